@@ -0,0 +1,112 @@
+"""
+Benchmark: Login Throughput
+Measures POST /api/auth/login logins/sec (total and per core) against a
+throwaway SQLite database, for each password hash pool size given.
+
+Usage:
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --logins 200 --concurrency 16 --workers 0 1 4
+    PASSWORD_HASH_METHOD=pbkdf2:sha256:600000 python benchmarks/login_throughput.py
+
+Each login runs the configured KDF once, so logins/sec per core is roughly
+1 / (KDF cost) - tune PASSWORD_HASH_METHOD with this number and the shift-start
+login peak in mind.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_bench_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ.setdefault("FLASK_ENV", "development")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.app import create_app  # noqa: E402
+from server.db import session_scope  # noqa: E402
+from server.models import Company, User  # noqa: E402
+from server import password_hashing  # noqa: E402
+
+PASSWORD = "Password123!"
+
+
+def seed_users(count):
+    """Create `count` users sharing one precomputed hash (seeding is not what we measure)"""
+    password_hash = password_hashing.hash_password(PASSWORD)
+    with session_scope() as session:
+        company = Company(name="Benchmark Company")
+        session.add(company)
+        session.flush()
+        session.add_all([
+            User(
+                email=f"user{i}@bench.local",
+                phone=f"9{i:09d}",
+                full_name=f"Bench User {i}",
+                password_hash=password_hash,
+                company_id=company.id,
+            )
+            for i in range(count)
+        ])
+
+
+def run(app, logins, concurrency, users):
+    """Fire `logins` logins from `concurrency` threads; returns (elapsed, status counts)"""
+    def login(i):
+        client = app.test_client()
+        response = client.post("/api/auth/login", json={
+            "email": f"user{i % users}@bench.local", "password": PASSWORD
+        })
+        return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return elapsed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, os.cpu_count() or 1],
+                        help="Password hash pool sizes to compare (0 = inline)")
+    args = parser.parse_args()
+
+    app = create_app()
+    logging.getLogger("server").setLevel(logging.WARNING)  # Per-login INFO lines would dominate the timing
+    seed_users(args.users)
+    cores = os.cpu_count() or 1
+
+    print("=" * 60)
+    print(f"Login throughput - {password_hashing.resolve_method()} - {cores} cores")
+    print("=" * 60)
+
+    try:
+        for workers in args.workers:
+            password_hashing.shutdown_pool()
+            password_hashing.config_obj.PASSWORD_HASH_WORKERS = workers
+            run(app, min(args.concurrency, args.logins), args.concurrency, args.users)  # Warm up the pool
+
+            elapsed, counts = run(app, args.logins, args.concurrency, args.users)
+            rate = counts.get(200, 0) / elapsed
+            print(f"pool={workers:<3} {rate:8.1f} logins/s  {rate / cores:8.1f} /core  "
+                  f"{elapsed * 1000 / args.logins:7.1f} ms/login  statuses={counts}")
+    finally:
+        password_hashing.shutdown_pool()
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: Register Search
+Compares GET /api/search's indexed lookup (search_documents + FTS5) with the LIKE
+scans a search over the registers would otherwise need (every key text column of
+batches and safety NCs, one ILIKE per word), against a throwaway SQLite database.
+
+Usage:
+    python benchmarks/search.py
+    python benchmarks/search.py --rows 50000 --repeat 5
+
+--rows batches and --rows / 4 safety NCs are created (documents are indexed by the
+write hook as they are inserted, so seeding also exercises the write path).
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_bench_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ.setdefault("FLASK_ENV", "development")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import and_, or_, select  # noqa: E402
+
+from server.app import create_app  # noqa: E402
+from server.db import session_scope  # noqa: E402
+from server.models import BatchRegister, Company, MixDesign, Project, RMCVendor, User  # noqa: E402
+from server.safety_nc_models import NonConformance  # noqa: E402
+from server.search import search_documents, search_terms  # noqa: E402
+from server.search_models import SEARCH_ENTITIES  # noqa: E402
+
+QUERIES = ("MH12AB12", "honeycomb column", "guard rail slab", "tower b level 1", "zz-no-match")
+
+REMARKS = (
+    "Slump within limits", "Honeycombing observed at column base", "Cold joint at slab edge",
+    "Delayed delivery due to traffic", "Cube samples taken at site", "Segregation noticed near beam",
+)
+NC_TITLES = ("Missing guard rail", "Unsafe scaffold", "No harness at height", "Open excavation", "Blocked exit")
+
+
+def seed(rows, chunk=2000):
+    """One company/project with `rows` batches and rows / 4 safety NCs"""
+    rng = random.Random(7)
+    started = datetime(2025, 1, 1, 8, 0)
+    with session_scope() as session:
+        company = Company(name="Benchmark Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Benchmark Project")
+        user = User(email="bench@bench.local", phone="9000000000", full_name="Bench User",
+                    password_hash="x", company_id=company.id)
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@bench.local")
+        session.add_all([project, user, vendor])
+        session.flush()
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        ids = (company.id, project.id, user.id, vendor.id, mix.id)
+
+    company_id, project_id, user_id, vendor_id, mix_id = ids
+    for offset in range(0, rows, chunk):
+        with session_scope() as session:
+            for i in range(offset, min(offset + chunk, rows)):
+                session.add(BatchRegister(
+                    project_id=project_id, mix_design_id=mix_id, rmc_vendor_id=vendor_id,
+                    batch_number=f"B-{i:07d}", delivery_date=started + timedelta(minutes=i), quantity_ordered=6.0,
+                    entered_by=user_id, vehicle_number=f"MH{rng.randint(10, 50)}AB{rng.randint(1000, 9999)}",
+                    building_name=f"Tower {'ABCD'[i % 4]}", floor_level=f"Level {i % 30}",
+                    remarks=rng.choice(REMARKS),
+                ))
+                if i % 4 == 0:
+                    session.add(NonConformance(
+                        company_id=company_id, project_id=project_id, nc_number=f"NC-BEN-{i:07d}",
+                        nc_title=rng.choice(NC_TITLES), nc_description=f"{rng.choice(REMARKS)} on Level {i % 30}",
+                        severity="major", raised_by=user_id, due_date=started + timedelta(days=7),
+                    ))
+    return company_id
+
+
+def _like_columns(entity):
+    spec = SEARCH_ENTITIES[entity]
+    return [getattr(spec.model, name) for name in (spec.reference,) + spec.title + spec.body]
+
+
+def like_scan(session, company_id, q, limit=20):
+    """What a search without the index does: ILIKE every key column of every register"""
+    terms = search_terms(q)
+    results = []
+    for entity, scope in (('batches', BatchRegister.project_id.in_(
+            select(Project.id).where(Project.company_id == company_id))),
+            ('safety_ncs', NonConformance.company_id == company_id)):
+        model = SEARCH_ENTITIES[entity].model
+        columns = _like_columns(entity)
+        matches = and_(*[or_(*[column.ilike(f"%{term}%") for column in columns]) for term in terms])
+        rows = session.execute(select(model.id).where(scope, matches).limit(limit)).all()
+        results.extend((entity, row.id) for row in rows)
+    return results[:limit]
+
+
+def measure(run, repeat):
+    """Best-of-`repeat` (seconds, result count)"""
+    best = None
+    for _ in range(repeat):
+        with session_scope() as session:
+            started = time.perf_counter()
+            count = len(run(session))
+            elapsed = time.perf_counter() - started
+        best = (elapsed, count) if best is None or elapsed < best[0] else best
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    create_app()
+    logging.getLogger("server").setLevel(logging.WARNING)
+    started = time.perf_counter()
+    company_id = seed(args.rows)
+    seeded = time.perf_counter() - started
+
+    print("=" * 72)
+    print(f"Register search - {args.rows} batches + {args.rows // 4} NCs, best of {args.repeat}")
+    print(f"(seeded and indexed in {seeded:.1f} s)")
+    print("=" * 72)
+    try:
+        for q in QUERIES:
+            like = measure(lambda s: like_scan(s, company_id, q), args.repeat)
+            fts = measure(lambda s: search_documents(s, company_id, q), args.repeat)
+            print(f"q={q!r}")
+            for label, (elapsed, count) in (("LIKE scan", like), ("FTS index", fts)):
+                print(f"  {label:<10} {elapsed * 1000:9.2f} ms  {count:3d} results")
+            print(f"  speedup {like[0] / fts[0]:.1f}x")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark: List Serialization
+Compares the legacy list path (ORM rows -> to_dict() -> stdlib jsonify) with the
+compiled RowSerializer + orjson path on large cube-test and batch listings,
+against a throwaway SQLite database.
+
+Usage:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --batches 2000 --repeat 5
+
+Each batch gets 4 cube test sets (3/7/28/56 days), so --batches 1250 gives 5k cube tests.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_bench_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ.setdefault("FLASK_ENV", "development")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from server.app import create_app  # noqa: E402
+from server.db import session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, RMCVendor, User
+)
+from server.batches import BATCH_LIST_SERIALIZER  # noqa: E402
+from server.cube_tests import CUBE_TEST_LIST_SERIALIZER  # noqa: E402
+from server.serialization import dumps_bytes  # noqa: E402
+
+TEST_AGES = (3, 7, 28, 56)
+
+
+def seed(batch_count):
+    """One project with `batch_count` batches (with photo blobs) and 4 cube sets each"""
+    started = datetime(2025, 1, 1, 8, 0)
+    with session_scope() as session:
+        company = Company(name="Benchmark Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Benchmark Project")
+        user = User(email="bench@bench.local", phone="9000000000", full_name="Bench User",
+                    password_hash="x", company_id=company.id)
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@bench.local")
+        session.add_all([project, user, vendor])
+        session.flush()
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+
+        photo = b"\xff" * 200_000  # Typical compressed batch sheet photo
+        for i in range(batch_count):
+            delivered = started + timedelta(hours=i)
+            batch = BatchRegister(
+                project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                batch_number=f"B-{i:06d}", delivery_date=delivered, quantity_ordered=6.0,
+                quantity_received=6.0, entered_by=user.id, batch_sheet_photo_data=photo,
+                building_name="Tower A", floor_level=f"Level {i % 30}",
+            )
+            session.add(batch)
+            session.flush()
+            session.add_all([
+                CubeTestRegister(
+                    project_id=project.id, batch_id=batch.id, set_number=1, test_age_days=age,
+                    casting_date=delivered, cast_by=user.id, required_strength_mpa=30.0,
+                    cube_1_strength_mpa=31.0, cube_2_strength_mpa=32.5, cube_3_strength_mpa=29.8,
+                )
+                for age in TEST_AGES
+            ])
+        return project.id
+
+
+def legacy_cube_tests(session, project_id):
+    """The pre-serializer GET /api/cube-tests body"""
+    result = []
+    for test in session.query(CubeTestRegister).filter_by(project_id=project_id, is_deleted=False).order_by(
+            CubeTestRegister.casting_date.desc()):
+        test_dict = test.to_dict()
+        batch = session.query(BatchRegister).filter_by(id=test.batch_id).first()
+        test_dict['batch_number'] = batch.batch_number
+        mix = session.query(MixDesign).filter_by(id=batch.mix_design_id).first()
+        test_dict['mix_design_name'] = mix.mix_design_id or mix.project_name
+        test_dict['mix_design_grade'] = mix.concrete_grade
+        result.append(test_dict)
+    return result
+
+
+def legacy_batches(session, project_id):
+    """The pre-serializer GET /api/batches body"""
+    result = []
+    for batch in session.query(BatchRegister).filter_by(project_id=project_id, is_deleted=False).order_by(
+            BatchRegister.delivery_date.desc()):
+        batch_dict = batch.to_dict()
+        vendor = session.query(RMCVendor).filter_by(id=batch.rmc_vendor_id).first()
+        batch_dict['vendor_name'] = batch_dict['vendorName'] = vendor.vendor_name
+        mix = session.query(MixDesign).filter_by(id=batch.mix_design_id).first()
+        batch_dict['mix_design_name'] = batch_dict['mixDesignName'] = mix.mix_design_id or mix.project_name
+        batch_dict['status'] = batch.verification_status
+        batch_dict['quantity'] = batch.quantity_received or batch.quantity_ordered
+        result.append(batch_dict)
+    return result
+
+
+def compiled(serializer, model, order_by):
+    def build(session, project_id):
+        query = serializer.select().select_from(model)
+        if model is CubeTestRegister:
+            query = query.outerjoin(BatchRegister, BatchRegister.id == CubeTestRegister.batch_id)
+            query = query.outerjoin(MixDesign, MixDesign.id == BatchRegister.mix_design_id)
+        else:
+            query = query.outerjoin(RMCVendor, RMCVendor.id == BatchRegister.rmc_vendor_id)
+            query = query.outerjoin(MixDesign, MixDesign.id == BatchRegister.mix_design_id)
+        query = query.where(model.project_id == project_id, model.is_deleted == False)
+        return serializer.dump(session.execute(query.order_by(order_by.desc())).all())
+    return build
+
+
+def measure(build, encode, project_id, repeat):
+    """Best-of-`repeat` (build seconds, encode seconds, payload bytes)"""
+    best = None
+    for _ in range(repeat):
+        with session_scope() as session:
+            started = time.perf_counter()
+            payload = build(session, project_id)
+            built = time.perf_counter()
+            body = encode({"success": True, "count": len(payload), "items": payload})
+            encoded = time.perf_counter()
+        timing = (built - started, encoded - built, len(body))
+        best = timing if best is None or sum(timing[:2]) < sum(best[:2]) else best
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=1250)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    logging.getLogger("server").setLevel(logging.WARNING)
+    project_id = seed(args.batches)
+    stdlib = DefaultJSONProvider(app)
+
+    cases = [
+        ("cube tests", args.batches * len(TEST_AGES), legacy_cube_tests,
+         compiled(CUBE_TEST_LIST_SERIALIZER, CubeTestRegister, CubeTestRegister.casting_date)),
+        ("batches", args.batches, legacy_batches,
+         compiled(BATCH_LIST_SERIALIZER, BatchRegister, BatchRegister.delivery_date)),
+    ]
+
+    print("=" * 72)
+    print(f"List serialization - best of {args.repeat}")
+    print("=" * 72)
+    try:
+        with app.app_context():
+            for name, rows, legacy, fast in cases:
+                old = measure(legacy, lambda obj: stdlib.dumps(obj).encode("utf-8"), project_id, args.repeat)
+                new = measure(fast, dumps_bytes, project_id, args.repeat)
+                print(f"{name} ({rows} rows)")
+                for label, (build, encode, size) in (("to_dict + jsonify", old), ("RowSerializer + orjson", new)):
+                    print(f"  {label:<24} build {build * 1000:8.1f} ms  encode {encode * 1000:7.1f} ms  "
+                          f"total {(build + encode) * 1000:8.1f} ms  {size / 1024:8.0f} KiB")
+                print(f"  speedup {sum(old[:2]) / sum(new[:2]):.1f}x")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
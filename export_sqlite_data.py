@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Export SQLite database to JSON files for migration to Supabase/PostgreSQL
+
+Deprecated: scripts/migrate_sqlite_to_postgres.py streams SQLite straight into
+PostgreSQL with COPY and verifies the result; use it instead of the JSON round trip.
 """
 import sqlite3
 import json
@@ -1,14 +1,22 @@
 # Gunicorn configuration for production deployment
 import multiprocessing
 import os
+import shutil
+import tempfile
 
 # Server socket
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
+# gthread: one process per CPU, concurrency from threads. Threads wait on the
+# password hash pool (bounded per worker - excess logins get 503) and on
+# /api/notifications/stream clients, so a worker keeps serving other requests.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+# Lets each worker size its password hash pool to its share of the host's CPUs
+os.environ.setdefault('GUNICORN_WORKERS', str(workers))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -17,7 +25,9 @@ keepalive = 2
 accesslog = '-'
 errorlog = '-'
 loglevel = os.environ.get('LOG_LEVEL', 'info')
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+# Path without the query string (%(U)s, not %(r)s): EventSource clients pass
+# their access token as /api/notifications/stream?jwt=...
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
 # Process naming
 proc_name = 'prosite'
@@ -30,6 +40,32 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Metrics: workers write Prometheus samples to a shared directory so /metrics
+# reports totals across all of them. Set before workers import the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prosite_metrics'))
+
 # SSL (uncomment and configure for HTTPS)
 # keyfile = '/path/to/keyfile'
 # certfile = '/path/to/certfile'
+
+
+def worker_exit(server, worker):
+    """Stop the per-worker password hash pool"""
+    from server.password_hashing import shutdown_pool
+    shutdown_pool()
+
+
+def on_starting(server):
+    """Start each master run with empty metric files"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (pool size, open streams)"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
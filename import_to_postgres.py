@@ -2,6 +2,9 @@
 """
 Import JSON data to PostgreSQL/Supabase database
 Respects foreign key constraints by importing tables in correct order
+
+Deprecated: scripts/migrate_sqlite_to_postgres.py streams SQLite straight into
+PostgreSQL with COPY and verifies the result; use it instead of the JSON round trip.
 """
 import json
 import psycopg2
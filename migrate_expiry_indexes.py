@@ -0,0 +1,65 @@
+"""
+Database Migration: Expiry Indexes and Buckets
+Adds the (is_expired, expiry) indexes on ppe_issuances / safety_inductions,
+creates the expiry_buckets table and runs the first expiry sweep
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from server.db import engine, Base
+from server.expiry_management import ExpiryBucket, run_expiry_sweep
+
+EXPIRY_TABLES = ['ppe_issuances', 'safety_inductions', 'expiry_buckets']
+
+
+def create_missing_indexes():
+    """Create expiry indexes and the expiry_buckets table if missing"""
+    ExpiryBucket.__table__.create(bind=engine, checkfirst=True)
+
+    inspector = inspect(engine)
+    for table_name in EXPIRY_TABLES:
+        table = Base.metadata.tables[table_name]
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in existing:
+                print(f"✅ Index {index.name} already exists")
+                continue
+            index.create(bind=engine)
+            print(f"✅ Created index {index.name}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Expiry Indexes and Buckets")
+    print("=" * 60)
+    print()
+
+    try:
+        create_missing_indexes()
+
+        print()
+        print("📝 Running initial expiry sweep...")
+        results = run_expiry_sweep()
+        print(f"  • Expired: {results['expired']}")
+        print(f"  • Bucketed: {results['bucketed']}")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Expiry Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Schedule POST /api/background-jobs/run-expiry-sweep daily (just after midnight)")
+    print("  2. Set EXPIRY_HORIZON_DAYS if alerts need to look further than 90 days ahead")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Database Migration: Partition Append-only Log Tables
+Converts location_verifications and permit_audit_logs to monthly range partitions (PostgreSQL)
+and adds the composite (tenant, timestamp) indexes used for date-range pruning (all databases)
+
+PostgreSQL steps per table:
+  1. Rename the existing table to <table>_legacy
+  2. Create a partitioned parent with the same columns, PRIMARY KEY (id, <timestamp>)
+  3. Create monthly partitions covering the existing data + LOG_PARTITIONS_AHEAD months, and a DEFAULT partition
+  4. Copy rows, re-create foreign keys and indexes, move the id sequence to the new table
+  5. Drop the legacy table (pass --keep-legacy to keep it)
+
+SQLite has no native partitioning: the hot table is kept as a rolling window
+and old months are archived by the daily log maintenance job.
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import text, inspect
+
+from server.db import engine
+from server.log_partitions import (
+    PARTITIONED_LOG_TABLES, LogArchive, is_partitioned, create_partition,
+    month_start, add_months
+)
+from server.config import get_config
+
+
+def create_missing_indexes():
+    """Create composite log indexes and the log_archives table if missing"""
+    from server.db import Base
+
+    LogArchive.__table__.create(bind=engine, checkfirst=True)
+
+    inspector = inspect(engine)
+    for table_name in PARTITIONED_LOG_TABLES:
+        table = Base.metadata.tables[table_name]
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in existing:
+                print(f"✅ Index {index.name} already exists")
+                continue
+            index.create(bind=engine)
+            print(f"✅ Created index {index.name}")
+
+
+def partition_table(conn, table_name, keep_legacy=False):
+    """Convert one table to monthly range partitions (PostgreSQL only)"""
+    ts_column = PARTITIONED_LOG_TABLES[table_name]
+    legacy = f"{table_name}_legacy"
+
+    if is_partitioned(conn, table_name):
+        print(f"✅ {table_name} is already partitioned")
+        return
+
+    print(f"📝 Partitioning {table_name} on {ts_column}...")
+
+    conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    conn.execute(text(
+        f"CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({ts_column})"
+    ))
+    conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {ts_column} SET NOT NULL"))
+    conn.execute(text(f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, {ts_column})"))
+
+    # Monthly partitions from the oldest row up to the configured look-ahead
+    oldest = conn.execute(text(f"SELECT min({ts_column}) FROM {legacy}")).scalar()
+    current = month_start(oldest or datetime.utcnow())
+    last = add_months(datetime.utcnow(), get_config().LOG_PARTITIONS_AHEAD)
+    created = 0
+    while current <= last:
+        if create_partition(conn, table_name, current):
+            created += 1
+        current = add_months(current, 1)
+    conn.execute(text(f"CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT"))
+    print(f"  • Created {created} monthly partitions + default")
+
+    # Copy data (NULL timestamps are not allowed on a partition key)
+    conn.execute(text(
+        f"UPDATE {legacy} SET {ts_column} = now() WHERE {ts_column} IS NULL"
+    ))
+    copied = conn.execute(text(f"INSERT INTO {table_name} SELECT * FROM {legacy}")).rowcount
+    print(f"  • Copied {copied} rows")
+
+    # Foreign keys from the legacy table
+    foreign_keys = conn.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = CAST(:legacy AS regclass) AND contype = 'f'
+    """), {'legacy': legacy}).all()
+    for name, definition in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {legacy} DROP CONSTRAINT {name}"))
+        conn.execute(text(f"ALTER TABLE {table_name} ADD CONSTRAINT {name} {definition}"))
+    print(f"  • Re-created {len(foreign_keys)} foreign keys")
+
+    # Keep the id sequence alive when the legacy table is dropped
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence(:legacy, 'id')"), {'legacy': legacy}
+    ).scalar()
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.id"))
+
+    if not keep_legacy:
+        conn.execute(text(f"DROP TABLE {legacy}"))
+        print(f"  • Dropped {legacy}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Partitioning Append-only Log Tables")
+    print("=" * 60)
+    print()
+
+    keep_legacy = '--keep-legacy' in sys.argv
+
+    try:
+        if engine.dialect.name == 'postgresql':
+            with engine.begin() as conn:
+                for table_name in PARTITIONED_LOG_TABLES:
+                    partition_table(conn, table_name, keep_legacy=keep_legacy)
+        else:
+            print(f"ℹ️ {engine.dialect.name} has no native partitioning - using rolling-table archival")
+
+        print()
+        create_missing_indexes()
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Log Partition Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Schedule POST /api/background-jobs/run-log-archival daily (off-peak)")
+    print("  2. Set LOG_RETENTION_MONTHS / LOG_ARCHIVE_DIR for your deployment")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Database Migration: NC Sweeper
+Adds quality_nc_issues.is_overdue, the sweep/refresh indexes on both NC tables,
+creates safety_nc_score_reports and background_job_locks (one sweep at a time),
+allows sweeper-generated concrete score reports
+(generated_by_id NULL), then runs a full sweep to backfill flags and reports
+without notifying NCs that were already overdue before the sweeper existed
+"""
+
+import sys
+
+from sqlalchemy import inspect, text
+
+from server.db import engine
+from server.safety_nc_models import NonConformance, SafetyNCScoreReport
+from server.concrete_nc_models import QualityNCIssue
+from server.job_locks import JobLock
+from server.nc_sweeper import run_nc_sweep
+
+
+def add_is_overdue_column():
+    """Add is_overdue to quality_nc_issues if missing"""
+    columns = {col['name'] for col in inspect(engine).get_columns(QualityNCIssue.__tablename__)}
+    if 'is_overdue' in columns:
+        print("✅ 'is_overdue' column already exists in quality_nc_issues")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE quality_nc_issues ADD COLUMN is_overdue BOOLEAN DEFAULT FALSE"))
+    print("✅ Added 'is_overdue' column to quality_nc_issues")
+
+
+def relax_generated_by():
+    """Sweeper reports have no generating user (SQLite cannot alter constraints - new databases only)"""
+    if engine.dialect.name != 'postgresql':
+        print("⚠️  Skipping generated_by_id NOT NULL change (PostgreSQL only)")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE concrete_nc_score_reports ALTER COLUMN generated_by_id DROP NOT NULL"))
+    print("✅ concrete_nc_score_reports.generated_by_id is now nullable")
+
+
+def create_missing_objects():
+    """Create the safety score report and job lock tables and NC indexes if missing"""
+    for model in (SafetyNCScoreReport, JobLock):
+        model.__table__.create(bind=engine, checkfirst=True)
+        print(f"✅ Table {model.__tablename__} ready")
+
+    inspector = inspect(engine)
+    for table in (NonConformance.__table__, QualityNCIssue.__table__):
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                print(f"✅ Index {index.name} already exists")
+                continue
+            index.create(bind=engine)
+            print(f"✅ Created index {index.name}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: NC Sweeper")
+    print("=" * 60)
+    print()
+
+    try:
+        add_is_overdue_column()
+        relax_generated_by()
+        create_missing_objects()
+
+        print()
+        print("📝 Running full NC sweep (overdue flags + score reports, no notifications)...")
+        results = run_nc_sweep(rebuild=True, notify=False)
+        if not results or results.get("skipped"):
+            raise RuntimeError("NC sweep failed or another sweep is running - see log")
+        for key, value in results.items():
+            print(f"  • {key}: {value}")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ NC Sweeper Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Schedule POST /api/background-jobs/run-nc-sweep hourly")
+    print("  2. Schedule POST /api/background-jobs/run-nc-sweep?rebuild=true nightly (safety net)")
+    print("  3. Keep NC_SCORE_LOOKBACK_DAYS above the sweep interval")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Database Migration: Notification Unread Counters
+Adds the recipient index on safety_contractor_notifications, creates
+safety_notification_unread_counters and backfills it from existing notifications
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from server.db import engine, session_scope
+from server.safety_nc_models import ContractorNotification, NotificationUnreadCounter
+from server.notification_stream import rebuild_unread_counters
+
+
+def create_missing_objects():
+    """Create the counter table and the notification recipient index if missing"""
+    NotificationUnreadCounter.__table__.create(bind=engine, checkfirst=True)
+    print(f"✅ Table {NotificationUnreadCounter.__tablename__} ready")
+
+    table = ContractorNotification.__table__
+    existing = {ix['name'] for ix in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing:
+            print(f"✅ Index {index.name} already exists")
+            continue
+        index.create(bind=engine)
+        print(f"✅ Created index {index.name}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Notification Unread Counters")
+    print("=" * 60)
+    print()
+
+    try:
+        create_missing_objects()
+
+        print()
+        print("📝 Backfilling unread counters...")
+        with session_scope() as session:
+            users = rebuild_unread_counters(session)
+        print(f"  • Users with unread notifications: {users}")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Notification Counter Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Set NOTIFICATION_BROKER_URL=redis://... when running more than one worker process")
+    print("  2. Run gunicorn with GUNICORN_WORKER_CLASS=gthread so open streams do not block workers")
+    print("  3. Point clients at GET /api/notifications/stream and stop polling /api/safety/nc/notifications")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Database Migration: Project Archives
+Creates project_archives, the record of closed projects whose rows were moved
+out of the hot tables into archive files (see server/project_archive.py), and
+project_archive_requests, the queue of archivals / restores for the background job.
+Nothing is archived by the migration itself.
+"""
+
+import sys
+
+from server.db import engine
+from server.project_archive import ProjectArchive, ProjectArchiveRequest
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Project Archives")
+    print("=" * 60)
+    print()
+
+    try:
+        for model in (ProjectArchive, ProjectArchiveRequest):
+            model.__table__.create(bind=engine, checkfirst=True)
+            print(f"✅ Table {model.__tablename__} ready")
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Project Archives Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Set PROJECT_ARCHIVE_DIR to durable storage (archives are the only copy of archived rows)")
+    print("  2. Archive completed projects with POST /api/projects/<id>/archive (queued; carried out by")
+    print("     the background jobs, status at GET /api/projects/archive-requests/<id>)")
+    print("  3. Browse with GET /api/projects/archives/<id>, restore with POST /api/projects/archives/<id>/restore")
+    print()
+
+
+if __name__ == "__main__":
+    main()
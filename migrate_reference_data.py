@@ -0,0 +1,40 @@
+"""
+Database Migration: Reference Data Versions
+Creates reference_data_versions, the per-company change counters behind
+GET /api/reference-data. Counters start at 0 and are created on the first
+write to a company's reference lists, so no backfill is needed.
+"""
+
+import sys
+
+from server.db import engine
+from server.reference_data import ReferenceDataVersion
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Reference Data Versions")
+    print("=" * 60)
+    print()
+
+    try:
+        ReferenceDataVersion.__table__.create(bind=engine, checkfirst=True)
+        print(f"✅ Table {ReferenceDataVersion.__tablename__} ready")
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Reference Data Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Point form screens at GET /api/reference-data and keep the returned version")
+    print("  2. Send ?version=<held version> on each form open; 304 means the local copy is current")
+    print()
+
+
+if __name__ == "__main__":
+    main()
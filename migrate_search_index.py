@@ -0,0 +1,48 @@
+"""
+Database Migration: Search Index
+Creates search_documents with its full-text index (PostgreSQL tsvector + GIN,
+SQLite FTS5 + sync triggers) and indexes every existing register row
+"""
+
+import sys
+
+from server.db import engine, session_scope
+from server.search_models import SearchDocument, create_search_index, rebuild_search_index
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Search Index")
+    print("=" * 60)
+    print()
+
+    try:
+        SearchDocument.__table__.create(bind=engine, checkfirst=True)
+        with engine.begin() as conn:
+            create_search_index(conn)
+        print(f"✅ Table {SearchDocument.__tablename__} and {engine.dialect.name} full-text index ready")
+
+        print()
+        print("📝 Indexing existing batches, NCs, handovers, incidents and permits...")
+        with session_scope() as session:
+            total = rebuild_search_index(session)
+        print(f"  • documents indexed: {total}")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Search Index Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. New and edited records are indexed on write - no scheduled job needed")
+    print("  2. Re-run this script after bulk SQL imports that bypass the ORM")
+    print()
+
+
+if __name__ == "__main__":
+    main()
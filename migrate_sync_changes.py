@@ -0,0 +1,91 @@
+"""
+Database Migration: Delta Sync Change Feed
+Creates sync_sequences, sync_changes and idempotency_keys, then seeds one sequence row per project
+and one change row per existing record so since=0 returns the full project
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from server.db import engine, session_scope
+from server.models import Project
+from server.sync_models import SYNC_ENTITIES, IdempotencyKey, SyncChange, SyncSequence
+
+
+def create_missing_objects():
+    """Create the sync tables (and their indexes) if missing"""
+    for table in (SyncSequence.__table__, SyncChange.__table__, IdempotencyKey.__table__):
+        table.create(bind=engine, checkfirst=True)
+        print(f"✅ Table {table.name} ready")
+
+
+def backfill(session):
+    """Seed change rows for records that have none yet; returns {entity: rows}"""
+    counts = {}
+    now = datetime.utcnow()
+    for project_id, in session.query(Project.id).all():
+        if session.get(SyncSequence, project_id) is None:
+            session.add(SyncSequence(project_id=project_id, last_seq=0))
+    session.flush()
+
+    for entity, model in SYNC_ENTITIES.items():
+        tracked = select(SyncChange.entity_id).where(SyncChange.entity == entity)
+        missing = session.execute(
+            select(model.project_id, model.id)
+            .where(model.project_id.isnot(None), model.id.not_in(tracked))
+            .order_by(model.project_id, model.id)
+        ).all()
+        counts[entity] = len(missing)
+
+        by_project = {}
+        for project_id, entity_id in missing:
+            by_project.setdefault(project_id, []).append(entity_id)
+
+        for project_id, ids in by_project.items():
+            sequence = session.get(SyncSequence, project_id)
+            if sequence is None:
+                sequence = SyncSequence(project_id=project_id, last_seq=0)
+                session.add(sequence)
+            first = sequence.last_seq + 1
+            sequence.last_seq += len(ids)
+            session.flush()
+            session.execute(insert(SyncChange), [
+                {'project_id': project_id, 'seq': first + i, 'entity': entity, 'entity_id': entity_id,
+                 'changed_at': now}
+                for i, entity_id in enumerate(ids)
+            ])
+    return counts
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Delta Sync Change Feed")
+    print("=" * 60)
+    print()
+
+    try:
+        create_missing_objects()
+
+        print()
+        print("📝 Backfilling change feed...")
+        with session_scope() as session:
+            counts = backfill(session)
+        for entity, count in counts.items():
+            print(f"  • {entity}: {count} records")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Delta Sync Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+
+
+if __name__ == "__main__":
+    main()
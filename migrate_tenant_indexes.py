@@ -0,0 +1,73 @@
+"""
+Database Migration: Tenant Indexes
+Creates the composite indexes that match the predicates the tenant query guard
+(server/tenancy.py) adds: company first, soft delete flag, then the list order,
+and the tenant_cache_generations table the tenant cache keys its entries on
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from server.db import engine
+from server.models import Project, RMCVendor
+from server.safety_nc_models import NonConformance
+from server.tenancy import TenantCacheGeneration
+
+
+TENANT_INDEXES = {
+    Project.__table__: 'ix_projects_company_created',
+    RMCVendor.__table__: 'ix_rmc_vendors_company_deleted_name',
+    NonConformance.__table__: 'ix_safety_non_conformances_tenant',
+}
+
+
+def create_tenant_indexes():
+    """Create the tenant indexes if missing"""
+    inspector = inspect(engine)
+    for table, name in TENANT_INDEXES.items():
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        if name in existing:
+            print(f"✅ Index {name} already exists")
+            continue
+        index = next(ix for ix in table.indexes if ix.name == name)
+        index.create(bind=engine)
+        print(f"✅ Created index {name}")
+
+
+def create_generation_table():
+    """Create tenant_cache_generations if missing"""
+    if inspect(engine).has_table(TenantCacheGeneration.__tablename__):
+        print(f"✅ Table {TenantCacheGeneration.__tablename__} already exists")
+        return
+    TenantCacheGeneration.__table__.create(bind=engine)
+    print(f"✅ Created table {TenantCacheGeneration.__tablename__}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Tenant Indexes")
+    print("=" * 60)
+    print()
+
+    try:
+        create_tenant_indexes()
+        create_generation_table()
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Tenant Index Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Optional: set TENANT_CACHE_URL to a Redis URL so workers share cached entries")
+    print("  2. Users pick up the company (\"cid\") token claim on their next login or refresh")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Database Migration: Vendor Scorecards
+Adds the vendor/date index on batch_registers and the batch index on cube_test_registers,
+creates vendor_scorecard_stats and backfills it from all existing batches and cube tests
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from server.db import engine, Base, session_scope
+from server.vendor_scorecard import VendorScorecardStat, rebuild_vendor_scorecards
+
+SCORECARD_TABLES = ['batch_registers', 'cube_test_registers']
+
+
+def create_missing_objects():
+    """Create the scorecard table and source-table indexes if missing"""
+    VendorScorecardStat.__table__.create(bind=engine, checkfirst=True)
+    print(f"✅ Table {VendorScorecardStat.__tablename__} ready")
+
+    inspector = inspect(engine)
+    for table_name in SCORECARD_TABLES:
+        table = Base.metadata.tables[table_name]
+        existing = {ix['name'] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if index.name in existing:
+                print(f"✅ Index {index.name} already exists")
+                continue
+            index.create(bind=engine)
+            print(f"✅ Created index {index.name}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Vendor Scorecards")
+    print("=" * 60)
+    print()
+
+    try:
+        create_missing_objects()
+
+        print()
+        print("📝 Backfilling vendor scorecards...")
+        with session_scope() as session:
+            rows = rebuild_vendor_scorecards(session)
+        print(f"  • Vendor/project/month rows: {rows}")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Vendor Scorecard Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+    print("Next Steps:")
+    print("  1. Schedule POST /api/background-jobs/run-vendor-scorecard-rebuild nightly (safety net)")
+    print("  2. Set VENDOR_MAX_CONCRETE_TEMP_C if the site limit differs from 35 C")
+    print()
+
+
+if __name__ == "__main__":
+    main()
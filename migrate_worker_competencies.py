@@ -0,0 +1,58 @@
+"""
+Database Migration: Worker Competency Index
+Creates worker_competencies and the covering index on training_attendances,
+then backfills one competency row per (project, worker) from issued certificates
+"""
+
+import sys
+
+from sqlalchemy import inspect
+
+from server.db import engine, session_scope
+from server.models import Project
+from server.training_attendance_models import TrainingAttendance, WorkerCompetency, rebuild_worker_competencies
+
+
+def create_missing_objects():
+    """Create the worker_competencies table and covering index if missing"""
+    WorkerCompetency.__table__.create(bind=engine, checkfirst=True)
+
+    existing = {ix['name'] for ix in inspect(engine).get_indexes(TrainingAttendance.__tablename__)}
+    for index in TrainingAttendance.__table__.indexes:
+        if index.name in existing:
+            print(f"✅ Index {index.name} already exists")
+            continue
+        index.create(bind=engine)
+        print(f"✅ Created index {index.name}")
+
+
+def main():
+    """Main migration function"""
+    print("=" * 60)
+    print("ProSite Migration: Worker Competency Index")
+    print("=" * 60)
+    print()
+
+    try:
+        create_missing_objects()
+
+        print()
+        print("📝 Backfilling worker competencies...")
+        with session_scope() as session:
+            project_ids = [pid for (pid,) in session.query(Project.id)]
+            written = rebuild_worker_competencies(session, project_ids)
+        print(f"  • {written} competency rows across {len(project_ids)} projects")
+
+    except Exception as e:
+        print(f"\n❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("✅ Worker Competency Migration Completed Successfully!")
+    print("=" * 60)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,43 @@
-"""Copy data from a local SQLite DB to a Postgres DB (e.g. Supabase) using SQLAlchemy.
+"""Stream a ProSite SQLite database into PostgreSQL (e.g. Supabase) with COPY.
 
 Usage:
-  - Ensure `DATABASE_URL` points to the target Postgres DB (export DATABASE_URL)
-  - Optionally set SOURCE_SQLITE (path to sqlite file). Default: repository `data.sqlite3`.
-  - Run: python scripts/migrate_sqlite_to_postgres.py
-
-Notes:
-  - This script will create tables on the target DB using the application's models, then copy rows
-    table-by-table attempting to preserve primary keys. It attempts to order tables to satisfy
-    foreign-key dependencies.
-  - After copying it will try to set Postgres sequences (serial) to the max(id) for tables with
-    a single integer PK named `id`.
-  - Test in a staging Supabase project before production.
+  python scripts/migrate_sqlite_to_postgres.py --target "$DATABASE_URL"
+  python scripts/migrate_sqlite_to_postgres.py --source data.sqlite3 --workers 8 --truncate
+
+How it works:
+  - Tables and columns come from the application models (Base.metadata); the target
+    schema is created from them unless --skip-create. Source tables without a model
+    (FTS shadow tables, leftovers) are reported and skipped.
+  - Foreign keys are turned into dependency levels: every table of a level only
+    references tables of earlier levels, so the tables of one level load in
+    parallel (--workers connections), one level after another.
+  - Each table is read from SQLite with fetchmany(--chunk-rows) and written with
+    COPY ... FROM STDIN (FORMAT binary): bytea goes over the wire as raw bytes (no
+    hex doubling), and memory stays at about one chunk per worker.
+  - Serial/identity sequences are moved past the copied ids.
+  - Verification compares row counts and an order-independent checksum of every
+    column value per table (--no-checksum compares counts only).
+
+Replaces the export_sqlite_data.py -> JSON -> import_to_postgres.py round trip.
+Test against a staging project before production.
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
+import io
+import json
+import logging
 import os
+import sqlite3
+import struct
 import sys
-import logging
-from typing import Dict, List, Set
-
-from sqlalchemy import create_engine, MetaData, Table, select, insert, text
-from sqlalchemy.engine import Engine
+import time as clock
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT)
@@ -30,137 +46,550 @@ logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger("migrate")
 
 
-def topological_sort_tables(metadata: MetaData) -> List[Table]:
-    """Return tables in an order that respects foreign key dependencies (simple topo sort)."""
-    deps: Dict[str, Set[str]] = {}
-    tables = {t.name: t for t in metadata.sorted_tables}
-    for name, table in tables.items():
-        refs = set()
-        for fk in table.foreign_keys:
-            refs.add(fk.column.table.name)
-        deps[name] = refs
-
-    ordered: List[Table] = []
-    while deps:
-        # pick tables with no dependencies
-        ready = [n for n, d in deps.items() if not d]
+class MigrationError(Exception):
+    """The migration cannot continue (schema mismatch, non-empty target, failed verification)"""
+
+
+# ========================================
+# DEPENDENCY ORDER
+# ========================================
+
+def dependency_levels(tables: Sequence) -> List[List]:
+    """
+    Group tables so every table only references tables of earlier groups.
+    Self-references are ignored; tables caught in a reference cycle form one last group.
+    """
+    names = {table.name for table in tables}
+    pending = {
+        table.name: {fk.column.table.name for fk in table.foreign_keys} & names - {table.name}
+        for table in tables
+    }
+    by_name = {table.name: table for table in tables}
+    levels = []
+    while pending:
+        ready = sorted(name for name, deps in pending.items() if not deps)
         if not ready:
-            # circular or unresolved; just append remaining
-            logger.warning("Circular dependency detected or unresolved FKs: %s", deps.keys())
-            for n in list(deps.keys()):
-                ordered.append(tables[n])
-                deps.pop(n)
-            break
-        for n in ready:
-            ordered.append(tables[n])
-            deps.pop(n)
-            for other in deps:
-                deps[other].discard(n)
-
-    return ordered
-
-
-def copy_table(source: Engine, target: Engine, table: Table) -> int:
-    s_conn = source.connect()
-    t_conn = target.connect()
-    trans = t_conn.begin()
+            logger.warning("Reference cycle between %s - loading them last, in one group", sorted(pending))
+            ready = sorted(pending)
+        levels.append([by_name[name] for name in ready])
+        for name in ready:
+            pending.pop(name)
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return levels
+
+
+# ========================================
+# VALUE CONVERSION (SQLite storage -> Python value of the target type)
+# ========================================
+
+PG_EPOCH = datetime(2000, 1, 1)
+PG_EPOCH_DATE = date(2000, 1, 1)
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    return datetime.fromisoformat(str(value).replace('Z', ''))
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_time(value):
+    if isinstance(value, time):
+        return value
+    return time.fromisoformat(str(value))
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 't', 'true', 'y', 'yes')
+    return bool(value)
+
+
+def _to_text(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+
+def _to_json_text(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _to_bytes(value):
+    return bytes(value) if not isinstance(value, str) else value.encode('utf-8')
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+CONVERTERS: Dict[str, Callable] = {
+    'bool': _to_bool,
+    'int2': int, 'int4': int, 'int8': int,
+    'float4': float, 'float8': float,
+    'numeric': _to_decimal,
+    'text': _to_text, 'varchar': _to_text, 'bpchar': _to_text, 'enum': _to_text,
+    'json': _to_json_text, 'jsonb': _to_json_text,
+    'bytea': _to_bytes,
+    'timestamp': _to_datetime, 'timestamptz': _to_datetime,
+    'date': _to_date,
+    'time': _to_time,
+}
+
+
+# ========================================
+# BINARY COPY ENCODING
+# ========================================
+
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+COPY_TRAILER = struct.pack('>h', -1)
+_NULL = struct.pack('>i', -1)
+
+
+def _encode_numeric(value: Decimal) -> bytes:
+    """PostgreSQL numeric wire format: base-10000 digits around the decimal point"""
+    if value.is_nan():
+        return struct.pack('>hhHh', 0, 0, 0xC000, 0)
+    sign = 0x4000 if value.is_signed() else 0
+    value = abs(value)
+    dscale = max(0, -value.as_tuple().exponent)
+    integer, _, fraction = format(value, 'f').partition('.')
+    integer = integer.lstrip('0')
+    integer = integer.zfill((len(integer) + 3) // 4 * 4)
+    fraction = fraction.ljust((len(fraction) + 3) // 4 * 4, '0')
+    digits = [int(integer[i:i + 4]) for i in range(0, len(integer), 4)]
+    weight = len(digits) - 1
+    digits += [int(fraction[i:i + 4]) for i in range(0, len(fraction), 4)]
+    while digits and digits[0] == 0:
+        digits.pop(0)
+        weight -= 1
+    while digits and digits[-1] == 0:
+        digits.pop()
+    if not digits:
+        weight = 0
+    return struct.pack(f'>hhHh{len(digits)}H', len(digits), weight, sign, dscale, *digits)
+
+
+def _encode_timestamp(value: datetime) -> bytes:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return struct.pack('>q', (value - PG_EPOCH) // timedelta(microseconds=1))
+
+
+def _encode_time(value: time) -> bytes:
+    micros = ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond
+    return struct.pack('>q', micros)
+
+
+ENCODERS: Dict[str, Callable] = {
+    'bool': lambda v: b'\x01' if v else b'\x00',
+    'int2': lambda v: struct.pack('>h', v),
+    'int4': lambda v: struct.pack('>i', v),
+    'int8': lambda v: struct.pack('>q', v),
+    'float4': lambda v: struct.pack('>f', v),
+    'float8': lambda v: struct.pack('>d', v),
+    'numeric': _encode_numeric,
+    'text': lambda v: v.encode('utf-8'),
+    'varchar': lambda v: v.encode('utf-8'),
+    'bpchar': lambda v: v.encode('utf-8'),
+    'enum': lambda v: v.encode('utf-8'),
+    'json': lambda v: v.encode('utf-8'),
+    'jsonb': lambda v: b'\x01' + v.encode('utf-8'),
+    'bytea': lambda v: v,
+    'timestamp': _encode_timestamp,
+    'timestamptz': _encode_timestamp,
+    'date': lambda v: struct.pack('>i', (v - PG_EPOCH_DATE).days),
+    'time': _encode_time,
+}
+
+
+class ColumnPlan(NamedTuple):
+    name: str
+    pg_type: str  # udt name, 'enum' for user-defined enums
+    scale: Optional[int] = None  # numeric scale, used by verification
+
+
+def row_encoder(columns: Sequence[ColumnPlan]) -> Callable[[Sequence], bytes]:
+    """Compile a function turning one SQLite row into one binary COPY tuple"""
+    steps = []
+    for column in columns:
+        if column.pg_type not in ENCODERS:
+            raise MigrationError(f"column {column.name}: no binary COPY encoder for type {column.pg_type}")
+        steps.append((CONVERTERS[column.pg_type], ENCODERS[column.pg_type]))
+    field_count = struct.pack('>h', len(steps))
+
+    def encode(row):
+        parts = [field_count]
+        for (convert, encode_value), value in zip(steps, row):
+            if value is None:
+                parts.append(_NULL)
+            else:
+                data = encode_value(convert(value))
+                parts.append(struct.pack('>i', len(data)))
+                parts.append(data)
+        return b''.join(parts)
+    return encode
+
+
+def copy_chunks(rows: Iterable[Sequence], columns: Sequence[ColumnPlan], counter: Optional[list] = None,
+                chunk_rows: int = 5000) -> Iterator[bytes]:
+    """Binary COPY stream of `rows`, one bytes object per `chunk_rows` rows"""
+    encode = row_encoder(columns)
+    yield COPY_HEADER
+    buffer = []
+    for row in rows:
+        buffer.append(encode(row))
+        if len(buffer) >= chunk_rows:
+            if counter is not None:
+                counter[0] += len(buffer)
+            yield b''.join(buffer)
+            buffer = []
+    if buffer:
+        if counter is not None:
+            counter[0] += len(buffer)
+        yield b''.join(buffer)
+    yield COPY_TRAILER
+
+
+class CopyStream(io.RawIOBase):
+    """File-like view of a bytes iterator, read by psycopg2's copy_expert"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+# ========================================
+# CHECKSUMS
+# ========================================
+
+def _canonical(column: ColumnPlan, value) -> bytes:
+    """Type-aware canonical form, equal for a converted SQLite value and the value psycopg2 reads back"""
+    if value is None:
+        return b'\x00'
+    kind = column.pg_type
+    if kind == 'bytea':
+        return hashlib.blake2b(bytes(value), digest_size=16).digest()
+    if kind in ('json', 'jsonb'):
+        parsed = json.loads(value) if isinstance(value, str) else value
+        return json.dumps(parsed, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    if kind == 'numeric':
+        value = Decimal(value)
+        if column.scale is not None:
+            value = value.quantize(Decimal(1).scaleb(-column.scale), rounding=ROUND_HALF_UP)
+        return format(value.normalize(), 'f').encode('utf-8')
+    if kind == 'float4':
+        return repr(struct.unpack('>f', struct.pack('>f', value))[0]).encode('utf-8')
+    if kind == 'float8':
+        return repr(float(value)).encode('utf-8')
+    if kind == 'bool':
+        return b't' if value else b'f'
+    if kind in ('timestamp', 'timestamptz'):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat().encode('utf-8')
+    if kind in ('date', 'time'):
+        return value.isoformat().encode('utf-8')
+    if kind == 'bpchar':
+        return str(value).rstrip(' ').encode('utf-8')
+    return str(value).encode('utf-8')
+
+
+def table_checksum(rows: Iterable[Sequence], columns: Sequence[ColumnPlan], convert: bool) -> tuple:
+    """(row count, order-independent checksum); convert=True for raw SQLite rows"""
+    converters = [CONVERTERS[c.pg_type] for c in columns]
+    count, total = 0, 0
+    for row in rows:
+        digest = hashlib.blake2b(digest_size=8)
+        for column, converter, value in zip(columns, converters, row):
+            if convert and value is not None:
+                value = converter(value)
+            digest.update(_canonical(column, value))
+            digest.update(b'\x1f')
+        total = (total + int.from_bytes(digest.digest(), 'big')) % (1 << 64)
+        count += 1
+    return count, total
+
+
+# ========================================
+# DATABASE ACCESS
+# ========================================
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _psycopg2_dsn(url: str) -> str:
+    return url.replace('postgresql+psycopg2://', 'postgresql://').replace('postgres://', 'postgresql://')
+
+
+def _source(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+@contextmanager
+def _target(url: str):
+    """psycopg2 connection committed on success and always closed (psycopg2's own context manager keeps it open)"""
+    import psycopg2
+    connection = psycopg2.connect(_psycopg2_dsn(url))
     try:
-        rows = s_conn.execute(select(table)).mappings().all()
-        if not rows:
-            logger.info("Skipping empty table %s", table.name)
-            trans.commit()
-            return 0
-
-        # Insert rows in chunks
-        chunk_size = 500
-        total = 0
-        for i in range(0, len(rows), chunk_size):
-            chunk = rows[i : i + chunk_size]
-            # convert Mapping objects to dicts
-            dicts = [dict(r) for r in chunk]
-            t_conn.execute(insert(table).prefix_with("/* migrate */"), dicts)
-            total += len(dicts)
-
-        trans.commit()
-        logger.info("Copied %d rows into %s", total, table.name)
-        return total
-    except Exception:
-        trans.rollback()
-        logger.exception("Failed to copy table %s", table.name)
-        raise
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def _stream_source(path: str, table: str, columns: Sequence[ColumnPlan], chunk_rows: int) -> Iterator[tuple]:
+    connection = _source(path)
+    try:
+        cursor = connection.execute(
+            f"SELECT {', '.join(_quote(c.name) for c in columns)} FROM {_quote(table)} ORDER BY rowid"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        connection.close()
+
+
+def plan_columns(source_path: str, target_url: str, table) -> List[ColumnPlan]:
+    """Columns present on both sides with their target types (source-only columns are reported)"""
+    connection = _source(source_path)
+    try:
+        source_columns = {row[1] for row in connection.execute(f"PRAGMA table_info({_quote(table.name)})")}
     finally:
-        s_conn.close()
-        t_conn.close()
+        connection.close()
 
+    with _target(target_url) as pg, pg.cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name, udt_name, data_type, numeric_scale FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position", (table.name,)
+        )
+        target_columns = cursor.fetchall()
+    if not target_columns:
+        raise MigrationError(f"table {table.name} does not exist on the target")
 
-def set_postgres_sequence(target: Engine, table_name: str, pk_name: str = "id") -> None:
-    # Set sequence to max(id) if sequence exists
+    plan = [
+        ColumnPlan(name, 'enum' if data_type == 'USER-DEFINED' else udt, scale)
+        for name, udt, data_type, scale in target_columns if name in source_columns
+    ]
+    dropped = source_columns - {c.name for c in plan}
+    if dropped:
+        logger.warning("%s: source columns without a target column are not copied: %s", table.name, sorted(dropped))
+    return plan
+
+
+def _disable_fk_triggers(cursor) -> bool:
+    """Skip FK checks for this connection (needs superuser; dependency order is used either way)"""
     try:
-        with target.connect() as conn:
-            # find the sequence for this serial column
-            sql = text(
-                "SELECT pg_get_serial_sequence(:table, :pk) as seq"
-            )
-            seq = conn.execute(sql, {"table": table_name, "pk": pk_name}).scalar()
-            if not seq:
-                return
-            max_sql = text(f"SELECT coalesce(max({pk_name}), 0) FROM \"{table_name}\"")
-            maxv = conn.execute(max_sql).scalar() or 0
-            set_sql = text(f"SELECT setval(:seq, :val, true)")
-            conn.execute(set_sql, {"seq": seq, "val": int(maxv)})
-            logger.info("Set sequence %s to %s", seq, maxv)
+        cursor.execute("SET session_replication_role = replica")
+        return True
     except Exception:
-        logger.exception("Failed to set sequence for %s", table_name)
+        cursor.connection.rollback()
+        return False
 
 
-def main() -> None:
-    sqlite_path = os.environ.get("SOURCE_SQLITE") or os.path.join(ROOT, "data.sqlite3")
-    if not os.path.exists(sqlite_path):
-        logger.error("Source SQLite not found at %s", sqlite_path)
-        return
+def load_table(source_path: str, target_url: str, table, columns: Sequence[ColumnPlan], chunk_rows: int) -> int:
+    """COPY one table; returns rows copied"""
+    counter = [0]
+    rows = _stream_source(source_path, table.name, columns, chunk_rows)
+    stream = CopyStream(copy_chunks(rows, columns, counter, chunk_rows))
+    column_list = ', '.join(_quote(c.name) for c in columns)
+    with _target(target_url) as pg, pg.cursor() as cursor:
+        if not _disable_fk_triggers(cursor):
+            logger.debug("%s: FK triggers stay enabled", table.name)
+        cursor.copy_expert(f"COPY {_quote(table.name)} ({column_list}) FROM STDIN WITH (FORMAT binary)",
+                           stream, size=1 << 20)
+    return counter[0]
+
+
+def verify_table(source_path: str, target_url: str, table, columns: Sequence[ColumnPlan], chunk_rows: int,
+                 checksum: bool) -> Optional[str]:
+    """None when source and target agree, otherwise a description of the difference"""
+    if not checksum:
+        connection = _source(source_path)
+        try:
+            expected = connection.execute(f"SELECT COUNT(*) FROM {_quote(table.name)}").fetchone()[0]
+        finally:
+            connection.close()
+        with _target(target_url) as pg, pg.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {_quote(table.name)}")
+            actual = cursor.fetchone()[0]
+        return None if expected == actual else f"{expected} source rows, {actual} target rows"
+
+    expected = table_checksum(_stream_source(source_path, table.name, columns, chunk_rows), columns, convert=True)
+    with _target(target_url) as pg:
+        with pg.cursor(name=f"verify_{table.name}") as cursor:  # Server-side cursor: bounded memory
+            cursor.itersize = chunk_rows
+            cursor.execute(f"SELECT {', '.join(_quote(c.name) for c in columns)} FROM {_quote(table.name)}")
+            actual = table_checksum(cursor, columns, convert=False)
+    if expected[0] != actual[0]:
+        return f"{expected[0]} source rows, {actual[0]} target rows"
+    if expected[1] != actual[1]:
+        return "row counts match but column values differ (checksum mismatch)"
+    return None
 
-    dest_url = os.environ.get("DATABASE_URL")
-    if not dest_url:
-        logger.error("Please set DATABASE_URL to your target Postgres (Supabase) database URL")
-        return
 
-    source_url = f"sqlite:///{sqlite_path}"
-    logger.info("Source: %s", source_url)
-    logger.info("Destination: %s", dest_url)
+def reset_sequences(target_url: str, tables: Sequence) -> int:
+    """Move every serial/identity sequence of `tables` past the largest copied value"""
+    moved = 0
+    with _target(target_url) as pg, pg.cursor() as cursor:
+        for table in tables:
+            for column in table.primary_key.columns:
+                cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (_quote(table.name), column.name))
+                sequence = cursor.fetchone()[0]
+                if not sequence:
+                    continue
+                cursor.execute(
+                    f"SELECT setval(%s, COALESCE(MAX({_quote(column.name)}), 1), MAX({_quote(column.name)}) IS NOT NULL) "
+                    f"FROM {_quote(table.name)}", (sequence,)
+                )
+                moved += 1
+    return moved
 
-    source_engine = create_engine(source_url, connect_args={"check_same_thread": False})
-    target_engine = create_engine(dest_url)
 
-    # Ensure models/tables exist on target
+def prepare_target(target_url: str, tables: Sequence, truncate: bool) -> None:
+    """Refuse to load into non-empty tables unless --truncate"""
+    with _target(target_url) as pg, pg.cursor() as cursor:
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(_quote(t.name) for t in tables)} RESTART IDENTITY CASCADE")
+            logger.info("Truncated %d target tables", len(tables))
+            return
+        for table in tables:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {_quote(table.name)})")
+            if cursor.fetchone()[0]:
+                raise MigrationError(f"target table {table.name} is not empty - rerun with --truncate")
+
+
+# ========================================
+# DRIVER
+# ========================================
+
+def model_tables(source_path: str, only: Optional[Sequence[str]] = None) -> List:
+    """Model tables present in the source database (others are reported and skipped)"""
+    import server.app  # noqa: F401 - registers every model on Base.metadata
+    from server.db import Base
+
+    connection = _source(source_path)
     try:
-        # Import application models so Base metadata is populated
-        import server.models  # noqa: F401
-        import server.db as _db  # noqa: F401
+        source_tables = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )}
+    finally:
+        connection.close()
 
-        _db.Base.metadata.create_all(bind=target_engine)
-    except Exception:
-        logger.exception("Failed to create tables on target DB via models metadata")
-        raise
+    tables = [t for t in Base.metadata.sorted_tables if t.name in source_tables and (not only or t.name in only)]
+    unknown = sorted(source_tables - set(Base.metadata.tables))
+    if unknown:
+        logger.warning("Source tables without a model are skipped: %s", unknown)
+    return tables
 
-    # Reflect source metadata (actual tables)
-    src_meta = MetaData()
-    src_meta.reflect(bind=source_engine)
 
-    ordered = topological_sort_tables(src_meta)
+def run_parallel(workers: int, jobs: Sequence[tuple], fn: Callable) -> Dict[str, object]:
+    """Run fn(*args) for every (name, args) job on `workers` threads; results by name"""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {name: pool.submit(fn, *args) for name, args in jobs}
+        return {name: future.result() for name, future in futures.items()}
 
-    total_rows = 0
-    for tbl in ordered:
+
+def migrate(source_path: str, target_url: str, workers: int = 4, chunk_rows: int = 5000, truncate: bool = False,
+            create: bool = True, checksum: bool = True, only: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """Copy, reset sequences, verify; returns rows copied per table"""
+    from sqlalchemy import create_engine
+
+    tables = model_tables(source_path, only)
+    if create:
+        from server.db import Base
+        engine = create_engine(target_url)
         try:
-            copied = copy_table(source_engine, target_engine, tbl)
-            total_rows += copied
-            # attempt to set Postgres sequence if PK is `id` integer
-            if "id" in [c.name for c in tbl.primary_key.columns]:
-                set_postgres_sequence(target_engine, tbl.name, "id")
-        except Exception:
-            logger.exception("Error copying table %s; aborting", tbl.name)
-            raise
-
-    logger.info("Migration complete. Total rows copied: %d", total_rows)
+            Base.metadata.create_all(bind=engine, tables=tables)
+        finally:
+            engine.dispose()
+    prepare_target(target_url, tables, truncate)
+
+    plans = {t.name: plan_columns(source_path, target_url, t) for t in tables}
+    for name, plan in plans.items():
+        row_encoder(plan)  # Fail on unsupported column types before anything is copied
+
+    copied: Dict[str, int] = {}
+    levels = dependency_levels(tables)
+    for number, level in enumerate(levels, start=1):
+        started = clock.perf_counter()
+        jobs = [(t.name, (source_path, target_url, t, plans[t.name], chunk_rows)) for t in level]
+        copied.update(run_parallel(workers, jobs, load_table))
+        logger.info("Level %d/%d: %d tables, %d rows in %.1fs", number, len(levels), len(level),
+                    sum(copied[t.name] for t in level), clock.perf_counter() - started)
+
+    logger.info("Reset %d sequences", reset_sequences(target_url, tables))
+
+    jobs = [(t.name, (source_path, target_url, t, plans[t.name], chunk_rows, checksum)) for t in tables]
+    problems = {name: problem for name, problem in run_parallel(workers, jobs, verify_table).items() if problem}
+    if problems:
+        for name, problem in sorted(problems.items()):
+            logger.error("Verification failed for %s: %s", name, problem)
+        raise MigrationError(f"{len(problems)} tables differ between source and target")
+    logger.info("Verified %d tables (%s)", len(tables), "counts + checksums" if checksum else "counts")
+    return copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=os.environ.get("SOURCE_SQLITE") or os.path.join(ROOT, "data.sqlite3"))
+    parser.add_argument("--target", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--workers", type=int, default=4, help="tables loaded in parallel")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="rows per SQLite fetch / COPY write")
+    parser.add_argument("--truncate", action="store_true", help="empty the target tables first")
+    parser.add_argument("--skip-create", action="store_true", help="do not create missing target tables")
+    parser.add_argument("--no-checksum", action="store_true", help="verify row counts only")
+    parser.add_argument("--tables", help="comma-separated subset of tables")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        logger.error("Source SQLite not found at %s", args.source)
+        sys.exit(1)
+    if not args.target or not args.target.startswith(("postgresql", "postgres://")):
+        logger.error("Set --target or DATABASE_URL to the target PostgreSQL database URL")
+        sys.exit(1)
+
+    started = clock.perf_counter()
+    try:
+        copied = migrate(
+            args.source, args.target, workers=args.workers, chunk_rows=args.chunk_rows, truncate=args.truncate,
+            create=not args.skip_create, checksum=not args.no_checksum,
+            only=args.tables.split(",") if args.tables else None,
+        )
+    except MigrationError as e:
+        logger.error("Migration failed: %s", e)
+        sys.exit(1)
+    logger.info("Migration complete: %d rows in %d tables, %.1fs",
+                sum(copied.values()), len(copied), clock.perf_counter() - started)
 
 
 if __name__ == "__main__":
@@ -14,11 +14,17 @@ from PIL import Image
 from .db import init_db, session_scope
 from .models import MixDesign
 from .config import get_config
+from .serialization import init_json
+from .response_optimization import init_response_optimization
+from .query_profiler import debug_bp, init_query_profiler
+from .metrics import IMAGE_PROCESSING_SECONDS, init_metrics, metrics_bp
 from .auth import auth_bp, init_jwt
 from .password_reset import password_reset_bp
 from .vendors import vendors_bp
 from .batches import batches_bp
 from .cube_tests import cube_tests_bp
+from .cube_acceptance import cube_acceptance_bp
+from .strength_forecast import strength_forecast_bp
 from .third_party_labs import third_party_labs_bp
 from .third_party_cube_tests import third_party_cube_tests_bp
 from .material_management import material_management_bp
@@ -45,6 +51,11 @@ from .safety_audits import audit_bp
 from .ppe_tracking import ppe_bp
 from .geofence_api import geofence_bp
 from .handover_register import handover_bp
+from .sync import sync_bp
+from .dashboard import dashboard_bp
+from .notification_stream import notification_stream_bp
+from .reference_data import reference_data_bp
+from .search import search_bp
 
 
 # Setup logging
@@ -78,6 +89,9 @@ def create_app() -> Flask:
     app.config['JWT_ENCODE_NBF'] = True
     app.config['JWT_ERROR_MESSAGE_KEY'] = 'error'
     
+    # Fast JSON provider (orjson) for jsonify / request.get_json
+    init_json(app)
+    
     # Initialize JWT
     init_jwt(app)
     
@@ -95,6 +109,8 @@ def create_app() -> Flask:
     
     # Register cube test management blueprint
     app.register_blueprint(cube_tests_bp)
+    app.register_blueprint(cube_acceptance_bp)
+    app.register_blueprint(strength_forecast_bp)
     
     # Register third-party lab management blueprint
     app.register_blueprint(third_party_labs_bp)
@@ -174,6 +190,27 @@ def create_app() -> Flask:
     # Register Handover Register blueprint (work completion handovers)
     app.register_blueprint(handover_bp)
     
+    # Register Delta Sync blueprint (change feed for offline clients)
+    app.register_blueprint(sync_bp)
+    
+    # Register Dashboard blueprint (all KPI tiles of a project in one request)
+    app.register_blueprint(dashboard_bp)
+    
+    # Register Notification Stream blueprint (SSE push instead of notification polling)
+    app.register_blueprint(notification_stream_bp)
+    
+    # Register Reference Data blueprint (versioned form lists, 304 while unchanged)
+    app.register_blueprint(reference_data_bp)
+    
+    # Register Search blueprint (ranked full-text search across registers)
+    app.register_blueprint(search_bp)
+    
+    # Register Debug blueprint (SQL query profiles, support admins only)
+    app.register_blueprint(debug_bp)
+    
+    # Register Metrics blueprint (Prometheus /metrics, /health/ready probe)
+    app.register_blueprint(metrics_bp)
+    
     # Enable CORS for commercial deployment
     CORS(app, resources={
         r"/api/*": {
@@ -183,6 +220,15 @@ def create_app() -> Flask:
         }
     })
     
+    # gzip/brotli compression for JSON and text responses
+    init_response_optimization(app)
+    
+    # Per-request SQL query counts, Server-Timing header and N+1 detection
+    init_query_profiler(app)
+    
+    # Prometheus request latency, upload size and DB pool metrics
+    init_metrics(app)
+    
     # Security headers
     @app.after_request
     def add_security_headers(response):
@@ -334,17 +380,18 @@ def create_app() -> Flask:
             return None, None, None
         
         try:
-            # Read and validate image
-            image = Image.open(file.stream)
-            
-            # Create thumbnail (max 800x800) to save space
-            image.thumbnail((800, 800), Image.Resampling.LANCZOS)
-            
-            # Convert to bytes
-            img_io = BytesIO()
-            img_format = 'JPEG' if ext in {'jpg', 'jpeg'} else 'PNG'
-            image.save(img_io, img_format, quality=85, optimize=True)
-            img_data = img_io.getvalue()
+            with IMAGE_PROCESSING_SECONDS.labels('mix_design_thumbnail').time():
+                # Read and validate image
+                image = Image.open(file.stream)
+                
+                # Create thumbnail (max 800x800) to save space
+                image.thumbnail((800, 800), Image.Resampling.LANCZOS)
+                
+                # Convert to bytes
+                img_io = BytesIO()
+                img_format = 'JPEG' if ext in {'jpg', 'jpeg'} else 'PNG'
+                image.save(img_io, img_format, quality=85, optimize=True)
+                img_data = img_io.getvalue()
             
             mimetype = f'image/{ext if ext != "jpg" else "jpeg"}'
             logger.info(f"Processed image: {filename} ({len(img_data)} bytes)")
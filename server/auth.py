@@ -22,11 +22,13 @@ from flask_jwt_extended import (
     decode_token,
 )
 import jwt
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.exc import IntegrityError
 
 from .db import session_scope, SessionLocal
 from .models import User, Company, Project, ProjectMembership
+from . import password_hashing
+from .password_hashing import PasswordHasherBusy
+from .rbac import permission_claims, get_role_from_string, permissions_for_mask, modules_for_mask, mask_from_claims
 
 logger = logging.getLogger(__name__)
 
@@ -196,13 +198,25 @@ def validate_full_name(name: str) -> Tuple[bool, Optional[str]]:
 # ============================================================================
 
 def hash_password(password: str) -> str:
-    """Hash a password using werkzeug's secure method (pbkdf2:sha256)."""
-    return generate_password_hash(password, method='pbkdf2:sha256')
+    """Hash a password with the configured KDF parameters (PASSWORD_HASH_METHOD)."""
+    return password_hashing.hash_password(password)
 
 
 def verify_password(password_hash: str, password: str) -> bool:
-    """Verify a password against its hash."""
-    return check_password_hash(password_hash, password)
+    """Verify a password against its hash (runs in the bounded KDF pool)."""
+    return password_hashing.verify_password(password_hash, password)
+
+
+def find_user_by_identifier(session, identifier: str) -> Optional[User]:
+    """
+    Resolve a login identifier with a single-column lookup.
+    Emails always contain '@' and phone numbers never do, so each branch
+    uses its own unique index instead of an OR across both columns.
+    """
+    identifier = identifier.strip()
+    if "@" in identifier:
+        return session.query(User).filter(User.email == identifier.lower()).first()
+    return session.query(User).filter(User.phone == identifier).first()
 
 
 # ============================================================================
@@ -242,8 +256,10 @@ def create_tokens(user: User) -> dict:
     # Store user_id as string (PyJWT requires sub to be string per RFC 7519)
     identity = str(user.id)
     
+    # Role + compiled permission mask ride in the access token (checked by @require_permission)
     access_token = create_access_token(
         identity=identity,
+        additional_claims=permission_claims(user),
         expires_delta=ACCESS_TOKEN_EXPIRES
     )
     refresh_token = create_refresh_token(
@@ -465,13 +481,11 @@ def login():
         if not identifier or not password:
             return jsonify({"error": "Email/phone and password are required"}), 400
         
-        identifier = identifier.strip().lower()
+        identifier = identifier.strip()
         
         with session_scope() as s:
             # Find user by email or phone
-            user = s.query(User).filter(
-                (User.email == identifier) | (User.phone == identifier)
-            ).first()
+            user = find_user_by_identifier(s, identifier)
             
             if not user:
                 logger.warning(f"Login attempt with invalid identifier: {identifier}")
@@ -488,8 +502,9 @@ def login():
                 logger.warning(f"Login attempt for locked account: {identifier}")
                 return jsonify({"error": message}), 403
             
-            # Verify password
-            if not verify_password(user.password_hash, password):
+            # Verify password (and upgrade outdated hash parameters)
+            valid, upgraded_hash = password_hashing.verify_and_upgrade(user.password_hash, password)
+            if not valid:
                 increment_failed_attempts(user)
                 s.flush()
                 
@@ -507,6 +522,9 @@ def login():
             
             # Successful login - reset failed attempts
             reset_failed_attempts(user)
+            if upgraded_hash:
+                user.password_hash = upgraded_hash
+                logger.info(f"Upgraded password hash parameters for user {user.id}")
             s.flush()
             
             # Create tokens
@@ -520,6 +538,11 @@ def login():
                 **tokens
             }), 200
             
+    except PasswordHasherBusy:
+        logger.warning("Login rejected: password hash pool is saturated")
+        response = jsonify({"error": "Too many login attempts in progress. Please retry shortly."})
+        response.headers["Retry-After"] = "2"
+        return response, 503
     except Exception as e:
         logger.error(f"Login error: {e}")
         return jsonify({"error": "Login failed"}), 500
@@ -532,9 +555,17 @@ def refresh():
     try:
         user_id_str = get_jwt_identity()  # Returns string user_id
         
+        # Recompute claims so role changes take effect on the next refresh
+        with session_scope() as s:
+            user = s.get(User, int(user_id_str))
+            if not user or not user.is_active:
+                return jsonify({"error": "User not found or inactive"}), 401
+            claims = permission_claims(user)
+        
         # Create new access token
         access_token = create_access_token(
             identity=user_id_str,
+            additional_claims=claims,
             expires_delta=ACCESS_TOKEN_EXPIRES
         )
         
@@ -568,6 +599,22 @@ def get_current_user():
         return jsonify({"error": "Failed to fetch user"}), 500
 
 
+@auth_bp.get("/permissions")
+@jwt_required()
+def get_my_permissions():
+    """Permissions and accessible modules for the current access token (no DB hit)."""
+    claims = get_jwt()
+    mask = mask_from_claims(claims)
+    if mask is None:
+        return jsonify({"error": "Token predates current permission claims, please refresh"}), 401
+    
+    return jsonify({
+        "role": get_role_from_string(claims.get("role")).value,
+        "permissions": [perm.value for perm in permissions_for_mask(mask)],
+        "modules": list(modules_for_mask(mask))
+    }), 200
+
+
 @auth_bp.post("/change-password")
 @jwt_required()
 def change_password():
@@ -728,7 +775,7 @@ def reset_password():
                 return jsonify({"error": "Account is inactive"}), 403
             
             # Update password
-            user.password_hash = generate_password_hash(new_password)
+            user.password_hash = hash_password(new_password)
             user.failed_login_attempts = 0  # Reset failed attempts
             user.account_locked_until = None  # Unlock account if locked
             user.updated_at = datetime.utcnow()
@@ -4,6 +4,12 @@ Handles periodic tasks:
 1. Check vehicle time limits and send warnings
 2. Check pending cube tests and send reminders
 3. Send missed test warnings to admins
+4. Archive expired audit log months (location verifications, permit audit logs)
+5. Sweep expired PPE/inductions and rebuild expiry buckets
+6. Compact the sync change feed
+7. Rebuild vendor scorecards
+8. Sweep NC overdue flags and refresh NC score reports
+9. Carry out queued project archive / restore requests
 """
 
 from datetime import datetime, timedelta
@@ -16,6 +22,14 @@ from .models import (
     ProjectSettings, User, ProjectMembership, Project
 )
 from .notifications import send_time_limit_warning, send_test_reminder, send_missed_test_warning
+from .log_partitions import run_log_maintenance
+from .expiry_management import run_expiry_sweep
+from .sync_models import run_sync_compaction
+from .vendor_scorecard import run_vendor_scorecard_rebuild
+from .nc_sweeper import run_nc_sweep
+from .project_archive import run_project_archive_requests
+from .query_profiler import profile_block
+from .metrics import track_job
 
 logger = logging.getLogger(__name__)
 
@@ -315,12 +329,25 @@ def run_all_background_jobs():
     logger.info("Running all background jobs...")
     logger.info("=" * 60)
     
-    results = {
-        "time_warnings": check_vehicle_time_limits(),
-        "test_reminders": check_pending_tests(),
-        "missed_tests": check_missed_tests()
+    jobs = {
+        "time_warnings": check_vehicle_time_limits,
+        "test_reminders": check_pending_tests,
+        "missed_tests": check_missed_tests,
+        "log_archival": run_log_maintenance,
+        "expiry_sweep": run_expiry_sweep,
+        "sync_compaction": run_sync_compaction,
+        "vendor_scorecards": run_vendor_scorecard_rebuild,
+        "nc_sweep": run_nc_sweep,
+        "project_archives": run_project_archive_requests
     }
     
+    results = {}
+    for name, job in jobs.items():
+        # Query counts per job (per-row query loops are logged as N+1 suspects),
+        # duration and item count metrics
+        with profile_block(f"job:{name}"), track_job(name) as run:
+            results[name] = run.result = job()
+    
     logger.info("=" * 60)
     logger.info(f"All jobs complete. Results: {results}")
     logger.info("=" * 60)
@@ -329,7 +356,7 @@ def run_all_background_jobs():
 
 
 # API endpoint to manually trigger jobs (for testing or manual runs)
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 background_jobs_bp = Blueprint('background_jobs', __name__, url_prefix='/api/background-jobs')
@@ -407,6 +434,128 @@ def run_missed_test_check():
         return jsonify({"error": str(e)}), 500
 
 
+@background_jobs_bp.route('/run-log-archival', methods=['POST'])
+@jwt_required()
+def run_log_archival():
+    """Manually trigger log partition maintenance and archival (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.query(User).filter(User.id == user_id).first()
+        
+        if not user or not (user.is_support_admin or user.is_company_admin):
+            return jsonify({"error": "Admin access required"}), 403
+        
+        results = run_log_maintenance()
+        
+        return jsonify({
+            "success": True,
+            "message": "Log archival complete",
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running manual log archival: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@background_jobs_bp.route('/run-expiry-sweep', methods=['POST'])
+@jwt_required()
+def run_expiry_sweep_job():
+    """Manually trigger expiry sweep and bucket rebuild (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.query(User).filter(User.id == user_id).first()
+        
+        if not user or not (user.is_support_admin or user.is_company_admin):
+            return jsonify({"error": "Admin access required"}), 403
+        
+        results = run_expiry_sweep()
+        
+        return jsonify({
+            "success": True,
+            "message": "Expiry sweep complete",
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running manual expiry sweep: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@background_jobs_bp.route('/run-sync-compaction', methods=['POST'])
+@jwt_required()
+def run_sync_compaction_job():
+    """Manually trigger sync change feed compaction and idempotency key purge (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.query(User).filter(User.id == user_id).first()
+        
+        if not user or not (user.is_support_admin or user.is_company_admin):
+            return jsonify({"error": "Admin access required"}), 403
+        
+        results = run_sync_compaction()
+        
+        return jsonify({
+            "success": True,
+            "message": "Sync compaction complete",
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running manual sync compaction: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@background_jobs_bp.route('/run-vendor-scorecard-rebuild', methods=['POST'])
+@jwt_required()
+def run_vendor_scorecard_rebuild_job():
+    """Manually trigger a full vendor scorecard rebuild (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.query(User).filter(User.id == user_id).first()
+        
+        if not user or not (user.is_support_admin or user.is_company_admin):
+            return jsonify({"error": "Admin access required"}), 403
+        
+        rows = run_vendor_scorecard_rebuild()
+        
+        return jsonify({
+            "success": True,
+            "message": "Vendor scorecard rebuild complete",
+            "rowsWritten": rows
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running manual vendor scorecard rebuild: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@background_jobs_bp.route('/run-nc-sweep', methods=['POST'])
+@jwt_required()
+def run_nc_sweep_job():
+    """Manually trigger the NC overdue/score sweep; ?rebuild=true recomputes every report (admin only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = db.session.query(User).filter(User.id == user_id).first()
+        
+        if not user or not (user.is_support_admin or user.is_company_admin):
+            return jsonify({"error": "Admin access required"}), 403
+        
+        results = run_nc_sweep(rebuild=request.args.get('rebuild') == 'true')
+        if results.get("skipped"):
+            return jsonify({"error": "NC sweep already running, try again later"}), 409
+        
+        return jsonify({
+            "success": True,
+            "message": "NC sweep complete",
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running manual NC sweep: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @background_jobs_bp.route('/run-all', methods=['POST'])
 @jwt_required()
 def run_all_jobs():
@@ -23,12 +23,18 @@ from functools import wraps
 from io import BytesIO
 import traceback
 
+from sqlalchemy import case, func
+
 try:
     from .db import session_scope
+    from .serialization import RowSerializer, model_shape
+    from .response_optimization import project_version_etag
     from .models import BatchRegister, RMCVendor, Project, ProjectMembership, MixDesign, User
     from .email_notifications import notify_batch_rejection_email
 except ImportError:
     from db import session_scope
+    from serialization import RowSerializer, model_shape
+    from response_optimization import project_version_etag
     from models import BatchRegister, RMCVendor, Project, ProjectMembership, MixDesign, User
     from email_notifications import notify_batch_rejection_email
 
@@ -36,6 +42,45 @@ except ImportError:
 # Create Blueprint
 batches_bp = Blueprint('batches', __name__)
 
+_LOCATION_COLUMNS = (
+    'building_name', 'floor_level', 'zone', 'grid_reference', 'structural_element_type',
+    'element_id', 'pour_location_description', 'latitude', 'longitude'
+)
+
+_mix_display = func.coalesce(func.nullif(MixDesign.mix_design_id, ''), MixDesign.project_name)
+
+# Same payload as BatchRegister.to_dict() + list enrichment, read straight from Row tuples
+# (the batch sheet photo blob is never loaded, only tested for NULL)
+BATCH_LIST_SERIALIZER = RowSerializer({
+    **model_shape(
+        BatchRegister,
+        exclude={'batch_sheet_photo_name', 'batch_sheet_photo_data', 'batch_sheet_photo_mimetype',
+                 'deleted_by', *_LOCATION_COLUMNS},
+        flags=('is_deleted',),
+    ),
+    "hasBatchSheetPhoto": BatchRegister.batch_sheet_photo_data.isnot(None),
+    "location": {
+        "buildingName": BatchRegister.building_name,
+        "floorLevel": BatchRegister.floor_level,
+        "zone": BatchRegister.zone,
+        "gridReference": BatchRegister.grid_reference,
+        "structuralElementType": BatchRegister.structural_element_type,
+        "elementId": BatchRegister.element_id,
+        "description": BatchRegister.pour_location_description,
+        "latitude": BatchRegister.latitude,
+        "longitude": BatchRegister.longitude,
+    },
+    "vendor_name": RMCVendor.vendor_name,
+    "vendorName": RMCVendor.vendor_name,
+    "mix_design_name": _mix_display,
+    "mixDesignName": _mix_display,
+    "status": BatchRegister.verification_status,
+    "quantity": case(
+        (func.coalesce(BatchRegister.quantity_received, 0) == 0, BatchRegister.quantity_ordered),
+        else_=BatchRegister.quantity_received
+    ),
+})
+
 
 # ============================================================================
 # HELPER FUNCTIONS
@@ -139,6 +184,7 @@ def quality_team_required(f):
 @batches_bp.route('/api/batches', methods=['GET'])
 @jwt_required()
 @project_access_required(optional=True)
+@project_version_etag
 def get_batches():
     """
     Get list of batches for a project or all projects.
@@ -169,73 +215,47 @@ def get_batches():
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
-            # Base query - exclude soft deleted
+            # Base query - exclude soft deleted; vendor/mix names are joined in rather than fetched per row
+            query = BATCH_LIST_SERIALIZER.select().select_from(BatchRegister).outerjoin(
+                RMCVendor, RMCVendor.id == BatchRegister.rmc_vendor_id
+            ).outerjoin(
+                MixDesign, MixDesign.id == BatchRegister.mix_design_id
+            ).where(BatchRegister.is_deleted == False)
+            
             if project_id:
                 # Filter by specific project
-                query = session.query(BatchRegister).filter_by(
-                    project_id=project_id,
-                    is_deleted=False
-                )
+                query = query.where(BatchRegister.project_id == project_id)
             else:
                 # Get all batches for user's company projects
-                query = session.query(BatchRegister).join(Project).filter(
-                    Project.company_id == user.company_id,
-                    BatchRegister.is_deleted == False
+                query = query.join(Project, Project.id == BatchRegister.project_id).where(
+                    Project.company_id == user.company_id
                 )
             
             # Apply filters
             if vendor_id:
-                query = query.filter(BatchRegister.rmc_vendor_id == vendor_id)
+                query = query.where(BatchRegister.rmc_vendor_id == vendor_id)
             if mix_design_id:
-                query = query.filter_by(mix_design_id=mix_design_id)
+                query = query.where(BatchRegister.mix_design_id == mix_design_id)
             if status:
-                query = query.filter_by(verification_status=status)
+                query = query.where(BatchRegister.verification_status == status)
             
             # Date range filter
             if date_from:
                 try:
                     date_from_dt = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                    query = query.filter(BatchRegister.delivery_date >= date_from_dt)
+                    query = query.where(BatchRegister.delivery_date >= date_from_dt)
                 except ValueError:
                     return jsonify({"error": "Invalid date_from format. Use ISO 8601 format"}), 400
             
             if date_to:
                 try:
                     date_to_dt = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                    query = query.filter(BatchRegister.delivery_date <= date_to_dt)
+                    query = query.where(BatchRegister.delivery_date <= date_to_dt)
                 except ValueError:
                     return jsonify({"error": "Invalid date_to format. Use ISO 8601 format"}), 400
             
-            batches = query.order_by(BatchRegister.delivery_date.desc()).all()
-            
-            # Enrich with vendor and mix design names
-            result = []
-            for batch in batches:
-                batch_dict = batch.to_dict()
-                
-                # Add vendor name (legacy snake_case + camelCase compatibility)
-                if batch.rmc_vendor_id:
-                    vendor = session.query(RMCVendor).filter_by(id=batch.rmc_vendor_id).first()
-                    vendor_name = vendor.vendor_name if vendor else None
-                    batch_dict['vendor_name'] = vendor_name
-                    batch_dict['vendorName'] = vendor_name
-                
-                # Add mix design name (map to existing MixDesign fields)
-                if batch.mix_design_id:
-                    mix = session.query(MixDesign).filter_by(id=batch.mix_design_id).first()
-                    if mix:
-                        # Prefer mix_design_id as the display identifier, fallback to project_name
-                        mix_display = mix.mix_design_id or mix.project_name
-                    else:
-                        mix_display = None
-                    batch_dict['mix_design_name'] = mix_display
-                    batch_dict['mixDesignName'] = mix_display
-
-                # Add compatibility fields expected by frontend
-                batch_dict['status'] = batch.verification_status
-                batch_dict['quantity'] = batch.quantity_received or batch.quantity_ordered
-                
-                result.append(batch_dict)
+            rows = session.execute(query.order_by(BatchRegister.delivery_date.desc())).all()
+            result = BATCH_LIST_SERIALIZER.dump(rows)
 
             return jsonify({
                 "success": True,
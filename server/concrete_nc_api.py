@@ -14,13 +14,14 @@ import json
 from .models import User, Company, Project, RMCVendor
 from .concrete_nc_models import (
     QualityNCTag, QualityNCIssue, NCResponse,
-    ConcreteNCNotification, ConcreteNCScoreReport,
+    ConcreteNCNotification,
     NCIssueSeverity, NCIssueStatus
 )
 from .db import SessionLocal
 from .notifications import send_whatsapp_alert
 from .email_notifications import send_email
 from .module_access import require_module
+from .nc_sweeper import CONCRETE, score_report, parse_period, period_bounds, period_label
 
 concrete_nc_bp = Blueprint('concrete_nc', __name__, url_prefix='/api/concrete/nc')
 
@@ -53,7 +54,7 @@ def send_nc_notification(nc_issue, event_type, recipient_user_id, session):
     
     Args:
         nc_issue: QualityNCIssue instance
-        event_type: Type of event (raised, acknowledged, responded, resolved, verified, closed, transferred, rejected)
+        event_type: Type of event (raised, acknowledged, responded, resolved, verified, closed, transferred, rejected, overdue)
         recipient_user_id: User ID to send notification to
         session: Database session
     """
@@ -64,14 +65,15 @@ def send_nc_notification(nc_issue, event_type, recipient_user_id, session):
         
         # Create notification message based on event type
         messages = {
-            'raised': f'New NC raised: {nc_issue.nc_number} - {nc_issue.title}',
+            'raised': f'New NC raised: {nc_issue.nc_number} - {nc_issue.issue_title}',
             'acknowledged': f'NC acknowledged: {nc_issue.nc_number}',
             'responded': f'Contractor responded to NC: {nc_issue.nc_number}',
             'resolved': f'NC marked as resolved: {nc_issue.nc_number}',
             'verified': f'NC verification completed: {nc_issue.nc_number}',
             'closed': f'NC closed: {nc_issue.nc_number}',
             'transferred': f'NC transferred to you: {nc_issue.nc_number}',
-            'rejected': f'NC rejected: {nc_issue.nc_number}'
+            'rejected': f'NC rejected: {nc_issue.nc_number}',
+            'overdue': f'NC overdue: {nc_issue.nc_number} - deadline {nc_issue.deadline_date} has passed'
         }
         
         message = messages.get(event_type, f'NC Update: {nc_issue.nc_number}')
@@ -337,6 +339,9 @@ def list_ncs():
             if severity:
                 query = query.filter_by(severity=severity.upper())
             
+            if request.args.get('is_overdue') == 'true':
+                query = query.filter(QualityNCIssue.is_overdue == True)
+            
             # Date range filters
             start_date = request.args.get('start_date')
             start_date = request.args.get('start_date')
@@ -849,10 +854,10 @@ def get_dashboard():
                 QualityNCIssue.status.in_(['raised', 'acknowledged', 'in_progress', 'resolved', 'verified', 'transferred'])
             ).count()
             
-            # Overdue issues (past proposed deadline and not closed)
+            # Overdue issues (flag maintained by the NC sweeper)
             overdue_count = base_query.filter(
                 and_(
-                    QualityNCIssue.deadline_date < datetime.utcnow(),
+                    QualityNCIssue.is_overdue == True,
                     QualityNCIssue.status != 'closed'
                 )
             ).count()
@@ -928,174 +933,47 @@ def get_dashboard():
 @require_module("concrete_nc")
 def generate_report(report_type):
     """
-    Generate NC score reports.
+    NC score report of a contractor (precomputed by the NC sweeper).
     report_type: 'monthly' or 'weekly'
+    Query params: project_id, contractor_id (required), period (YYYY-MM or YYYY-Www, default current)
     """
     try:
+        if report_type not in ('monthly', 'weekly'):
+            return jsonify({'error': 'Invalid report_type. Use monthly or weekly'}), 400
+        
+        project_id = request.args.get('project_id', type=int)
+        contractor_id = request.args.get('contractor_id', type=int)
+        if not project_id or not contractor_id:
+            return jsonify({'error': 'project_id and contractor_id are required'}), 400
+        
+        try:
+            year, number = parse_period(report_type, request.args.get('period'))
+        except ValueError:
+            return jsonify({'error': 'Invalid period format. Use YYYY-MM (monthly) or YYYY-Www (weekly)'}), 400
+        
         with session_scope() as session:
             user_id = get_jwt_identity()
             user = session.query(User).filter_by(id=user_id).first()
             
             if not user:
                 return jsonify({'error': 'User not found'}), 404
+            if not session.query(Project.id).filter_by(id=project_id, company_id=user.company_id).first():
+                return jsonify({'error': 'Project not found'}), 404
             
-            project_id = request.args.get('project_id')
-            contractor_id = request.args.get('contractor_id')
-            
-            if not project_id or not contractor_id:
-                return jsonify({'error': 'project_id and contractor_id are required'}), 400
+            report = score_report(session, CONCRETE, user.company_id, project_id, contractor_id, report_type, year, number)
             
-            # Determine period and build period filter using QualityNCIssue fields
-            if report_type == 'monthly':
-                period = request.args.get('period', datetime.utcnow().strftime('%Y-%m'))
-                try:
-                    year_str, month_str = period.split('-')
-                    year = int(year_str)
-                    month = int(month_str)
-                except Exception:
-                    return jsonify({'error': 'Invalid monthly period format. Use YYYY-MM'}), 400
-                period_filter = and_(QualityNCIssue.score_year == year, QualityNCIssue.score_month == month)
-            elif report_type == 'weekly':
-                period = request.args.get('period', None)
-                if not period:
-                    now = datetime.utcnow()
-                    year, week, _ = now.isocalendar()
-                else:
-                    # Expecting 'YYYY-Www' or 'YYYY-W##'
-                    try:
-                        if '-W' in period:
-                            year_str, week_str = period.split('-W')
-                        else:
-                            year_str, week_str = period.split('-')
-                        year = int(year_str)
-                        week = int(week_str)
-                    except Exception:
-                        return jsonify({'error': 'Invalid weekly period format. Use YYYY-Www or YYYY-W##'}), 400
-                period_filter = and_(QualityNCIssue.score_year == year, QualityNCIssue.score_week == week)
-            else:
-                return jsonify({'error': 'Invalid report_type. Use monthly or weekly'}), 400
-
-            # Get all issues for this contractor and period
+            start, end = period_bounds(report_type, year, number)
             issues = session.query(QualityNCIssue).filter(
-                and_(
-                    QualityNCIssue.company_id == user.company_id,
-                    QualityNCIssue.project_id == project_id,
-                    QualityNCIssue.assigned_contractor_id == contractor_id,
-                    period_filter
-                )
-            ).all()
-            
-            # Calculate scores with severity weighting
-            severity_map = {'HIGH': 1.0, 'MODERATE': 0.5, 'LOW': 0.25}
-            
-            # severity is an Enum; use .name for comparison (HIGH/MODERATE/LOW)
-            high_count = sum(1 for nc in issues if (nc.severity.name.upper() if nc.severity else '') == 'HIGH' and nc.status != NCIssueStatus.CLOSED)
-            moderate_count = sum(1 for nc in issues if (nc.severity.name.upper() if nc.severity else '') == 'MODERATE' and nc.status != NCIssueStatus.CLOSED)
-            low_count = sum(1 for nc in issues if (nc.severity.name.upper() if nc.severity else '') == 'LOW' and nc.status != NCIssueStatus.CLOSED)
-
-            closed_count = sum(1 for nc in issues if nc.status == NCIssueStatus.CLOSED)
-            total_count = len(issues)
-            
-            # Calculate weighted score
-            def sev_value(nc):
-                key = (nc.severity.name.upper() if nc.severity else 'MODERATE')
-                return severity_map.get(key, 0.5)
-
-            total_severity_points = sum(sev_value(nc) for nc in issues)
-            closed_severity_points = sum(sev_value(nc) for nc in issues if nc.status == NCIssueStatus.CLOSED)
-            
-            total_score = (closed_severity_points / total_severity_points * 10) if total_severity_points > 0 else 10.0
-            
-            # Calculate closure rate
-            closure_rate = (closed_count / total_count * 100) if total_count > 0 else 0
-            
-            # Calculate avg resolution time
-            closed_issues = [nc for nc in issues if nc.status == 'closed' and nc.actual_resolution_days]
-            avg_resolution_days = sum(nc.actual_resolution_days for nc in closed_issues) / len(closed_issues) if closed_issues else 0
-            
-            # Determine performance grade
-            if total_score >= 9.0:
-                grade = 'A'
-            elif total_score >= 7.0:
-                grade = 'B'
-            elif total_score >= 5.0:
-                grade = 'C'
-            elif total_score >= 3.0:
-                grade = 'D'
-            else:
-                grade = 'F'
-            
-            # Check if report already exists (match by type and period)
-            if report_type == 'monthly':
-                existing_report = session.query(ConcreteNCScoreReport).filter(
-                    and_(
-                        ConcreteNCScoreReport.company_id == user.company_id,
-                        ConcreteNCScoreReport.project_id == project_id,
-                        ConcreteNCScoreReport.contractor_id == contractor_id,
-                        ConcreteNCScoreReport.report_type == report_type,
-                        ConcreteNCScoreReport.report_year == year,
-                        ConcreteNCScoreReport.report_month == month
-                    )
-                ).first()
-            else:
-                existing_report = session.query(ConcreteNCScoreReport).filter(
-                    and_(
-                        ConcreteNCScoreReport.company_id == user.company_id,
-                        ConcreteNCScoreReport.project_id == project_id,
-                        ConcreteNCScoreReport.contractor_id == contractor_id,
-                        ConcreteNCScoreReport.report_type == report_type,
-                        ConcreteNCScoreReport.report_year == year,
-                        ConcreteNCScoreReport.report_week == week
-                    )
-                ).first()
-            
-            if existing_report:
-                # Update existing report
-                existing_report.high_severity_count = high_count
-                existing_report.moderate_severity_count = moderate_count
-                existing_report.low_severity_count = low_count
-                existing_report.total_issues_count = total_count
-                existing_report.closed_issues_count = closed_count
-                existing_report.open_issues_count = total_count - closed_count
-                existing_report.total_score = total_score
-                existing_report.closure_rate = closure_rate
-                existing_report.avg_resolution_days = avg_resolution_days
-                existing_report.performance_grade = grade
-                existing_report.generated_at = datetime.utcnow()
-                
-                report = existing_report
-            else:
-                # Create new report
-                # Create new report record (populate year/month or week accordingly)
-                report = ConcreteNCScoreReport(
-                    company_id=user.company_id,
-                    project_id=project_id,
-                    contractor_id=contractor_id,
-                    report_type=report_type,
-                    report_year=year,
-                    report_month=month if report_type == 'monthly' else None,
-                    report_week=week if report_type == 'weekly' else None,
-                    report_period_start=datetime.utcnow().date(),
-                    report_period_end=datetime.utcnow().date(),
-                    high_severity_count=high_count,
-                    moderate_severity_count=moderate_count,
-                    low_severity_count=low_count,
-                    total_issues_count=total_count,
-                    closed_issues_count=closed_count,
-                    open_issues_count=total_count - closed_count,
-                    total_score=total_score,
-                    closure_rate=closure_rate,
-                    avg_resolution_days=avg_resolution_days,
-                    performance_grade=grade,
-                    generated_by_id=user_id,
-                    generated_at=datetime.utcnow()
-                )
-                session.add(report)
-            
-            session.flush()
+                QualityNCIssue.company_id == user.company_id,
+                QualityNCIssue.project_id == project_id,
+                QualityNCIssue.assigned_contractor_id == contractor_id,
+                QualityNCIssue.raised_at >= datetime.combine(start, datetime.min.time()),
+                QualityNCIssue.raised_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+            ).order_by(QualityNCIssue.raised_at).all()
             
             return jsonify({
-                'report': report.to_dict(),
+                'period': period_label(report_type, year, number),
+                'report': report.to_dict() if report else None,
                 'issues': [nc.to_dict() for nc in issues]
             }), 200
             
@@ -14,7 +14,7 @@ Compliance: ISO 9001:2015 Clause 8.7 (Control of nonconforming outputs)
 """
 
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 import enum
 from server.db import Base
@@ -97,6 +97,10 @@ class QualityNCIssue(Base):
     6. Issues can be transferred between contractors
     """
     __tablename__ = 'quality_nc_issues'
+    __table_args__ = (
+        Index('ix_quality_nc_issues_overdue_deadline', 'is_overdue', 'deadline_date'),  # Overdue sweep
+        Index('ix_quality_nc_issues_updated', 'updated_at'),  # Score report refresh
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -127,6 +131,7 @@ class QualityNCIssue(Base):
     severity = Column(SQLEnum(NCIssueSeverity), nullable=False)
     severity_score = Column(Float, nullable=False)  # Auto-calculated: HIGH=1.0, MODERATE=0.5, LOW=0.25
     deadline_date = Column(Date, nullable=False)
+    is_overdue = Column(Boolean, default=False)  # Open past deadline_date - maintained by nc_sweeper
     
     # Recommendation from raiser
     recommended_action = Column(Text, nullable=True)
@@ -197,6 +202,7 @@ class QualityNCIssue(Base):
             'severity': self.severity.value if self.severity else None,
             'severityScore': self.severity_score,
             'deadlineDate': self.deadline_date.isoformat() if self.deadline_date else None,
+            'isOverdue': bool(self.is_overdue),
             'recommendedAction': self.recommended_action,
             'raisedById': self.raised_by_id,
             'raisedByRole': self.raised_by_role,
@@ -269,7 +275,7 @@ class ConcreteNCNotification(Base):
     id = Column(Integer, primary_key=True)
     company_id = Column(Integer, ForeignKey('companies.id'), nullable=False)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    nc_issue_id = Column(Integer, ForeignKey('concrete_nc_issues.id'), nullable=False)
+    nc_issue_id = Column(Integer, ForeignKey('quality_nc_issues.id'), nullable=False)
     
     # Notification details
     notification_type = Column(String(50), nullable=False)  # issue_raised, contractor_response, verified, closed, transferred
@@ -310,13 +316,14 @@ class ConcreteNCNotification(Base):
 class ConcreteNCScoreReport(Base):
     """
     Monthly/Weekly scoring reports for contractors based on NC issues.
+    Precomputed by nc_sweeper for the issues raised in each period.
     
-    Scoring system:
-    - High severity NC (open): +1.0 point
-    - Moderate severity NC (open): +0.5 points
-    - Low severity NC (open): +0.25 points
+    Scoring system (severity points):
+    - High severity NC: 1.0 point
+    - Moderate severity NC: 0.5 points
+    - Low severity NC: 0.25 points
     
-    Lower score = Better performance
+    Score out of 10 = closed points / raised points - higher = better performance
     """
     __tablename__ = 'concrete_nc_score_reports'
     
@@ -345,14 +352,14 @@ class ConcreteNCScoreReport(Base):
     issues_overdue = Column(Integer, default=0)
     
     # Score calculation
-    total_score = Column(Float, default=0.0)  # Sum of severity scores for open issues
+    total_score = Column(Float, default=0.0)  # Out of 10: closed severity points / raised severity points
     performance_grade = Column(String(10), nullable=True)  # A, B, C, D, F based on score
     
     # Average resolution time (in days)
     avg_resolution_days = Column(Float, nullable=True)
     
-    # Generated by
-    generated_by_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    # Generated by (None = nc_sweeper)
+    generated_by_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     generated_at = Column(DateTime, default=datetime.utcnow)
     
     # Metadata
@@ -40,11 +40,81 @@ class Config:
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 
+    # Audit log storage (location verifications, permit audit logs)
+    LOG_ARCHIVE_DIR = Path(os.environ.get('LOG_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'logs')))
+    LOG_RETENTION_MONTHS = int(os.environ.get('LOG_RETENTION_MONTHS', '12'))  # Months kept in hot tables
+    LOG_PARTITIONS_AHEAD = int(os.environ.get('LOG_PARTITIONS_AHEAD', '3'))  # Future monthly partitions (Postgres)
+    LOG_QUERY_DEFAULT_DAYS = int(os.environ.get('LOG_QUERY_DEFAULT_DAYS', '30'))  # Default log query window
+
+    # Closed-project archives (rows moved out of the hot tables into one zip per project)
+    PROJECT_ARCHIVE_DIR = Path(os.environ.get('PROJECT_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'projects')))
+    PROJECT_ARCHIVE_STATUSES = tuple(os.environ.get(
+        'PROJECT_ARCHIVE_STATUSES', 'completed,cancelled'
+    ).split(','))  # Project statuses that may be archived
+
+    # Expiry management (PPE, inductions, worker certifications)
+    EXPIRY_HORIZON_DAYS = int(os.environ.get('EXPIRY_HORIZON_DAYS', '90'))  # Days ahead kept in expiry_buckets
+
+    # Password hashing (werkzeug method string; older hashes are upgraded on login)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    # KDF processes per app worker (0 = inline); default splits the host's CPUs across gunicorn workers
+    PASSWORD_HASH_WORKERS = int(os.environ.get(
+        'PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // max(int(os.environ.get('GUNICORN_WORKERS', '1')), 1))
+    ))
+    # Queued + running KDFs per app worker before 503 (keep below GUNICORN_THREADS)
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 2 * max(PASSWORD_HASH_WORKERS, 1)))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))  # Seconds to wait for a KDF result
+
+    # Response optimization
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))  # Smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+    ETAG_SALT = os.environ.get('ETAG_SALT', os.environ.get('RELEASE_VERSION', ''))  # Change per deploy to invalidate ETags
+
+    # Offline sync (batched mutations)
+    SYNC_MAX_MUTATIONS = int(os.environ.get('SYNC_MAX_MUTATIONS', '200'))  # Operations per /api/sync/mutations request
+    IDEMPOTENCY_KEY_RETENTION_DAYS = int(os.environ.get('IDEMPOTENCY_KEY_RETENTION_DAYS', '30'))  # Replay window
+
+    # Project dashboard
+    DASHBOARD_CACHE_TTL_SECONDS = int(os.environ.get('DASHBOARD_CACHE_TTL_SECONDS', '30'))  # Composite payload per project
+    DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', '4'))  # Sections computed in parallel (1 = sequential)
+
+    # Real-time notifications (SSE)
+    NOTIFICATION_BROKER_URL = os.environ.get('NOTIFICATION_BROKER_URL', '')  # redis://... for multi-process fan-out; empty = in-process
+    NOTIFICATION_HEARTBEAT_SECONDS = int(os.environ.get('NOTIFICATION_HEARTBEAT_SECONDS', '15'))  # Keep-alive comment interval
+    NOTIFICATION_STREAM_MAX_SECONDS = int(os.environ.get('NOTIFICATION_STREAM_MAX_SECONDS', '300'))  # Client reconnects after this
+    NOTIFICATION_RETRY_MS = int(os.environ.get('NOTIFICATION_RETRY_MS', '3000'))  # EventSource reconnect delay
+
+    # NC sweeper (overdue flags, overdue notifications, score reports)
+    NC_SWEEP_BATCH_SIZE = int(os.environ.get('NC_SWEEP_BATCH_SIZE', '200'))  # NCs flagged and notified per commit
+    NC_SCORE_LOOKBACK_DAYS = int(os.environ.get('NC_SCORE_LOOKBACK_DAYS', '2'))  # Must exceed the sweep interval
+    NC_SWEEP_LOCK_SECONDS = int(os.environ.get('NC_SWEEP_LOCK_SECONDS', '3600'))  # Lock of a crashed sweep expires after this; above the longest sweep
+
+    # Tenant read cache (projects, vendors and other slow-changing reference data)
+    TENANT_CACHE_URL = os.environ.get('TENANT_CACHE_URL')  # redis://... to share entries across workers; in-process LRU if unset (still consistent)
+    TENANT_CACHE_TTL_SECONDS = int(os.environ.get('TENANT_CACHE_TTL_SECONDS', '300'))  # Upper bound; writes invalidate sooner
+    TENANT_CACHE_MAX_ENTRIES = int(os.environ.get('TENANT_CACHE_MAX_ENTRIES', '5000'))  # Per-process LRU size
+
+    # SQL query profiler (per-request query counts, N+1 detection)
+    QUERY_PROFILE_HEADERS = os.environ.get('QUERY_PROFILE_HEADERS', 'False').lower() == 'true'  # Server-Timing db/app header
+    QUERY_PROFILE_HISTORY = int(os.environ.get('QUERY_PROFILE_HISTORY', '200'))  # Recent profiles kept per worker
+    QUERY_PROFILE_LOG_MIN_QUERIES = int(os.environ.get('QUERY_PROFILE_LOG_MIN_QUERIES', '25'))  # Log requests with this many queries
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', '5'))  # Same statement shape this often in one request
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', '0'))  # Max queries per request under app.testing; 0 = off
+
+    # Metrics and readiness (/metrics needs prometheus_client; PROMETHEUS_MULTIPROC_DIR is set by gunicorn.conf.py)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token required by /metrics when set
+    HEALTH_READY_MAX_DB_MS = float(os.environ.get('HEALTH_READY_MAX_DB_MS', '1000'))  # /health/ready fails above this SELECT 1 time
+
+    # Vendor scorecards
+    VENDOR_MAX_CONCRETE_TEMP_C = float(os.environ.get('VENDOR_MAX_CONCRETE_TEMP_C', '35'))  # Hot delivery above this
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     DATABASE_URL = os.environ.get('DATABASE_URL', f'sqlite:///{BASE_DIR}/data.sqlite3')
+    QUERY_PROFILE_HEADERS = os.environ.get('QUERY_PROFILE_HEADERS', 'True').lower() == 'true'
 
 
 class ProductionConfig(Config):
@@ -0,0 +1,330 @@
+"""
+Cube Acceptance Analytics (IS 456:2000 Clause 16, Table 11 / IS 516)
+
+Project-wide statistical acceptance of 28-day cube results, per concrete grade.
+Per-set pass/fail (CubeTestRegister.calculate_results) judges one set against its
+required strength; this module applies the group criteria to the whole series:
+
+- Test result: average of the cubes in one set (average_strength_mpa)
+- Individual criterion: every result >= fck - 3 (M15) / fck - 4 (M20 and above)
+- Group criterion: mean of each group of 4 non-overlapping consecutive results
+  >= max(fck + 0.825 * sigma (rounded to 0.5 N/mm2), fck + 3 (M15) / fck + 4 (M20+))
+- sigma: established standard deviation of the last 30 results up to the end of
+  the group (Clause 9.2.4.1); Table 8 assumed value until 30 results exist
+- Characteristic strength estimate: mean - 1.65 * sigma of the latest 30 results
+
+Results are held per project and grade as NumPy arrays. A re-run only reloads the
+cube tests changed since the cached project version (sync change feed) and
+recomputes the grades they belong to.
+
+Endpoints:
+- GET /api/cube-tests/acceptance?project_id=<id>&grade=<M30>
+"""
+
+import re
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, select
+
+from .db import session_scope
+from .models import CubeTestRegister, BatchRegister, MixDesign
+from .sync_models import SyncChange, project_change_version
+from .cube_tests import project_access_required
+from .response_optimization import project_version_etag
+
+logger = logging.getLogger(__name__)
+
+cube_acceptance_bp = Blueprint('cube_acceptance', __name__)
+
+ACCEPTANCE_AGE_DAYS = 28
+GROUP_SIZE = 4
+SIGMA_SAMPLE_SIZE = 30
+CACHED_PROJECTS = 256
+
+# IS 456 Table 8 - assumed standard deviation until 30 results are available
+ASSUMED_SIGMA = ((15, 3.5), (25, 4.0))
+ASSUMED_SIGMA_DEFAULT = 5.0
+
+GRADE_PATTERN = re.compile(r'M\s*(\d+)', re.IGNORECASE)
+
+# Writes to these entities can change the grade a cube test is judged under
+_GRADE_SOURCES = ('batches', 'mix_designs')
+
+
+def parse_fck(grade):
+    """Characteristic strength (N/mm2) from a grade label: 'M30' -> 30, 'M40FF' -> 40"""
+    match = GRADE_PATTERN.match((grade or '').strip())
+    return int(match.group(1)) if match else None
+
+
+def assumed_sigma(fck):
+    for upper, sigma in ASSUMED_SIGMA:
+        if fck <= upper:
+            return sigma
+    return ASSUMED_SIGMA_DEFAULT
+
+
+def _round_half(values):
+    """Round to the nearest 0.5 N/mm2"""
+    return np.floor(values * 2 + 0.5) / 2
+
+
+# ========================================
+# ENGINE
+# ========================================
+
+def evaluate_series(strengths, fck):
+    """
+    Acceptance of one grade's results in sampling order.
+
+    strengths: 1-D array of test results (N/mm2)
+    Returns a dict of NumPy arrays / scalars:
+      individual_pass[n], group_mean[g], group_sigma[g], group_established[g],
+      group_threshold[g], group_min[g], group_pass[g], mean, sigma, sigma_established,
+      characteristic_strength, individual_limit
+    """
+    x = np.asarray(strengths, dtype=np.float64)
+    n = x.size
+    margin = 3.0 if fck <= 15 else 4.0
+    fallback = assumed_sigma(fck)
+
+    # Rolling sigma over the last 30 results ending at each index (NaN before 30)
+    rolling_sigma = np.full(n, np.nan)
+    if n >= SIGMA_SAMPLE_SIZE:
+        rolling_sigma[SIGMA_SAMPLE_SIZE - 1:] = sliding_window_view(x, SIGMA_SAMPLE_SIZE).std(axis=1, ddof=1)
+
+    individual_limit = fck - margin
+    individual_pass = x >= individual_limit
+
+    groups = n // GROUP_SIZE
+    grouped = x[:groups * GROUP_SIZE].reshape(groups, GROUP_SIZE)
+    group_end = np.arange(groups) * GROUP_SIZE + GROUP_SIZE - 1
+    group_sigma = rolling_sigma[group_end]
+    group_established = ~np.isnan(group_sigma)
+    group_sigma = np.where(group_established, group_sigma, fallback)
+    group_threshold = np.maximum(_round_half(fck + 0.825 * group_sigma), fck + margin)
+    group_mean = grouped.mean(axis=1)
+    group_min = grouped.min(axis=1)
+    group_pass = (group_mean >= group_threshold) & (group_min >= individual_limit)
+
+    sigma_established = n >= SIGMA_SAMPLE_SIZE
+    sigma = float(rolling_sigma[-1]) if sigma_established else fallback
+    latest = x[-SIGMA_SAMPLE_SIZE:]
+    return {
+        "individual_limit": individual_limit,
+        "individual_pass": individual_pass,
+        "group_mean": group_mean,
+        "group_min": group_min,
+        "group_sigma": group_sigma,
+        "group_established": group_established,
+        "group_threshold": group_threshold,
+        "group_pass": group_pass,
+        "mean": float(x.mean()) if n else None,
+        "sigma": sigma,
+        "sigma_established": sigma_established,
+        "characteristic_strength": float(latest.mean() - 1.65 * sigma) if n else None,
+    }
+
+
+def grade_report(grade, ids, strengths):
+    """JSON-ready acceptance report for one grade (ids/strengths in sampling order)"""
+    fck = parse_fck(grade)
+    result = evaluate_series(strengths, fck)
+    ids = np.asarray(ids)
+    groups = result["group_pass"].size
+
+    group_rows = [
+        {
+            "group": k + 1,
+            "testIds": ids[k * GROUP_SIZE:(k + 1) * GROUP_SIZE].tolist(),
+            "mean": round(float(result["group_mean"][k]), 2),
+            "minimum": round(float(result["group_min"][k]), 2),
+            "sigma": round(float(result["group_sigma"][k]), 2),
+            "sigmaSource": "established" if result["group_established"][k] else "assumed",
+            "requiredMean": float(result["group_threshold"][k]),
+            "status": "pass" if result["group_pass"][k] else "fail",
+        }
+        for k in range(groups)
+    ]
+    failed_groups = int(groups - np.count_nonzero(result["group_pass"]))
+    individual_failures = ids[~result["individual_pass"]].tolist()
+
+    return {
+        "grade": grade,
+        "fck": fck,
+        "results": int(ids.size),
+        "meanStrength": round(result["mean"], 2) if result["mean"] is not None else None,
+        "standardDeviation": round(result["sigma"], 2),
+        "sigmaSource": "established" if result["sigma_established"] else "assumed",
+        "characteristicStrength": (round(result["characteristic_strength"], 2)
+                                   if result["characteristic_strength"] is not None else None),
+        "individualLimit": result["individual_limit"],
+        "individualFailures": individual_failures,
+        "groups": group_rows,
+        "failedGroups": failed_groups,
+        "pendingResults": int(ids.size - groups * GROUP_SIZE),  # Waiting for a complete group of 4
+        "compliant": failed_groups == 0 and not individual_failures,
+    }
+
+
+# ========================================
+# INCREMENTAL PROJECT STATE
+# ========================================
+
+class _ProjectResults:
+    """Latest acceptance inputs of one project: test id -> (grade, sort key, strength)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # Held while this project refreshes; other projects run alongside
+        self.version = None
+        self.tests = {}
+        self.reports = {}  # grade -> report (only grades touched since the last run are rebuilt)
+
+
+_projects = OrderedDict()
+_lock = threading.Lock()  # Guards _projects only
+
+
+def _project_state(project_id):
+    with _lock:
+        state = _projects.get(project_id)
+        if state is None:
+            state = _projects[project_id] = _ProjectResults()
+            while len(_projects) > CACHED_PROJECTS:
+                _projects.popitem(last=False)
+        else:
+            _projects.move_to_end(project_id)
+        return state
+
+
+def _result_query(project_id):
+    grade = func.coalesce(func.nullif(CubeTestRegister.concrete_grade, ''), MixDesign.concrete_grade)
+    return select(
+        CubeTestRegister.id, grade.label('grade'), CubeTestRegister.casting_date,
+        CubeTestRegister.average_strength_mpa
+    ).select_from(CubeTestRegister).outerjoin(
+        BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+    ).outerjoin(
+        MixDesign, MixDesign.id == BatchRegister.mix_design_id
+    ).where(
+        CubeTestRegister.project_id == project_id,
+        CubeTestRegister.test_age_days == ACCEPTANCE_AGE_DAYS,
+        CubeTestRegister.is_deleted == False,
+        CubeTestRegister.average_strength_mpa.isnot(None)
+    )
+
+
+def _load(session, project_id, ids=None):
+    """{id: (grade, sort key, strength)} for qualifying results (all, or only `ids`)"""
+    query = _result_query(project_id)
+    if ids is not None:
+        query = query.where(CubeTestRegister.id.in_(ids))
+    return {
+        row.id: (row.grade, (row.casting_date, row.id), row.average_strength_mpa)
+        for row in session.execute(query)
+        if parse_fck(row.grade) is not None
+    }
+
+
+def _refresh(session, state, project_id, version):
+    """Bring `state` up to `version`; returns the grades whose inputs changed"""
+    if state.version is None:
+        state.tests = _load(session, project_id)
+        return {grade for grade, _, _ in state.tests.values()}
+
+    changed = session.execute(
+        select(SyncChange.entity, SyncChange.entity_id).where(
+            SyncChange.project_id == project_id,
+            SyncChange.seq > state.version,
+            SyncChange.entity.in_(('cube_tests',) + _GRADE_SOURCES)
+        ).distinct()
+    ).all()
+    if any(entity in _GRADE_SOURCES for entity, _ in changed):
+        # A batch or mix design edit can move tests between grades - reload everything
+        previous = {grade for grade, _, _ in state.tests.values()}
+        state.tests = _load(session, project_id)
+        return previous | {grade for grade, _, _ in state.tests.values()}
+
+    ids = [entity_id for _, entity_id in changed]
+    touched = {state.tests.pop(test_id)[0] for test_id in ids if test_id in state.tests}
+    fresh = _load(session, project_id, ids) if ids else {}
+    state.tests.update(fresh)
+    return touched | {grade for grade, _, _ in fresh.values()}
+
+
+def _rebuild(state, grades):
+    by_grade = defaultdict(list)
+    for test_id, (grade, sort_key, strength) in state.tests.items():
+        if grade in grades:
+            by_grade[grade].append((sort_key, test_id, strength))
+
+    for grade in grades:
+        rows = by_grade.get(grade)
+        if not rows:
+            state.reports.pop(grade, None)
+            continue
+        rows.sort()
+        ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        strengths = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        state.reports[grade] = grade_report(grade, ids, strengths)
+
+
+def project_acceptance(session, project_id):
+    """Acceptance reports of a project keyed by grade, recomputed only where results changed"""
+    version = project_change_version(session, project_id)
+    state = _project_state(project_id)
+    with state.lock:
+        # A request that read an older version than the cached one keeps the newer reports
+        if state.version is None or version > state.version:
+            _rebuild(state, _refresh(session, state, project_id, version))
+            state.version = version
+        return dict(state.reports)
+
+
+# ========================================
+# API ENDPOINTS
+# ========================================
+
+@cube_acceptance_bp.route('/api/cube-tests/acceptance', methods=['GET'])
+@jwt_required()
+@project_access_required
+@project_version_etag
+def get_cube_acceptance():
+    """
+    IS 456 statistical acceptance of 28-day cube results, per grade.
+
+    Query Parameters:
+    - project_id (required)
+    - grade (optional): Only this grade (e.g. M30)
+
+    Returns:
+    - One report per grade: mean, sigma (established/assumed), characteristic strength,
+      individual failures and the group-of-4 results
+    """
+    try:
+        project_id = request.args.get('project_id', type=int)
+        grade = request.args.get('grade')
+
+        with session_scope() as session:
+            reports = project_acceptance(session, project_id)
+
+        if grade:
+            reports = {g: r for g, r in reports.items() if g.upper() == grade.strip().upper()}
+
+        grades = sorted(reports.values(), key=lambda r: (r["fck"], r["grade"]))
+        return jsonify({
+            "success": True,
+            "testAgeDays": ACCEPTANCE_AGE_DAYS,
+            "compliant": all(r["compliant"] for r in grades),
+            "grades": grades
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error computing cube acceptance: {e}")
+        return jsonify({"error": "Failed to compute cube acceptance"}), 500
@@ -22,13 +22,21 @@ from functools import wraps
 import traceback
 import json
 
+from sqlalchemy import func, insert, case, literal
+
 try:
     from .db import session_scope
+    from .serialization import RowSerializer, Const, model_shape
+    from .response_optimization import project_version_etag
+    from .sync_models import record_changes
     from .models import CubeTestRegister, BatchRegister, RMCVendor, MixDesign, Project, ProjectMembership, User, TestReminder, ThirdPartyLab
     from .email_notifications import notify_test_failure_email
     from .notifications import notify_test_failure
 except ImportError:
     from db import session_scope
+    from serialization import RowSerializer, Const, model_shape
+    from response_optimization import project_version_etag
+    from sync_models import record_changes
     from models import CubeTestRegister, BatchRegister, RMCVendor, MixDesign, Project, ProjectMembership, User, TestReminder, ThirdPartyLab
     from models import CubeTestRegister, BatchRegister, RMCVendor, MixDesign, Project, ProjectMembership, User
     from email_notifications import notify_test_failure_email
@@ -38,6 +46,41 @@ except ImportError:
 # Create Blueprint
 cube_tests_bp = Blueprint('cube_tests', __name__)
 
+
+def _cube_shape(n: int, name: str) -> dict:
+    """Nested cube dict of CubeTestRegister.to_dict() for cube n"""
+    column = lambda field: getattr(CubeTestRegister, f"cube_{n}_{field}")
+    return {
+        "name": Const(name),
+        "weight": column("weight_kg"),
+        "dimensions": {"length": column("length_mm"), "width": column("width_mm"), "height": column("height_mm")},
+        "load": column("load_kn"),
+        "strength": column("strength_mpa"),
+        "failureMode": getattr(CubeTestRegister, f"failure_mode_cube_{n}"),
+    }
+
+
+# Same payload as CubeTestRegister.to_dict() + list enrichment, read straight from Row tuples
+# (signature blobs are never loaded, only tested for NULL)
+CUBE_TEST_LIST_SERIALIZER = RowSerializer({
+    **model_shape(
+        CubeTestRegister,
+        exclude={c.key for c in CubeTestRegister.__table__.columns
+                 if c.key.startswith(('cube_1_', 'cube_2_', 'cube_3_', 'failure_mode_'))
+                 or c.key.endswith('_signature_data') or c.key == 'deleted_by'},
+        flags=('ncr_generated', 'notification_sent', 'is_deleted'),
+    ),
+    "cube1": _cube_shape(1, "A"),
+    "cube2": _cube_shape(2, "B"),
+    "cube3": _cube_shape(3, "C"),
+    "hasTesterSignature": CubeTestRegister.tester_signature_data.isnot(None),
+    "hasVerifierSignature": CubeTestRegister.verifier_signature_data.isnot(None),
+    "batch_number": case((CubeTestRegister.batch_id.is_(None), literal("Planned")), else_=BatchRegister.batch_number),
+    "mix_design_name": func.coalesce(func.nullif(MixDesign.mix_design_id, ''), MixDesign.project_name),
+    "mix_design_grade": case((CubeTestRegister.batch_id.is_(None), CubeTestRegister.concrete_grade),
+                             else_=MixDesign.concrete_grade),
+})
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -164,6 +207,248 @@ def generate_ncr_number(project_id: int, test_id: int) -> str:
     return f"NCR-P{project_id}-CT{test_id}-{timestamp}"
 
 
+def apply_cube_results(test, data: dict) -> bool:
+    """
+    Apply cube loads/strengths, testing date and remarks to a cube test, then
+    recalculate average strength, pass/fail and NCR (shared with batched sync).
+    
+    Returns: True when this update turned the test into a failure
+    Raises: ValueError on unparseable numbers or dates
+    """
+    # Update cube strengths/loads
+    for i in range(1, 4):
+        load_key = f'cube_{i}_load_kn'
+        strength_key = f'cube_{i}_strength_mpa'
+        
+        # Handle Load Input
+        if load_key in data:
+            load = float(data[load_key]) if data[load_key] else None
+            setattr(test, load_key, load)
+            
+            if load is not None:
+                # Calculate Strength: (Load * 1000) / Area
+                # Default to 150x150mm if dimensions not provided
+                length = getattr(test, f'cube_{i}_length_mm') or 150.0
+                width = getattr(test, f'cube_{i}_width_mm') or 150.0
+                area = length * width
+                strength = round((load * 1000) / area, 2)
+                setattr(test, strength_key, strength)
+            else:
+                setattr(test, strength_key, None)
+        
+        # Handle Direct Strength Input (overrides calculated if provided)
+        elif strength_key in data:
+            strength = float(data[strength_key]) if data[strength_key] else None
+            setattr(test, strength_key, strength)
+    
+    # Update testing date
+    if 'testing_date' in data:
+        try:
+            test.testing_date = datetime.fromisoformat(data['testing_date'].replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError("Invalid testing_date format")
+    
+    # Update remarks
+    if 'remarks' in data:
+        test.remarks = data['remarks']
+    
+    # Auto-calculate average strength
+    test.average_strength_mpa = calculate_average_strength(
+        test.cube_1_strength_mpa,
+        test.cube_2_strength_mpa,
+        test.cube_3_strength_mpa
+    )
+    
+    # Determine pass/fail status
+    old_status = test.pass_fail_status
+    test.pass_fail_status = determine_pass_fail(
+        test.average_strength_mpa,
+        test.required_strength_mpa,
+        test.test_age_days
+    )
+    
+    # Generate NCR on failure
+    newly_failed = test.pass_fail_status == 'fail' and old_status != 'fail'
+    if newly_failed:
+        test.ncr_generated = True
+        test.ncr_number = generate_ncr_number(test.project_id, test.id)
+    
+    test.updated_at = datetime.utcnow()
+    return newly_failed
+
+
+def notify_cube_test_failure(test_id):
+    """
+    Send Email + WhatsApp failure alerts for a committed cube test; never raises.
+    Call after the transaction that failed the test has committed: the alert data is
+    read in a short session of its own, so no transaction or row lock is held while
+    the mail and WhatsApp APIs are called, and a rolled back failure is never announced.
+    """
+    try:
+        with session_scope() as session:
+            test = session.get(CubeTestRegister, test_id)
+            if not test:
+                return
+            batch = session.query(BatchRegister).filter_by(id=test.batch_id).first()
+            mix_design = session.query(MixDesign).filter_by(id=batch.mix_design_id).first() if batch else None
+            vendor = session.query(RMCVendor).filter_by(id=batch.rmc_vendor_id).first() if batch else None
+            project = session.query(Project).filter_by(id=test.project_id).first()
+            
+            # Prepare notification data
+            notification_data = {
+                'test_id': test.id,
+                'batch_number': batch.batch_number if batch else "Unknown",
+                'mix_design_grade': mix_design.concrete_grade if mix_design else "Unknown",
+                'test_age_days': test.test_age_days,
+                'expected_strength': test.required_strength_mpa,
+                'average_strength': test.average_strength_mpa,
+                'cube_1_strength': test.cube_1_strength_mpa,
+                'cube_2_strength': test.cube_2_strength_mpa,
+                'cube_3_strength': test.cube_3_strength_mpa,
+                'ncr_number': test.ncr_number,
+                'project_name': project.name if project else "Unknown Project",
+                'vendor_name': vendor.vendor_name if vendor else "Unknown Vendor",
+                'vendor_email': vendor.contact_email if vendor and getattr(vendor, 'contact_email', None) else None,
+                'casting_date': test.casting_date.strftime("%Y-%m-%d") if test.casting_date else None,
+                'testing_date': test.testing_date.strftime("%Y-%m-%d") if test.testing_date else None
+            }
+        
+        # Send email notification
+        try:
+            notify_test_failure_email(**notification_data)
+        except Exception as email_error:
+            print(f"Warning: Email notification failed: {str(email_error)}")
+        
+        # Send WhatsApp notification
+        try:
+            notify_test_failure(test_id, notification_data)
+        except Exception as whatsapp_error:
+            print(f"Warning: WhatsApp notification failed: {str(whatsapp_error)}")
+        
+        # Mark notification as sent (through the ORM so the sync change feed records it)
+        with session_scope() as session:
+            test = session.get(CubeTestRegister, test_id)
+            if test:
+                test.notification_sent = True
+        
+    except Exception as notification_error:
+        print(f"Warning: Notification failed: {str(notification_error)}")
+        # Don't fail the update if notification fails
+
+
+def create_cube_sets(session, project_id: int, batch_ids: list, casting_date: datetime, test_ages: list,
+                     cast_by: int, sets_per_age: int = 1, third_party_assignments: dict = None,
+                     casting_time: str = None, curing_method: str = 'Water', curing_temperature: float = None,
+                     pour=None):
+    """
+    Create cube sets and test reminders for many batches in one set-based transaction.
+    
+    The reminder schedule (casting_date + age) is computed once per age, next set
+    numbers and required strengths are fetched with one query each, and cube sets
+    and reminders are written with one multi-row INSERT ... RETURNING apiece.
+    
+    Returns: (created_tests, created_reminders) in batch → age → set order
+    """
+    third_party_assignments = third_party_assignments or {}
+    schedule = {age: casting_date + timedelta(days=age) for age in test_ages}
+    
+    next_set = dict(session.query(
+        CubeTestRegister.batch_id, func.max(CubeTestRegister.set_number)
+    ).filter(
+        CubeTestRegister.batch_id.in_(batch_ids),
+        CubeTestRegister.is_deleted == False
+    ).group_by(CubeTestRegister.batch_id).all())
+    
+    # Convert mix design PSI to MPa (1 psi = 0.00689476 MPa)
+    required_strength = {
+        batch_id: round(psi * 0.00689476, 2) if psi else None
+        for batch_id, psi in session.query(BatchRegister.id, MixDesign.specified_strength_psi)
+        .outerjoin(MixDesign, MixDesign.id == BatchRegister.mix_design_id)
+        .filter(BatchRegister.id.in_(batch_ids))
+    }
+    
+    pour_fields = {
+        'pour_activity_id': pour.id if pour else None,
+        'structure_type': pour.structural_element_type if pour else None,
+        'structure_location': pour.location_description if pour else None,
+        'concrete_grade': pour.design_grade if pour else None,
+        'concrete_type': 'PT' if pour and pour.concrete_type == 'PT' else 'Normal',
+    }
+    
+    rows = []
+    for batch_id in batch_ids:
+        set_number = next_set.get(batch_id) or 0
+        for test_age in test_ages:
+            for _ in range(sets_per_age):
+                set_number += 1
+                rows.append({
+                    'batch_id': batch_id,
+                    'project_id': project_id,
+                    'set_number': set_number,
+                    'test_age_days': test_age,
+                    'cube_identifier': None,  # Set-level record (A/B/C are in the fields)
+                    'third_party_lab_id': third_party_assignments.get(str(test_age)),
+                    'casting_date': casting_date,
+                    'casting_time': casting_time,
+                    'cast_by': cast_by,
+                    'curing_method': curing_method,
+                    'curing_temperature': curing_temperature,
+                    'required_strength_mpa': required_strength.get(batch_id),
+                    'pass_fail_status': 'pending',
+                    **pour_fields
+                })
+    
+    if not rows:
+        return [], []
+    
+    inserted = session.execute(
+        insert(CubeTestRegister).values(rows).returning(
+            CubeTestRegister.id, CubeTestRegister.batch_id, CubeTestRegister.set_number
+        )
+    ).all()
+    test_ids = {(r.batch_id, r.set_number): r.id for r in inserted}
+    record_changes(session, CubeTestRegister, project_id, test_ids.values())
+    
+    reminder_rows = [{
+        'cube_test_id': test_ids[(row['batch_id'], row['set_number'])],
+        'project_id': project_id,
+        'reminder_date': schedule[row['test_age_days']],
+        'test_age_days': row['test_age_days'],
+        'status': 'pending'
+    } for row in rows]
+    
+    reminder_ids = {
+        r.cube_test_id: r.id for r in session.execute(
+            insert(TestReminder).values(reminder_rows).returning(TestReminder.id, TestReminder.cube_test_id)
+        ).all()
+    }
+    record_changes(session, TestReminder, project_id, reminder_ids.values())
+    
+    created_tests = []
+    created_reminders = []
+    for row in rows:
+        test_id = test_ids[(row['batch_id'], row['set_number'])]
+        testing_date = schedule[row['test_age_days']]
+        created_tests.append({
+            "id": test_id,
+            "batchId": row['batch_id'],
+            "setNumber": row['set_number'],
+            "testAgeDays": row['test_age_days'],
+            "castingDate": casting_date.isoformat(),
+            "testingDate": testing_date.isoformat(),
+            "thirdPartyLabId": row['third_party_lab_id'],
+            "cubes": ["A", "B", "C"]
+        })
+        created_reminders.append({
+            "id": reminder_ids[test_id],
+            "cubeTestId": test_id,
+            "reminderDate": testing_date.isoformat(),
+            "testAgeDays": row['test_age_days']
+        })
+    
+    return created_tests, created_reminders
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -171,6 +456,7 @@ def generate_ncr_number(project_id: int, test_id: int) -> str:
 @cube_tests_bp.route('/api/cube-tests', methods=['GET'])
 @jwt_required()
 @project_access_required
+@project_version_etag
 def get_cube_tests():
     """
     Get list of cube tests for a project.
@@ -195,63 +481,41 @@ def get_cube_tests():
         date_to = request.args.get('date_to')
         
         with session_scope() as session:
-            # Base query
-            query = session.query(CubeTestRegister).filter_by(
-                project_id=project_id,
-                is_deleted=False
+            # Base query - batch/mix enrichment is joined in rather than fetched per row
+            query = CUBE_TEST_LIST_SERIALIZER.select().select_from(CubeTestRegister).outerjoin(
+                BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+            ).outerjoin(
+                MixDesign, MixDesign.id == BatchRegister.mix_design_id
+            ).where(
+                CubeTestRegister.project_id == project_id,
+                CubeTestRegister.is_deleted == False
             )
             
             # Apply filters
             if batch_id:
-                query = query.filter_by(batch_id=batch_id)
+                query = query.where(CubeTestRegister.batch_id == batch_id)
             if status:
-                query = query.filter_by(pass_fail_status=status)
+                query = query.where(CubeTestRegister.pass_fail_status == status)
             if age:
-                query = query.filter_by(test_age_days=age)
+                query = query.where(CubeTestRegister.test_age_days == age)
             
             # Date range filter
             if date_from:
                 try:
                     date_from_dt = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                    query = query.filter(CubeTestRegister.casting_date >= date_from_dt)
+                    query = query.where(CubeTestRegister.casting_date >= date_from_dt)
                 except ValueError:
                     return jsonify({"error": "Invalid date_from format"}), 400
             
             if date_to:
                 try:
                     date_to_dt = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                    query = query.filter(CubeTestRegister.casting_date <= date_to_dt)
+                    query = query.where(CubeTestRegister.casting_date <= date_to_dt)
                 except ValueError:
                     return jsonify({"error": "Invalid date_to format"}), 400
             
-            tests = query.order_by(CubeTestRegister.casting_date.desc()).all()
-            
-            # Enrich with batch and mix design info
-            result = []
-            for test in tests:
-                test_dict = test.to_dict()
-                
-                # Add batch number
-                if test.batch_id:
-                    batch = session.query(BatchRegister).filter_by(id=test.batch_id).first()
-                    test_dict['batch_number'] = batch.batch_number if batch else None
-                    
-                    # Add mix design info
-                    if batch and batch.mix_design_id:
-                        mix = session.query(MixDesign).filter_by(id=batch.mix_design_id).first()
-                        # Map to existing MixDesign fields
-                        if mix:
-                            test_dict['mix_design_name'] = mix.mix_design_id or mix.project_name
-                            test_dict['mix_design_grade'] = mix.concrete_grade
-                        else:
-                            test_dict['mix_design_name'] = None
-                            test_dict['mix_design_grade'] = None
-                else:
-                    test_dict['batch_number'] = "Planned"
-                    test_dict['mix_design_name'] = None
-                    test_dict['mix_design_grade'] = test.concrete_grade
-                
-                result.append(test_dict)
+            rows = session.execute(query.order_by(CubeTestRegister.casting_date.desc())).all()
+            result = CUBE_TEST_LIST_SERIALIZER.dump(rows)
             
             return jsonify({
                 "success": True,
@@ -462,122 +726,28 @@ def update_cube_test(test_id):
             if not test:
                 return jsonify({"error": "Cube test not found"}), 404
             
-            # Update cube strengths/loads
-            for i in range(1, 4):
-                load_key = f'cube_{i}_load_kn'
-                strength_key = f'cube_{i}_strength_mpa'
-                
-                # Handle Load Input
-                if load_key in data:
-                    load = float(data[load_key]) if data[load_key] else None
-                    setattr(test, load_key, load)
-                    
-                    if load is not None:
-                        # Calculate Strength: (Load * 1000) / Area
-                        # Default to 150x150mm if dimensions not provided
-                        length = getattr(test, f'cube_{i}_length_mm') or 150.0
-                        width = getattr(test, f'cube_{i}_width_mm') or 150.0
-                        area = length * width
-                        strength = round((load * 1000) / area, 2)
-                        setattr(test, strength_key, strength)
-                    else:
-                        setattr(test, strength_key, None)
-                
-                # Handle Direct Strength Input (overrides calculated if provided)
-                elif strength_key in data:
-                    strength = float(data[strength_key]) if data[strength_key] else None
-                    setattr(test, strength_key, strength)
-
-            # Update testing date
-            if 'testing_date' in data:
-                try:
-                    test.testing_date = datetime.fromisoformat(data['testing_date'].replace('Z', '+00:00'))
-                except ValueError:
-                    return jsonify({"error": "Invalid testing_date format"}), 400
-            
-            # Update remarks
-            if 'remarks' in data:
-                test.remarks = data['remarks']
-            
-            # Auto-calculate average strength
-            test.average_strength_mpa = calculate_average_strength(
-                test.cube_1_strength_mpa,
-                test.cube_2_strength_mpa,
-                test.cube_3_strength_mpa
-            )
-            
-            # Determine pass/fail status
-            old_status = test.pass_fail_status
-            test.pass_fail_status = determine_pass_fail(
-                test.average_strength_mpa,
-                test.expected_strength_mpa,
-                test.test_age_days
-            )
-            
-            # Generate NCR on failure
-            if test.pass_fail_status == 'fail' and old_status != 'fail':
-                test.ncr_generated = True
-                test.ncr_number = generate_ncr_number(project_id, test_id)
-            
-            test.updated_at = datetime.utcnow()
+            try:
+                newly_failed = apply_cube_results(test, data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
             session.flush()
             
-            # Get enriched data for notifications
+            # Get enriched data for the response
             batch = session.query(BatchRegister).filter_by(id=test.batch_id).first()
             mix_design = session.query(MixDesign).filter_by(id=batch.mix_design_id).first() if batch else None
-            vendor = session.query(RMCVendor).filter_by(id=batch.vendor_id).first() if batch else None
-            project = session.query(Project).filter_by(id=project_id).first()
             
             test_dict = test.to_dict()
             test_dict['batch_number'] = batch.batch_number if batch else None
             # Use existing MixDesign fields
             test_dict['mix_design_name'] = (mix_design.mix_design_id or mix_design.project_name) if mix_design else None
         
-        # Send notifications on failure (Email + WhatsApp)
-        if test.pass_fail_status == 'fail' and old_status != 'fail':
-            try:
-                # Prepare notification data
-                notification_data = {
-                    'test_id': test_id,
-                    'batch_number': batch.batch_number if batch else "Unknown",
-                    'mix_design_grade': mix_design.concrete_grade if mix_design else "Unknown",
-                    'test_age_days': test.test_age_days,
-                    'expected_strength': test.expected_strength_mpa,
-                    'average_strength': test.average_strength_mpa,
-                    'cube_1_strength': test.cube_1_strength_mpa,
-                    'cube_2_strength': test.cube_2_strength_mpa,
-                    'cube_3_strength': test.cube_3_strength_mpa,
-                    'ncr_number': test.ncr_number,
-                    'project_name': project.name if project else "Unknown Project",
-                    'vendor_name': vendor.vendor_name if vendor else "Unknown Vendor",
-                    'vendor_email': vendor.contact_email if vendor and getattr(vendor, 'contact_email', None) else None,
-                    'casting_date': test.casting_date.strftime("%Y-%m-%d") if test.casting_date else None,
-                    'testing_date': test.testing_date.strftime("%Y-%m-%d") if test.testing_date else None
-                }
-                
-                # Send email notification
-                try:
-                    notify_test_failure_email(**notification_data)
-                except Exception as email_error:
-                    print(f"Warning: Email notification failed: {str(email_error)}")
-                
-                # Send WhatsApp notification
-                try:
-                    notify_test_failure(test_id, notification_data)
-                except Exception as whatsapp_error:
-                    print(f"Warning: WhatsApp notification failed: {str(whatsapp_error)}")
-                
-                # Mark notification as sent
-                test.notification_sent = True
-                session.flush()
-                
-            except Exception as notification_error:
-                print(f"Warning: Notification failed: {str(notification_error)}")
-                # Don't fail the update if notification fails
+        # Send notifications on failure (Email + WhatsApp), once the result is committed
+        if newly_failed:
+            notify_cube_test_failure(test_id)
         
         return jsonify({
             "success": True,
-            "message": f"Cube test updated successfully. Status: {test.pass_fail_status}",
+            "message": f"Cube test updated successfully. Status: {test_dict['passFailStatus']}",
             "cube_test": test_dict
         }), 200
     
@@ -750,9 +920,6 @@ def bulk_create_cube_sets():
         # Parse casting date
         casting_date = datetime.fromisoformat(casting_date_str.replace('Z', '+00:00'))
         
-        created_tests = []
-        created_reminders = []
-        
         with session_scope() as session:
             # Verify batch exists
             batch = session.query(BatchRegister).filter_by(
@@ -764,85 +931,14 @@ def bulk_create_cube_sets():
             if not batch:
                 return jsonify({"error": "Batch not found"}), 404
             
-            # Get mix design for required strength
-            mix_design = session.query(MixDesign).filter_by(
-                id=batch.mix_design_id
-            ).first()
-            
-            required_strength_mpa = None
-            if mix_design and mix_design.specified_strength_psi:
-                # Convert PSI to MPa (1 psi = 0.00689476 MPa)
-                required_strength_mpa = round(mix_design.specified_strength_psi * 0.00689476, 2)
-            
-            # Get existing set numbers for this batch
-            existing_sets = session.query(CubeTestRegister).filter_by(
-                batch_id=batch_id,
-                is_deleted=False
-            ).all()
-            max_set_number = max([s.set_number for s in existing_sets], default=0)
-            
-            current_set_number = max_set_number
-            
-            # Create cube sets for each test age
-            for test_age in test_ages:
-                # Get third-party lab assignment if specified
-                third_party_lab_id = third_party_assignments.get(str(test_age))
-                
-                # Create multiple sets per age if requested
-                for set_index in range(sets_per_age):
-                    current_set_number += 1
-                    
-                    # Calculate testing date (casting_date + test_age days)
-                    testing_date = casting_date + timedelta(days=test_age)
-                    
-                    # Create cube test record
-                    cube_test = CubeTestRegister(
-                        batch_id=batch_id,
-                        project_id=project_id,
-                        set_number=current_set_number,
-                        test_age_days=test_age,
-                        cube_identifier=None,  # Set-level record (A/B/C are in the fields)
-                        third_party_lab_id=third_party_lab_id,
-                        casting_date=casting_date,
-                        casting_time=casting_time,
-                        cast_by=user_id,
-                        curing_method=curing_method,
-                        curing_temperature=curing_temperature,
-                        required_strength_mpa=required_strength_mpa,
-                        pass_fail_status='pending'
-                    )
-                    
-                    session.add(cube_test)
-                    session.flush()  # Get the ID
-                    
-                    # Create test reminder
-                    reminder = TestReminder(
-                        cube_test_id=cube_test.id,
-                        project_id=project_id,
-                        reminder_date=testing_date,
-                        test_age_days=test_age,
-                        status='pending'
-                    )
-                    
-                    session.add(reminder)
-                    session.flush()
-                    
-                    created_tests.append({
-                        "id": cube_test.id,
-                        "setNumber": cube_test.set_number,
-                        "testAgeDays": test_age,
-                        "castingDate": casting_date.isoformat(),
-                        "testingDate": testing_date.isoformat(),
-                        "thirdPartyLabId": third_party_lab_id,
-                        "cubes": ["A", "B", "C"]
-                    })
-                    
-                    created_reminders.append({
-                        "id": reminder.id,
-                        "cubeTestId": cube_test.id,
-                        "reminderDate": testing_date.isoformat(),
-                        "testAgeDays": test_age
-                    })
+            created_tests, created_reminders = create_cube_sets(
+                session, project_id, [batch_id], casting_date, test_ages, user_id,
+                sets_per_age=sets_per_age,
+                third_party_assignments=third_party_assignments,
+                casting_time=casting_time,
+                curing_method=curing_method,
+                curing_temperature=curing_temperature
+            )
         
         return jsonify({
             "success": True,
@@ -0,0 +1,411 @@
+"""
+Project Dashboard API Blueprint
+All dashboard KPI tiles of a project in one request
+
+Endpoints:
+- GET /api/dashboard/<project_id>
+
+Replaces the dashboard's fan-out to /api/cube-tests, /api/batches,
+/api/concrete/nc/dashboard, /api/safety/analytics/summary, /api/tbt/dashboard,
+/api/ppe/statistics and /api/incidents/dashboard:
+- Auth, membership and module subscription are checked once
+- Each section is one (or two) grouped aggregate queries - no rows are loaded
+- Sections run in parallel on a small thread pool, one session per worker
+  (DASHBOARD_WORKERS=1 runs them in sequence in a single session)
+- The composite payload is cached per project for DASHBOARD_CACHE_TTL_SECONDS and
+  dropped when a commit writes to any source table of that project
+  (writes to tables without project_id - TBT attendance, workers - age out with the TTL)
+
+Sections are computed for the whole project and filtered to the caller's
+subscribed modules on the way out, so one cache entry serves every member.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, case, func, select
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .db import session_scope
+from .config import get_config
+from .models import BatchRegister, Company, CubeTestRegister, Project, ProjectMembership
+from .concrete_nc_models import QualityNCIssue, NCIssueSeverity, NCIssueStatus
+from .safety_models import FormSubmission, SafetyAction, Worker
+from .tbt_models import TBTSession, TBTAttendance
+from .ppe_tracking_models import PPEIssuance, IssuanceStatus
+from .incident_investigation_models import IncidentReport, IncidentType
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+NC_GRADES = ((9.0, 'A'), (7.0, 'B'), (5.0, 'C'), (3.0, 'D'))
+NC_SEVERITY_POINTS = {NCIssueSeverity.HIGH: 1.0, NCIssueSeverity.MODERATE: 0.5, NCIssueSeverity.LOW: 0.25}
+
+# Detached project identity handed to section workers
+ProjectRef = namedtuple('ProjectRef', 'id company_id')
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+# ========================================
+# SECTIONS
+# ========================================
+
+def cube_test_tiles(session, project, now):
+    row = session.execute(
+        select(
+            func.count(CubeTestRegister.id),
+            _count_if(CubeTestRegister.pass_fail_status == 'pass'),
+            _count_if(CubeTestRegister.pass_fail_status == 'fail'),
+            _count_if(CubeTestRegister.average_strength_mpa.is_(None)),
+            func.avg(case((CubeTestRegister.test_age_days == 28, CubeTestRegister.average_strength_mpa))),
+        ).where(CubeTestRegister.project_id == project.id, CubeTestRegister.is_deleted == False)
+    ).one()
+    total, passed, failed, awaiting, avg_28 = row
+    tested = passed + failed
+    return {
+        "total": total,
+        "passed": passed,
+        "failed": failed,
+        "awaitingResults": awaiting,
+        "passRate": round(passed * 100.0 / tested, 1) if tested else None,
+        "avgStrength28Day": round(avg_28, 2) if avg_28 is not None else None,
+    }
+
+
+def batch_tiles(session, project, now):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    row = session.execute(
+        select(
+            func.count(BatchRegister.id),
+            _count_if(BatchRegister.verification_status == 'pending'),
+            _count_if(BatchRegister.verification_status == 'approved'),
+            _count_if(BatchRegister.verification_status == 'rejected'),
+            func.coalesce(func.sum(func.coalesce(BatchRegister.quantity_received, BatchRegister.quantity_ordered)), 0),
+            _count_if(BatchRegister.delivery_date >= month_start),
+        ).where(BatchRegister.project_id == project.id, BatchRegister.is_deleted == False)
+    ).one()
+    total, pending, approved, rejected, quantity, this_month = row
+    return {
+        "total": total,
+        "pendingVerification": pending,
+        "approved": approved,
+        "rejected": rejected,
+        "quantityDelivered": round(float(quantity), 2),
+        "deliveriesThisMonth": this_month,
+    }
+
+
+def concrete_nc_tiles(session, project, now):
+    rows = session.execute(
+        select(
+            QualityNCIssue.status, QualityNCIssue.severity,
+            func.count(QualityNCIssue.id),
+            # By severity: severity_score is zeroed when an issue is closed
+            func.coalesce(func.sum(case(
+                *((QualityNCIssue.severity == severity, points) for severity, points in NC_SEVERITY_POINTS.items()),
+                else_=0.5
+            )), 0.0),
+            _count_if(QualityNCIssue.deadline_date < now.date()),
+        ).where(
+            QualityNCIssue.project_id == project.id, QualityNCIssue.is_deleted == False
+        ).group_by(QualityNCIssue.status, QualityNCIssue.severity)
+    ).all()
+
+    status_counts = {status.value: 0 for status in NCIssueStatus}
+    severity_counts, open_by_severity = {}, {}
+    total = overdue = 0
+    points = closed_points = 0.0
+    for status, severity, count, severity_points, past_deadline in rows:
+        closed = status == NCIssueStatus.CLOSED
+        status_counts[status.value] += count
+        severity_counts[severity.value] = severity_counts.get(severity.value, 0) + count
+        total += count
+        points += severity_points
+        if closed:
+            closed_points += severity_points
+        else:
+            open_by_severity[severity.value] = open_by_severity.get(severity.value, 0) + count
+            overdue += past_deadline
+
+    score = closed_points / points * 10 if points else 10.0
+    grade = next((g for floor, g in NC_GRADES if score >= floor), 'F')
+    return {
+        "total": total,
+        "open": total - status_counts['closed'],
+        "closed": status_counts['closed'],
+        "overdue": overdue,
+        "statusCounts": status_counts,
+        "severityCounts": severity_counts,
+        "openBySeverity": open_by_severity,
+        "score": round(score, 1),
+        "performanceGrade": grade,
+    }
+
+
+def safety_tiles(session, project, now):
+    submissions = session.execute(
+        select(func.count(FormSubmission.id), _count_if(FormSubmission.status == 'submitted'))
+        .where(FormSubmission.project_id == project.id)
+    ).one()
+    actions = session.execute(
+        select(
+            _count_if(SafetyAction.status != 'completed'),
+            _count_if(and_(SafetyAction.status != 'completed', SafetyAction.due_date < now)),
+        ).where(SafetyAction.project_id == project.id)
+    ).one()
+    active_workers = session.scalar(
+        select(func.count(Worker.id)).where(Worker.company_id == project.company_id, Worker.is_active == True)
+    )
+    return {
+        "totalSubmissions": submissions[0],
+        "pendingApprovals": submissions[1],
+        "openActions": actions[0],
+        "overdueActions": actions[1],
+        "activeWorkers": active_workers,
+    }
+
+
+def tbt_tiles(session, project, now):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    sessions, attendance = session.execute(
+        select(func.count(func.distinct(TBTSession.id)), func.count(TBTAttendance.id))
+        .select_from(TBTSession)
+        .outerjoin(TBTAttendance, TBTAttendance.session_id == TBTSession.id)
+        .where(TBTSession.project_id == project.id, TBTSession.session_date >= month_start)
+    ).one()
+    return {
+        "sessionsThisMonth": sessions,
+        "attendanceThisMonth": attendance,
+        "avgAttendancePerSession": round(attendance / sessions, 1) if sessions else 0,
+    }
+
+
+def ppe_tiles(session, project, now):
+    expiring_by = date.today() + timedelta(days=30)
+    rows = session.execute(
+        select(
+            PPEIssuance.status, func.count(PPEIssuance.id),
+            _count_if(and_(PPEIssuance.expiry_date.isnot(None), PPEIssuance.expiry_date <= expiring_by)),
+            func.coalesce(func.sum(PPEIssuance.unit_cost), 0),
+        ).where(
+            PPEIssuance.project_id == project.id, PPEIssuance.is_deleted == False
+        ).group_by(PPEIssuance.status)
+    ).all()
+
+    by_status = {status.value.lower(): 0 for status in IssuanceStatus}
+    expiring_soon, total_cost = 0, 0.0
+    for status, count, expiring, cost in rows:
+        by_status[status.value.lower()] += count
+        total_cost += float(cost)
+        if status == IssuanceStatus.ISSUED:
+            expiring_soon = expiring
+    total = sum(by_status.values())
+    return {
+        "totalIssuances": total,
+        "byStatus": by_status,
+        "expiringSoon": expiring_soon,
+        "totalCost": round(total_cost, 2),
+        "damageRate": round(by_status['damaged'] * 100.0 / total, 2) if total else 0,
+        "lossRate": round(by_status['lost'] * 100.0 / total, 2) if total else 0,
+    }
+
+
+def incident_tiles(session, project, now):
+    rows = session.execute(
+        select(
+            IncidentReport.incident_type, func.count(IncidentReport.id),
+            func.coalesce(func.sum(IncidentReport.lost_time_days), 0),
+            _count_if(IncidentReport.reportable_to_authority == True),
+            func.max(IncidentReport.incident_date),
+        ).where(
+            IncidentReport.project_id == project.id,
+            IncidentReport.is_deleted == False,
+            IncidentReport.incident_date >= now - timedelta(days=365)
+        ).group_by(IncidentReport.incident_type)
+    ).all()
+
+    by_type = {incident_type.value: 0 for incident_type in IncidentType}
+    lost_days = reportable = 0
+    last_incident = None
+    for incident_type, count, lost, reportable_count, latest in rows:
+        by_type[incident_type.value] += count
+        lost_days += lost
+        reportable += reportable_count
+        last_incident = max(filter(None, (last_incident, latest)), default=None)
+    return {
+        "totalIncidents": sum(by_type.values()),
+        "byType": by_type,
+        "nearMisses": by_type['near_miss'],
+        "lostTimeDays": lost_days,
+        "reportable": reportable,
+        "daysSinceLastIncident": (now - last_incident).days if last_incident else None,
+    }
+
+
+# Section key -> (tile builder, module required to see it)
+SECTIONS = {
+    'cubeTests': (cube_test_tiles, 'concrete'),
+    'batches': (batch_tiles, 'concrete'),
+    'concreteNC': (concrete_nc_tiles, 'concrete_nc'),
+    'safety': (safety_tiles, 'safety'),
+    'tbt': (tbt_tiles, 'safety'),
+    'ppe': (ppe_tiles, 'safety'),
+    'incidents': (incident_tiles, 'safety'),
+}
+
+# Writes to these tables drop the project's cached dashboard at commit
+DASHBOARD_SOURCES = (
+    BatchRegister, CubeTestRegister, QualityNCIssue, FormSubmission, SafetyAction, TBTSession,
+    PPEIssuance, IncidentReport
+)
+
+
+# ========================================
+# COMPOSITION + CACHE
+# ========================================
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache = {}
+_invalidations = {}  # project_id -> invalidation count, guards stores of payloads built before a write
+_cache_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config_obj.DASHBOARD_WORKERS,
+                                           thread_name_prefix='dashboard')
+        return _executor
+
+
+def _run_section(builder, project, now):
+    with session_scope() as session:
+        return builder(session, project, now)
+
+
+def _safe(key, call):
+    try:
+        return call()
+    except Exception as e:
+        logger.error(f"Dashboard section {key} failed: {e}")
+        return None
+
+
+def build_dashboard(project, now=None):
+    """All sections of a project dashboard (a failing section is returned as null)"""
+    now = now or datetime.utcnow()
+    if config_obj.DASHBOARD_WORKERS <= 1:
+        with session_scope() as session:
+            sections = {key: _safe(key, lambda b=builder: b(session, project, now))
+                        for key, (builder, _) in SECTIONS.items()}
+    else:
+        executor = _get_executor()
+        futures = {key: executor.submit(_run_section, builder, project, now)
+                   for key, (builder, _) in SECTIONS.items()}
+        sections = {key: _safe(key, future.result) for key, future in futures.items()}
+    return {"generatedAt": now.isoformat(), "sections": sections}
+
+
+def cached_dashboard(project):
+    """Composite payload from the per-project cache, rebuilt after TTL or invalidation"""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(project.id)
+        if entry and entry[0] > now:
+            return entry[1]
+        invalidations = _invalidations.get(project.id, 0)
+    payload = build_dashboard(project)
+    with _cache_lock:
+        # Invalidated while building: the payload may predate the write, serve it uncached
+        if _invalidations.get(project.id, 0) == invalidations:
+            _cache[project.id] = (now + config_obj.DASHBOARD_CACHE_TTL_SECONDS, payload)
+    return payload
+
+
+def invalidate_dashboard(*project_ids):
+    with _cache_lock:
+        for project_id in project_ids:
+            _cache.pop(project_id, None)
+            _invalidations[project_id] = _invalidations.get(project_id, 0) + 1
+
+
+_TOUCHED = 'dashboard_projects'
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_projects(session, flush_context):
+    touched = {
+        obj.project_id
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, DASHBOARD_SOURCES) and obj.project_id is not None
+    }
+    if touched:
+        session.info.setdefault(_TOUCHED, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_touched_projects(session):
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        invalidate_dashboard(*touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched_projects(session):
+    session.info.pop(_TOUCHED, None)
+
+
+# ========================================
+# API ENDPOINTS
+# ========================================
+
+@dashboard_bp.route('/api/dashboard/<int:project_id>', methods=['GET'])
+@jwt_required()
+def get_project_dashboard(project_id):
+    """
+    All KPI tiles of a project dashboard.
+
+    Returns:
+    - sections: cubeTests, batches, concreteNC, safety, tbt, ppe, incidents
+      (only those covered by the company's subscribed modules)
+    - generatedAt: when the cached payload was computed
+    """
+    try:
+        with session_scope() as session:
+            membership = session.query(ProjectMembership.id).filter_by(
+                user_id=int(get_jwt_identity()), project_id=project_id
+            ).first()
+            project = session.get(Project, project_id)
+            if not membership or not project:
+                return jsonify({"error": "Access denied. You are not a member of this project"}), 403
+            company = session.get(Company, project.company_id)
+            modules = set(company.get_subscribed_modules()) if company else set()
+            project = ProjectRef(project.id, project.company_id)
+
+        payload = cached_dashboard(project)
+        return jsonify({
+            "success": True,
+            "projectId": project_id,
+            "generatedAt": payload["generatedAt"],
+            "sections": {
+                key: tiles for key, tiles in payload["sections"].items() if SECTIONS[key][1] in modules
+            }
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error building dashboard: {e}")
+        return jsonify({"error": "Failed to build dashboard"}), 500
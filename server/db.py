@@ -63,6 +63,17 @@ def session_scope() -> Iterator[scoped_session]:
         session.close()
 
 
+def begin_write(session) -> None:
+    """
+    Open the write transaction up front so begin_nested() SAVEPOINTs nest inside it.
+    pysqlite only emits BEGIN on the first DML, and RELEASE of a SAVEPOINT opened
+    outside a transaction commits it - so on SQLite start one explicitly.
+    """
+    connection = session.connection()
+    if connection.dialect.name == 'sqlite' and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
 def init_db() -> None:
     """
     Ensure ORM models are registered so SQLAlchemy can create tables.
@@ -138,7 +149,13 @@ class _DBSession:
     
     def add(self, instance):
         return SessionLocal().add(instance)
-    
+
+    def execute(self, statement, *args, **kwargs):
+        return SessionLocal().execute(statement, *args, **kwargs)
+
+    def refresh(self, instance, attribute_names=None):
+        return SessionLocal().refresh(instance, attribute_names)
+
     def commit(self):
         return SessionLocal().commit()
     
@@ -8,6 +8,7 @@ ISO 9001:2015 - Clause 7.4 (Communication)
 from __future__ import annotations
 
 import os
+import time
 import logging
 import smtplib
 from email.mime.text import MIMEText
@@ -16,6 +17,11 @@ from email.mime.image import MIMEImage
 from typing import Optional, List, Dict
 from datetime import datetime
 
+try:
+    from .metrics import record_notification
+except ImportError:
+    from metrics import record_notification
+
 logger = logging.getLogger(__name__)
 
 # Email Configuration (from environment variables)
@@ -76,8 +82,10 @@ class EmailService:
         """
         if not self.enabled:
             logger.info(f"Email disabled. Would send to {to_email}: {subject}")
+            record_notification("email", "disabled")
             return False
         
+        started = time.perf_counter()
         try:
             # Create message
             msg = MIMEMultipart('alternative')
@@ -100,10 +108,12 @@ class EmailService:
                 server.send_message(msg)
             
             logger.info(f"Email sent to {to_email}: {subject}")
+            record_notification("email", "sent", time.perf_counter() - started)
             return True
             
         except Exception as e:
             logger.error(f"Failed to send email to {to_email}: {e}")
+            record_notification("email", "failed", time.perf_counter() - started)
             return False
     
     def send_to_multiple(
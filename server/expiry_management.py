@@ -0,0 +1,365 @@
+"""
+Expiry Management
+Scheduled expiry sweeper and precomputed "expiring soon" buckets
+
+Tracked records:
+- ppe_issuances (expiry_date) - items currently held by a worker
+- safety_inductions (valid_until) - completed inductions
+- safety_workers.certifications (JSON entries with an expiry/valid-until date)
+
+The daily sweep:
+1. Flips expired PPE (is_expired, status=EXPIRED) and inductions (is_expired, status='expired')
+   with bulk UPDATEs on the (is_expired, expiry) indexes - no row-by-row loading
+2. Rebuilds expiry_buckets with everything expiring within EXPIRY_HORIZON_DAYS,
+   plus bucket 0 rows for expired items still in use (PPE not returned, lapsed certifications)
+
+Expiry endpoints and worker eligibility checks read expiry_buckets instead of
+re-deriving expiry from the source tables on every request.
+"""
+
+import logging
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import (
+    Column, Integer, String, Date, DateTime, Index, select, insert, update, delete, case, literal
+)
+
+from .db import Base, session_scope
+from .config import get_config
+from .ppe_tracking_models import PPEIssuance, IssuanceStatus
+from .safety_induction_models import SafetyInduction
+from .safety_models import Worker
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+# Upper bounds (days from today) of the "expiring within N days" buckets
+EXPIRY_BUCKETS = (7, 30, 60, 90)
+
+# Bucket for items that have already expired but are still in use
+EXPIRED_BUCKET = 0
+
+# Keys accepted for the expiry date and name of a worker certification entry
+CERTIFICATION_EXPIRY_KEYS = ('expiry_date', 'valid_until', 'expires_on')
+CERTIFICATION_NAME_KEYS = ('name', 'certification', 'type')
+
+
+class ExpiryBucket(Base):
+    """
+    Expiry Bucket
+    One row per tracked record expiring within the horizon (or expired and still in use)
+    """
+    __tablename__ = 'expiry_buckets'
+    __table_args__ = (
+        Index('ix_expiry_buckets_company_type_expiry', 'company_id', 'entity_type', 'expiry_date'),
+        Index('ix_expiry_buckets_worker', 'worker_id', 'entity_type'),
+        Index('ix_expiry_buckets_entity', 'entity_type', 'entity_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String(30), nullable=False)  # ppe, induction, certification
+    entity_id = Column(Integer, nullable=False)  # ppe_issuances.id, safety_inductions.id, safety_workers.id
+    company_id = Column(Integer, nullable=False)
+    project_id = Column(Integer)
+    worker_id = Column(Integer)
+    label = Column(String(255))  # PPE type, induction number, certification name
+    expiry_date = Column(Date, nullable=False)
+    bucket_days = Column(Integer, nullable=False)  # 0 (expired) or one of EXPIRY_BUCKETS
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'company_id': self.company_id,
+            'project_id': self.project_id,
+            'worker_id': self.worker_id,
+            'label': self.label,
+            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
+            'bucket_days': self.bucket_days,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+
+# ========================================
+# BUCKET HELPERS
+# ========================================
+
+def bucket_for(expiry_date, today=None):
+    """Bucket (0 or one of EXPIRY_BUCKETS) for an expiry date, None if beyond the horizon"""
+    today = today or date.today()
+    if expiry_date < today:
+        return EXPIRED_BUCKET
+    days_left = (expiry_date - today).days
+    for bound in EXPIRY_BUCKETS:
+        if days_left <= bound:
+            return bound
+    if days_left <= config_obj.EXPIRY_HORIZON_DAYS:
+        return config_obj.EXPIRY_HORIZON_DAYS
+    return None
+
+
+def _bucket_expression(column, today):
+    """SQL CASE equivalent of bucket_for() for set-based inserts"""
+    whens = [(column < today, EXPIRED_BUCKET)]
+    whens += [(column <= today + timedelta(days=bound), bound) for bound in EXPIRY_BUCKETS]
+    return case(*whens, else_=config_obj.EXPIRY_HORIZON_DAYS)
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_certification_expiries(certifications):
+    """Yield (name, expiry_date) for each dated entry of a worker's certifications JSON"""
+    if isinstance(certifications, dict):
+        entries = [
+            dict(value, name=key) if isinstance(value, dict) else {'name': key, 'expiry_date': value}
+            for key, value in certifications.items()
+        ]
+    elif isinstance(certifications, list):
+        entries = [entry for entry in certifications if isinstance(entry, dict)]
+    else:
+        return
+
+    for entry in entries:
+        expiry = next((_parse_date(entry[k]) for k in CERTIFICATION_EXPIRY_KEYS if entry.get(k)), None)
+        if expiry:
+            name = next((str(entry[k]) for k in CERTIFICATION_NAME_KEYS if entry.get(k)), 'Certification')
+            yield name[:255], expiry
+
+
+# ========================================
+# SWEEPER
+# ========================================
+
+def sweep_expired_records(session, today=None):
+    """
+    Transition records past their expiry date in bulk.
+    Returns: {"ppe": rows, "inductions": rows}
+    """
+    today = today or date.today()
+    now = datetime.utcnow()
+
+    ppe_result = session.execute(
+        update(PPEIssuance)
+        .where(
+            PPEIssuance.is_expired == False,
+            PPEIssuance.expiry_date < today,
+            PPEIssuance.is_deleted == False
+        )
+        .values(
+            is_expired=True,
+            status=case(
+                (PPEIssuance.status == IssuanceStatus.ISSUED,
+                 literal(IssuanceStatus.EXPIRED, type_=PPEIssuance.__table__.c.status.type)),
+                else_=PPEIssuance.status
+            ),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    induction_result = session.execute(
+        update(SafetyInduction)
+        .where(
+            SafetyInduction.is_expired == False,
+            SafetyInduction.valid_until < today,
+            SafetyInduction.is_deleted == False
+        )
+        .values(
+            is_expired=True,
+            status=case(
+                (SafetyInduction.status == 'completed', 'expired'),
+                else_=SafetyInduction.status
+            ),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    return {"ppe": ppe_result.rowcount, "inductions": induction_result.rowcount}
+
+
+def rebuild_expiry_buckets(session, today=None):
+    """
+    Replace expiry_buckets with the current expiring/expired-in-use set.
+    PPE and inductions are INSERT ... SELECT; certifications are parsed from worker JSON.
+    Returns: {"ppe": rows, "inductions": rows, "certifications": rows}
+    """
+    today = today or date.today()
+    horizon = today + timedelta(days=config_obj.EXPIRY_HORIZON_DAYS)
+    now = datetime.utcnow()
+    columns = ['entity_type', 'entity_id', 'company_id', 'project_id', 'worker_id',
+               'label', 'expiry_date', 'bucket_days', 'computed_at']
+
+    session.execute(delete(ExpiryBucket))
+
+    # PPE still with the worker: issued (expiring soon) or expired and not returned
+    ppe_select = select(
+        literal('ppe'), PPEIssuance.id, PPEIssuance.company_id, PPEIssuance.project_id,
+        PPEIssuance.worker_id, PPEIssuance.issuance_number, PPEIssuance.expiry_date,
+        _bucket_expression(PPEIssuance.expiry_date, today), literal(now)
+    ).where(
+        PPEIssuance.status.in_([IssuanceStatus.ISSUED, IssuanceStatus.EXPIRED]),
+        PPEIssuance.expiry_date <= horizon,
+        PPEIssuance.is_deleted == False
+    )
+    ppe_rows = session.execute(
+        insert(ExpiryBucket).from_select(columns, ppe_select)
+    ).rowcount
+
+    # Completed inductions expiring soon (expired ones are handled by re-induction)
+    induction_select = select(
+        literal('induction'), SafetyInduction.id, SafetyInduction.company_id, SafetyInduction.project_id,
+        SafetyInduction.worker_id, SafetyInduction.induction_number, SafetyInduction.valid_until,
+        _bucket_expression(SafetyInduction.valid_until, today), literal(now)
+    ).where(
+        SafetyInduction.status == 'completed',
+        SafetyInduction.is_expired == False,
+        SafetyInduction.valid_until >= today,
+        SafetyInduction.valid_until <= horizon,
+        SafetyInduction.is_deleted == False
+    )
+    induction_rows = session.execute(
+        insert(ExpiryBucket).from_select(columns, induction_select)
+    ).rowcount
+
+    # Certifications live in a free-form JSON column, so they are bucketed in Python
+    certification_rows = []
+    workers = session.execute(
+        select(Worker.id, Worker.company_id, Worker.project_id, Worker.certifications)
+        .where(Worker.is_active == True, Worker.certifications.isnot(None))
+    )
+    for worker_id, company_id, project_id, certifications in workers:
+        for name, expiry in iter_certification_expiries(certifications):
+            bucket = bucket_for(expiry, today)
+            if bucket is None:
+                continue
+            certification_rows.append({
+                'entity_type': 'certification', 'entity_id': worker_id, 'company_id': company_id,
+                'project_id': project_id, 'worker_id': worker_id, 'label': name,
+                'expiry_date': expiry, 'bucket_days': bucket, 'computed_at': now
+            })
+    if certification_rows:
+        session.execute(insert(ExpiryBucket), certification_rows)
+
+    return {"ppe": ppe_rows, "inductions": induction_rows, "certifications": len(certification_rows)}
+
+
+def track_expiry(session, entity_type, entity_id, company_id, project_id, worker_id, label, expiry_date, today=None):
+    """
+    Upsert the bucket row for one record between sweeps (e.g. 30-day gloves issued today).
+    Rows beyond the horizon are removed/skipped; the next sweep reconciles everything else.
+    """
+    session.execute(
+        delete(ExpiryBucket).where(
+            ExpiryBucket.entity_type == entity_type,
+            ExpiryBucket.entity_id == entity_id
+        )
+    )
+    bucket = bucket_for(expiry_date, today) if expiry_date else None
+    if bucket is None or (bucket == EXPIRED_BUCKET and entity_type == 'induction'):
+        return None
+
+    row = ExpiryBucket(
+        entity_type=entity_type, entity_id=entity_id, company_id=company_id,
+        project_id=project_id, worker_id=worker_id, label=label,
+        expiry_date=expiry_date, bucket_days=bucket
+    )
+    session.add(row)
+    return row
+
+
+def expiring_entity_ids(session, entity_type, company_id, days, project_id=None, today=None):
+    """
+    Ids of records of one type expiring within `days` days, read from expiry_buckets.
+    Returns None when `days` is beyond the precomputed horizon (caller falls back to a live query).
+    """
+    if days > config_obj.EXPIRY_HORIZON_DAYS:
+        return None
+
+    today = today or date.today()
+    query = session.query(ExpiryBucket.entity_id).filter(
+        ExpiryBucket.company_id == company_id,
+        ExpiryBucket.entity_type == entity_type,
+        ExpiryBucket.bucket_days != EXPIRED_BUCKET,
+        ExpiryBucket.expiry_date >= today,
+        ExpiryBucket.expiry_date <= today + timedelta(days=days)
+    )
+    if project_id:
+        query = query.filter(ExpiryBucket.project_id == project_id)
+    return [row.entity_id for row in query.order_by(ExpiryBucket.expiry_date).all()]
+
+
+# ========================================
+# WORKER ELIGIBILITY
+# ========================================
+
+def worker_eligibility(session, worker_id, today=None):
+    """
+    Site-entry eligibility for a worker:
+    - a completed, unexpired induction (indexed on worker_id, valid_until)
+    - no expired PPE still in use and no lapsed certifications (expiry_buckets bucket 0)
+    Expiring-soon items are returned as warnings and do not block eligibility.
+    """
+    today = today or date.today()
+
+    induction = session.query(SafetyInduction).filter(
+        SafetyInduction.worker_id == worker_id,
+        SafetyInduction.valid_until >= today,
+        SafetyInduction.status == 'completed',
+        SafetyInduction.is_deleted == False
+    ).order_by(SafetyInduction.valid_until.desc()).first()
+
+    buckets = session.query(ExpiryBucket).filter(
+        ExpiryBucket.worker_id == worker_id
+    ).order_by(ExpiryBucket.expiry_date).all()
+
+    expired = [b.to_dict() for b in buckets if b.bucket_days == EXPIRED_BUCKET or b.expiry_date < today]
+    expiring = [b.to_dict() for b in buckets if b.bucket_days != EXPIRED_BUCKET and b.expiry_date >= today]
+
+    reasons = []
+    if not induction:
+        reasons.append('No valid safety induction')
+    if expired:
+        reasons.append(f'{len(expired)} expired item(s) in use')
+
+    return {
+        'worker_id': worker_id,
+        'eligible': not reasons,
+        'reasons': reasons,
+        'induction_valid_until': induction.valid_until.isoformat() if induction else None,
+        'expired': expired,
+        'expiring': expiring
+    }
+
+
+# ========================================
+# BACKGROUND JOB
+# ========================================
+
+def run_expiry_sweep(today=None):
+    """
+    Background job: Flip expired PPE/inductions and rebuild expiry buckets
+    Run once daily (just after midnight)
+    """
+    try:
+        logger.info("Starting expiry sweep...")
+
+        with session_scope() as session:
+            expired = sweep_expired_records(session, today)
+            buckets = rebuild_expiry_buckets(session, today)
+
+        logger.info(f"Expiry sweep complete. Expired: {expired}, bucketed: {buckets}")
+        return {"expired": expired, "bucketed": buckets}
+
+    except Exception as e:
+        logger.error(f"Error in expiry sweep: {e}")
+        return {"expired": {}, "bucketed": {}}
@@ -5,11 +5,12 @@ Endpoints for managing project geofences and viewing location verification logs
 
 from flask import Blueprint, request, jsonify
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy import func, extract
 from server.db import db
 from server.models import User, Company, Project
 from server.geofence_models import GeofenceLocation, LocationVerification
+from server.log_partitions import bounded_log_window
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 geofence_bp = Blueprint('geofence', __name__)
@@ -252,10 +253,20 @@ def get_verification_logs():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
+        
+        # Always bound the partition key so only the requested months are scanned
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start_date, end_date = bounded_log_window(
+            datetime.fromisoformat(start_date) if start_date else None,
+            datetime.fromisoformat(end_date) if end_date else None
+        )
         
-        query = LocationVerification.query.filter(
-            LocationVerification.company_id == user.company_id
+        query = db.session.query(LocationVerification).filter(
+            LocationVerification.company_id == user.company_id,
+            LocationVerification.verified_at >= start_date,
+            LocationVerification.verified_at <= end_date
         )
         
         # Filters
@@ -271,14 +282,6 @@ def get_verification_logs():
         if request.args.get('failed_only') == 'true':
             query = query.filter(LocationVerification.is_verified == False)
         
-        if request.args.get('start_date'):
-            start_date = datetime.fromisoformat(request.args.get('start_date'))
-            query = query.filter(LocationVerification.verified_at >= start_date)
-        
-        if request.args.get('end_date'):
-            end_date = datetime.fromisoformat(request.args.get('end_date'))
-            query = query.filter(LocationVerification.verified_at <= end_date)
-        
         # Limit results
         limit = request.args.get('limit', default=100, type=int)
         query = query.order_by(LocationVerification.verified_at.desc()).limit(limit)
@@ -293,6 +296,10 @@ def get_verification_logs():
         return jsonify({
             'logs': [log.to_dict() for log in logs],
             'count': total_attempts,
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
             'statistics': {
                 'total_attempts': total_attempts,
                 'verified': verified,
@@ -318,15 +325,17 @@ def get_violations():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
         days = request.args.get('days', default=7, type=int)
-        start_date = datetime.now() - timedelta(days=days)
+        # verified_at is stored in UTC; the window also bounds the partition scan
+        start_date, end_date = bounded_log_window(default_days=days)
         
-        query = LocationVerification.query.filter(
+        query = db.session.query(LocationVerification).filter(
             LocationVerification.company_id == user.company_id,
             LocationVerification.is_verified == False,
-            LocationVerification.verified_at >= start_date
+            LocationVerification.verified_at >= start_date,
+            LocationVerification.verified_at <= end_date
         )
         
         if request.args.get('project_id'):
@@ -337,7 +346,7 @@ def get_violations():
         # Group by user
         user_violations = {}
         for violation in violations:
-            user_name = violation.user.name if violation.user else "Unknown"
+            user_name = violation.user.full_name if violation.user else "Unknown"
             if user_name not in user_violations:
                 user_violations[user_name] = 0
             user_violations[user_name] += 1
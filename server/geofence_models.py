@@ -5,7 +5,7 @@ Ensures workers are physically present on-site before data entry
 """
 
 from server.db import Base
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import math
@@ -137,8 +137,13 @@ class LocationVerification(Base):
     """
     Location Verification Log
     Audit trail of all location verification attempts
+    Append-only; monthly partitioned on verified_at (see server/log_partitions.py)
     """
     __tablename__ = 'location_verifications'
+    __table_args__ = (
+        Index('ix_location_verifications_company_verified_at', 'company_id', 'verified_at'),
+        Index('ix_location_verifications_project_verified_at', 'project_id', 'verified_at'),
+    )
     
     # Primary Key
     id = Column(Integer, primary_key=True)
@@ -190,7 +195,7 @@ class LocationVerification(Base):
             
             'user': {
                 'id': self.user_id,
-                'name': self.user.name if self.user else None,
+                'name': self.user.full_name if self.user else None,
                 'email': self.user.email if self.user else None
             } if self.user else None,
             
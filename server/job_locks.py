@@ -0,0 +1,72 @@
+"""
+Background Job Locks
+One row per running job in background_job_locks, so a job started by cron and the
+same job triggered from the admin API never overlap (across workers and hosts)
+
+- Taken with an upsert that only succeeds when no live lock row exists
+- Released by the holder (matched on a random token) when the job ends
+- A lock left by a crashed run expires after its TTL and can be taken over
+"""
+
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, String, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .db import Base, engine
+
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+class JobLock(Base):
+    """Held lock of a running background job"""
+    __tablename__ = 'background_job_locks'
+
+    name = Column(String(100), primary_key=True)
+    token = Column(String(36), nullable=False)  # Identifies the holder
+    locked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # Taken over after this (crashed holder)
+
+
+class JobLocked(Exception):
+    """Another run of the job holds its lock"""
+
+
+def acquire_job_lock(name, ttl_seconds, bind=None):
+    """Take the lock of job `name`; returns the holder token, or None when it is held"""
+    bind = bind or engine
+    table = JobLock.__table__
+    token = str(uuid.uuid4())
+    now = datetime.utcnow()
+    values = {'token': token, 'locked_at': now, 'expires_at': now + timedelta(seconds=ttl_seconds)}
+    with bind.begin() as conn:
+        statement = _DIALECT_INSERTS[conn.dialect.name](table).values(name=name, **values)
+        holder = conn.execute(statement.on_conflict_do_update(
+            index_elements=['name'], set_=values, where=table.c.expires_at < now
+        ).returning(table.c.token)).scalar()
+    return token if holder == token else None
+
+
+def release_job_lock(name, token, bind=None):
+    table = JobLock.__table__
+    with (bind or engine).begin() as conn:
+        conn.execute(delete(table).where(table.c.name == name, table.c.token == token))
+
+
+@contextmanager
+def job_lock(name, ttl_seconds, bind=None):
+    """
+    Hold the lock of job `name` for the block; raises JobLocked when another run holds it.
+
+        with job_lock('nc_sweep', 3600):
+            ...
+    """
+    token = acquire_job_lock(name, ttl_seconds, bind)
+    if token is None:
+        raise JobLocked(f"Job {name} is already running")
+    try:
+        yield
+    finally:
+        release_job_lock(name, token, bind)
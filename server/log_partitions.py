@@ -0,0 +1,415 @@
+"""
+Append-only Log Storage
+Monthly partitioning, date-range pruning and archival for high-volume audit logs
+
+Tables:
+- location_verifications (partitioned on verified_at)
+- permit_audit_logs (partitioned on action_timestamp)
+
+PostgreSQL:
+- Parent tables are PARTITION BY RANGE on the timestamp column
+  (converted once with migrate_log_partitions.py)
+- ensure_partitions() keeps monthly partitions created ahead of time
+- Archival exports a month to a gzip JSONL file, then DETACH + DROP its partition
+
+SQLite (no native partitioning):
+- The hot table is the rolling window: archival exports a month and deletes it
+- Composite (tenant, timestamp) indexes give the same range pruning on queries
+
+Every archived month is recorded in log_archives with its file path, row count and checksum.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, select, delete, insert, func, text
+
+from .db import Base, engine
+from .config import get_config
+# Imported only to register the log tables on Base.metadata
+from . import geofence_models, permit_to_work_models  # noqa: F401
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+# Append-only log tables and the timestamp column each one is partitioned on
+PARTITIONED_LOG_TABLES = {
+    'location_verifications': 'verified_at',
+    'permit_audit_logs': 'action_timestamp',
+}
+
+# Rows fetched per round trip while exporting a month
+ARCHIVE_CHUNK_SIZE = 5000
+
+
+class LogArchive(Base):
+    """
+    Archived Log Month
+    One row per (table, month) moved out of the hot tables into a compressed export file
+    """
+    __tablename__ = 'log_archives'
+    __table_args__ = (
+        Index('ix_log_archives_table_period', 'table_name', 'period_start'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(100), nullable=False)
+    period_start = Column(DateTime, nullable=False)  # Inclusive
+    period_end = Column(DateTime, nullable=False)  # Exclusive
+    file_path = Column(String(500), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    sha256 = Column(String(64), nullable=False)  # Checksum of the compressed file
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'period_end': self.period_end.isoformat() if self.period_end else None,
+            'file_path': self.file_path,
+            'row_count': self.row_count,
+            'sha256': self.sha256,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+
+# ========================================
+# DATE HELPERS
+# ========================================
+
+def month_start(value):
+    """First instant of the month containing value"""
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """First instant of the month `months` after the month containing value"""
+    years, month_index = divmod(value.month - 1 + months, 12)
+    return datetime(value.year + years, month_index + 1, 1)
+
+
+def partition_name(table_name, period_start):
+    """Child table name for one month, e.g. location_verifications_y2025m11"""
+    return f"{table_name}_y{period_start.year}m{period_start.month:02d}"
+
+
+def bounded_log_window(start_date=None, end_date=None, default_days=None):
+    """
+    Resolve the query window for a log table.
+    Log queries are always bounded on the partition key so PostgreSQL prunes
+    partitions (and SQLite uses the composite index) instead of scanning the
+    whole history. A missing start defaults to `default_days` (LOG_QUERY_DEFAULT_DAYS
+    when None) before the end; default_days=0 is an empty window ending now.
+    Returns: (start, end)
+    """
+    end = end_date or datetime.utcnow()
+    if start_date is None:
+        days = config_obj.LOG_QUERY_DEFAULT_DAYS if default_days is None else default_days
+        start = end - timedelta(days=days)
+    else:
+        start = start_date
+    return start, end
+
+
+# ========================================
+# POSTGRESQL PARTITION MANAGEMENT
+# ========================================
+
+def is_partitioned(conn, table_name):
+    """True if table_name is a natively partitioned PostgreSQL table"""
+    if conn.dialect.name != 'postgresql':
+        return False
+    row = conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :name
+    """), {'name': table_name}).first()
+    return row is not None
+
+
+def list_partitions(conn, table_name):
+    """Monthly partitions attached to table_name as {period_start: child_name}"""
+    pattern = re.compile(rf"^{re.escape(table_name)}_y(\d{{4}})m(\d{{2}})$")
+    rows = conn.execute(text("""
+        SELECT child.relname FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = :name
+    """), {'name': table_name}).scalars()
+
+    partitions = {}
+    for child in rows:
+        match = pattern.match(child)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = child
+    return partitions
+
+
+def default_partition(conn, table_name):
+    """Name of table_name's DEFAULT partition, or None"""
+    return conn.execute(text("""
+        SELECT child.relname FROM pg_partitioned_table pt
+        JOIN pg_class parent ON parent.oid = pt.partrelid
+        JOIN pg_class child ON child.oid = pt.partdefid
+        WHERE parent.relname = :name
+    """), {'name': table_name}).scalar()
+
+
+def create_partition(conn, table_name, period_start):
+    """
+    Create the monthly partition for period_start. Returns True if it was created.
+    Rows of that month already in the DEFAULT partition (written while the partition
+    was missing) would make CREATE ... PARTITION OF fail: they are moved into a new
+    table first, which is then attached.
+    """
+    name = partition_name(table_name, period_start)
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar()
+    if exists:
+        return False
+
+    period_end = add_months(period_start, 1)
+    bounds = f"FOR VALUES FROM ('{period_start:%Y-%m-%d}') TO ('{period_end:%Y-%m-%d}')"
+    column = PARTITIONED_LOG_TABLES[table_name]
+    default = default_partition(conn, table_name)
+    in_month = f"{column} >= :start AND {column} < :end"
+    params = {'start': period_start, 'end': period_end}
+    if default and conn.execute(text(f"SELECT 1 FROM {default} WHERE {in_month} LIMIT 1"), params).first():
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        moved = conn.execute(text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), params).rowcount
+        conn.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {name} {bounds}"))
+        logger.info(f"Created log partition {name} with {moved} rows moved from {default}")
+        return True
+
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table_name} {bounds}"))
+    logger.info(f"Created log partition {name}")
+    return True
+
+
+def ensure_partitions(months_ahead=None, now=None, bind=None):
+    """
+    Make sure the current month and the next `months_ahead` months have partitions.
+    No-op on SQLite or on PostgreSQL tables that have not been converted yet.
+    Returns: number of partitions created
+    """
+    bind = bind or engine
+    months_ahead = config_obj.LOG_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(now or datetime.utcnow())
+    created = 0
+
+    with bind.begin() as conn:
+        if conn.dialect.name != 'postgresql':
+            return 0
+
+        for table_name in PARTITIONED_LOG_TABLES:
+            if not is_partitioned(conn, table_name):
+                continue
+            for offset in range(months_ahead + 1):
+                if create_partition(conn, table_name, add_months(current, offset)):
+                    created += 1
+
+    return created
+
+
+# ========================================
+# ARCHIVAL
+# ========================================
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _archive_path(archive_dir, table_name, period_start):
+    """Archive file for one month; a suffix is added if the month was archived before (late rows)"""
+    directory = Path(archive_dir) / table_name
+    directory.mkdir(parents=True, exist_ok=True)
+
+    path = directory / f"{period_start:%Y-%m}.jsonl.gz"
+    suffix = 1
+    while path.exists():
+        path = directory / f"{period_start:%Y-%m}-{suffix}.jsonl.gz"
+        suffix += 1
+    return path
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_month(conn, table_name, period_start, path):
+    """
+    Stream one month of a log table into a gzip JSONL file (one row per line).
+    Rows are fetched in ARCHIVE_CHUNK_SIZE chunks so memory stays bounded.
+    Returns: number of rows written
+    """
+    table = Base.metadata.tables[table_name]
+    column = table.c[PARTITIONED_LOG_TABLES[table_name]]
+    period_end = add_months(period_start, 1)
+
+    result = conn.execution_options(stream_results=True, yield_per=ARCHIVE_CHUNK_SIZE).execute(
+        select(table)
+        .where(column >= period_start, column < period_end)
+        .order_by(column, table.c.id)
+    )
+
+    row_count = 0
+    tmp_path = path.with_name(path.name + '.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for chunk in result.partitions():
+            for row in chunk:
+                f.write(json.dumps(dict(row._mapping), default=_json_default))
+                f.write('\n')
+                row_count += 1
+    os.replace(tmp_path, path)
+    return row_count
+
+
+def iter_archive_rows(path):
+    """Read rows back from an archive file (read-only browsing / restore)"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def archive_month(table_name, period_start, archive_dir=None, bind=None):
+    """
+    Move one month of a log table out of the hot storage.
+    Export, removal and manifest row happen in one transaction: if the export
+    fails nothing is dropped.
+    Returns: LogArchive dict, or None if the month was empty
+    """
+    bind = bind or engine
+    archive_dir = archive_dir or config_obj.LOG_ARCHIVE_DIR
+    period_start = month_start(period_start)
+    period_end = add_months(period_start, 1)
+
+    table = Base.metadata.tables[table_name]
+    column = table.c[PARTITIONED_LOG_TABLES[table_name]]
+    path = _archive_path(archive_dir, table_name, period_start)
+
+    with bind.begin() as conn:
+        row_count = export_month(conn, table_name, period_start, path)
+        partitioned = is_partitioned(conn, table_name)
+        child = partition_name(table_name, period_start)
+
+        if row_count == 0:
+            path.unlink()
+            if partitioned and period_start in list_partitions(conn, table_name):
+                conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {child}"))
+                conn.execute(text(f"DROP TABLE {child}"))
+            return None
+
+        if partitioned and period_start in list_partitions(conn, table_name):
+            conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {child}"))
+            conn.execute(text(f"DROP TABLE {child}"))
+        else:
+            # Rolling-table mode (SQLite) or rows that landed in the default partition
+            conn.execute(delete(table).where(column >= period_start, column < period_end))
+
+        archive = {
+            'table_name': table_name,
+            'period_start': period_start,
+            'period_end': period_end,
+            'file_path': str(path),
+            'row_count': row_count,
+            'sha256': _file_sha256(path),
+            'archived_at': datetime.utcnow()
+        }
+        archive['id'] = conn.execute(insert(LogArchive.__table__).values(**archive)).inserted_primary_key[0]
+
+    logger.info(f"Archived {row_count} rows of {table_name} for {period_start:%Y-%m} to {path}")
+    return {
+        **archive,
+        'period_start': period_start.isoformat(),
+        'period_end': period_end.isoformat(),
+        'archived_at': archive['archived_at'].isoformat()
+    }
+
+
+def expired_months(conn, table_name, cutoff):
+    """Months of table_name that end on or before cutoff and still hold rows or partitions"""
+    column = Base.metadata.tables[table_name].c[PARTITIONED_LOG_TABLES[table_name]]
+    months = set()
+
+    oldest = conn.execute(select(func.min(column)).where(column < cutoff)).scalar()
+    if oldest is not None:
+        current = month_start(oldest)
+        while current < cutoff:
+            months.add(current)
+            current = add_months(current, 1)
+
+    if is_partitioned(conn, table_name):
+        months.update(start for start in list_partitions(conn, table_name) if start < cutoff)
+
+    return sorted(months)
+
+
+def archive_expired_logs(retention_months=None, archive_dir=None, now=None, bind=None):
+    """
+    Archive every month older than the retention window, oldest first.
+    Returns: {table_name: rows_archived}
+    """
+    bind = bind or engine
+    retention_months = config_obj.LOG_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+
+    results = {}
+    for table_name in PARTITIONED_LOG_TABLES:
+        with bind.connect() as conn:
+            months = expired_months(conn, table_name, cutoff)
+
+        archived_rows = 0
+        for period_start in months:
+            archive = archive_month(table_name, period_start, archive_dir=archive_dir, bind=bind)
+            if archive:
+                archived_rows += archive['row_count']
+        results[table_name] = archived_rows
+
+    return results
+
+
+def run_log_maintenance():
+    """
+    Background job: Create upcoming partitions and archive expired log months
+    Run once daily (off-peak). The two steps run independently: a failing one is
+    reported in errors and does not stop the other.
+    """
+    logger.info("Starting log partition maintenance...")
+    results = {"partitionsCreated": 0, "rowsArchived": {}, "errors": {}}
+
+    try:
+        results["partitionsCreated"] = ensure_partitions()
+    except Exception as e:
+        logger.error(f"Error creating log partitions: {e}")
+        results["errors"]["partitions"] = str(e)
+
+    try:
+        results["rowsArchived"] = archive_expired_logs()
+    except Exception as e:
+        logger.error(f"Error archiving expired logs: {e}")
+        results["errors"]["archival"] = str(e)
+
+    logger.info(f"Log maintenance complete. Partitions created: {results['partitionsCreated']}, "
+                f"rows archived: {results['rowsArchived']}, errors: {results['errors']}")
+    return results
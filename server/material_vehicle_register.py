@@ -17,6 +17,9 @@ from .models import (
 
 material_vehicle_bp = Blueprint('material_vehicle', __name__, url_prefix='/api/material-vehicles')
 
+# Watchman, DataEntry, or higher roles can access
+VEHICLE_ROLES = ('ProjectAdmin', 'QualityManager', 'QualityEngineer', 'SiteEngineer', 'DataEntry', 'Watchman')
+
 
 def check_watchman_permission(user_id, project_id):
     """Check if user is watchman or has higher permissions"""
@@ -31,14 +34,57 @@ def check_watchman_permission(user_id, project_id):
     if not membership:
         return False, "User not assigned to this project"
     
-    # Watchman, DataEntry, or higher roles can access
-    allowed_roles = ['ProjectAdmin', 'QualityManager', 'QualityEngineer', 'SiteEngineer', 'DataEntry', 'Watchman']
-    if membership.role not in allowed_roles:
+    if membership.role not in VEHICLE_ROLES:
         return False, "Insufficient permissions"
     
     return True, membership.role
 
 
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def build_vehicle_entry(data, project_id, user_id, allowed_time_hours):
+    """New on-site MaterialVehicleRegister row from a camelCase payload (shared with batched sync)"""
+    vehicle_entry = MaterialVehicleRegister(
+        project_id=project_id,
+        vehicle_number=(data.get('vehicleNumber') or '').strip().upper(),
+        vehicle_type=data.get('vehicleType'),
+        material_type=data.get('materialType', 'Concrete'),
+        supplier_name=data.get('supplierName'),
+        challan_number=data.get('challanNumber'),
+        driver_name=data.get('driverName'),
+        driver_phone=data.get('driverPhone'),
+        driver_license=data.get('driverLicense'),
+        entry_time=_parse_time(data.get('entryTime')) or datetime.utcnow(),
+        allowed_time_hours=allowed_time_hours,
+        purpose=data.get('purpose'),
+        remarks=data.get('remarks'),
+        created_by=user_id,
+        status='on_site'
+    )
+    
+    # Handle photos
+    if data.get('photos'):
+        vehicle_entry.photos = json.dumps(data['photos'])
+    
+    return vehicle_entry
+
+
+def apply_vehicle_exit(entry, exit_time, user_id):
+    """Mark a vehicle entry as exited and compute its duration (shared with batched sync)"""
+    entry.exit_time = _parse_time(exit_time) or datetime.utcnow()
+    entry.status = 'exited'
+    
+    # Calculate duration
+    if entry.entry_time and entry.exit_time:
+        duration = entry.exit_time - entry.entry_time
+        entry.duration_hours = duration.total_seconds() / 3600
+    
+    entry.updated_by = user_id
+    entry.updated_at = datetime.utcnow()
+
+
 @material_vehicle_bp.route('/create', methods=['POST'])
 @jwt_required()
 def create_vehicle_entry():
@@ -67,27 +113,7 @@ def create_vehicle_entry():
         allowed_time_hours = settings.vehicle_allowed_time_hours if settings else 3.0
         
         # Create vehicle entry
-        vehicle_entry = MaterialVehicleRegister(
-            project_id=project_id,
-            vehicle_number=data.get('vehicleNumber', '').strip().upper(),
-            vehicle_type=data.get('vehicleType'),
-            material_type=data.get('materialType', 'Concrete'),
-            supplier_name=data.get('supplierName'),
-            challan_number=data.get('challanNumber'),
-            driver_name=data.get('driverName'),
-            driver_phone=data.get('driverPhone'),
-            driver_license=data.get('driverLicense'),
-            entry_time=datetime.fromisoformat(data['entryTime'].replace('Z', '+00:00')) if data.get('entryTime') else datetime.utcnow(),
-            allowed_time_hours=allowed_time_hours,
-            purpose=data.get('purpose'),
-            remarks=data.get('remarks'),
-            created_by=user_id,
-            status='on_site'
-        )
-        
-        # Handle photos
-        if data.get('photos'):
-            vehicle_entry.photos = json.dumps(data['photos'])
+        vehicle_entry = build_vehicle_entry(data, project_id, user_id, allowed_time_hours)
         
         db.session.add(vehicle_entry)
         db.session.commit()
@@ -305,21 +331,7 @@ def mark_vehicle_exit(entry_id):
             return jsonify({"error": "Vehicle already marked as exited"}), 400
         
         # Mark as exited
-        exit_time = data.get('exitTime')
-        if exit_time:
-            entry.exit_time = datetime.fromisoformat(exit_time.replace('Z', '+00:00'))
-        else:
-            entry.exit_time = datetime.utcnow()
-        
-        entry.status = 'exited'
-        
-        # Calculate duration
-        if entry.entry_time and entry.exit_time:
-            duration = entry.exit_time - entry.entry_time
-            entry.duration_hours = duration.total_seconds() / 3600
-        
-        entry.updated_by = user_id
-        entry.updated_at = datetime.utcnow()
+        apply_vehicle_exit(entry, data.get('exitTime'), user_id)
         
         db.session.commit()
         
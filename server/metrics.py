@@ -0,0 +1,302 @@
+"""
+Metrics and Readiness
+Prometheus metrics for requests, the DB pool, background jobs, notifications,
+uploads and image processing, plus a deep readiness probe
+
+- GET /metrics        Prometheus text exposition (bearer METRICS_TOKEN when set)
+- GET /health/ready   SELECT 1 round trip and pool state; 503 when the database
+                      is unreachable or slower than HEALTH_READY_MAX_DB_MS
+                      (/health stays a cheap liveness check)
+
+Multiple gunicorn workers: gunicorn.conf.py points PROMETHEUS_MULTIPROC_DIR at a
+fresh directory before workers start; each worker writes its samples there and
+/metrics aggregates all of them, whichever worker serves the scrape. Cron-run
+background jobs share the totals when started with the same directory.
+
+Requires the optional `prometheus_client` package; without it every metric is a
+no-op and /metrics answers 503 (the readiness probe still works).
+"""
+
+import hmac
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import Blueprint, Response, g, jsonify, request
+from sqlalchemy import event, text
+
+try:
+    from .config import get_config
+    from .db import engine
+except ImportError:
+    from config import get_config
+    from db import engine
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+    )
+except ImportError:  # Optional - metrics are no-ops
+    REGISTRY = Counter = Gauge = Histogram = None
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+SIZE_BUCKETS = (10_000, 100_000, 500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000, 20_000_000)
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def time(self):
+        return nullcontext()
+
+
+def _metric(kind, name, documentation, labels=(), **kwargs):
+    if kind is None:
+        return _NoopMetric()
+    # A second copy of this module (imported as both `server.metrics` and bare
+    # `metrics`) must reuse the collectors of the first, not register them again
+    existing = REGISTRY._names_to_collectors.get(name)
+    if isinstance(existing, kind):
+        return existing
+    return kind(name, documentation, labels, **kwargs)
+
+
+def _histogram(name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+    return _metric(Histogram, name, documentation, labels, buckets=buckets)
+
+
+def _counter(name, documentation, labels=()):
+    return _metric(Counter, name, documentation, labels)
+
+
+def _gauge(name, documentation, labels=(), mode='livesum'):
+    # multiprocess_mode says how samples of several worker processes combine
+    return _metric(Gauge, name, documentation, labels, multiprocess_mode=mode)
+
+
+# ========================================
+# METRICS
+# ========================================
+
+HTTP_REQUEST_SECONDS = _histogram(
+    'prosite_http_request_duration_seconds', 'Request latency until the response is returned',
+    ('blueprint', 'endpoint', 'method', 'status')
+)
+UPLOAD_BYTES = _histogram(
+    'prosite_upload_bytes', 'Size of multipart upload requests', ('endpoint',), buckets=SIZE_BUCKETS
+)
+IMAGE_PROCESSING_SECONDS = _histogram(
+    'prosite_image_processing_seconds', 'Image decode/resize/encode time', ('operation',)
+)
+
+DB_POOL_CHECKOUT_SECONDS = _histogram(
+    'prosite_db_pool_checkout_seconds', 'Wait for a pooled database connection', buckets=WAIT_BUCKETS
+)
+DB_POOL_CONNECTIONS = _gauge(
+    'prosite_db_pool_connections', 'Pool connections (summed over live workers)', ('state',)
+)
+DB_PING_SECONDS = _gauge(
+    'prosite_db_ping_seconds', 'SELECT 1 round trip of the last readiness probe', mode='max'
+)
+
+JOB_SECONDS = _histogram('prosite_job_duration_seconds', 'Background job run time', ('job',), buckets=JOB_BUCKETS)
+JOB_RUNS = _counter('prosite_job_runs_total', 'Background job runs', ('job', 'outcome'))
+JOB_ITEMS = _counter('prosite_job_items_total', 'Items processed by background jobs', ('job',))
+JOB_LAST_SUCCESS = _gauge(
+    'prosite_job_last_success_timestamp_seconds', 'Unix time of the last successful run', ('job',), mode='max'
+)
+
+NOTIFICATIONS = _counter(
+    'prosite_notifications_total', 'Notification sends by channel and outcome (sent, failed, disabled)',
+    ('channel', 'outcome')
+)
+NOTIFICATION_SEND_SECONDS = _histogram(
+    'prosite_notification_send_seconds', 'Notification send time', ('channel',)
+)
+NOTIFICATION_SUBSCRIBERS = _gauge('prosite_notification_stream_subscribers', 'Open notification streams')
+
+
+# ========================================
+# RECORDING HELPERS
+# ========================================
+
+def record_notification(channel, outcome, seconds=None):
+    NOTIFICATIONS.labels(channel, outcome).inc()
+    if seconds is not None:
+        NOTIFICATION_SEND_SECONDS.labels(channel).observe(seconds)
+
+
+def _count_items(result):
+    """Items in a job result: ints, or ints nested in dicts and lists"""
+    if isinstance(result, (int, float)):
+        return result
+    if isinstance(result, dict):
+        return sum(_count_items(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 0
+
+
+class JobRun:
+    result = None
+
+
+@contextmanager
+def track_job(name):
+    """
+    Time a background job and count the items it reports.
+
+        with track_job('nc_sweep') as run:
+            run.result = run_nc_sweep()
+    """
+    run = JobRun()
+    started = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        JOB_RUNS.labels(name, 'failed').inc()
+        raise
+    finally:
+        JOB_SECONDS.labels(name).observe(time.perf_counter() - started)
+    JOB_RUNS.labels(name, 'succeeded').inc()
+    JOB_ITEMS.labels(name).inc(max(_count_items(run.result), 0))
+    JOB_LAST_SUCCESS.labels(name).set(time.time())
+
+
+# ========================================
+# DATABASE POOL
+# ========================================
+
+def pool_status(pool=None):
+    """Pool size and usage (QueuePool; other pools report what they have)"""
+    pool = pool or engine.pool
+    status = {}
+    for key, attr in (('size', 'size'), ('checkedOut', 'checkedout'), ('overflow', 'overflow')):
+        if hasattr(pool, attr):
+            status[key] = getattr(pool, attr)()
+    return status
+
+
+def _update_pool_gauges(dbapi_connection, connection_record, *args):
+    status = pool_status()
+    DB_POOL_CONNECTIONS.labels('checked_out').set(status.get('checkedOut', 0))
+    DB_POOL_CONNECTIONS.labels('size').set(status.get('size', 0))
+
+
+def instrument_engine(target):
+    """Checkout wait histogram and pool gauges for an engine"""
+    if getattr(target, '_prosite_metrics', False):
+        return
+    raw_connection = target.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+    target.raw_connection = timed_raw_connection
+    event.listen(target, 'checkout', _update_pool_gauges)
+    event.listen(target, 'checkin', _update_pool_gauges)
+    target._prosite_metrics = True
+
+
+# ========================================
+# REQUEST HOOKS
+# ========================================
+
+def _start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None or request.blueprint == metrics_bp.name:
+        return response
+    # Unmatched URLs share one label so 404 scans do not create new series
+    endpoint = request.endpoint or 'unmatched'
+    HTTP_REQUEST_SECONDS.labels(
+        request.blueprint or 'app', endpoint, request.method, str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    if request.content_length and request.mimetype == 'multipart/form-data':
+        UPLOAD_BYTES.labels(endpoint).observe(request.content_length)
+    return response
+
+
+def init_metrics(app):
+    """Request metrics for an app and DB pool metrics for the shared engine"""
+    app.before_request(_start_request_timer)
+    app.after_request(_observe_request)
+    instrument_engine(engine)
+
+
+# ========================================
+# ENDPOINTS
+# ========================================
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    if REGISTRY is None:
+        return jsonify({"error": "Metrics unavailable: prometheus_client is not installed"}), 503
+    token = config_obj.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+@metrics_bp.route('/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: the database answers, fast enough"""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except Exception as e:
+        logger.error(f"Readiness check failed: database unreachable: {e}")
+        database = {"status": "error", "error": type(e).__name__}
+    else:
+        latency = time.perf_counter() - started
+        DB_PING_SECONDS.set(latency)
+        slow = latency * 1000 > config_obj.HEALTH_READY_MAX_DB_MS
+        database = {"status": "slow" if slow else "ok", "latencyMs": round(latency * 1000, 2)}
+
+    ready = database["status"] == "ok"
+    payload = {
+        "status": "ready" if ready else "unavailable",
+        "service": "prosite-api",
+        "checks": {"database": database, "pool": pool_status()},
+    }
+    return jsonify(payload), 200 if ready else 503
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, LargeBinary, ForeignKey
+from sqlalchemy import DateTime, Float, Integer, String, Text, LargeBinary, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 # Models must not import the full db/session machinery at module import time
@@ -181,6 +181,9 @@ class User(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index('ix_projects_company_created', 'company_id', 'created_at'),  # Tenant-scoped project list
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"), nullable=False)
@@ -344,6 +347,9 @@ class RMCVendor(Base):
     Each vendor can supply multiple mix designs.
     """
     __tablename__ = "rmc_vendors"
+    __table_args__ = (
+        Index('ix_rmc_vendors_company_deleted_name', 'company_id', 'is_deleted', 'vendor_name'),  # Tenant-scoped vendor list
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"), nullable=False)
@@ -565,6 +571,9 @@ class BatchRegister(Base):
     Entry persons create, Quality persons verify.
     """
     __tablename__ = "batch_registers"
+    __table_args__ = (
+        Index('ix_batch_registers_vendor_project_delivery', 'rmc_vendor_id', 'project_id', 'delivery_date'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -677,6 +686,9 @@ class CubeTestRegister(Base):
     Auto-calculates pass/fail and triggers alerts.
     """
     __tablename__ = "cube_test_registers"
+    __table_args__ = (
+        Index('ix_cube_test_registers_batch', 'batch_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     batch_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("batch_registers.id"), nullable=True)
@@ -0,0 +1,406 @@
+"""
+NC Lifecycle Sweeper
+Keeps Safety and Concrete NC overdue flags and contractor score reports current
+
+1. Overdue flags: set-based UPDATEs flag open NCs past their due date
+   (NonConformance.due_date / QualityNCIssue.deadline_date) and clear the flag
+   when the date is extended. Closed NCs keep the flag as a closed-late record.
+2. Overdue notifications: each NC is notified once, when it turns overdue
+   (safety 'nc_overdue', concrete 'overdue'). Flags are committed
+   NC_SWEEP_BATCH_SIZE NCs at a time before that batch is notified, so a
+   failing or slow send never holds the flags' transaction open
+3. Score reports: weekly (ISO week) and monthly rows per project and contractor
+   in safety_nc_score_reports / concrete_nc_score_reports, over the NCs raised
+   in each period. Only periods with an NC updated in the last
+   NC_SCORE_LOOKBACK_DAYS are recomputed (all contractors of that project and
+   period, so transfers move between reports); rebuild recomputes everything.
+
+Score out of 10 = closed severity points / raised severity points (higher is better).
+The sweeper is the only writer of the report tables; runs hold the 'nc_sweep'
+job lock, so a cron run and an admin-triggered run never overlap. The report
+endpoints read its rows and compute a period it has not reached yet without storing it.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, update, delete, insert, and_, or_, true
+
+from .db import session_scope
+from .config import get_config
+from .job_locks import JobLocked, job_lock
+from .safety_nc_models import NonConformance, SafetyNCScoreReport
+from .concrete_nc_models import QualityNCIssue, ConcreteNCScoreReport, NCIssueStatus
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+SAFETY_SEVERITY_POINTS = {'critical': 1.0, 'major': 0.5, 'minor': 0.25}
+# By severity, not severity_score: closing an issue zeroes its severity_score
+CONCRETE_SEVERITY_POINTS = {'HIGH': 1.0, 'MODERATE': 0.5, 'LOW': 0.25}
+DEFAULT_SEVERITY_POINTS = 0.5
+GRADES = ((9.0, 'A'), (7.0, 'B'), (5.0, 'C'), (3.0, 'D'))
+REPORT_TYPES = ('weekly', 'monthly')
+
+
+def performance_grade(score):
+    return next((grade for floor, grade in GRADES if score >= floor), 'F')
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ========================================
+# PERIODS
+# ========================================
+
+def report_periods(day):
+    """(report_type, year, number) of the weekly and monthly periods containing `day`"""
+    iso_year, iso_week, _ = day.isocalendar()
+    return (('weekly', iso_year, iso_week), ('monthly', day.year, day.month))
+
+
+def period_bounds(report_type, year, number):
+    """First and last day of an ISO week or calendar month"""
+    if report_type == 'weekly':
+        start = date.fromisocalendar(year, number, 1)
+        return start, start + timedelta(days=6)
+    start = date(year, number, 1)
+    return start, date(year + number // 12, number % 12 + 1, 1) - timedelta(days=1)
+
+
+def period_label(report_type, year, number):
+    return f"{year}-W{number:02d}" if report_type == 'weekly' else f"{year}-{number:02d}"
+
+
+def parse_period(report_type, label=None):
+    """(year, number) from 'YYYY-Www' / 'YYYY-MM' (current period when empty); raises ValueError"""
+    if not label:
+        return report_periods(datetime.utcnow().date())[REPORT_TYPES.index(report_type)][1:]
+    year, _, number = label.strip().upper().partition('-')
+    year, number = int(year), int(number.lstrip('W'))
+    period_bounds(report_type, year, number)  # Validates week / month number
+    return year, number
+
+
+# ========================================
+# OVERDUE SWEEP
+# ========================================
+
+def sweep_safety_overdue(session, now, notify=True):
+    """Flag open safety NCs past due_date (notifying each once); returns flagged/cleared counts"""
+    from .safety_nc import send_nc_notification
+
+    nc = NonConformance
+    is_open = or_(nc.is_closed == False, nc.is_closed.is_(None))
+    cleared = session.execute(
+        update(nc).where(nc.is_overdue == True, is_open, nc.due_date >= now).values(is_overdue=False)
+    ).rowcount
+
+    ids = session.scalars(
+        select(nc.id).where(or_(nc.is_overdue == False, nc.is_overdue.is_(None)), is_open, nc.due_date < now)
+        .order_by(nc.id)
+    ).all()
+    for chunk in _chunks(ids, config_obj.NC_SWEEP_BATCH_SIZE):
+        session.execute(update(nc).where(nc.id.in_(chunk)).values(is_overdue=True))
+        session.commit()
+        if notify:
+            for record in session.scalars(select(nc).where(nc.id.in_(chunk))).all():
+                send_nc_notification(record, "nc_overdue", session)
+            session.commit()
+    return {"flagged": len(ids), "cleared": cleared}
+
+
+def sweep_concrete_overdue(session, now, notify=True):
+    """Flag open concrete NCs past deadline_date (notifying supervisor and engineer once)"""
+    from .concrete_nc_api import send_nc_notification
+
+    issue = QualityNCIssue
+    today = now.date()
+    is_open = issue.status != NCIssueStatus.CLOSED
+    is_live = or_(issue.is_deleted == False, issue.is_deleted.is_(None))
+    cleared = session.execute(
+        update(issue).where(issue.is_overdue == True, is_open, issue.deadline_date >= today).values(is_overdue=False)
+    ).rowcount
+
+    ids = session.scalars(
+        select(issue.id).where(
+            or_(issue.is_overdue == False, issue.is_overdue.is_(None)), is_open, is_live, issue.deadline_date < today
+        ).order_by(issue.id)
+    ).all()
+    for chunk in _chunks(ids, config_obj.NC_SWEEP_BATCH_SIZE):
+        session.execute(update(issue).where(issue.id.in_(chunk)).values(is_overdue=True))
+        session.commit()
+        if notify:
+            for record in session.scalars(select(issue).where(issue.id.in_(chunk))).all():
+                for recipient in {record.contractor_supervisor_id, record.oversight_engineer_id} - {None}:
+                    send_nc_notification(record, 'overdue', recipient, session)
+            session.commit()
+    return {"flagged": len(ids), "cleared": cleared}
+
+
+# ========================================
+# SCORE REPORTS
+# ========================================
+
+class _Tally:
+    """Running totals of the NCs raised by one contractor in one period"""
+
+    __slots__ = ('company_id', 'severities', 'total', 'closed', 'overdue', 'points', 'closed_points',
+                 'resolution_days', 'resolved')
+
+    def __init__(self, company_id):
+        self.company_id = company_id
+        self.severities = defaultdict(int)
+        self.total = self.closed = self.overdue = self.resolved = 0
+        self.points = self.closed_points = self.resolution_days = 0.0
+
+    def add(self, severity, points, closed, overdue, raised_at, closed_at):
+        self.severities[severity] += 1
+        self.total += 1
+        self.points += points
+        if closed:
+            self.closed += 1
+            self.closed_points += points
+            if raised_at and closed_at:
+                self.resolution_days += (closed_at - raised_at).total_seconds() / 86400
+                self.resolved += 1
+        elif overdue:
+            self.overdue += 1
+
+    @property
+    def score(self):
+        return self.closed_points / self.points * 10 if self.points else 10.0
+
+    @property
+    def avg_resolution_days(self):
+        return self.resolution_days / self.resolved if self.resolved else None
+
+
+class _SafetySource:
+    """safety_non_conformances -> safety_nc_score_reports (contractor = assigned_to_contractor name)"""
+
+    model = NonConformance
+    report = SafetyNCScoreReport
+    contractor_key = 'contractor_name'
+
+    def rows(self, session, where):
+        nc = NonConformance
+        return session.execute(
+            select(nc.company_id, nc.project_id, nc.assigned_to_contractor.label('contractor'), nc.severity,
+                   nc.is_closed.label('closed'), nc.is_overdue.label('overdue'), nc.raised_at, nc.closed_at)
+            .where(nc.assigned_to_contractor.isnot(None), where)
+            .execution_options(yield_per=5000)
+        )
+
+    def severity(self, row):
+        return (row.severity or '').lower()
+
+    def points(self, row):
+        return SAFETY_SEVERITY_POINTS.get(self.severity(row), DEFAULT_SEVERITY_POINTS)
+
+    def closed(self, row):
+        return bool(row.closed)
+
+    def period_filter(self, report_type, year, number):
+        table = SafetyNCScoreReport
+        return and_(table.report_type == report_type, table.period == period_label(report_type, year, number))
+
+    def values(self, project_id, contractor, report_type, year, number, tally, now):
+        start, end = period_bounds(report_type, year, number)
+        return {
+            'company_id': tally.company_id, 'project_id': project_id, 'contractor_name': contractor,
+            'report_type': report_type, 'period': period_label(report_type, year, number),
+            'period_start': start, 'period_end': end,
+            'critical_count': tally.severities['critical'], 'major_count': tally.severities['major'],
+            'minor_count': tally.severities['minor'], 'total_issues_count': tally.total,
+            'closed_issues_count': tally.closed, 'open_issues_count': tally.total - tally.closed,
+            'overdue_issues_count': tally.overdue, 'total_score': tally.score,
+            'closure_rate': tally.closed / tally.total * 100, 'avg_resolution_days': tally.avg_resolution_days,
+            'performance_grade': performance_grade(tally.score), 'generated_at': now,
+        }
+
+
+class _ConcreteSource:
+    """quality_nc_issues -> concrete_nc_score_reports (contractor = assigned_contractor_id)"""
+
+    model = QualityNCIssue
+    report = ConcreteNCScoreReport
+    contractor_key = 'contractor_id'
+
+    def rows(self, session, where):
+        issue = QualityNCIssue
+        return session.execute(
+            select(issue.company_id, issue.project_id, issue.assigned_contractor_id.label('contractor'),
+                   issue.severity, issue.status, issue.is_overdue.label('overdue'),
+                   issue.raised_at, issue.closed_at)
+            .where(or_(issue.is_deleted == False, issue.is_deleted.is_(None)),
+                   or_(issue.is_scored == True, issue.is_scored.is_(None)), where)
+            .execution_options(yield_per=5000)
+        )
+
+    def severity(self, row):
+        return row.severity.name if row.severity else 'MODERATE'
+
+    def points(self, row):
+        return CONCRETE_SEVERITY_POINTS[self.severity(row)]
+
+    def closed(self, row):
+        return row.status == NCIssueStatus.CLOSED
+
+    def period_filter(self, report_type, year, number):
+        table = ConcreteNCScoreReport
+        period = table.report_week if report_type == 'weekly' else table.report_month
+        return and_(table.report_type == report_type, table.report_year == year, period == number)
+
+    def values(self, project_id, contractor, report_type, year, number, tally, now):
+        start, end = period_bounds(report_type, year, number)
+        return {
+            'company_id': tally.company_id, 'project_id': project_id, 'contractor_id': contractor,
+            'report_type': report_type, 'report_year': year,
+            'report_month': number if report_type == 'monthly' else None,
+            'report_week': number if report_type == 'weekly' else None,
+            'report_period_start': start, 'report_period_end': end,
+            'total_issues_raised': tally.total, 'high_severity_issues': tally.severities['HIGH'],
+            'moderate_severity_issues': tally.severities['MODERATE'], 'low_severity_issues': tally.severities['LOW'],
+            'issues_closed': tally.closed, 'issues_open': tally.total - tally.closed,
+            'issues_overdue': tally.overdue, 'total_score': tally.score,
+            'performance_grade': performance_grade(tally.score),
+            'avg_resolution_days': tally.avg_resolution_days, 'generated_at': now, 'created_at': now,
+        }
+
+
+SAFETY = _SafetySource()
+CONCRETE = _ConcreteSource()
+
+
+def _touched_periods(session, source, since):
+    """{(project_id, report_type, year, number)} holding an NC updated since `since`"""
+    model = source.model
+    touched = set()
+    for project_id, raised_at in session.execute(
+        select(model.project_id, model.raised_at).where(model.updated_at >= since, model.raised_at.isnot(None))
+    ):
+        touched.update((project_id,) + period for period in report_periods(raised_at.date()))
+    return touched
+
+
+def _tally_periods(session, source, periods):
+    """{(project_id, report_type, year, number, contractor): _Tally} over `periods` (None: every period)"""
+    model = source.model
+    where = true()
+    if periods is not None:
+        bounds = [period_bounds(*period[1:]) for period in periods]
+        where = and_(
+            model.project_id.in_({period[0] for period in periods}),
+            model.raised_at >= datetime.combine(min(start for start, _ in bounds), datetime.min.time()),
+            model.raised_at < datetime.combine(max(end for _, end in bounds) + timedelta(days=1), datetime.min.time()),
+        )
+
+    tallies = {}
+    for row in source.rows(session, where):
+        if row.raised_at is None:
+            continue
+        for period in report_periods(row.raised_at.date()):
+            key = (row.project_id,) + period
+            if periods is not None and key not in periods:
+                continue
+            tally = tallies.setdefault(key + (row.contractor,), _Tally(row.company_id))
+            tally.add(source.severity(row), source.points(row), source.closed(row), row.overdue,
+                      row.raised_at, row.closed_at)
+    return tallies
+
+
+def refresh_score_reports(session, source, since=None, periods=None):
+    """
+    Recompute report rows of `source` (SAFETY or CONCRETE). Background job only:
+    rows are replaced by delete + insert, so runs must not overlap (run_nc_sweep
+    holds the nc_sweep job lock).
+
+    since: only periods holding an NC updated at or after this time
+    periods: explicit {(project_id, report_type, year, number)}
+    Neither: rebuild every period. Returns the number of rows written.
+    """
+    table = source.report.__table__
+    now = datetime.utcnow()
+    if periods is None and since is not None:
+        periods = _touched_periods(session, source, since)
+    if periods is not None and not periods:
+        return 0
+
+    tallies = _tally_periods(session, source, periods)
+    if periods is None:
+        session.execute(delete(table))
+    else:
+        for chunk in _chunks(list(periods), 50):
+            session.execute(delete(table).where(or_(*(
+                and_(table.c.project_id == project_id, source.period_filter(report_type, year, number))
+                for project_id, report_type, year, number in chunk
+            ))))
+
+    rows = [
+        source.values(project_id, contractor, report_type, year, number, tally, now)
+        for (project_id, report_type, year, number, contractor), tally in tallies.items()
+    ]
+    if rows:
+        session.execute(insert(table), rows)
+    return len(rows)
+
+
+def score_report(session, source, company_id, project_id, contractor, report_type, year, number):
+    """
+    Precomputed report of one contractor and period (None if no NCs). A period the
+    sweeper has not reached yet is computed now as an unsaved report: reads never write.
+    """
+    model = source.report
+    report = session.scalars(select(model).where(
+        model.company_id == company_id, model.project_id == project_id, getattr(model, source.contractor_key) == contractor,
+        source.period_filter(report_type, year, number)
+    )).first()
+    if report is not None:
+        return report
+
+    tally = _tally_periods(session, source, {(project_id, report_type, year, number)}).get(
+        (project_id, report_type, year, number, contractor)
+    )
+    if tally is None or tally.company_id != company_id:
+        return None
+    return model(**source.values(project_id, contractor, report_type, year, number, tally, datetime.utcnow()))
+
+
+# ========================================
+# BACKGROUND JOB
+# ========================================
+
+def run_nc_sweep(rebuild=False, notify=True):
+    """
+    Background job: Flag overdue NCs, send overdue notifications, refresh score reports
+    Run hourly; rebuild=True recomputes every score report (nightly safety net)
+    Returns {"skipped": "locked"} without doing anything while another run is in progress.
+    """
+    try:
+        with job_lock('nc_sweep', config_obj.NC_SWEEP_LOCK_SECONDS):
+            logger.info("Starting NC sweep...")
+            now = datetime.utcnow()
+            since = None if rebuild else now - timedelta(days=config_obj.NC_SCORE_LOOKBACK_DAYS)
+
+            with session_scope() as session:
+                results = {
+                    "safety_overdue": sweep_safety_overdue(session, now, notify),
+                    "concrete_overdue": sweep_concrete_overdue(session, now, notify),
+                }
+                results["safety_reports"] = refresh_score_reports(session, SAFETY, since)
+                results["concrete_reports"] = refresh_score_reports(session, CONCRETE, since)
+
+        logger.info(f"NC sweep complete. Results: {results}")
+        return results
+
+    except JobLocked:
+        logger.warning("NC sweep skipped: another run is in progress")
+        return {"skipped": "locked"}
+    except Exception as e:
+        logger.error(f"Error in NC sweep: {e}")
+        return {}
@@ -0,0 +1,547 @@
+"""
+Real-time Notifications (Server-Sent Events)
+Pushes in-app notifications to open clients instead of having them poll
+
+- ContractorNotification rows are published to their recipient after commit;
+  rolled back notifications are never sent
+- Unread counts live in safety_notification_unread_counters and are adjusted in
+  the same transaction as the notification writes (no COUNT(*) per request).
+  Bulk Core updates bypass the flush and must call adjust_unread() themselves
+  (apply_unread_deltas() on a Core connection).
+- Fan-out goes through a broker: in-process by default, Redis pub/sub when
+  NOTIFICATION_BROKER_URL is set so every worker process sees every event
+- Reconnecting clients send Last-Event-ID and are replayed what they missed
+
+Each open stream holds a worker thread: run gunicorn with the gthread (or
+gevent) worker class. Under the sync worker class the stream answers 503 (a
+stream would pin the only thread past the worker timeout) and clients fall
+back to polling /unread-count. Streams close after NOTIFICATION_STREAM_MAX_SECONDS
+and EventSource reconnects on its own.
+
+Endpoints:
+- GET  /api/notifications/stream         (text/event-stream; token in header or ?jwt=)
+- GET  /api/notifications/unread-count
+- POST /api/notifications/read           {"ids": [...]} or {"all": true}
+"""
+
+import json
+import queue
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from .db import session_scope
+from .config import get_config
+from .metrics import NOTIFICATION_SUBSCRIBERS, record_notification
+from .safety_nc_models import ContractorNotification, NotificationUnreadCounter
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - Redis is only needed for multi-process fan-out
+    redis = None
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+notification_stream_bp = Blueprint('notification_stream', __name__, url_prefix='/api/notifications')
+
+READ_STATUS = 'read'
+REPLAY_LIMIT = 100
+SUBSCRIBER_QUEUE_SIZE = 100
+CHANNEL_PREFIX = 'prosite:notifications:'
+RECONNECT_MAX_SECONDS = 30
+
+
+# ========================================
+# BROKERS
+# ========================================
+
+class LocalBroker:
+    """In-process fan-out (single worker process, tests)"""
+
+    def __init__(self):
+        self._handler = None
+
+    def start(self, handler, on_gap=None):
+        self._handler = handler
+
+    def publish(self, user_id, message):
+        if self._handler:
+            self._handler(user_id, message)
+
+    def close(self):
+        self._handler = None
+
+
+class RedisBroker:
+    """Redis pub/sub fan-out: every worker process receives every user's events"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("NOTIFICATION_BROKER_URL is set but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+        self._closed = threading.Event()
+
+    def start(self, handler, on_gap=None):
+        self._thread = threading.Thread(
+            target=self._listen, args=(handler, on_gap), name='notification-broker', daemon=True
+        )
+        self._thread.start()
+
+    def _listen(self, handler, on_gap):
+        """Receive events until closed; reconnect with exponential backoff when Redis goes away"""
+        delay = 1
+        while not self._closed.is_set():
+            try:
+                self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                delay = 1
+                for message in self._pubsub.listen():
+                    self._deliver(handler, message)
+            except Exception as e:
+                if self._closed.is_set():
+                    return
+                logger.error(f"Notification broker connection lost, reconnecting in {delay}s: {e}")
+                # Events published meanwhile are missed: let open streams end and replay from Last-Event-ID
+                if on_gap:
+                    on_gap()
+                self._closed.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    @staticmethod
+    def _deliver(handler, message):
+        try:
+            channel = message['channel'].decode() if isinstance(message['channel'], bytes) else message['channel']
+            handler(int(channel[len(CHANNEL_PREFIX):]), json.loads(message['data']))
+        except Exception as e:
+            logger.error(f"Dropped malformed notification event: {e}")
+
+    def publish(self, user_id, message):
+        self._client.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps(message, default=str))
+
+    def close(self):
+        self._closed.set()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+# ========================================
+# HUB
+# ========================================
+
+class Subscription:
+    """One open stream: a bounded queue of events for one user"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.lagging = False  # Queue overflowed - the stream ends and the client replays from Last-Event-ID
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+
+class NotificationHub:
+    """Routes broker events to the subscriptions of this process"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        broker.start(self._dispatch, self._end_streams)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        NOTIFICATION_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+        NOTIFICATION_SUBSCRIBERS.dec()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, user_id, message):
+        started = time.perf_counter()
+        try:
+            self.broker.publish(user_id, message)
+        except Exception as e:
+            logger.error(f"Failed to publish notification event for user {user_id}: {e}")
+            record_notification("push", "failed", time.perf_counter() - started)
+        else:
+            record_notification("push", "sent", time.perf_counter() - started)
+
+    def _end_streams(self):
+        """Close every open stream of this process; clients reconnect with Last-Event-ID"""
+        with self._lock:
+            subscriptions = [s for user_subscriptions in self._subscriptions.values() for s in user_subscriptions]
+        for subscription in subscriptions:
+            subscription.lagging = True
+
+    def _dispatch(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.lagging = True
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Process-wide hub, created on first use from NOTIFICATION_BROKER_URL"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            url = config_obj.NOTIFICATION_BROKER_URL
+            _hub = NotificationHub(RedisBroker(url) if url else LocalBroker())
+        return _hub
+
+
+def set_hub(hub):
+    """Replace the process-wide hub (tests, custom brokers); returns the previous one"""
+    global _hub
+    with _hub_lock:
+        previous, _hub = _hub, hub
+    return previous
+
+
+# ========================================
+# UNREAD COUNTERS
+# ========================================
+
+_DELTAS = 'notification_unread_deltas'
+_EVENTS = 'notification_events'
+_PUBLISH = 'notification_publish'
+
+
+def _is_unread(status):
+    return status != READ_STATUS
+
+
+def adjust_unread(session, user_id, delta):
+    """Change a user's unread count at commit (for writes made outside the ORM flush)"""
+    deltas = session.info.setdefault(_DELTAS, defaultdict(int))
+    deltas[user_id] += delta
+
+
+def unread_count(session, user_id):
+    count = session.scalar(select(NotificationUnreadCounter.unread).where(NotificationUnreadCounter.user_id == user_id))
+    return count if count is not None else _count_unread(session, user_id)
+
+
+def _count_unread(session, user_id):
+    return session.scalar(
+        select(func.count(ContractorNotification.id)).where(
+            ContractorNotification.recipient_user == user_id,
+            ContractorNotification.delivery_status != READ_STATUS
+        )
+    ) or 0
+
+
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def apply_unread_deltas(session, deltas):
+    """
+    Adjust counters in place, in user id order; a user without a counter row gets one
+    seeded from a full count. The seed is an upsert: when a concurrent first notification
+    of the same user inserted the row meanwhile, this delta is added to it instead of the
+    insert failing on the key. `session` may also be a Core connection.
+    Returns {user_id: new count}.
+    """
+    table = NotificationUnreadCounter.__table__
+    bind = session.get_bind() if isinstance(session, Session) else session
+    dialect_insert = _DIALECT_INSERTS[bind.dialect.name]
+    now = datetime.utcnow()
+    counts = {}
+    for user_id in sorted(deltas):
+        delta = deltas[user_id]
+        if not delta:
+            continue
+        counts[user_id] = session.execute(
+            update(table).where(table.c.user_id == user_id)
+            .values(unread=table.c.unread + delta, updated_at=now).returning(table.c.unread)
+        ).scalar()
+        if counts[user_id] is not None:
+            continue
+        # Seed count already includes this transaction's flushed rows
+        statement = dialect_insert(table).values(user_id=user_id, unread=_count_unread(session, user_id), updated_at=now)
+        counts[user_id] = session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id'], set_={'unread': table.c.unread + delta, 'updated_at': now}
+        ).returning(table.c.unread)).scalar()
+    return counts
+
+
+def rebuild_unread_counters(session):
+    """Recompute every counter from the notification rows; returns the number of users"""
+    table = NotificationUnreadCounter.__table__
+    rows = session.execute(
+        select(ContractorNotification.recipient_user, func.count(ContractorNotification.id))
+        .where(ContractorNotification.recipient_user.isnot(None),
+               ContractorNotification.delivery_status != READ_STATUS)
+        .group_by(ContractorNotification.recipient_user)
+    ).all()
+    now = datetime.utcnow()
+    session.execute(table.delete())
+    if rows:
+        session.execute(insert(table), [{'user_id': u, 'unread': c, 'updated_at': now} for u, c in rows])
+    return len(rows)
+
+
+def _status_history(obj):
+    """(old status, new status) of a flushed notification"""
+    history = sa_inspect(obj).attrs.delivery_status.history
+    new = (history.added or history.unchanged or (None,))[0]
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+def _recipient_history(obj):
+    history = sa_inspect(obj).attrs.recipient_user.history
+    new = (history.added or history.unchanged or (None,))[0]
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_notification_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, ContractorNotification):
+            continue
+        old_status, new_status = _status_history(obj)
+        old_user, new_user = _recipient_history(obj)
+        if obj in session.new:
+            if new_user is not None:
+                if _is_unread(new_status):
+                    adjust_unread(session, new_user, 1)
+                session.info.setdefault(_EVENTS, []).append((new_user, obj.to_dict()))
+        elif obj in session.deleted:
+            if old_user is not None and _is_unread(old_status):
+                adjust_unread(session, old_user, -1)
+        elif (old_user, _is_unread(old_status)) != (new_user, _is_unread(new_status)):
+            if old_user is not None and _is_unread(old_status):
+                adjust_unread(session, old_user, -1)
+            if new_user is not None and _is_unread(new_status):
+                adjust_unread(session, new_user, 1)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_unread_deltas(session):
+    session.flush()  # Changes are collected by the flush hook; commit's own flush runs after this event
+    deltas = session.info.pop(_DELTAS, None)
+    events = session.info.pop(_EVENTS, None)
+    if not deltas and not events:
+        return
+    counts = apply_unread_deltas(session, deltas or {})
+    session.info[_PUBLISH] = (events or [], counts)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_notifications(session):
+    pending = session.info.pop(_PUBLISH, None)
+    if not pending:
+        return
+    events, counts = pending
+    try:
+        hub = get_hub()
+    except Exception as e:  # The commit already happened - never fail it over a push
+        logger.error(f"Notification broker unavailable, {len(events)} event(s) not pushed: {e}")
+        record_notification("push", "failed")
+        return
+    for user_id, notification in events:
+        hub.publish(user_id, {'event': 'notification', 'id': notification['id'], 'data': notification})
+    for user_id, count in counts.items():
+        hub.publish(user_id, {'event': 'unread', 'data': {'count': count}})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_notification_changes(session):
+    for key in (_DELTAS, _EVENTS, _PUBLISH):
+        session.info.pop(key, None)
+
+
+def mark_notifications_read(session, user_id, ids=None):
+    """Mark a user's notifications read in one statement (all unread when ids is None); returns the count"""
+    query = update(ContractorNotification).where(
+        ContractorNotification.recipient_user == user_id,
+        ContractorNotification.delivery_status != READ_STATUS
+    )
+    if ids is not None:
+        query = query.where(ContractorNotification.id.in_(ids))
+    result = session.execute(
+        query.values(delivery_status=READ_STATUS, read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        adjust_unread(session, user_id, -result.rowcount)
+    return result.rowcount
+
+
+# ========================================
+# STREAM
+# ========================================
+
+def format_event(data, event_name=None, event_id=None):
+    """One text/event-stream frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event_name:
+        lines.append(f"event: {event_name}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _replay(session, user_id, last_event_id):
+    rows = session.scalars(
+        select(ContractorNotification).where(
+            ContractorNotification.recipient_user == user_id,
+            ContractorNotification.id > last_event_id
+        ).order_by(ContractorNotification.id).limit(REPLAY_LIMIT)
+    ).all()
+    return [row.to_dict() for row in rows]
+
+
+def event_stream(hub, subscription, backlog, unread, heartbeat, max_seconds):
+    """Generator behind the stream response; always releases the subscription"""
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f"retry: {config_obj.NOTIFICATION_RETRY_MS}\n\n"
+        for notification in backlog:
+            yield format_event(notification, 'notification', notification['id'])
+        yield format_event({'count': unread}, 'unread')
+
+        while not subscription.lagging:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = subscription.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(message['data'], message['event'], message.get('id'))
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def _current_user_id():
+    return int(get_jwt_identity())
+
+
+def _can_hold_stream():
+    """False under gunicorn's sync worker: its single thread would be pinned past the worker timeout"""
+    environ = request.environ
+    return environ.get('gunicorn.socket') is None or bool(environ.get('wsgi.multithread'))
+
+
+# ========================================
+# API ENDPOINTS
+# ========================================
+
+@notification_stream_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
+    """
+    Server-Sent Events stream of the current user's notifications.
+
+    EventSource cannot set headers, so the access token may be passed as ?jwt=<token>.
+
+    Events:
+    - notification (id = notification id): a new notification
+    - unread: {"count": n}, sent on connect and whenever the count changes
+
+    Reconnects send Last-Event-ID (or ?last_event_id=) and receive up to 100 missed notifications.
+    """
+    if not _can_hold_stream():
+        return jsonify({"error": "Notification stream unavailable on this server, poll /unread-count"}), 503
+
+    user_id = _current_user_id()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    hub = get_hub()
+    subscription = hub.subscribe(user_id)  # Before reading the backlog so nothing falls in between
+    try:
+        with session_scope() as session:
+            backlog = _replay(session, user_id, int(last_event_id)) if last_event_id else []
+            unread = unread_count(session, user_id)
+    except (ValueError, TypeError):
+        hub.unsubscribe(subscription)
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+    except Exception as e:
+        hub.unsubscribe(subscription)
+        logger.error(f"Error opening notification stream: {e}")
+        return jsonify({"error": "Failed to open notification stream"}), 500
+
+    response = Response(
+        event_stream(hub, subscription, backlog, unread,
+                     config_obj.NOTIFICATION_HEARTBEAT_SECONDS, config_obj.NOTIFICATION_STREAM_MAX_SECONDS),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+@notification_stream_bp.route('/unread-count', methods=['GET'])
+@jwt_required()
+def get_unread_count():
+    """Unread notification count of the current user (one primary-key lookup)"""
+    with session_scope() as session:
+        return jsonify({"success": True, "unread": unread_count(session, _current_user_id())}), 200
+
+
+@notification_stream_bp.route('/read', methods=['POST'])
+@jwt_required()
+def mark_read():
+    """
+    Mark notifications read in bulk.
+
+    Request Body:
+    - ids: notification ids, or
+    - all: true to mark every unread notification read
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if data.get('all') is True:
+        ids = None
+    elif not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return jsonify({"error": "Provide ids (list of notification ids) or all: true"}), 400
+
+    user_id = _current_user_id()
+    try:
+        with session_scope() as session:
+            updated = mark_notifications_read(session, user_id, ids)
+            session.commit()
+            unread = unread_count(session, user_id)
+        return jsonify({"success": True, "updated": updated, "unread": unread}), 200
+
+    except Exception as e:
+        logger.error(f"Error marking notifications read: {e}")
+        return jsonify({"error": "Failed to mark notifications read"}), 500
@@ -5,10 +5,16 @@ Sends automated alerts for test failures, batch rejections, and NCRs.
 from __future__ import annotations
 
 import os
+import time
 import logging
 from typing import Optional, List
 from datetime import datetime
 
+try:
+    from .metrics import record_notification
+except ImportError:
+    from metrics import record_notification
+
 logger = logging.getLogger(__name__)
 
 # Twilio Configuration (from environment variables)
@@ -60,8 +66,10 @@ class WhatsAppNotification:
         """
         if not self.enabled:
             logger.info(f"WhatsApp disabled. Would send to {to_phone}: {message[:50]}...")
+            record_notification("whatsapp", "disabled")
             return False
         
+        started = time.perf_counter()
         try:
             # Format phone number for WhatsApp
             if not to_phone.startswith("whatsapp:"):
@@ -74,10 +82,12 @@ class WhatsAppNotification:
             )
             
             logger.info(f"WhatsApp sent to {to_phone}, SID: {message_obj.sid}")
+            record_notification("whatsapp", "sent", time.perf_counter() - started)
             return True
             
         except Exception as e:
             logger.error(f"Failed to send WhatsApp to {to_phone}: {e}")
+            record_notification("whatsapp", "failed", time.perf_counter() - started)
             return False
     
     def send_to_multiple(self, phone_numbers: List[str], message: str) -> dict:
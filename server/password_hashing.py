@@ -0,0 +1,147 @@
+"""
+Password Hashing
+Offloads password KDF work (pbkdf2/scrypt) to a bounded process pool
+
+- verify_and_upgrade() checks a password and, when the stored hash uses older
+  parameters than PASSWORD_HASH_METHOD, returns a re-hashed value in the same pool task
+- At most PASSWORD_HASH_MAX_PENDING KDFs may be queued or running per app worker;
+  beyond that PasswordHasherBusy is raised so the caller can answer 503 + Retry-After
+  instead of pinning every worker at shift-start login spikes. A KDF that outlives
+  PASSWORD_HASH_TIMEOUT also raises PasswordHasherBusy and keeps its slot until it ends.
+- The bound only bites with several request threads per worker (gunicorn gthread,
+  the default in gunicorn.conf.py); pool size defaults to the worker's CPU share
+- PASSWORD_HASH_WORKERS=0 runs the KDF inline (still bounded)
+
+The pool is created lazily per process (after gunicorn forks) with the spawn
+start method, so workers never inherit locks from a threaded parent.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+# Werkzeug's scrypt defaults (N, r, p)
+SCRYPT_DEFAULTS = (2 ** 15, 8, 1)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(config_obj.PASSWORD_HASH_MAX_PENDING, 1))
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the KDF queue is full"""
+
+
+# ========================================
+# HASH PARAMETERS
+# ========================================
+
+def resolve_method(method=None):
+    """Fully-qualified werkzeug method string, e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000'"""
+    method = method or config_obj.PASSWORD_HASH_METHOD
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 else 'sha256'
+        iterations = parts[2] if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if parts[0] == 'scrypt':
+        n, r, p = (parts[1:] + [str(v) for v in SCRYPT_DEFAULTS][len(parts) - 1:])[:3]
+        return f"scrypt:{n}:{r}:{p}"
+    return method
+
+
+def needs_rehash(pwhash, method=None):
+    """True when a stored hash was produced with different KDF parameters than configured"""
+    return pwhash.split('$', 1)[0] != resolve_method(method)
+
+
+def hash_password(password, method=None):
+    """Hash a password with the configured method (inline - registration and resets are rare)"""
+    return generate_password_hash(password, method=resolve_method(method))
+
+
+def _verify_and_rehash(pwhash, password, method):
+    """Pool task: verify, and re-hash with `method` if the stored parameters are outdated"""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] != method:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+# ========================================
+# PROCESS POOL
+# ========================================
+
+def _get_executor():
+    global _executor, _executor_pid
+    if config_obj.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=config_obj.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _executor_pid = os.getpid()
+            logger.info(f"Started password hash pool with {config_obj.PASSWORD_HASH_WORKERS} workers")
+        return _executor
+
+
+def _run(fn, *args):
+    """Run a KDF task in the pool, refusing immediately when the queue is full"""
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy("Too many concurrent password checks")
+    try:
+        executor = _get_executor()
+        future = executor.submit(fn, *args) if executor is not None else None
+    except BaseException:
+        slots.release()
+        raise
+    
+    if future is None:
+        try:
+            return fn(*args)
+        finally:
+            slots.release()
+    
+    # The slot is freed when the KDF really ends, not when this request stops waiting
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=config_obj.PASSWORD_HASH_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()  # Still queued: dropped. Running: finishes, then frees the slot
+        raise PasswordHasherBusy("Password check timed out")
+
+
+def verify_and_upgrade(pwhash, password, method=None):
+    """
+    Verify a password in the KDF pool.
+    Returns: (valid, new_hash) - new_hash is set when the stored hash should be replaced
+    """
+    return _run(_verify_and_rehash, pwhash, password, resolve_method(method))
+
+
+def verify_password(pwhash, password):
+    """Verify a password in the KDF pool (no upgrade)"""
+    return _run(check_password_hash, pwhash, password)
+
+
+def shutdown_pool():
+    """Stop the pool (tests, benchmarks, worker exit)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor, _executor_pid = None, None
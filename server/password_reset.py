@@ -175,8 +175,8 @@ def reset_password():
                 return jsonify({'error': 'User not found'}), 404
             
             # Update password
-            from werkzeug.security import generate_password_hash
-            user.password_hash = generate_password_hash(new_password)
+            from .password_hashing import hash_password
+            user.password_hash = hash_password(new_password)
             
             # Mark token as used
             reset_token.used = True
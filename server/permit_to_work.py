@@ -27,6 +27,7 @@ from .permit_to_work_models import (
     PermitChecklist, PermitAuditLog
 )
 from .models import User, Company, Project
+from .log_partitions import month_start
 from .notifications import send_whatsapp_alert
 from .email_notifications import send_email
 
@@ -771,9 +772,10 @@ def get_permit_details(permit_id):
             permit_id=permit_id
         ).order_by(PermitSignature.signed_at).all()
         
-        # Get audit log
-        audit_logs = session.query(PermitAuditLog).filter_by(
-            permit_id=permit_id
+        # Get audit log (bounded by permit creation so partitions before it are pruned)
+        audit_logs = session.query(PermitAuditLog).filter(
+            PermitAuditLog.permit_id == permit_id,
+            PermitAuditLog.action_timestamp >= month_start(permit.created_at)
         ).order_by(PermitAuditLog.action_timestamp.desc()).limit(20).all()
         
         return jsonify({
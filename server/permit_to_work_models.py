@@ -16,7 +16,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, Boolean, ForeignKey, JSON, Date, Time
+from sqlalchemy import DateTime, Float, Integer, String, Text, Boolean, ForeignKey, JSON, Date, Time, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -305,8 +305,12 @@ class PermitChecklist(Base):
 class PermitAuditLog(Base):
     """
     Complete audit trail of all permit actions
+    Append-only; monthly partitioned on action_timestamp (see server/log_partitions.py)
     """
     __tablename__ = "permit_audit_logs"
+    __table_args__ = (
+        Index("ix_permit_audit_logs_permit_action_timestamp", "permit_id", "action_timestamp"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     permit_id: Mapped[int] = mapped_column(Integer, ForeignKey("work_permits.id"), nullable=False)
@@ -13,8 +13,20 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import and_
 from datetime import datetime, timedelta
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from server.models import PourActivity, BatchRegister, Project, User
-from server.db import db
+from server.models import (
+    PourActivity, BatchRegister, Project, ProjectMembership, User, CubeTestRegister, ThirdPartyLab
+)
+from server.db import db, SessionLocal
+from server.cube_tests import create_cube_sets
+
+# Cube test ages (days) by concrete type
+PT_TEST_AGES = [5, 7, 28, 56]
+NORMAL_TEST_AGES = [3, 7, 28, 56]
+
+# Limits for pour cube casting options
+MAX_TEST_AGE_DAYS = 365
+MAX_TEST_AGES = 8
+MAX_SETS_PER_AGE = 5
 
 DEBUG_LOG_PATH = r"C:\Users\shrot\OneDrive\Desktop\ProSite\concretethings\server_debug.log"
 
@@ -39,6 +51,116 @@ def _get_current_user():
 pour_activities_bp = Blueprint('pour_activities', __name__, url_prefix='/api/pour-activities')
 
 
+def _test_ages_for(pour):
+    return PT_TEST_AGES if pour.concrete_type == 'PT' else NORMAL_TEST_AGES
+
+
+def _project_access_error(user, project_id):
+    """
+    Same rule as auth.project_access_required: system admins, company admins of the
+    project's company, or project members. Returns an error response or None.
+    """
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    if user.is_system_admin:
+        return None
+    if user.is_company_admin:
+        project = db.session.query(Project).filter_by(id=project_id).first()
+        if project and project.company_id == user.company_id:
+            return None
+        return jsonify({"error": "Access denied to this project"}), 403
+    membership = db.session.query(ProjectMembership.id).filter_by(user_id=user.id, project_id=project_id).first()
+    if not membership:
+        return jsonify({"error": "Access denied. You are not a member of this project"}), 403
+    return None
+
+
+def _positive_int(value, name, maximum):
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be a whole number between 1 and {maximum}")
+    return value
+
+
+def _parse_cube_set_options(options, pour):
+    """
+    Validate cube casting options (camelCase request body) into create_cube_sets arguments.
+    Raises ValueError with a client-facing message on bad input.
+    """
+    if not isinstance(options, dict):
+        raise ValueError("cube set options must be an object")
+    
+    test_ages = options.get('testAges') or _test_ages_for(pour)
+    if not isinstance(test_ages, list) or len(test_ages) > MAX_TEST_AGES:
+        raise ValueError(f"testAges must be a list of at most {MAX_TEST_AGES} ages")
+    test_ages = sorted({_positive_int(age, 'testAges', MAX_TEST_AGE_DAYS) for age in test_ages})
+    
+    assignments = options.get('thirdPartyLabAssignments') or {}
+    if not isinstance(assignments, dict):
+        raise ValueError("thirdPartyLabAssignments must map test age to lab id")
+    assignments = {str(age): _positive_int(lab_id, 'thirdPartyLabAssignments lab id', 2**31 - 1)
+                   for age, lab_id in assignments.items()}
+    if assignments:
+        # Only the project company's own labs
+        company_labs = db.session.query(ThirdPartyLab.id).join(
+            Project, Project.company_id == ThirdPartyLab.company_id
+        ).filter(
+            Project.id == pour.project_id,
+            ThirdPartyLab.id.in_(set(assignments.values())),
+            ThirdPartyLab.is_deleted == 0
+        ).all()
+        unknown = set(assignments.values()) - {lab_id for lab_id, in company_labs}
+        if unknown:
+            raise ValueError(f"Unknown third-party lab id(s): {', '.join(map(str, sorted(unknown)))}")
+    
+    casting_date = options.get('castingDate')
+    if casting_date:
+        try:
+            casting_date = datetime.fromisoformat(str(casting_date).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError("castingDate must be an ISO date/time")
+    else:
+        casting_date = pour.completed_at or datetime.now()
+    
+    curing_temperature = options.get('curingTemperature')
+    if curing_temperature is not None:
+        try:
+            curing_temperature = float(curing_temperature)
+        except (TypeError, ValueError):
+            raise ValueError("curingTemperature must be a number")
+    
+    return {
+        'casting_date': casting_date,
+        'test_ages': test_ages,
+        'sets_per_age': _positive_int(options.get('setsPerAge', 1), 'setsPerAge', MAX_SETS_PER_AGE),
+        'third_party_assignments': assignments,
+        'casting_time': options.get('castingTime'),
+        'curing_method': options.get('curingMethod', 'Water'),
+        'curing_temperature': curing_temperature,
+    }
+
+
+def _cast_pour_cube_sets(pour, options, cast_by):
+    """
+    Create cube sets + reminders for every batch of a pour (one INSERT each, no commit).
+    `options` comes from _parse_cube_set_options.
+    Returns: (created_tests, created_reminders)
+    """
+    return create_cube_sets(
+        SessionLocal(),
+        pour.project_id,
+        [batch.id for batch in pour.batches if not batch.is_deleted],
+        options['casting_date'],
+        options['test_ages'],
+        cast_by,
+        sets_per_age=options['sets_per_age'],
+        third_party_assignments=options['third_party_assignments'],
+        casting_time=options['casting_time'],
+        curing_method=options['curing_method'],
+        curing_temperature=options['curing_temperature'],
+        pour=pour
+    )
+
+
 @pour_activities_bp.route('', methods=['POST'])
 @jwt_required()
 def create_pour_activity():
@@ -361,16 +483,34 @@ def complete_pour_activity(pour_id):
         # Calculate total received quantity
         total_received = sum(batch.quantity_received or 0 for batch in pour.batches)
         
-        # Update pour
         data = request.get_json() or {}
+        current_user = _get_current_user()
+        
+        # Casting cube sets needs project access and valid options (checked before any write)
+        cube_set_options = None
+        if data.get('cubeSets') is not None:
+            denied = _project_access_error(current_user, pour.project_id)
+            if denied:
+                return denied
+            try:
+                cube_set_options = _parse_cube_set_options(data['cubeSets'], pour)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        
+        # Update pour
         pour.status = 'completed'
         pour.completed_at = datetime.now()
-        current_user = _get_current_user()
         pour.completed_by = current_user.id if current_user else None
         pour.total_quantity_received = total_received
         if data.get('remarks'):
             pour.remarks = data['remarks']
         
+        # Optionally cast cube sets for all batches in the same transaction
+        cube_tests, reminders = [], []
+        if cube_set_options is not None:
+            db.session.flush()
+            cube_tests, reminders = _cast_pour_cube_sets(pour, cube_set_options, current_user.id)
+        
         db.session.commit()
         
         # Return pour data with batches for cube modal
@@ -378,13 +518,86 @@ def complete_pour_activity(pour_id):
         pour_data['batches'] = [batch.to_dict() for batch in pour.batches]
         pour_data['totalQuantityReceived'] = total_received
         
-        return jsonify({
+        response = {
             "message": "Pour activity completed successfully",
             "pourActivity": pour_data,
-            "showCubeModal": True,  # Signal to frontend
+            "showCubeModal": not cube_tests,  # Signal to frontend
             "concreteType": pour.concrete_type,  # For PT logic
-            "testAges": [5, 7, 28, 56] if pour.concrete_type == 'PT' else [3, 7, 28, 56]
-        }), 200
+            "testAges": _test_ages_for(pour)
+        }
+        if cube_tests:
+            response["cubeTests"] = cube_tests
+            response["reminders"] = reminders
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@pour_activities_bp.route('/<int:pour_id>/cube-sets', methods=['POST'])
+@jwt_required()
+def cast_pour_cube_sets(pour_id):
+    """
+    Create cube sets and test reminders for ALL batches of a completed pour in one request
+    (instead of one /api/cube-tests/bulk-create call per batch)
+    
+    Request Body (all optional):
+    {
+        "castingDate": "2025-01-15T10:30:00",   # Default: pour completion time
+        "castingTime": "10:30",
+        "testAges": [3, 7, 28, 56],              # Default: by concrete type (PT → 5 instead of 3)
+        "setsPerAge": 1,
+        "thirdPartyLabAssignments": {"28": 5},
+        "curingMethod": "Water",
+        "curingTemperature": 23.0
+    }
+    """
+    try:
+        current_user = _get_current_user()
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
+        
+        pour = db.session.query(PourActivity)\
+            .options(joinedload(PourActivity.batches))\
+            .filter_by(id=pour_id)\
+            .first()
+        
+        if not pour:
+            return jsonify({"error": "Pour activity not found"}), 404
+        
+        denied = _project_access_error(current_user, pour.project_id)
+        if denied:
+            return denied
+        
+        if pour.status != 'completed':
+            return jsonify({"error": "Complete the pour before casting cube sets"}), 400
+        
+        if not pour.batches:
+            return jsonify({"error": "Cannot cast cubes for a pour with no batches linked"}), 400
+        
+        existing = db.session.query(CubeTestRegister.id).filter(
+            CubeTestRegister.pour_activity_id == pour.id,
+            CubeTestRegister.is_deleted == False
+        ).first()
+        if existing:
+            return jsonify({"error": "Cube sets already created for this pour"}), 409
+        
+        try:
+            options = _parse_cube_set_options(request.get_json() or {}, pour)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        cube_tests, reminders = _cast_pour_cube_sets(pour, options, current_user.id)
+        db.session.commit()
+        
+        return jsonify({
+            "success": True,
+            "message": f"Created {len(cube_tests)} cube test sets with reminders for {len(pour.batches)} batches",
+            "cubeTests": cube_tests,
+            "reminders": reminders
+        }), 201
         
     except Exception as e:
         db.session.rollback()
@@ -11,6 +11,7 @@ from server.db import db
 from server.models import User, Company, Project
 from server.safety_models import Worker
 from server.ppe_tracking_models import PPEIssuance, PPEInventory, PPEType, IssuanceStatus, PPECondition, get_ppe_expiry_date, PPE_LIFESPAN_DAYS
+from server.expiry_management import expiring_entity_ids, track_expiry
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 ppe_bp = Blueprint('ppe_tracking', __name__)
@@ -25,7 +26,7 @@ def get_current_user_id():
 def generate_issuance_number(project_id):
     """Generate unique issuance number: PPE-{project_id}-{year}-{seq}"""
     year = datetime.now().year
-    existing = PPEIssuance.query.filter(
+    existing = db.session.query(PPEIssuance).filter(
         PPEIssuance.project_id == project_id,
         extract('year', PPEIssuance.issue_date) == year,
         PPEIssuance.is_deleted == False
@@ -33,6 +34,14 @@ def generate_issuance_number(project_id):
     seq = existing + 1
     return f"PPE-{project_id}-{year}-{seq:05d}"
 
+def track_issuance_expiry(issuance):
+    """Keep the expiry bucket in step with an issuance (only items still held are tracked)"""
+    held = issuance.status in (IssuanceStatus.ISSUED, IssuanceStatus.EXPIRED) and not issuance.is_deleted
+    track_expiry(
+        db.session, 'ppe', issuance.id, issuance.company_id, issuance.project_id,
+        issuance.worker_id, issuance.issuance_number, issuance.expiry_date if held else None
+    )
+
 # ========================================
 # 1. ISSUE PPE TO WORKER
 # ========================================
@@ -58,11 +67,11 @@ def issue_ppe():
         if not all(field in data for field in required):
             return jsonify({'error': f'Missing required fields: {required}'}), 400
         
-        project = Project.query.get(data['project_id'])
+        project = db.session.query(Project).get(data['project_id'])
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        worker = Worker.query.get(data['worker_id'])
+        worker = db.session.query(Worker).get(data['worker_id'])
         if not worker:
             return jsonify({'error': 'Worker not found'}), 404
         
@@ -104,9 +113,11 @@ def issue_ppe():
         )
         
         db.session.add(issuance)
+        db.session.flush()
+        track_issuance_expiry(issuance)
         
         # Update inventory (decrease available stock)
-        inventory = PPEInventory.query.filter_by(
+        inventory = db.session.query(PPEInventory).filter_by(
             project_id=data['project_id'],
             ppe_type=ppe_type_enum,
             ppe_description=data['ppe_description'],
@@ -151,11 +162,11 @@ def return_ppe(issuance_id):
         user_id = get_current_user_id()
         data = request.get_json()
         
-        issuance = PPEIssuance.query.get(issuance_id)
+        issuance = db.session.query(PPEIssuance).get(issuance_id)
         if not issuance or issuance.is_deleted:
             return jsonify({'error': 'Issuance record not found'}), 404
         
-        if issuance.status != IssuanceStatus.ISSUED:
+        if issuance.status not in (IssuanceStatus.ISSUED, IssuanceStatus.EXPIRED):
             return jsonify({'error': f'PPE already returned/damaged/lost. Current status: {issuance.status.value}'}), 400
         
         # Update issuance
@@ -164,11 +175,12 @@ def return_ppe(issuance_id):
         issuance.return_condition = PPECondition[data.get('return_condition', 'GOOD')]
         issuance.return_remarks = data.get('return_remarks')
         issuance.status = IssuanceStatus.RETURNED
+        track_issuance_expiry(issuance)
         issuance.updated_by = user_id
         
         # Update inventory (increase available stock if condition is good)
         if issuance.return_condition in [PPECondition.NEW, PPECondition.GOOD]:
-            inventory = PPEInventory.query.filter_by(
+            inventory = db.session.query(PPEInventory).filter_by(
                 project_id=issuance.project_id,
                 ppe_type=issuance.ppe_type,
                 ppe_description=issuance.ppe_description,
@@ -211,7 +223,7 @@ def report_damage(issuance_id):
         user_id = get_current_user_id()
         data = request.get_json()
         
-        issuance = PPEIssuance.query.get(issuance_id)
+        issuance = db.session.query(PPEIssuance).get(issuance_id)
         if not issuance or issuance.is_deleted:
             return jsonify({'error': 'Issuance record not found'}), 404
         
@@ -221,11 +233,12 @@ def report_damage(issuance_id):
         issuance.damage_photos = data.get('damage_photos', [])
         issuance.replacement_required = data.get('replacement_required', False)
         issuance.status = IssuanceStatus.DAMAGED
+        track_issuance_expiry(issuance)
         issuance.updated_by = user_id
         
         # Update inventory (decrease issued if still with worker)
         if issuance.return_date is None:
-            inventory = PPEInventory.query.filter_by(
+            inventory = db.session.query(PPEInventory).filter_by(
                 project_id=issuance.project_id,
                 ppe_type=issuance.ppe_type,
                 ppe_description=issuance.ppe_description,
@@ -268,7 +281,7 @@ def report_loss(issuance_id):
         user_id = get_current_user_id()
         data = request.get_json()
         
-        issuance = PPEIssuance.query.get(issuance_id)
+        issuance = db.session.query(PPEIssuance).get(issuance_id)
         if not issuance or issuance.is_deleted:
             return jsonify({'error': 'Issuance record not found'}), 404
         
@@ -277,10 +290,11 @@ def report_loss(issuance_id):
         issuance.loss_remarks = data.get('loss_remarks')
         issuance.penalty_amount = data.get('penalty_amount', 0)
         issuance.status = IssuanceStatus.LOST
+        track_issuance_expiry(issuance)
         issuance.updated_by = user_id
         
         # Update inventory (decrease issued)
-        inventory = PPEInventory.query.filter_by(
+        inventory = db.session.query(PPEInventory).filter_by(
             project_id=issuance.project_id,
             ppe_type=issuance.ppe_type,
             ppe_description=issuance.ppe_description,
@@ -319,9 +333,9 @@ def list_issuances():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
-        query = PPEIssuance.query.filter(
+        query = db.session.query(PPEIssuance).filter(
             PPEIssuance.company_id == user.company_id,
             PPEIssuance.is_deleted == False
         )
@@ -367,13 +381,13 @@ def get_worker_ppe_history(worker_id):
     """Get complete PPE issuance history for a worker"""
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
-        worker = Worker.query.get(worker_id)
+        worker = db.session.query(Worker).get(worker_id)
         if not worker:
             return jsonify({'error': 'Worker not found'}), 404
         
-        issuances = PPEIssuance.query.filter(
+        issuances = db.session.query(PPEIssuance).filter(
             PPEIssuance.worker_id == worker_id,
             PPEIssuance.company_id == user.company_id,
             PPEIssuance.is_deleted == False
@@ -417,9 +431,9 @@ def list_inventory():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
-        query = PPEInventory.query.filter(
+        query = db.session.query(PPEInventory).filter(
             PPEInventory.company_id == user.company_id,
             PPEInventory.is_deleted == False
         )
@@ -472,7 +486,7 @@ def add_inventory():
         user_id = get_current_user_id()
         data = request.get_json()
         
-        project = Project.query.get(data['project_id'])
+        project = db.session.query(Project).get(data['project_id'])
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
@@ -533,7 +547,7 @@ def restock_inventory(inventory_id):
         user_id = get_current_user_id()
         data = request.get_json()
         
-        inventory = PPEInventory.query.get(inventory_id)
+        inventory = db.session.query(PPEInventory).get(inventory_id)
         if not inventory or inventory.is_deleted:
             return jsonify({'error': 'Inventory item not found'}), 404
         
@@ -573,26 +587,38 @@ def get_expiring_ppe():
     """
     Get PPE items expiring soon (30 days)
     Query params: project_id, days_threshold (default 30)
+    Reads the precomputed expiry buckets; thresholds beyond the bucket horizon query live
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
         days = request.args.get('days_threshold', default=30, type=int)
-        expiry_threshold = date.today() + timedelta(days=days)
-        
-        query = PPEIssuance.query.filter(
-            PPEIssuance.company_id == user.company_id,
-            PPEIssuance.expiry_date <= expiry_threshold,
-            PPEIssuance.expiry_date >= date.today(),
-            PPEIssuance.status == IssuanceStatus.ISSUED,
-            PPEIssuance.is_deleted == False
-        )
-        
-        if request.args.get('project_id'):
-            query = query.filter(PPEIssuance.project_id == request.args.get('project_id', type=int))
-        
-        expiring = query.order_by(PPEIssuance.expiry_date).all()
+        project_id = request.args.get('project_id', type=int)
+        
+        ids = expiring_entity_ids(db.session, 'ppe', user.company_id, days, project_id=project_id)
+        
+        if ids is not None:
+            by_id = {
+                i.id: i for i in db.session.query(PPEIssuance).filter(
+                    PPEIssuance.id.in_(ids),
+                    PPEIssuance.status == IssuanceStatus.ISSUED,
+                    PPEIssuance.is_deleted == False
+                ).all()
+            } if ids else {}
+            expiring = [by_id[i] for i in ids if i in by_id]
+        else:
+            expiry_threshold = date.today() + timedelta(days=days)
+            query = db.session.query(PPEIssuance).filter(
+                PPEIssuance.company_id == user.company_id,
+                PPEIssuance.expiry_date <= expiry_threshold,
+                PPEIssuance.expiry_date >= date.today(),
+                PPEIssuance.status == IssuanceStatus.ISSUED,
+                PPEIssuance.is_deleted == False
+            )
+            if project_id:
+                query = query.filter(PPEIssuance.project_id == project_id)
+            expiring = query.order_by(PPEIssuance.expiry_date).all()
         
         return jsonify({
             'expiring_ppe': [i.to_dict() for i in expiring],
@@ -617,9 +643,9 @@ def get_ppe_statistics():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
-        query = PPEIssuance.query.filter(
+        query = db.session.query(PPEIssuance).filter(
             PPEIssuance.company_id == user.company_id,
             PPEIssuance.is_deleted == False
         )
@@ -4,7 +4,7 @@ Database models for PPE issuance, return, damage tracking, and inventory managem
 """
 
 from server.db import Base
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Numeric, Enum, Date
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Numeric, Enum, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 import enum
@@ -50,6 +50,10 @@ class PPEIssuance(Base):
     Tracks individual PPE items issued to workers
     """
     __tablename__ = 'ppe_issuances'
+    __table_args__ = (
+        Index('ix_ppe_issuances_expired_expiry', 'is_expired', 'expiry_date'),
+        Index('ix_ppe_issuances_company_expiry', 'company_id', 'expiry_date'),
+    )
     
     # Primary Key
     id = Column(Integer, primary_key=True)
@@ -147,9 +151,9 @@ class PPEIssuance(Base):
             
             'worker': {
                 'id': self.worker_id,
-                'name': self.worker.name if self.worker else None,
-                'company': self.worker.company if self.worker else None,
-                'trade': self.worker.trade if self.worker else None
+                'name': self.worker.full_name if self.worker else None,
+                'company': self.worker.contractor if self.worker else None,
+                'trade': self.worker.skill_category if self.worker else None
             } if self.worker else None,
             
             'ppe': {
@@ -165,7 +169,7 @@ class PPEIssuance(Base):
             'issuance': {
                 'issue_date': self.issue_date.isoformat() if self.issue_date else None,
                 'issued_by_id': self.issued_by_id,
-                'issued_by_name': self.issued_by.name if self.issued_by else None,
+                'issued_by_name': self.issued_by.full_name if self.issued_by else None,
                 'issue_remarks': self.issue_remarks
             },
             
@@ -179,7 +183,7 @@ class PPEIssuance(Base):
             'return': {
                 'return_date': self.return_date.isoformat() if self.return_date else None,
                 'returned_to_id': self.returned_to_id,
-                'returned_to_name': self.returned_to.name if self.returned_to else None,
+                'returned_to_name': self.returned_to.full_name if self.returned_to else None,
                 'return_condition': self.return_condition.value if self.return_condition else None,
                 'return_remarks': self.return_remarks
             },
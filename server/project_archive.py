@@ -0,0 +1,653 @@
+"""
+Project Archives
+Move a closed project's rows out of the hot tables into one self-describing file,
+browse it read-only, and restore it on demand
+
+Archive file: <PROJECT_ARCHIVE_DIR>/<company_id>/project-<id>-<timestamp>.zip
+- manifest.json: format version, project row, per table row count, columns,
+  blob count and SHA-256 of the table file
+- tables/<table>.jsonl: one row per line, in insert order (parents first)
+- blobs/<table>/<pk>.<column>: LargeBinary values (photos, signatures, certificates),
+  stored uncompressed; the row holds {"$blob": "<member>"} instead of the bytes
+
+The project's graph is every table with a project_id column plus the tables that
+hang off them by foreign key (permit logs, audit items, attendances, NC comments).
+The projects row itself stays, with status 'archived', so the project and its
+archives remain listed.
+
+Archival exports, verifies (zip CRCs, table checksums, row counts against the
+database) and deletes in one transaction: a failure anywhere leaves the hot tables
+untouched. The project row is locked first and, on PostgreSQL, the transaction
+runs under REPEATABLE READ, so export and delete see the same rows; a concurrent
+update of an exported row aborts the archival instead of being lost. Rows still
+referenced from outside the project (e.g. a project vendor used by another
+project's batches) block archival.
+
+Restore re-inserts the rows with their original ids. Both adjust the notification
+unread counters of the moved notifications in the same transaction (Core writes
+bypass the counter hook). Archive files are never deleted by this module.
+
+Archival and restore of a large project outlast any request timeout: the API
+queues a ProjectArchiveRequest and run_project_archive_requests() (background
+job) carries it out.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+
+from sqlalchemy import (
+    Column, Date, DateTime, Float, Index, Integer, LargeBinary, Numeric, String, Text, Time, and_, delete,
+    exc, func, insert, not_, select, update
+)
+
+from .db import Base, engine, session_scope
+from .config import get_config
+from .models import Project
+from .notification_stream import READ_STATUS, apply_unread_deltas
+from .safety_nc_models import ContractorNotification
+from .tenancy import tenant_cache
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+ARCHIVE_FORMAT = 'prosite-project-archive'
+ARCHIVE_VERSION = 1
+
+# Rows fetched / inserted per round trip
+ARCHIVE_CHUNK_SIZE = 2000
+
+ARCHIVED_STATUS = 'archived'
+PENDING_REQUEST_STATUSES = ('queued', 'running')
+
+
+class ProjectArchiveError(Exception):
+    """The project cannot be archived or restored (state, references, verification)"""
+
+
+class ProjectArchive(Base):
+    """
+    Archived Project
+    One row per archive file; the rows of the project live in the file while status is 'archived'
+    """
+    __tablename__ = 'project_archives'
+    __table_args__ = (
+        Index('ix_project_archives_company_project', 'company_id', 'project_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    project_name = Column(String(255), nullable=False)
+    previous_status = Column(String(50), nullable=True)  # Project status before archival, restored with the rows
+    status = Column(String(20), nullable=False, default='archived')  # archived, restored
+    file_path = Column(String(500), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    blob_count = Column(Integer, nullable=False, default=0)
+    table_counts = Column(Text, nullable=True)  # JSON {table: rows}
+    sha256 = Column(String(64), nullable=False)  # Checksum of the archive file
+    archived_by = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    restored_by = Column(Integer, nullable=True)
+    restored_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'project_id': self.project_id,
+            'project_name': self.project_name,
+            'status': self.status,
+            'file_path': self.file_path,
+            'row_count': self.row_count,
+            'blob_count': self.blob_count,
+            'table_counts': json.loads(self.table_counts) if self.table_counts else {},
+            'sha256': self.sha256,
+            'archived_by': self.archived_by,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None,
+            'restored_by': self.restored_by,
+            'restored_at': self.restored_at.isoformat() if self.restored_at else None
+        }
+
+
+class ProjectArchiveRequest(Base):
+    """
+    Queued Archive / Restore
+    One row per requested archival or restore, carried out by run_project_archive_requests()
+    """
+    __tablename__ = 'project_archive_requests'
+    __table_args__ = (
+        Index('ix_project_archive_requests_status', 'status', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)  # archive, restore
+    archive_id = Column(Integer, nullable=True)  # Archive to restore / archive written
+    force = Column(Integer, nullable=False, default=0)  # Archive a project in any status
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, done, failed
+    error = Column(Text, nullable=True)
+    requested_by = Column(Integer, nullable=True)
+    requested_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'company_id': self.company_id,
+            'project_id': self.project_id,
+            'action': self.action,
+            'archive_id': self.archive_id,
+            'status': self.status,
+            'error': self.error,
+            'requested_by': self.requested_by,
+            'requested_at': self.requested_at.isoformat() if self.requested_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+# ========================================
+# PROJECT GRAPH
+# ========================================
+
+def project_tables(metadata=None):
+    """
+    Tables holding a project's rows, parents before children.
+    Returns: [(table, parent_fk)] - parent_fk is None for tables with a project_id
+    column, otherwise the foreign key linking the table to an earlier graph table
+    """
+    metadata = metadata or Base.metadata
+    graph = {}
+    for table in metadata.sorted_tables:
+        if table.name in (Project.__tablename__, ProjectArchive.__tablename__, ProjectArchiveRequest.__tablename__):
+            continue
+        if 'project_id' in table.c:
+            graph[table.name] = (table, None)
+            continue
+        links = sorted(
+            (fk for fk in table.foreign_keys
+             if fk.column.table.name in graph and fk.column.table is not table),
+            key=lambda fk: (fk.parent.nullable, fk.parent.name)  # Prefer the mandatory parent
+        )
+        if links:
+            graph[table.name] = (table, links[0])
+    return list(graph.values())
+
+
+def _row_filter(table, parent_fk, project_id, graph):
+    """WHERE clause selecting the project's rows of `table`"""
+    if parent_fk is None:
+        return table.c.project_id == project_id
+    parent = parent_fk.column.table
+    return parent_fk.parent.in_(
+        select(parent_fk.column).where(_row_filter(parent, graph[parent.name], project_id, graph))
+    )
+
+
+def _project_filters(project_id):
+    tables = project_tables()
+    graph = {table.name: parent_fk for table, parent_fk in tables}
+    return [(table, _row_filter(table, parent_fk, project_id, graph)) for table, parent_fk in tables]
+
+
+def external_references(conn, project_id, filters=None):
+    """
+    Rows outside the project that reference one of its rows (these block archival).
+    Returns: {"referencing_table.column -> referenced_table": count}
+    """
+    filters = filters or _project_filters(project_id)
+    selected = {table.name: where for table, where in filters}
+    blockers = {}
+    for table in Base.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            referenced = fk.column.table
+            if referenced.name not in selected:
+                continue
+            condition = fk.parent.in_(select(fk.column).where(selected[referenced.name]))
+            if table.name in selected:
+                condition = and_(condition, not_(selected[table.name]))
+            count = conn.execute(select(func.count()).select_from(table).where(condition)).scalar()
+            if count:
+                blockers[f"{table.name}.{fk.parent.name} -> {referenced.name}"] = count
+    return blockers
+
+
+# ========================================
+# ROW ENCODING
+# ========================================
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.name  # SQLAlchemy Enum columns store member names
+    return str(value)
+
+
+def _decoder(column):
+    """Turn a JSON value of `column` back into what the column expects on insert"""
+    kind = column.type
+    if isinstance(kind, DateTime):
+        return datetime.fromisoformat
+    if isinstance(kind, Date):
+        return date.fromisoformat
+    if isinstance(kind, Time):
+        return time.fromisoformat
+    if isinstance(kind, Numeric) and not isinstance(kind, Float):
+        return Decimal
+    return None
+
+
+def _blob_columns(table):
+    return [column.name for column in table.c if isinstance(column.type, LargeBinary)]
+
+
+def _blob_member(table, row, column_name):
+    key = '-'.join(str(row[column.name]) for column in table.primary_key.columns)
+    return f"blobs/{table.name}/{key}.{column_name}"
+
+
+# ========================================
+# EXPORT + VERIFY
+# ========================================
+
+def _archive_path(archive_dir, company_id, project_id):
+    directory = Path(archive_dir) / str(company_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"project-{project_id}-{datetime.utcnow():%Y%m%d%H%M%S}.zip"
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_table(conn, archive, table, where):
+    """
+    Stream the selected rows of one table into the archive.
+    Rows go to a temporary file first (zipfile writes one member at a time, and
+    blobs are written as their own members while the rows stream).
+    Returns: manifest entry {rows, blobs, sha256, columns}
+    """
+    blob_columns = _blob_columns(table)
+    order = list(table.primary_key.columns) or list(table.c)
+    result = conn.execution_options(stream_results=True, yield_per=ARCHIVE_CHUNK_SIZE).execute(
+        select(table).where(where).order_by(*order)
+    )
+
+    digest = hashlib.sha256()
+    rows = blobs = 0
+    with tempfile.TemporaryFile() as buffer:
+        for chunk in result.partitions():
+            for row in chunk:
+                values = dict(row._mapping)
+                for name in blob_columns:
+                    if values[name] is not None:
+                        member = _blob_member(table, values, name)
+                        archive.writestr(zipfile.ZipInfo(member), bytes(values[name]), compress_type=zipfile.ZIP_STORED)
+                        values[name] = {'$blob': member}
+                        blobs += 1
+                line = (json.dumps(values, default=_json_default) + '\n').encode('utf-8')
+                digest.update(line)
+                buffer.write(line)
+                rows += 1
+        buffer.seek(0)
+        with archive.open(f"tables/{table.name}.jsonl", 'w', force_zip64=True) as member:
+            shutil.copyfileobj(buffer, member)
+
+    return {
+        'rows': rows,
+        'blobs': blobs,
+        'sha256': digest.hexdigest(),
+        'columns': [{'name': column.name, 'type': str(column.type)} for column in table.c],
+    }
+
+
+def read_manifest(path):
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read('manifest.json'))
+
+
+def verify_archive(path):
+    """
+    Check an archive end to end: zip CRCs, every table file against its manifest
+    checksum and row count, every blob reference present.
+    Returns: manifest. Raises ProjectArchiveError on any mismatch.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            broken = archive.testzip()
+            if broken:
+                raise ProjectArchiveError(f"{path}: corrupt member {broken}")
+            manifest = json.loads(archive.read('manifest.json'))
+            if manifest.get('format') != ARCHIVE_FORMAT or manifest.get('version', 0) > ARCHIVE_VERSION:
+                raise ProjectArchiveError(f"{path}: unsupported archive format")
+            members = set(archive.namelist())
+            for name, entry in manifest['tables'].items():
+                digest, rows, blobs = hashlib.sha256(), 0, 0
+                with archive.open(f"tables/{name}.jsonl") as f:
+                    for line in f:
+                        digest.update(line)
+                        rows += 1
+                        for value in json.loads(line).values():
+                            if isinstance(value, dict) and '$blob' in value:
+                                if value['$blob'] not in members:
+                                    raise ProjectArchiveError(f"{path}: missing blob {value['$blob']}")
+                                blobs += 1
+                if (rows, blobs, digest.hexdigest()) != (entry['rows'], entry['blobs'], entry['sha256']):
+                    raise ProjectArchiveError(f"{path}: table {name} does not match the manifest")
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise ProjectArchiveError(f"{path}: unreadable archive ({e})") from e
+    return manifest
+
+
+# ========================================
+# ARCHIVE / RESTORE
+# ========================================
+
+def _snapshot(bind):
+    """
+    `bind` set up for one consistent view from export to delete: REPEATABLE READ on
+    PostgreSQL (READ COMMITTED would let rows change in between). SQLite transactions
+    are serializable already.
+    """
+    if bind.dialect.name == 'postgresql':
+        return bind.execution_options(isolation_level='REPEATABLE READ')
+    return bind
+
+
+def archive_project(project_id, archived_by=None, archive_dir=None, bind=None, force=False):
+    """
+    Move one project's rows out of the hot tables into an archive file.
+    The project must be in a PROJECT_ARCHIVE_STATUSES status unless force=True.
+    Long running - call from a background job (queue_archive_request), not a request.
+    Returns: ProjectArchive dict
+    """
+    bind = bind or engine
+    archive_dir = archive_dir or config_obj.PROJECT_ARCHIVE_DIR
+    projects = Project.__table__
+    path = None
+
+    try:
+        with _snapshot(bind).begin() as conn:
+            project = conn.execute(
+                select(projects).where(projects.c.id == project_id).with_for_update()
+            ).mappings().first()
+            if project is None:
+                raise ProjectArchiveError(f"Project {project_id} not found")
+            if project['status'] == ARCHIVED_STATUS:
+                raise ProjectArchiveError(f"Project {project_id} is already archived")
+            if not force and project['status'] not in config_obj.PROJECT_ARCHIVE_STATUSES:
+                raise ProjectArchiveError(
+                    f"Only {', '.join(config_obj.PROJECT_ARCHIVE_STATUSES)} projects can be archived "
+                    f"(project {project_id} is {project['status']})"
+                )
+
+            filters = _project_filters(project_id)
+            blockers = external_references(conn, project_id, filters)
+            if blockers:
+                details = ', '.join(f"{key} ({count})" for key, count in sorted(blockers.items()))
+                raise ProjectArchiveError(f"Rows of project {project_id} are referenced from outside it: {details}")
+
+            path = _archive_path(archive_dir, project['company_id'], project_id)
+            manifest = {
+                'format': ARCHIVE_FORMAT,
+                'version': ARCHIVE_VERSION,
+                'created_at': datetime.utcnow().isoformat(),
+                'dialect': conn.dialect.name,
+                'company_id': project['company_id'],
+                'project': json.loads(json.dumps(dict(project), default=_json_default)),
+                'tables': {},
+            }
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                for table, where in filters:
+                    manifest['tables'][table.name] = export_table(conn, archive, table, where)
+                archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+            verify_archive(path)
+            unread = _unread_by_recipient(conn, project_id)
+            for table, where in reversed(filters):
+                expected = manifest['tables'][table.name]['rows']
+                deleted = conn.execute(delete(table).where(where)).rowcount
+                if deleted != expected:
+                    raise ProjectArchiveError(
+                        f"{table.name}: {expected} rows archived but {deleted} deleted (project written to concurrently?)"
+                    )
+
+            # Core deletes bypass the unread counter flush hook
+            apply_unread_deltas(conn, {user_id: -count for user_id, count in unread.items()})
+            conn.execute(update(projects).where(projects.c.id == project_id).values(
+                status=ARCHIVED_STATUS, is_active=0, updated_at=datetime.utcnow()
+            ))
+            table_counts = {name: entry['rows'] for name, entry in manifest['tables'].items() if entry['rows']}
+            record = {
+                'company_id': project['company_id'],
+                'project_id': project_id,
+                'project_name': project['name'],
+                'previous_status': project['status'],
+                'status': ARCHIVED_STATUS,
+                'file_path': str(path),
+                'row_count': sum(table_counts.values()),
+                'blob_count': sum(entry['blobs'] for entry in manifest['tables'].values()),
+                'table_counts': json.dumps(table_counts),
+                'sha256': _file_sha256(path),
+                'archived_by': archived_by,
+                'archived_at': datetime.utcnow(),
+            }
+            archive_id = conn.execute(insert(ProjectArchive.__table__).values(**record)).inserted_primary_key[0]
+    except Exception:
+        if path is not None and path.exists():
+            path.unlink()
+        raise
+
+    tenant_cache.invalidate(record['company_id'])
+    logger.info(f"Archived project {project_id}: {record['row_count']} rows, {record['blob_count']} blobs to {path}")
+    return _archive_dict(bind, archive_id)
+
+
+def _decode_row(table, values, archive, decoders):
+    row = {}
+    for name, value in values.items():
+        if name not in table.c:
+            continue  # Column dropped since the archive was written
+        if isinstance(value, dict) and '$blob' in value:
+            value = archive.read(value['$blob'])
+        elif value is not None and decoders.get(name):
+            value = decoders[name](value)
+        row[name] = value
+    return row
+
+
+def restore_project(archive_id, restored_by=None, bind=None):
+    """
+    Put an archived project's rows back into the hot tables (original ids) and
+    reactivate the project with its previous status and is_active flag.
+    Long running - call from a background job (queue_archive_request), not a request.
+    Returns: ProjectArchive dict
+    """
+    bind = bind or engine
+    archives = ProjectArchive.__table__
+    projects = Project.__table__
+
+    with bind.begin() as conn:
+        record = conn.execute(select(archives).where(archives.c.id == archive_id)).mappings().first()
+        if record is None:
+            raise ProjectArchiveError(f"Archive {archive_id} not found")
+        if record['status'] != ARCHIVED_STATUS:
+            raise ProjectArchiveError(f"Archive {archive_id} was already restored")
+        if not Path(record['file_path']).exists() or _file_sha256(record['file_path']) != record['sha256']:
+            raise ProjectArchiveError(f"Archive file {record['file_path']} is missing or was modified")
+        manifest = verify_archive(record['file_path'])
+
+        unknown = [name for name in manifest['tables'] if name not in Base.metadata.tables]
+        if unknown:
+            raise ProjectArchiveError(f"Archive tables no longer exist: {', '.join(unknown)}")
+
+        with zipfile.ZipFile(record['file_path']) as archive:
+            for name in manifest['tables']:  # Written parents first
+                table = Base.metadata.tables[name]
+                decoders = {column.name: _decoder(column) for column in table.c}
+                batch = []
+                with archive.open(f"tables/{name}.jsonl") as f:
+                    for line in f:
+                        batch.append(_decode_row(table, json.loads(line), archive, decoders))
+                        if len(batch) >= ARCHIVE_CHUNK_SIZE:
+                            _insert_rows(conn, table, batch)
+                            batch = []
+                if batch:
+                    _insert_rows(conn, table, batch)
+        apply_unread_deltas(conn, _unread_by_recipient(conn, record['project_id']))
+
+        conn.execute(update(projects).where(projects.c.id == record['project_id']).values(
+            status=record['previous_status'] or 'completed',
+            is_active=manifest['project'].get('is_active', 1),  # The manifest holds the project row as archived
+            updated_at=datetime.utcnow()
+        ))
+        conn.execute(update(archives).where(archives.c.id == archive_id).values(
+            status='restored', restored_by=restored_by, restored_at=datetime.utcnow()
+        ))
+
+    tenant_cache.invalidate(record['company_id'])
+    logger.info(f"Restored project {record['project_id']} from {record['file_path']}")
+    return _archive_dict(bind, archive_id)
+
+
+def _unread_by_recipient(conn, project_id):
+    """{recipient user: unread notifications} of a project, for the unread counters"""
+    notifications = ContractorNotification.__table__
+    return dict(conn.execute(
+        select(notifications.c.recipient_user, func.count())
+        .where(notifications.c.project_id == project_id, notifications.c.recipient_user.isnot(None),
+               notifications.c.delivery_status != READ_STATUS)
+        .group_by(notifications.c.recipient_user)
+    ).all())
+
+
+def _insert_rows(conn, table, rows):
+    try:
+        conn.execute(insert(table), rows)
+    except exc.IntegrityError as e:
+        raise ProjectArchiveError(f"{table.name}: archived ids are in use again, restore aborted ({e.orig})") from e
+
+
+def _archive_dict(bind, archive_id):
+    with bind.connect() as conn:
+        row = conn.execute(select(ProjectArchive.__table__).where(ProjectArchive.id == archive_id)).mappings().one()
+    return ProjectArchive(**row).to_dict()
+
+
+# ========================================
+# QUEUED REQUESTS
+# ========================================
+
+def queue_archive_request(session, company_id, project_id, action, requested_by=None, archive_id=None, force=False):
+    """
+    Queue an archival or restore for the background job.
+    Raises ProjectArchiveError while another request for the project is pending.
+    Returns: ProjectArchiveRequest (flushed)
+    """
+    pending = session.query(ProjectArchiveRequest.id).filter(
+        ProjectArchiveRequest.project_id == project_id,
+        ProjectArchiveRequest.status.in_(PENDING_REQUEST_STATUSES)
+    ).first()
+    if pending:
+        raise ProjectArchiveError(f"Project {project_id} already has a pending archive request ({pending.id})")
+    archive_request = ProjectArchiveRequest(
+        company_id=company_id, project_id=project_id, action=action, archive_id=archive_id,
+        force=int(bool(force)), status='queued', requested_by=requested_by, requested_at=datetime.utcnow()
+    )
+    session.add(archive_request)
+    session.flush()
+    return archive_request
+
+
+def _claim_request(request_id):
+    """Mark a queued request running; False when another runner claimed it first"""
+    requests_table = ProjectArchiveRequest.__table__
+    with engine.begin() as conn:
+        return conn.execute(
+            update(requests_table)
+            .where(requests_table.c.id == request_id, requests_table.c.status == 'queued')
+            .values(status='running', started_at=datetime.utcnow())
+        ).rowcount == 1
+
+
+def run_project_archive_requests(limit=None):
+    """
+    Background job: Carry out queued archive / restore requests, oldest first
+    Run every few minutes; overlapping runs never take the same request
+    """
+    with session_scope() as session:
+        queued = session.query(
+            ProjectArchiveRequest.id, ProjectArchiveRequest.project_id, ProjectArchiveRequest.action,
+            ProjectArchiveRequest.archive_id, ProjectArchiveRequest.force, ProjectArchiveRequest.requested_by
+        ).filter_by(status='queued').order_by(ProjectArchiveRequest.id).limit(limit).all()
+
+    results = {'done': 0, 'failed': 0}
+    requests_table = ProjectArchiveRequest.__table__
+    for queued_request in queued:
+        if not _claim_request(queued_request.id):
+            continue
+        outcome = {'status': 'done', 'error': None}
+        try:
+            if queued_request.action == 'restore':
+                restore_project(queued_request.archive_id, restored_by=queued_request.requested_by)
+            else:
+                archive = archive_project(queued_request.project_id, archived_by=queued_request.requested_by,
+                                          force=bool(queued_request.force))
+                outcome['archive_id'] = archive['id']
+        except Exception as e:
+            logger.error(f"Project archive request {queued_request.id} failed: {e}")
+            outcome = {'status': 'failed', 'error': str(e)}
+        with engine.begin() as conn:
+            conn.execute(update(requests_table).where(requests_table.c.id == queued_request.id).values(
+                finished_at=datetime.utcnow(), **outcome
+            ))
+        results[outcome['status']] += 1
+    return results
+
+
+# ========================================
+# READ-ONLY BROWSING
+# ========================================
+
+def iter_archive_rows(path, table_name, offset=0, limit=None):
+    """Rows of one archived table, blobs left as {"$blob": member} references"""
+    with zipfile.ZipFile(path) as archive:
+        try:
+            f = archive.open(f"tables/{table_name}.jsonl")
+        except KeyError:
+            raise ProjectArchiveError(f"Table {table_name} is not in the archive")
+        with f:
+            for index, line in enumerate(f):
+                if index < offset:
+                    continue
+                if limit is not None and index >= offset + limit:
+                    break
+                yield json.loads(line)
+
+
+def read_archive_blob(path, member):
+    """Bytes of one archived blob"""
+    if not member.startswith('blobs/'):
+        raise ProjectArchiveError(f"{member} is not a blob")
+    with zipfile.ZipFile(path) as archive:
+        try:
+            return archive.read(member)
+        except KeyError:
+            raise ProjectArchiveError(f"Blob {member} is not in the archive")
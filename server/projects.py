@@ -1,14 +1,24 @@
 """
 Projects API endpoints for listing and managing projects.
 """
-from flask import Blueprint, request, jsonify
+from io import BytesIO
+
+from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import desc
 
 from .models import Project, User
 from .db import SessionLocal
+from .config import get_config
+from .project_archive import (
+    ARCHIVED_STATUS, ProjectArchive, ProjectArchiveError, ProjectArchiveRequest, iter_archive_rows,
+    queue_archive_request, read_archive_blob, read_manifest
+)
+from .tenancy import current_company_id, tenant_session, tenant_cache
 from contextlib import contextmanager
 
+config_obj = get_config()
+
 projects_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
 
@@ -31,26 +41,17 @@ def session_scope():
 def list_projects():
     """List all projects for the user's company."""
     try:
-        with session_scope() as session:
-            user_id = get_jwt_identity()
-            user = session.query(User).filter_by(id=user_id).first()
-
-            if not user:
-                return jsonify({'error': 'User not found'}), 404
+        company_id = current_company_id()
 
-            # Get all projects for user's company
-            projects = (
-                session.query(Project)
-                .filter_by(company_id=user.company_id)
-                .order_by(desc(Project.created_at))
-                .all()
-            )
+        def load():
+            # Tenant guard scopes the query to the company (projects company_id, created_at index)
+            with tenant_session(company_id) as session:
+                projects = session.query(Project).order_by(desc(Project.created_at)).all()
+                return [project.to_dict() for project in projects]
 
-            # Return enabled modules/features for each project
-            return (
-                jsonify({'projects': [project.to_dict() for project in projects], 'total': len(projects)}),
-                200,
-            )
+        # Return enabled modules/features for each project
+        projects = tenant_cache.get_or_load(company_id, 'projects', load)
+        return jsonify({'projects': projects, 'total': len(projects)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -129,3 +130,191 @@ def create_project():
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+# ========================================
+# PROJECT ARCHIVES
+# ========================================
+
+ARCHIVE_PAGE_MAX = 500
+
+
+def _archive_admin(session):
+    """The calling user if they may manage project archives, else None"""
+    user = session.query(User).filter_by(id=get_jwt_identity()).first()
+    if not user or not (getattr(user, 'is_system_admin', False) or getattr(user, 'is_company_admin', False) or getattr(user, 'is_support_admin', False)):
+        return None
+    return user
+
+
+def _company_archive(session, user, archive_id):
+    return session.query(ProjectArchive).filter_by(id=archive_id, company_id=user.company_id).first()
+
+
+@projects_bp.route('/<int:project_id>/archive', methods=['POST'])
+@jwt_required()
+def archive_closed_project(project_id):
+    """
+    Queue the archival of a completed/cancelled project (Admin only).
+    Body (optional): {"force": true} to archive a project in any other status.
+    Returns 202 with the request; poll GET /archive-requests/<id> for the archive.
+    """
+    try:
+        force = bool((request.get_json(silent=True) or {}).get('force'))
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            project = session.query(Project).filter_by(id=project_id, company_id=user.company_id).first()
+            if not project:
+                return jsonify({'error': 'Project not found'}), 404
+            # Checked again by the job; failing here spares a queued request
+            if project.status == ARCHIVED_STATUS:
+                raise ProjectArchiveError(f"Project {project_id} is already archived")
+            if not force and project.status not in config_obj.PROJECT_ARCHIVE_STATUSES:
+                raise ProjectArchiveError(
+                    f"Only {', '.join(config_obj.PROJECT_ARCHIVE_STATUSES)} projects can be archived "
+                    f"(project {project_id} is {project.status})"
+                )
+            archive_request = queue_archive_request(
+                session, user.company_id, project_id, 'archive', requested_by=user.id, force=force
+            )
+            return jsonify({'message': 'Project archival queued', 'request': archive_request.to_dict()}), 202
+    except ProjectArchiveError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archives', methods=['GET'])
+@jwt_required()
+def list_project_archives():
+    """List the company's project archives (Admin only)."""
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archives = (
+                session.query(ProjectArchive)
+                .filter_by(company_id=user.company_id)
+                .order_by(desc(ProjectArchive.archived_at))
+                .all()
+            )
+            return jsonify({'archives': [a.to_dict() for a in archives], 'total': len(archives)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archives/<int:archive_id>', methods=['GET'])
+@jwt_required()
+def get_project_archive(archive_id):
+    """Archive record plus its manifest (project row, tables, row counts, columns)."""
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archive = _company_archive(session, user, archive_id)
+            if not archive:
+                return jsonify({'error': 'Archive not found'}), 404
+            record = archive.to_dict()
+
+        return jsonify({'archive': record, 'manifest': read_manifest(record['file_path'])}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archives/<int:archive_id>/tables/<table_name>', methods=['GET'])
+@jwt_required()
+def browse_project_archive(archive_id, table_name):
+    """
+    Read-only rows of one archived table.
+    Query: offset (default 0), limit (default 100, max 500)
+    """
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archive = _company_archive(session, user, archive_id)
+            if not archive:
+                return jsonify({'error': 'Archive not found'}), 404
+            file_path = archive.file_path
+
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), ARCHIVE_PAGE_MAX)
+        rows = list(iter_archive_rows(file_path, table_name, offset, limit))
+        return jsonify({'table': table_name, 'offset': offset, 'rows': rows, 'count': len(rows)}), 200
+    except ProjectArchiveError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archives/<int:archive_id>/blobs/<path:member>', methods=['GET'])
+@jwt_required()
+def get_project_archive_blob(archive_id, member):
+    """One archived photo/signature/certificate (member as referenced by {"$blob": ...})."""
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archive = _company_archive(session, user, archive_id)
+            if not archive:
+                return jsonify({'error': 'Archive not found'}), 404
+            file_path = archive.file_path
+
+        data = read_archive_blob(file_path, f"blobs/{member}")
+        return send_file(BytesIO(data), mimetype='application/octet-stream', download_name=member.rsplit('/', 1)[-1])
+    except ProjectArchiveError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archives/<int:archive_id>/restore', methods=['POST'])
+@jwt_required()
+def restore_project_archive(archive_id):
+    """
+    Queue moving an archived project's rows back into the live tables (Admin only).
+    Returns 202 with the request; poll GET /archive-requests/<id>.
+    """
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archive = _company_archive(session, user, archive_id)
+            if not archive:
+                return jsonify({'error': 'Archive not found'}), 404
+            if archive.status != ARCHIVED_STATUS:
+                raise ProjectArchiveError(f"Archive {archive_id} was already restored")
+            archive_request = queue_archive_request(
+                session, user.company_id, archive.project_id, 'restore', requested_by=user.id, archive_id=archive_id
+            )
+            return jsonify({'message': 'Project restore queued', 'request': archive_request.to_dict()}), 202
+    except ProjectArchiveError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@projects_bp.route('/archive-requests/<int:request_id>', methods=['GET'])
+@jwt_required()
+def get_project_archive_request(request_id):
+    """Status of a queued archive / restore (Admin only); archive_id is set once an archival is done."""
+    try:
+        with session_scope() as session:
+            user = _archive_admin(session)
+            if not user:
+                return jsonify({'error': 'Unauthorized'}), 403
+            archive_request = session.query(ProjectArchiveRequest).filter_by(
+                id=request_id, company_id=user.company_id
+            ).first()
+            if not archive_request:
+                return jsonify({'error': 'Archive request not found'}), 404
+            return jsonify({'request': archive_request.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
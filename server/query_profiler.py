@@ -0,0 +1,371 @@
+"""
+SQL Query Profiler
+Per-request query counts, DB time and N+1 detection from SQLAlchemy cursor events
+
+- Every statement executed during a request (or a profile_block, e.g. a background
+  job) is timed and grouped by fingerprint: the SQL with literals, bound parameters
+  and IN lists collapsed, so a per-row loop shows up as one fingerprint run N times
+- A fingerprint repeated N_PLUS_ONE_THRESHOLD times in one request is an N+1
+  suspect; the first application frame that issued it is recorded
+- Results are surfaced as:
+  - Server-Timing response header (db;dur=..;desc="12 queries", app;dur=..)
+    when QUERY_PROFILE_HEADERS is on
+  - one JSON log line per request with N+1 suspects or QUERY_PROFILE_LOG_MIN_QUERIES+ queries
+  - GET /api/_debug/profile (support/system admins): per-endpoint aggregates and
+    the last QUERY_PROFILE_HISTORY request profiles of this process
+- Query budgets: query_budget(n) fails a block that runs more than n statements
+  (tests); under app.testing every request is held to QUERY_BUDGET when set
+
+Profiling costs two perf_counter() calls and a dict update per statement.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from flask import Blueprint, current_app, g, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .auth import require_support_admin
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+debug_bp = Blueprint('query_debug', __name__, url_prefix='/api/_debug')
+
+SQL_PREVIEW_CHARS = 300
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_profile = ContextVar('query_profile', default=None)
+_budgets = ContextVar('query_budgets', default=())
+
+
+# ========================================
+# FINGERPRINTS
+# ========================================
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """Statement shape: literals and parameters become ?, IN lists (?, ?, ...) become (?+)"""
+    sql = _STRING.sub('?', statement)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(?+)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _callsite():
+    """First application frame (outside this module, SQLAlchemy and libraries) on the stack"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_REPO_ROOT) and filename != __file__ and 'site-packages' not in filename:
+            return f"{os.path.relpath(filename, _REPO_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+# ========================================
+# PROFILES
+# ========================================
+
+class QueryProfile:
+    """Statements of one request or block, grouped by fingerprint"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = {}  # fingerprint -> [count, seconds, first statement, callsite]
+
+    def record(self, statement, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        key = fingerprint(statement)
+        entry = self.statements.get(key)
+        if entry is None:
+            self.statements[key] = [1, seconds, statement, None]
+            return
+        entry[0] += 1
+        entry[1] += seconds
+        if entry[0] == config_obj.N_PLUS_ONE_THRESHOLD:
+            entry[3] = _callsite()
+
+    def merge(self, other):
+        self.queries += other.queries
+        self.db_seconds += other.db_seconds
+        for key, (count, seconds, statement, callsite) in other.statements.items():
+            entry = self.statements.setdefault(key, [0, 0.0, statement, callsite])
+            entry[0] += count
+            entry[1] += seconds
+            entry[3] = entry[3] or callsite
+
+    def suspects(self):
+        """N+1 suspects, most repeated first"""
+        return [
+            {
+                'count': count,
+                'db_ms': round(seconds * 1000, 2),
+                'sql': statement[:SQL_PREVIEW_CHARS],
+                'callsite': callsite,
+            }
+            for count, seconds, statement, callsite in sorted(self.statements.values(), key=lambda e: -e[0])
+            if count >= config_obj.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'queries': self.queries,
+            'db_ms': round(self.db_seconds * 1000, 2),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'n_plus_one': self.suspects(),
+        }
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None or _budgets.get():
+        conn.info.setdefault('query_profiler_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_profiler_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement, elapsed)
+    for budget in _budgets.get():
+        budget.record(statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed_statement(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so the
+    # list on a pooled connection does not grow with every error
+    conn = context.connection
+    started = conn.info.get('query_profiler_started') if conn is not None else None
+    if started:
+        started.pop()
+
+
+# ========================================
+# HISTORY
+# ========================================
+
+class ProfileHistory:
+    """Recent profiles and per-name aggregates of this process"""
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=size)
+        self._totals = {}
+
+    def add(self, summary):
+        with self._lock:
+            self._recent.append(summary)
+            totals = self._totals.setdefault(summary['name'], {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'n_plus_one_requests': 0
+            })
+            totals['requests'] += 1
+            totals['queries'] += summary['queries']
+            totals['max_queries'] = max(totals['max_queries'], summary['queries'])
+            totals['db_ms'] += summary['db_ms']
+            totals['n_plus_one_requests'] += 1 if summary['n_plus_one'] else 0
+
+    def recent(self, name=None, n_plus_one=False, limit=50):
+        with self._lock:
+            rows = list(self._recent)
+        rows = [r for r in reversed(rows) if (name is None or r['name'] == name) and (r['n_plus_one'] or not n_plus_one)]
+        return rows[:limit]
+
+    def endpoints(self):
+        with self._lock:
+            totals = {name: dict(values) for name, values in self._totals.items()}
+        return sorted(
+            (
+                {
+                    'name': name,
+                    **values,
+                    'avg_queries': round(values['queries'] / values['requests'], 2),
+                    'avg_db_ms': round(values['db_ms'] / values['requests'], 2),
+                    'db_ms': round(values['db_ms'], 2),
+                }
+                for name, values in totals.items()
+            ),
+            key=lambda row: -row['queries']
+        )
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._totals.clear()
+
+
+history = ProfileHistory(config_obj.QUERY_PROFILE_HISTORY)
+
+
+def _report(summary, **fields):
+    """History entry plus a structured log line for N+1 suspects and heavy requests"""
+    summary.update(fields, at=datetime.utcnow().isoformat())
+    history.add(summary)
+    if summary['n_plus_one']:
+        logger.warning(json.dumps({'event': 'sql_n_plus_one', **summary}))
+    elif summary['queries'] >= config_obj.QUERY_PROFILE_LOG_MIN_QUERIES:
+        logger.info(json.dumps({'event': 'sql_heavy_request', **summary}))
+
+
+@contextmanager
+def profile_block(name):
+    """
+    Profile a block outside a request (background jobs, scripts).
+    Nested in a request, the block is reported on its own and also counted in the request.
+    """
+    profile = QueryProfile(name)
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+        parent = _profile.get()
+        if parent is not None:
+            parent.merge(profile)
+        _report(profile.summary())
+
+
+# ========================================
+# QUERY BUDGETS
+# ========================================
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements ran than the budget allows"""
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail when the wrapped block runs more than `max_queries` statements
+    (or, with n_plus_one=True, repeats any statement N_PLUS_ONE_THRESHOLD times).
+
+        with query_budget(4):
+            client.get('/api/cube-tests?project_id=1')
+    """
+
+    def __init__(self, max_queries, n_plus_one=False):
+        self.max_queries = max_queries
+        self.n_plus_one = n_plus_one
+        self.profile = None
+
+    def record(self, statement):
+        self.profile.record(statement, 0.0)
+
+    def __enter__(self):
+        self.profile = QueryProfile('budget')
+        self._token = _budgets.set(_budgets.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _budgets.reset(self._token)
+        if exc_type is not None:
+            return False
+        check_budget(self.profile, self.max_queries, self.n_plus_one)
+        return False
+
+
+def check_budget(profile, max_queries, n_plus_one=False):
+    """Raise QueryBudgetExceeded with the statements that ran most often"""
+    suspects = profile.suspects() if n_plus_one else []
+    if profile.queries <= max_queries and not suspects:
+        return
+    top = sorted(profile.statements.values(), key=lambda e: -e[0])[:5]
+    details = '\n'.join(f"  {count}x {statement[:SQL_PREVIEW_CHARS]}" for count, _, statement, _ in top)
+    reason = (f"{profile.queries} queries (budget {max_queries})" if profile.queries > max_queries
+              else f"N+1 at {suspects[0]['callsite']}")
+    raise QueryBudgetExceeded(f"{profile.name}: {reason}\n{details}")
+
+
+# ========================================
+# REQUEST HOOKS
+# ========================================
+
+def _start_request_profile():
+    g.query_profile_token = _profile.set(QueryProfile(request.endpoint or request.path))
+
+
+def _finish_request_profile(response):
+    profile = _profile.get()
+    if profile is None or getattr(g, 'query_profile_token', None) is None:
+        return response
+
+    summary = profile.summary()
+    if config_obj.QUERY_PROFILE_HEADERS:
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries", app;dur={summary["total_ms"]}'
+        )
+    if request.blueprint != debug_bp.name:
+        _report(summary, method=request.method, path=request.path, status=response.status_code)
+
+    budget = config_obj.QUERY_BUDGET
+    if current_app.testing and budget:
+        check_budget(profile, budget)
+    return response
+
+
+def _end_request_profile(exception=None):
+    token = g.pop('query_profile_token', None)
+    if token is not None:
+        _profile.reset(token)
+
+
+def init_query_profiler(app):
+    """Profile every request of an app"""
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    app.teardown_request(_end_request_profile)
+
+
+# ========================================
+# DEBUG VIEW
+# ========================================
+
+@debug_bp.route('/profile', methods=['GET'])
+@jwt_required()
+@require_support_admin
+def get_query_profile():
+    """
+    Query profiles of this worker process
+    Query: endpoint (filter), n_plus_one=1 (suspects only), limit (default 50), reset=1 (clear after reading)
+    """
+    endpoint = request.args.get('endpoint')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), config_obj.QUERY_PROFILE_HISTORY)
+    payload = {
+        'success': True,
+        'pid': os.getpid(),
+        'nPlusOneThreshold': config_obj.N_PLUS_ONE_THRESHOLD,
+        'endpoints': history.endpoints(),
+        'recent': history.recent(endpoint, request.args.get('n_plus_one') == '1', limit),
+    }
+    if request.args.get('reset') == '1':
+        history.clear()
+    return jsonify(payload), 200
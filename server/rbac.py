@@ -1,10 +1,15 @@
 """
 Role-Based Access Control (RBAC) System
 Comprehensive user roles and permissions for multi-industry platform
+
+The role → permission matrix is compiled once at import into integer bitmasks
+(bit i = i-th Permission member). Access tokens carry the user's mask in the
+"perm" claim, so @require_permission checks are a single AND with no DB hit.
 """
 
 from enum import Enum
-from typing import List, Dict, Set
+from functools import wraps
+from typing import List, Dict, Optional, Set, Tuple
 
 
 class UserRole(Enum):
@@ -382,8 +387,7 @@ class RBACManager:
     @staticmethod
     def has_permission(role: UserRole, permission: Permission) -> bool:
         """Check if a role has a specific permission"""
-        role_permissions = RBACManager.get_role_permissions(role)
-        return permission in role_permissions
+        return bool(ROLE_MASKS.get(role, 0) & PERMISSION_BITS[permission])
     
     @staticmethod
     def can_access_module(role: UserRole, module: str) -> bool:
@@ -394,43 +398,161 @@ class RBACManager:
             role: User role
             module: Module name (batches, cube_tests, safety_nc, etc.)
         """
-        role_permissions = RBACManager.get_role_permissions(role)
-        
-        # Module to permission mapping
-        module_permissions = {
-            'batches': [Permission.VIEW_BATCH],
-            'cube_tests': [Permission.VIEW_CUBE_TEST],
-            'material_tests': [Permission.VIEW_MATERIAL_TEST],
-            'ncr': [Permission.VIEW_NCR],
-            'safety_nc': [Permission.VIEW_SAFETY_NC],
-            'ptw': [Permission.VIEW_PTW],
-            'training': [Permission.VIEW_TRAINING],
-            'pour_activities': [Permission.VIEW_POUR_ACTIVITY],
-            'labs': [Permission.VIEW_LAB],
-            'handovers': [Permission.VIEW_HANDOVER],
-            'gate_register': [Permission.VIEW_GATE_LOG],
-            'analytics': [Permission.VIEW_ANALYTICS],
-            'users': [Permission.VIEW_USERS],
-            'settings': [Permission.VIEW_SETTINGS],
-        }
-        
-        required_permissions = module_permissions.get(module, [])
-        return any(perm in role_permissions for perm in required_permissions)
+        return bool(ROLE_MASKS.get(role, 0) & MODULE_MASKS.get(module, 0))
     
     @staticmethod
-    def get_accessible_modules(role: UserRole) -> List[str]:
-        """Get list of all modules accessible by a role"""
-        modules = [
-            'dashboard', 'batches', 'cube_tests', 'material_tests',
-            'ncr', 'safety_nc', 'ptw', 'training', 'pour_activities',
-            'labs', 'handovers', 'gate_register', 'analytics',
-            'users', 'settings'
-        ]
-        
-        return [
-            module for module in modules
-            if RBACManager.can_access_module(role, module)
-        ]
+    def get_accessible_modules(role: UserRole) -> Tuple[str, ...]:
+        """Get all modules accessible by a role (precomputed, do not mutate)"""
+        return ROLE_MODULES.get(role, ())
+
+
+# ============================================================================
+# Compiled permission matrix
+# ============================================================================
+
+# Bit position of every permission. Positions are part of the token format:
+# append new permissions at the end, never reorder or reuse a position, and
+# bump PERMISSION_MASK_VERSION if a position ever has to change meaning.
+PERMISSION_BIT_POSITIONS: Dict[Permission, int] = {
+    Permission.VIEW_DASHBOARD: 0,
+    Permission.VIEW_ANALYTICS: 1,
+    Permission.EXPORT_REPORTS: 2,
+    Permission.VIEW_PROJECT: 3,
+    Permission.CREATE_PROJECT: 4,
+    Permission.EDIT_PROJECT: 5,
+    Permission.DELETE_PROJECT: 6,
+    Permission.VIEW_BATCH: 7,
+    Permission.CREATE_BATCH: 8,
+    Permission.EDIT_BATCH: 9,
+    Permission.DELETE_BATCH: 10,
+    Permission.APPROVE_BATCH: 11,
+    Permission.REJECT_BATCH: 12,
+    Permission.VIEW_CUBE_TEST: 13,
+    Permission.CREATE_CUBE_TEST: 14,
+    Permission.EDIT_CUBE_TEST: 15,
+    Permission.DELETE_CUBE_TEST: 16,
+    Permission.VIEW_MATERIAL_TEST: 17,
+    Permission.CREATE_MATERIAL_TEST: 18,
+    Permission.EDIT_MATERIAL_TEST: 19,
+    Permission.DELETE_MATERIAL_TEST: 20,
+    Permission.VIEW_NCR: 21,
+    Permission.CREATE_NCR: 22,
+    Permission.EDIT_NCR: 23,
+    Permission.RESPOND_NCR: 24,
+    Permission.APPROVE_NCR: 25,
+    Permission.CLOSE_NCR: 26,
+    Permission.VIEW_SAFETY_NC: 27,
+    Permission.CREATE_SAFETY_NC: 28,
+    Permission.EDIT_SAFETY_NC: 29,
+    Permission.APPROVE_SAFETY_NC: 30,
+    Permission.CLOSE_SAFETY_NC: 31,
+    Permission.VIEW_PTW: 32,
+    Permission.CREATE_PTW: 33,
+    Permission.APPROVE_PTW: 34,
+    Permission.CLOSE_PTW: 35,
+    Permission.VIEW_TRAINING: 36,
+    Permission.CREATE_TRAINING: 37,
+    Permission.SCHEDULE_TRAINING: 38,
+    Permission.MARK_ATTENDANCE: 39,
+    Permission.VIEW_POUR_ACTIVITY: 40,
+    Permission.CREATE_POUR_ACTIVITY: 41,
+    Permission.EDIT_POUR_ACTIVITY: 42,
+    Permission.DELETE_POUR_ACTIVITY: 43,
+    Permission.VIEW_LAB: 44,
+    Permission.CREATE_LAB: 45,
+    Permission.EDIT_LAB: 46,
+    Permission.DELETE_LAB: 47,
+    Permission.VIEW_HANDOVER: 48,
+    Permission.CREATE_HANDOVER: 49,
+    Permission.APPROVE_HANDOVER: 50,
+    Permission.VIEW_GATE_LOG: 51,
+    Permission.CREATE_GATE_LOG: 52,
+    Permission.EDIT_GATE_LOG: 53,
+    Permission.VIEW_USERS: 54,
+    Permission.CREATE_USER: 55,
+    Permission.EDIT_USER: 56,
+    Permission.DELETE_USER: 57,
+    Permission.ASSIGN_ROLES: 58,
+    Permission.VIEW_SETTINGS: 59,
+    Permission.EDIT_SETTINGS: 60,
+    Permission.MANAGE_SUBSCRIPTION: 61,
+    Permission.UPLOAD_DOCUMENTS: 62,
+    Permission.DELETE_DOCUMENTS: 63,
+    Permission.VIEW_COSTS: 64,
+    Permission.EDIT_BUDGET: 65,
+}
+
+# "pv" claim; tokens carrying another version are re-resolved from the database
+PERMISSION_MASK_VERSION = 1
+
+assert set(PERMISSION_BIT_POSITIONS) == set(Permission), "every Permission needs a fixed bit position"
+assert len(set(PERMISSION_BIT_POSITIONS.values())) == len(PERMISSION_BIT_POSITIONS), "duplicate bit position"
+
+PERMISSION_BITS: Dict[Permission, int] = {perm: 1 << position for perm, position in PERMISSION_BIT_POSITIONS.items()}
+
+ALL_PERMISSIONS_MASK = sum(PERMISSION_BITS.values())  # distinct bits, so sum == OR
+
+
+def encode_mask(mask: int) -> str:
+    """Mask as a hex string: JSON numbers lose bits above 2**53 (and orjson rejects > 64 bits)"""
+    return format(mask, 'x')
+
+
+def decode_mask(value) -> Optional[int]:
+    """Mask from its hex string, None when malformed"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return int(value, 16)
+    except ValueError:
+        return None
+
+
+def compile_mask(permissions) -> int:
+    """OR together the bits of an iterable of permissions"""
+    mask = 0
+    for perm in permissions:
+        mask |= PERMISSION_BITS[perm]
+    return mask
+
+
+ROLE_MASKS: Dict[UserRole, int] = {
+    role: compile_mask(perms) for role, perms in RBACManager.ROLE_PERMISSIONS.items()
+}
+
+# Module → permissions granting access (any one is enough)
+MODULE_PERMISSIONS: Dict[str, Tuple[Permission, ...]] = {
+    'dashboard': (Permission.VIEW_DASHBOARD,),
+    'batches': (Permission.VIEW_BATCH,),
+    'cube_tests': (Permission.VIEW_CUBE_TEST,),
+    'material_tests': (Permission.VIEW_MATERIAL_TEST,),
+    'ncr': (Permission.VIEW_NCR,),
+    'safety_nc': (Permission.VIEW_SAFETY_NC,),
+    'ptw': (Permission.VIEW_PTW,),
+    'training': (Permission.VIEW_TRAINING,),
+    'pour_activities': (Permission.VIEW_POUR_ACTIVITY,),
+    'labs': (Permission.VIEW_LAB,),
+    'handovers': (Permission.VIEW_HANDOVER,),
+    'gate_register': (Permission.VIEW_GATE_LOG,),
+    'analytics': (Permission.VIEW_ANALYTICS,),
+    'users': (Permission.VIEW_USERS,),
+    'settings': (Permission.VIEW_SETTINGS,),
+}
+
+MODULE_MASKS: Dict[str, int] = {module: compile_mask(perms) for module, perms in MODULE_PERMISSIONS.items()}
+
+
+def modules_for_mask(mask: int) -> Tuple[str, ...]:
+    """Modules reachable with a permission mask, in MODULE_PERMISSIONS order"""
+    return tuple(module for module, module_mask in MODULE_MASKS.items() if mask & module_mask)
+
+
+ROLE_MODULES: Dict[UserRole, Tuple[str, ...]] = {role: modules_for_mask(mask) for role, mask in ROLE_MASKS.items()}
+
+
+def permissions_for_mask(mask: int) -> List[Permission]:
+    """Decode a mask back into Permission members (for display/debugging)"""
+    return [perm for perm, bit in PERMISSION_BITS.items() if mask & bit]
 
 
 # Role Display Names (Multi-language ready)
@@ -466,13 +588,79 @@ ROLE_DESCRIPTIONS = {
 }
 
 
+_ROLES_BY_VALUE: Dict[str, UserRole] = {role.value: role for role in UserRole}
+
+
 def get_role_from_string(role_str: str) -> UserRole:
-    """Convert string to UserRole enum"""
-    try:
-        return UserRole(role_str)
-    except ValueError:
-        # Default to lowest permission role
-        return UserRole.WATCHMAN
+    """Convert string to UserRole enum (defaults to the lowest permission role)"""
+    return _ROLES_BY_VALUE.get(role_str, UserRole.WATCHMAN)
+
+
+def user_permission_mask(user) -> int:
+    """Permission mask for a User row (legacy is_system_admin flag grants everything)"""
+    if getattr(user, 'is_system_admin', False):
+        return ALL_PERMISSIONS_MASK
+    return ROLE_MASKS[get_role_from_string(user.role)]
+
+
+def permission_claims(user) -> Dict[str, object]:
+    """Claims embedded in access tokens: role string, hex permission mask and its version, company (tenant)"""
+    return {
+        "role": user.role,
+        "perm": encode_mask(user_permission_mask(user)),
+        "pv": PERMISSION_MASK_VERSION,
+        "cid": user.company_id,
+    }
+
+
+def mask_from_claims(claims) -> Optional[int]:
+    """Permission mask of a decoded token; None for older tokens (no claim, integer mask or another version)"""
+    if claims.get("pv") != PERMISSION_MASK_VERSION:
+        return None
+    return decode_mask(claims.get("perm"))
+
+
+def require_permission(*permissions: Permission):
+    """
+    Require ALL given permissions, checked against the "perm" mask in the access token.
+    Tokens without a current-version mask fall back to one user lookup.
+    
+    Usage:
+        @bp.route('/api/batches/<int:batch_id>/approve', methods=['POST'])
+        @require_permission(Permission.APPROVE_BATCH)
+        def approve_batch(batch_id):
+            ...
+    """
+    required = compile_mask(permissions)
+    
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            from flask import jsonify
+            from flask_jwt_extended import verify_jwt_in_request, get_jwt
+            
+            verify_jwt_in_request()
+            mask = mask_from_claims(get_jwt())
+            if mask is None:
+                mask = _lookup_mask()
+            
+            if mask & required != required:
+                return jsonify({"error": "Permission denied"}), 403
+            return fn(*args, **kwargs)
+        
+        return wrapper
+    return decorator
+
+
+def _lookup_mask() -> int:
+    """Permission mask from the database for tokens without a usable "perm" claim"""
+    from flask_jwt_extended import get_jwt_identity
+    from .db import session_scope
+    from .models import User
+    
+    with session_scope() as session:
+        user = session.get(User, int(get_jwt_identity()))
+        return user_permission_mask(user) if user else 0
 
 
 def get_user_roles_list() -> List[Dict[str, str]]:
@@ -0,0 +1,182 @@
+"""
+Reference Data
+Versioned per-company snapshot of the slow-changing lists every form loads
+
+GET /api/reference-data?version=N returns, in one response:
+- materialCategories / approvedBrands (material management)
+- permitTypes (PTW), tbtTopics (company + global), inductionTopics
+- auditChecklists, ppeTypes
+
+reference_data_versions holds one counter per company (company_id 0 = global rows,
+i.e. TBT topics without a company). An after_flush hook bumps the counter in the
+same transaction as any ORM write to a reference model, and a company's version is
+its own counter plus the global one, so it increases on every relevant change.
+
+The snapshot is serialized once per version into immutable JSON bytes and kept in
+the tenant cache under that version, so it can never be served stale. Clients send
+the version they hold (?version= or If-None-Match) and get 304 while it is current.
+"""
+
+import logging
+from datetime import datetime
+from typing import NamedTuple
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import BigInteger, Column, DateTime, Integer, event, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .db import Base, session_scope
+from .models import ApprovedBrand, MaterialCategory
+from .permit_to_work_models import PermitType
+from .tbt_models import TBTTopic
+from .safety_induction_models import InductionTopic
+from .safety_audit_models import AuditChecklist
+from .ppe_tracking_models import PPEType
+from .tenancy import current_company_id, tenant_cache, tenant_session
+
+logger = logging.getLogger(__name__)
+
+reference_data_bp = Blueprint('reference_data', __name__, url_prefix='/api/reference-data')
+
+GLOBAL = 0  # Counter of rows shared by all companies (company_id NULL)
+
+REFERENCE_MODELS = (MaterialCategory, ApprovedBrand, PermitType, TBTTopic, InductionTopic, AuditChecklist)
+
+
+class ReferenceDataVersion(Base):
+    """Change counter of a company's reference data"""
+    __tablename__ = "reference_data_versions"
+
+    company_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReferenceSnapshot(NamedTuple):
+    version: int
+    body: bytes  # Serialized JSON response
+
+
+# ========================================
+# VERSIONS
+# ========================================
+
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def _bump(connection, company_ids):
+    """Upsert: two concurrent first edits of a company both bump instead of one failing on the key"""
+    table = ReferenceDataVersion.__table__
+    dialect_insert = _DIALECT_INSERTS[connection.dialect.name]
+    now = datetime.utcnow()
+    for company_id in company_ids:
+        statement = dialect_insert(table).values(company_id=company_id, version=1, updated_at=now)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['company_id'], set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_reference_versions(session, flush_context):
+    """Bump the version of every company whose reference rows changed in this flush"""
+    touched = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, REFERENCE_MODELS):
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        touched.add(obj.company_id if obj.company_id is not None else GLOBAL)
+    if touched:
+        _bump(session.connection(), sorted(touched))  # Sorted: writers lock counter rows in one order
+
+
+def reference_data_version(session, company_id):
+    """Current reference data version of a company (0 before its first change)"""
+    table = ReferenceDataVersion.__table__
+    versions = session.execute(
+        select(table.c.version).where(table.c.company_id.in_((company_id, GLOBAL)))
+    ).scalars().all()
+    return sum(versions)
+
+
+# ========================================
+# SNAPSHOT
+# ========================================
+
+def _sections(session, company_id):
+    """Active reference rows of a company, JSON-ready (tenant guard adds company and soft delete)"""
+    categories = session.query(MaterialCategory).filter_by(is_active=1) \
+        .order_by(MaterialCategory.category_name).all()
+    brands = session.query(ApprovedBrand).filter_by(is_active=1) \
+        .order_by(ApprovedBrand.category_id, ApprovedBrand.brand_name).all()
+    permit_types = session.query(PermitType).filter_by(is_active=True) \
+        .order_by(PermitType.permit_type_name).all()
+    # Global topics (company_id NULL) are shared, so this one query bypasses the guard
+    tbt_topics = session.query(TBTTopic).execution_options(tenant_bypass=True).filter(
+        or_(TBTTopic.company_id == company_id, TBTTopic.company_id.is_(None)),
+        TBTTopic.is_active == True  # noqa: E712
+    ).order_by(TBTTopic.category, TBTTopic.topic_name).all()
+    induction_topics = session.query(InductionTopic).filter_by(is_active=True) \
+        .order_by(InductionTopic.display_order, InductionTopic.id).all()
+    checklists = session.query(AuditChecklist).filter_by(is_active=True) \
+        .order_by(AuditChecklist.checklist_name).all()
+
+    return {
+        'materialCategories': [c.to_dict() for c in categories],
+        'approvedBrands': [b.to_dict() for b in brands],
+        'permitTypes': [p.to_dict() for p in permit_types],
+        'tbtTopics': [t.to_dict() for t in tbt_topics],
+        'inductionTopics': [t.to_dict() for t in induction_topics],
+        'auditChecklists': [c.to_dict() for c in checklists],
+        'ppeTypes': [t.value for t in PPEType],
+    }
+
+
+def reference_snapshot(company_id, version):
+    """Snapshot of a company's reference data at `version` (built once per version)"""
+    def build():
+        with tenant_session(company_id) as session:
+            payload = {'success': True, 'version': version, **_sections(session, company_id)}
+        return ReferenceSnapshot(version, current_app.json.dumps(payload).encode('utf-8'))
+
+    return tenant_cache.get_or_load(company_id, f"reference-data:v{version}", build)
+
+
+# ========================================
+# API
+# ========================================
+
+def _etag(company_id, version):
+    return f"rd{company_id}-v{version}"
+
+
+@reference_data_bp.route('', methods=['GET'])
+@jwt_required()
+def get_reference_data():
+    """
+    All reference lists of the user's company
+    Query: version (optional) - version the client holds; 304 when still current
+    """
+    try:
+        company_id = current_company_id()
+        if company_id is None:
+            return jsonify({"success": False, "message": "User has no company"}), 404
+
+        with session_scope() as session:
+            version = reference_data_version(session, company_id)
+
+        etag = _etag(company_id, version)
+        if request.args.get('version', type=int) == version or request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            snapshot = reference_snapshot(company_id, version)
+            response = current_app.response_class(snapshot.body, mimetype='application/json')
+
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        logger.error(f"Failed to load reference data: {e}")
+        return jsonify({"success": False, "message": "Failed to load reference data"}), 500
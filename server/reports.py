@@ -48,10 +48,12 @@ def export_cube_tests():
         if not membership:
             return {"error": "Access denied"}, 403
             
-        # Query tests
-        query = session.query(CubeTestRegister).filter_by(
-            project_id=project_id,
-            is_deleted=False
+        # Query tests (batch number joined in; rows are built before the session closes)
+        query = session.query(CubeTestRegister, BatchRegister.batch_number).outerjoin(
+            BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+        ).filter(
+            CubeTestRegister.project_id == project_id,
+            CubeTestRegister.is_deleted == False
         )
         
         if date_from:
@@ -68,49 +70,46 @@ def export_cube_tests():
             except ValueError:
                 pass
                 
-        tests = query.order_by(CubeTestRegister.casting_date.desc()).all()
+        rows = [
+            [
+                test.id,
+                batch_number or "Planned",
+                test.casting_date.strftime('%Y-%m-%d'),
+                test.testing_date.strftime('%Y-%m-%d') if test.testing_date else 'Pending',
+                test.test_age_days,
+                test.concrete_grade,
+                test.concrete_type,
+                test.cube_1_strength_mpa or '-',
+                test.cube_2_strength_mpa or '-',
+                test.cube_3_strength_mpa or '-',
+                test.average_strength_mpa or '-',
+                (test.pass_fail_status or 'pending').upper(),
+                test.remarks or ''
+            ]
+            for test, batch_number in query.order_by(CubeTestRegister.casting_date.desc())
+        ]
         
-        # Generate CSV
-        def generate():
-            data = io.StringIO()
-            writer = csv.writer(data)
-            
-            # Header
-            writer.writerow([
-                'Test ID', 'Batch No', 'Casting Date', 'Testing Date', 
-                'Age (Days)', 'Grade', 'Concrete Type',
-                'Cube 1 (MPa)', 'Cube 2 (MPa)', 'Cube 3 (MPa)', 
-                'Avg Strength (MPa)', 'Result', 'Remarks'
-            ])
+    # Generate CSV
+    def generate():
+        data = io.StringIO()
+        writer = csv.writer(data)
+        
+        # Header
+        writer.writerow([
+            'Test ID', 'Batch No', 'Casting Date', 'Testing Date', 
+            'Age (Days)', 'Grade', 'Concrete Type',
+            'Cube 1 (MPa)', 'Cube 2 (MPa)', 'Cube 3 (MPa)', 
+            'Avg Strength (MPa)', 'Result', 'Remarks'
+        ])
+        yield data.getvalue()
+        data.seek(0)
+        data.truncate(0)
+        
+        for row in rows:
+            writer.writerow(row)
             yield data.getvalue()
             data.seek(0)
             data.truncate(0)
-            
-            for test in tests:
-                batch_no = "Planned"
-                if test.batch_id:
-                    batch = session.query(BatchRegister).filter_by(id=test.batch_id).first()
-                    if batch:
-                        batch_no = batch.batch_number
-                
-                writer.writerow([
-                    test.id,
-                    batch_no,
-                    test.casting_date.strftime('%Y-%m-%d'),
-                    test.testing_date.strftime('%Y-%m-%d') if test.testing_date else 'Pending',
-                    test.test_age_days,
-                    test.concrete_grade,
-                    test.concrete_type,
-                    test.cube_1_strength_mpa or '-',
-                    test.cube_2_strength_mpa or '-',
-                    test.cube_3_strength_mpa or '-',
-                    test.average_strength_mpa or '-',
-                    test.pass_fail_status.upper(),
-                    test.remarks or ''
-                ])
-                yield data.getvalue()
-                data.seek(0)
-                data.truncate(0)
 
     response = Response(stream_with_context(generate()), mimetype='text/csv')
     response.headers.set('Content-Disposition', 'attachment', filename=f'cube_tests_project_{project_id}.csv')
@@ -0,0 +1,116 @@
+"""
+Response Optimization
+Compression and conditional GET for JSON endpoints
+
+- Compression: after_request hook that gzip/brotli-encodes compressible responses
+  of at least COMPRESSION_MIN_BYTES, negotiated from Accept-Encoding
+  (brotli is used when the optional `brotli` package is installed)
+- Conditional GET: @project_version_etag derives a weak ETag from the project's
+  change sequence (sync_sequences, bumped on every tracked write) plus the
+  request path and query string. A matching If-None-Match is answered with 304
+  before the view runs, so unchanged lists are never queried or serialized.
+
+Weak ETags stay valid across content encodings, so one validator serves both
+compressed and uncompressed clients.
+"""
+
+import gzip
+import hashlib
+from functools import wraps
+
+from flask import request, current_app, make_response
+
+from .config import get_config
+from .db import session_scope
+from .sync_models import project_change_version
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only
+    brotli = None
+
+config_obj = get_config()
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'image/svg+xml',
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript'
+}
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+# ========================================
+# COMPRESSION
+# ========================================
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config_obj.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config_obj.COMPRESSION_GZIP_LEVEL)
+
+
+def compress_response(response):
+    """Encode a response body when the client accepts it and it is worth it"""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < config_obj.COMPRESSION_MIN_BYTES:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# ========================================
+# CONDITIONAL GET
+# ========================================
+
+def _etag(project_id, version):
+    query = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    digest = hashlib.blake2s(
+        f"{config_obj.ETAG_SALT}|{request.path}|{query}".encode('utf-8'), digest_size=8
+    ).hexdigest()
+    return f"p{project_id}-v{version}-{digest}"
+
+
+def project_version_etag(f):
+    """
+    Weak ETag + 304 for GET list endpoints scoped by ?project_id.
+    Place below the auth/access decorators so only authorized requests are answered.
+    Requests without project_id (company-wide lists) pass through untouched.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        project_id = request.args.get('project_id', type=int)
+        if request.method != 'GET' or not project_id:
+            return f(*args, **kwargs)
+
+        with session_scope() as session:
+            etag = _etag(project_id, project_change_version(session, project_id))
+
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+
+def init_response_optimization(app):
+    """Register compression on an app"""
+    app.after_request(compress_response)
@@ -15,6 +15,7 @@ from .safety_models import (
 )
 from .models import User, Company, Project
 from .auth import require_company_admin
+from .expiry_management import worker_eligibility
 
 logger = logging.getLogger(__name__)
 
@@ -483,6 +484,31 @@ def create_worker():
         return jsonify({"error": str(e)}), 500
 
 
+@safety_bp.get("/workers/<int:worker_id>/eligibility")
+@jwt_required()
+def get_worker_eligibility(worker_id):
+    """Check worker site-entry eligibility (valid induction, no expired PPE/certifications)"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        with session_scope() as session:
+            user = session.query(User).filter(User.id == user_id).first()
+            
+            worker = session.query(Worker).filter(
+                Worker.id == worker_id,
+                Worker.company_id == user.company_id
+            ).first()
+            
+            if not worker:
+                return jsonify({"error": "Worker not found"}), 404
+            
+            return jsonify(worker_eligibility(session, worker.id)), 200
+            
+    except Exception as e:
+        logger.error(f"Error checking worker eligibility: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ============================================================================
 # Attendance Management
 # ============================================================================
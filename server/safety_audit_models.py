@@ -5,8 +5,8 @@ ISO 45001:2018 Clause 9.2 (Internal Audit)
 """
 
 from server.db import Base, session_scope
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Numeric, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Numeric, Enum, UniqueConstraint, insert, update
+from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 import enum
 
@@ -90,13 +90,13 @@ class SafetyAudit(Base):
     
     # Checklist
     checklist_id = Column(Integer, ForeignKey('audit_checklists.id'))
-    checklist_items = Column(JSON)  # Snapshot of checklist at audit time
+    checklist_items = Column(JSON)  # Legacy snapshot - items now live in safety_audit_items
     # [{
     #     item_id, category, item, compliant: true/false/na,
     #     evidence_photo, remarks, corrective_action_required
     # }]
     
-    # Scoring
+    # Scoring (counters maintained incrementally by apply_checklist_updates)
     total_items = Column(Integer, default=0)
     compliant_items = Column(Integer, default=0)
     non_compliant_items = Column(Integer, default=0)
@@ -213,7 +213,7 @@ class SafetyAudit(Base):
             'scheduled_by_id': self.scheduled_by_id,
             
             'lead_auditor_id': self.lead_auditor_id,
-            'lead_auditor_name': self.lead_auditor.name if self.lead_auditor else None,
+            'lead_auditor_name': self.lead_auditor.full_name if self.lead_auditor else None,
             'audit_team': self.audit_team or [],
             
             'actual_start_time': self.actual_start_time.isoformat() if self.actual_start_time else None,
@@ -225,7 +225,7 @@ class SafetyAudit(Base):
             'areas_covered': self.areas_covered or [],
             
             'checklist_id': self.checklist_id,
-            'checklist_items': self.checklist_items or [],
+            'checklist_items': [item.to_dict() for item in self.item_rows] if self.item_rows else (self.checklist_items or []),
             
             'scoring': {
                 'total_items': self.total_items,
@@ -271,7 +271,7 @@ class SafetyAudit(Base):
             
             'closure': {
                 'closed_by_id': self.closed_by_id,
-                'closed_by_name': self.closed_by.name if self.closed_by else None,
+                'closed_by_name': self.closed_by.full_name if self.closed_by else None,
                 'closed_date': self.closed_date.isoformat() if self.closed_date else None,
                 'closure_remarks': self.closure_remarks
             },
@@ -389,6 +389,170 @@ class AuditChecklist(Base):
         }
 
 
+class SafetyAuditItem(Base):
+    """
+    Safety Audit Checklist Item
+    One row per checklist item of an audit, so a tap on the tablet updates a single
+    row instead of rewriting the whole SafetyAudit.checklist_items document
+    """
+    __tablename__ = 'safety_audit_items'
+    __table_args__ = (
+        UniqueConstraint('audit_id', 'item_index', name='uq_safety_audit_items_audit_index'),
+    )
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True)
+    
+    # Audit
+    audit_id = Column(Integer, ForeignKey('safety_audits.id'), nullable=False)
+    item_index = Column(Integer, nullable=False)  # Position in the checklist snapshot
+    
+    # Template snapshot (item_id, category, item_description, compliance_criteria, ...)
+    template_item = Column(JSON, nullable=False)
+    
+    # Result
+    compliant = Column(Boolean)  # True / False / None (N/A)
+    evidence_photo = Column(String(500))
+    remarks = Column(Text, default='')
+    corrective_action_required = Column(Boolean, default=False)
+    
+    # Audit Trail
+    updated_by = Column(Integer, ForeignKey('users.id'))
+    updated_at = Column(DateTime)
+    
+    # Relationships
+    audit = relationship('SafetyAudit', backref=backref('item_rows', order_by='SafetyAuditItem.item_index'))
+    
+    def to_dict(self):
+        """Same shape as a legacy checklist_items entry"""
+        return {
+            **(self.template_item or {}),
+            'item_index': self.item_index,
+            'compliant': self.compliant,
+            'evidence_photo': self.evidence_photo,
+            'remarks': self.remarks or '',
+            'corrective_action_required': bool(self.corrective_action_required),
+            'updated_by': self.updated_by,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+# Fields an auditor may change on a checklist item
+CHECKLIST_ITEM_FIELDS = ('compliant', 'evidence_photo', 'remarks', 'corrective_action_required')
+
+# Result fields carried in template snapshots that must not end up in template_item
+_CHECKLIST_RESULT_FIELDS = CHECKLIST_ITEM_FIELDS + ('updated_by', 'updated_at', 'item_index')
+
+
+def _compliance_counter(value):
+    """Scoring counter a compliance value is counted in"""
+    if value is True:
+        return 'compliant_items'
+    if value is False:
+        return 'non_compliant_items'
+    return 'not_applicable_items'
+
+
+def create_audit_items(session, audit, items):
+    """
+    Snapshot checklist items for an audit as safety_audit_items rows (one bulk INSERT)
+    and initialise the scoring counters. Items may be template items or legacy
+    checklist_items entries (results are carried over).
+    """
+    rows = []
+    counters = {'compliant_items': 0, 'non_compliant_items': 0, 'not_applicable_items': 0}
+    for index, item in enumerate(items):
+        compliant = item.get('compliant')
+        counters[_compliance_counter(compliant)] += 1
+        rows.append({
+            'audit_id': audit.id,
+            'item_index': index,
+            'template_item': {k: v for k, v in item.items() if k not in _CHECKLIST_RESULT_FIELDS},
+            'compliant': compliant,
+            'evidence_photo': item.get('evidence_photo'),
+            'remarks': item.get('remarks') or '',
+            'corrective_action_required': bool(item.get('corrective_action_required', False)),
+            'updated_by': item.get('updated_by'),
+            'updated_at': datetime.fromisoformat(item['updated_at']) if item.get('updated_at') else None
+        })
+    
+    if rows:
+        session.execute(insert(SafetyAuditItem), rows)
+    
+    audit.total_items = len(rows)
+    audit.compliant_items = counters['compliant_items']
+    audit.non_compliant_items = counters['non_compliant_items']
+    audit.not_applicable_items = counters['not_applicable_items']
+    audit.calculate_score()
+    return len(rows)
+
+
+def ensure_audit_items(session, audit):
+    """Move a legacy checklist_items JSON snapshot into safety_audit_items (once)"""
+    exists = session.query(SafetyAuditItem.id).filter_by(audit_id=audit.id).first()
+    if exists or not audit.checklist_items:
+        return False
+    
+    create_audit_items(session, audit, audit.checklist_items)
+    audit.checklist_items = None
+    session.flush()
+    return True
+
+
+def apply_checklist_updates(session, audit, updates, user_id):
+    """
+    Apply partial checklist item updates and keep scoring counters incrementally.
+    
+    updates: [{item_index, compliant?, evidence_photo?, remarks?, corrective_action_required?}]
+    Only the fields present in an update are changed. Touched item rows are locked
+    (SELECT ... FOR UPDATE on PostgreSQL) and the counters are adjusted with one
+    relative UPDATE, so concurrent auditors on the same audit cannot lose each other's
+    changes and nothing is recounted over the full checklist.
+    
+    Raises LookupError if an item_index does not exist.
+    Returns: list of updated item dicts (in request order)
+    """
+    ensure_audit_items(session, audit)
+    
+    indexes = [int(u['item_index']) for u in updates]
+    rows = session.query(SafetyAuditItem).filter(
+        SafetyAuditItem.audit_id == audit.id,
+        SafetyAuditItem.item_index.in_(set(indexes))
+    ).with_for_update().all()
+    rows_by_index = {row.item_index: row for row in rows}
+    
+    missing = [i for i in indexes if i not in rows_by_index]
+    if missing:
+        raise LookupError(f"Checklist item(s) not found: {missing}")
+    
+    deltas = {'compliant_items': 0, 'non_compliant_items': 0, 'not_applicable_items': 0}
+    now = datetime.utcnow()
+    for change in updates:
+        row = rows_by_index[int(change['item_index'])]
+        if 'compliant' in change and change['compliant'] is not row.compliant:
+            deltas[_compliance_counter(row.compliant)] -= 1
+            deltas[_compliance_counter(change['compliant'])] += 1
+        for field in CHECKLIST_ITEM_FIELDS:
+            if field in change:
+                setattr(row, field, change[field])
+        row.updated_by = user_id
+        row.updated_at = now
+    session.flush()
+    
+    if any(deltas.values()):
+        session.execute(
+            update(SafetyAudit)
+            .where(SafetyAudit.id == audit.id)
+            .values(**{name: getattr(SafetyAudit, name) + delta for name, delta in deltas.items() if delta})
+            .execution_options(synchronize_session=False)
+        )
+        session.refresh(audit, ['total_items', 'compliant_items', 'non_compliant_items', 'not_applicable_items'])
+    
+    audit.calculate_score()
+    audit.updated_by = user_id
+    return [rows_by_index[i].to_dict() for i in indexes]
+
+
 # ========================================
 # STANDARD CHECKLIST TEMPLATES
 # ========================================
@@ -8,9 +8,13 @@ from flask import Blueprint, request, jsonify
 from functools import wraps
 from datetime import datetime, timedelta
 from sqlalchemy import func, extract, and_, or_
+from sqlalchemy.orm import selectinload
 from server.db import db
 from server.models import User, Company, Project
-from server.safety_audit_models import SafetyAudit, AuditChecklist, AuditType, AuditStatus, FindingSeverity, AuditGrade, seed_standard_checklists
+from server.safety_audit_models import (
+    SafetyAudit, AuditChecklist, AuditType, AuditStatus, FindingSeverity, AuditGrade, seed_standard_checklists,
+    CHECKLIST_ITEM_FIELDS, create_audit_items, apply_checklist_updates
+)
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 audit_bp = Blueprint('safety_audits', __name__)
@@ -144,9 +148,9 @@ def list_audits():
     """
     try:
         user_id = get_current_user_id()
-        user = User.query.get(user_id)
+        user = db.session.query(User).get(user_id)
         
-        query = SafetyAudit.query.filter(
+        query = db.session.query(SafetyAudit).filter(
             SafetyAudit.company_id == user.company_id,
             SafetyAudit.is_deleted == False
         )
@@ -171,7 +175,12 @@ def list_audits():
             end_date = datetime.fromisoformat(request.args.get('end_date'))
             query = query.filter(SafetyAudit.scheduled_date <= end_date)
         
-        query = query.order_by(SafetyAudit.scheduled_date.desc())
+        # to_dict reads the checklist rows and auditor names: load them per list, not per audit
+        query = query.options(
+            selectinload(SafetyAudit.item_rows),
+            selectinload(SafetyAudit.lead_auditor),
+            selectinload(SafetyAudit.closed_by)
+        ).order_by(SafetyAudit.scheduled_date.desc())
         audits = query.all()
         
         return jsonify({
@@ -227,7 +236,7 @@ def start_audit(audit_id):
         user_id = get_current_user_id()
         data = request.get_json() or {}
         
-        audit = SafetyAudit.query.get(audit_id)
+        audit = db.session.query(SafetyAudit).get(audit_id)
         if not audit or audit.is_deleted:
             return jsonify({'error': 'Audit not found'}), 404
         
@@ -236,14 +245,10 @@ def start_audit(audit_id):
         
         # Load checklist snapshot
         if audit.checklist_id:
-            checklist = AuditChecklist.query.get(audit.checklist_id)
+            checklist = db.session.query(AuditChecklist).get(audit.checklist_id)
             if checklist:
-                # Create editable snapshot
-                audit.checklist_items = [
-                    {**item, 'compliant': None, 'evidence_photo': None, 'remarks': '', 'corrective_action_required': False}
-                    for item in checklist.items
-                ]
-                audit.total_items = len(checklist.items)
+                # Create editable snapshot (one row per item)
+                create_audit_items(db.session, audit, checklist.items or [])
         
         audit.actual_start_time = datetime.fromisoformat(data['actual_start_time']) if data.get('actual_start_time') else datetime.utcnow()
         audit.status = AuditStatus.IN_PROGRESS
@@ -269,7 +274,7 @@ def start_audit(audit_id):
 @jwt_required()
 def update_checklist_item(audit_id, item_index):
     """
-    Update a specific checklist item
+    Update a specific checklist item (partial - only fields sent are changed)
     Body: {
         compliant: true/false/null (null = N/A),
         evidence_photo: "S3 URL",
@@ -279,41 +284,28 @@ def update_checklist_item(audit_id, item_index):
     """
     try:
         user_id = get_current_user_id()
-        data = request.get_json()
+        data = request.get_json() or {}
         
-        audit = SafetyAudit.query.get(audit_id)
+        change, error = _parse_checklist_change({**data, 'item_index': item_index})
+        if error:
+            return jsonify({'error': error}), 400
+        
+        audit = db.session.query(SafetyAudit).get(audit_id)
         if not audit or audit.is_deleted:
             return jsonify({'error': 'Audit not found'}), 404
         
-        if not audit.checklist_items or item_index >= len(audit.checklist_items):
+        try:
+            items = apply_checklist_updates(db.session, audit, [change], user_id)
+        except LookupError:
+            db.session.rollback()
             return jsonify({'error': 'Checklist item not found'}), 404
         
-        # Update item
-        audit.checklist_items[item_index].update({
-            'compliant': data.get('compliant'),
-            'evidence_photo': data.get('evidence_photo'),
-            'remarks': data.get('remarks', ''),
-            'corrective_action_required': data.get('corrective_action_required', False),
-            'updated_by': user_id,
-            'updated_at': datetime.utcnow().isoformat()
-        })
-        
-        # Recalculate scoring
-        audit.compliant_items = sum(1 for item in audit.checklist_items if item.get('compliant') is True)
-        audit.non_compliant_items = sum(1 for item in audit.checklist_items if item.get('compliant') is False)
-        audit.not_applicable_items = sum(1 for item in audit.checklist_items if item.get('compliant') is None)
-        audit.calculate_score()
-        
-        audit.updated_by = user_id
         db.session.commit()
         
         return jsonify({
             'message': 'Checklist item updated successfully',
-            'item': audit.checklist_items[item_index],
-            'scoring': {
-                'compliance_percentage': float(audit.compliance_percentage) if audit.compliance_percentage else 0.0,
-                'audit_grade': audit.audit_grade.value if audit.audit_grade else None
-            }
+            'item': items[0],
+            'scoring': _checklist_scoring(audit)
         }), 200
         
     except Exception as e:
@@ -321,6 +313,93 @@ def update_checklist_item(audit_id, item_index):
         return jsonify({'error': str(e)}), 500
 
 
+@audit_bp.route('/api/safety-audits/<int:audit_id>/checklist/bulk', methods=['PUT'])
+@jwt_required()
+def bulk_update_checklist_items(audit_id):
+    """
+    Apply many checklist item changes in one request (one transaction)
+    Body: {
+        items: [
+            {item_index, compliant, evidence_photo, remarks, corrective_action_required},
+            ...
+        ]
+    }
+    Only fields sent are changed. All changes are rejected if any item_index is invalid.
+    """
+    try:
+        user_id = get_current_user_id()
+        data = request.get_json() or {}
+        
+        raw_items = data.get('items')
+        if not isinstance(raw_items, list) or not raw_items:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+        
+        changes = []
+        for position, raw in enumerate(raw_items):
+            change, error = _parse_checklist_change(raw)
+            if error:
+                return jsonify({'error': f'items[{position}]: {error}'}), 400
+            changes.append(change)
+        
+        audit = db.session.query(SafetyAudit).get(audit_id)
+        if not audit or audit.is_deleted:
+            return jsonify({'error': 'Audit not found'}), 404
+        
+        try:
+            items = apply_checklist_updates(db.session, audit, changes, user_id)
+        except LookupError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 404
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(items)} checklist items updated successfully',
+            'items': items,
+            'scoring': _checklist_scoring(audit)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _parse_checklist_change(raw):
+    """Validate one checklist item change. Returns (change, error)"""
+    if not isinstance(raw, dict) or 'item_index' not in raw:
+        return None, 'item_index is required'
+    try:
+        item_index = int(raw['item_index'])
+    except (TypeError, ValueError):
+        return None, 'item_index must be an integer'
+    
+    change = {'item_index': item_index}
+    for field in CHECKLIST_ITEM_FIELDS:
+        if field in raw:
+            change[field] = raw[field]
+    
+    # Not `in (True, False, None)`: 1 == True, and a stored 1 is counted as not applicable
+    if 'compliant' in change and not (isinstance(change['compliant'], bool) or change['compliant'] is None):
+        return None, 'compliant must be true, false or null'
+    if 'corrective_action_required' in change:
+        change['corrective_action_required'] = bool(change['corrective_action_required'])
+    if 'remarks' in change and change['remarks'] is None:
+        change['remarks'] = ''
+    
+    return change, None
+
+
+def _checklist_scoring(audit):
+    return {
+        'total_items': audit.total_items,
+        'compliant_items': audit.compliant_items,
+        'non_compliant_items': audit.non_compliant_items,
+        'not_applicable_items': audit.not_applicable_items,
+        'compliance_percentage': float(audit.compliance_percentage) if audit.compliance_percentage else 0.0,
+        'audit_grade': audit.audit_grade.value if audit.audit_grade else None
+    }
+
+
 # ========================================
 # 6. ADD FINDING
 # ========================================
@@ -8,7 +8,7 @@ Compliance: ISO 45001:2018 Clause 7.2 (Competence)
 """
 
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Numeric, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Numeric, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from .models import Base
 
@@ -27,6 +27,10 @@ class SafetyInduction(Base):
     - Certificate issuance
     """
     __tablename__ = 'safety_inductions'
+    __table_args__ = (
+        Index('ix_safety_inductions_expired_valid_until', 'is_expired', 'valid_until'),
+        Index('ix_safety_inductions_worker_valid_until', 'worker_id', 'valid_until'),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True)
@@ -136,10 +140,10 @@ class SafetyInduction(Base):
             'inductionDate': self.induction_date.isoformat() if self.induction_date else None,
             'worker': {
                 'id': self.worker.id,
-                'name': self.worker.worker_name,
+                'name': self.worker.full_name,
                 'code': self.worker.worker_code,
-                'company': self.worker.worker_company,
-                'trade': self.worker.worker_trade,
+                'company': self.worker.contractor,
+                'trade': self.worker.skill_category,
             } if self.worker else None,
             'conductedBy': {
                 'id': self.conductor.id,
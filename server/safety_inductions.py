@@ -41,11 +41,13 @@ try:
     from .safety_induction_models import SafetyInduction, InductionTopic, STANDARD_INDUCTION_TOPICS
     from .safety_models import Worker
     from .models import User, Project, Company
+    from .expiry_management import expiring_entity_ids, track_expiry
 except ImportError:
     from db import session_scope
     from safety_induction_models import SafetyInduction, InductionTopic, STANDARD_INDUCTION_TOPICS
     from safety_models import Worker
     from models import User, Project, Company
+    from expiry_management import expiring_entity_ids, track_expiry
 
 
 # Create Blueprint
@@ -697,6 +699,10 @@ def complete_induction(induction_id):
             induction.status = 'completed'
             induction.updated_by = user_id
             
+            track_expiry(
+                session, 'induction', induction.id, induction.company_id, induction.project_id,
+                induction.worker_id, induction.induction_number, induction.valid_until
+            )
             session.flush()
             
             return jsonify({
@@ -783,28 +789,55 @@ def get_worker_induction_history(worker_id):
 @safety_induction_bp.route('/expiring', methods=['GET'])
 @jwt_required()
 def get_expiring_inductions():
-    """Get inductions expiring in next 30 days."""
+    """
+    Get inductions expiring in next 30 days.
+    
+    Query Params:
+    - project_id: Filter by project
+    - days: Look-ahead window (default 30)
+    
+    Reads the precomputed expiry buckets; windows beyond the bucket horizon query live.
+    """
     try:
+        user_id = get_current_user_id()
         project_id = request.args.get('project_id', type=int)
+        days = request.args.get('days', default=30, type=int)
         
         with session_scope() as session:
-            expiry_threshold = datetime.now().date() + timedelta(days=30)
-            
-            query = session.query(SafetyInduction).filter(
-                SafetyInduction.valid_until <= expiry_threshold,
-                SafetyInduction.is_expired == False,
-                SafetyInduction.is_deleted == False,
-                SafetyInduction.status == 'completed'
-            )
-            
-            if project_id:
-                query = query.filter_by(project_id=project_id)
-            
-            inductions = query.order_by(SafetyInduction.valid_until).all()
+            user = session.query(User).filter_by(id=user_id).first()
+            if not user:
+                return jsonify({"error": "User not found"}), 404
+            
+            ids = expiring_entity_ids(session, 'induction', user.company_id, days, project_id=project_id)
+            
+            if ids is not None:
+                by_id = {
+                    ind.id: ind for ind in session.query(SafetyInduction).filter(
+                        SafetyInduction.id.in_(ids),
+                        SafetyInduction.is_deleted == False
+                    ).all()
+                } if ids else {}
+                inductions = [by_id[i] for i in ids if i in by_id]
+            else:
+                today = datetime.now().date()
+                query = session.query(SafetyInduction).filter(
+                    SafetyInduction.company_id == user.company_id,
+                    SafetyInduction.valid_until >= today,
+                    SafetyInduction.valid_until <= today + timedelta(days=days),
+                    SafetyInduction.is_expired == False,
+                    SafetyInduction.is_deleted == False,
+                    SafetyInduction.status == 'completed'
+                )
+                
+                if project_id:
+                    query = query.filter_by(project_id=project_id)
+                
+                inductions = query.order_by(SafetyInduction.valid_until).all()
             
             return jsonify({
                 "success": True,
                 "count": len(inductions),
+                "days": days,
                 "inductions": [ind.to_dict() for ind in inductions]
             }), 200
     
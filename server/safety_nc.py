@@ -8,12 +8,15 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from sqlalchemy import and_, or_, func
 
-from .auth import jwt_required, get_current_user
+from .auth import jwt_required, get_current_user, get_jwt_identity
 from .db import session_scope
+from .tenancy import tenant_session, current_user_role
 from .safety_nc_models import NonConformance, NCComment, ContractorNotification
 from .models import User, Company, Project
 from .notifications import send_whatsapp_alert
 from .email_notifications import send_email
+from .notification_stream import unread_count, mark_notifications_read
+from .nc_sweeper import SAFETY, score_report, parse_period, period_bounds, period_label
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -198,11 +201,11 @@ def get_ncs():
     Get all NCs with filtering
     Query params: project_id, contractor, severity, status, is_overdue
     """
-    current_user = get_current_user()
+    role = current_user_role()
     
-    with session_scope() as session:
-        # Base query - filter by company
-        query = session.query(NonConformance).filter_by(company_id=current_user.company_id)
+    # Tenant guard adds company_id (safety_non_conformances company_id, project_id, raised_at index)
+    with tenant_session() as session:
+        query = session.query(NonConformance)
         
         # Filters
         if request.args.get("project_id"):
@@ -221,8 +224,8 @@ def get_ncs():
             query = query.filter_by(is_overdue=True)
         
         # If user is contractor, show only their NCs
-        if current_user.role == "contractor":
-            query = query.filter_by(assigned_to_user=current_user.id)
+        if role == "contractor":
+            query = query.filter_by(assigned_to_user=int(get_jwt_identity()))
         
         ncs = query.order_by(NonConformance.raised_at.desc()).all()
         
@@ -494,19 +497,22 @@ def nc_dashboard():
 @nc_bp.route("/notifications", methods=["GET"])
 @jwt_required()
 def get_notifications():
-    """Get all notifications for current user/contractor"""
-    current_user = get_current_user()
+    """
+    Latest notifications for the current user/contractor
+    Live updates arrive on /api/notifications/stream - call this once on load, not on a timer
+    """
+    user_id = int(get_jwt_identity())
     
     with session_scope() as session:
         query = session.query(ContractorNotification).filter_by(
-            company_id=current_user.company_id,
-            recipient_user=current_user.id
-        ).order_by(ContractorNotification.sent_at.desc()).limit(50)
+            recipient_user=user_id
+        ).order_by(ContractorNotification.id.desc()).limit(50)
         
         notifications = query.all()
         
         return jsonify({
             "success": True,
+            "unread": unread_count(session, user_id),
             "notifications": [n.to_dict() for n in notifications]
         }), 200
 
@@ -514,20 +520,19 @@ def get_notifications():
 @nc_bp.route("/notifications/<int:notification_id>/read", methods=["POST"])
 @jwt_required()
 def mark_notification_read(notification_id):
-    """Mark notification as read"""
-    current_user = get_current_user()
+    """Mark notification as read (see POST /api/notifications/read for bulk)"""
+    user_id = int(get_jwt_identity())
     
     with session_scope() as session:
-        notification = session.query(ContractorNotification).filter_by(
+        exists = session.query(ContractorNotification.id).filter_by(
             id=notification_id,
-            recipient_user=current_user.id
+            recipient_user=user_id
         ).first()
         
-        if not notification:
+        if not exists:
             return jsonify({"success": False, "message": "Notification not found"}), 404
         
-        notification.delivery_status = "read"
-        notification.read_at = datetime.utcnow()
+        mark_notifications_read(session, user_id, [notification_id])
         session.commit()
         
         return jsonify({"success": True, "message": "Notification marked as read"}), 200
@@ -642,17 +647,15 @@ def get_nc_dashboard():
 @jwt_required()
 def generate_nc_report(report_type):
     """
-    Generate contractor performance report.
+    Contractor performance report (precomputed by the NC sweeper).
     
     report_type: 'monthly' or 'weekly'
     
     Query params:
     - project_id (required): Project to report on
     - contractor (required): Contractor name
-    - period (optional): Period in YYYY-MM or YYYY-Wnn format
+    - period (optional): Period in YYYY-MM or YYYY-Www (ISO week) format, default current
     """
-    current_user = get_current_user()
-    
     if report_type not in ['monthly', 'weekly']:
         return jsonify({"error": "Invalid report_type. Use 'monthly' or 'weekly'"}), 400
     
@@ -662,109 +665,32 @@ def generate_nc_report(report_type):
     if not project_id or not contractor:
         return jsonify({"error": "project_id and contractor are required"}), 400
     
-    # Determine period
-    if report_type == 'monthly':
-        period = request.args.get('period', datetime.utcnow().strftime('%Y-%m'))
-        period_filter = NonConformance.score_month == period
-    else:  # weekly
-        period = request.args.get('period', datetime.utcnow().strftime('%Y-W%U'))
-        period_filter = NonConformance.score_week == period
+    try:
+        year, number = parse_period(report_type, request.args.get('period'))
+    except ValueError:
+        return jsonify({"error": "Invalid period. Use YYYY-MM (monthly) or YYYY-Www (weekly)"}), 400
     
     with session_scope() as session:
-        # Get all NCs for this contractor and period
-        issues = session.query(NonConformance).filter(
-            and_(
-                NonConformance.company_id == current_user.company_id,
-                NonConformance.project_id == project_id,
-                NonConformance.assigned_to_contractor == contractor,
-                period_filter
-            )
-        ).all()
-        
-        # Calculate scores with severity weighting
-        severity_map = {'critical': 1.0, 'major': 0.5, 'minor': 0.25}
-        
-        critical_count = sum(1 for nc in issues if nc.severity.lower() == 'critical' and nc.nc_status != 'closed')
-        major_count = sum(1 for nc in issues if nc.severity.lower() == 'major' and nc.nc_status != 'closed')
-        minor_count = sum(1 for nc in issues if nc.severity.lower() == 'minor' and nc.nc_status != 'closed')
+        user = session.get(User, int(get_jwt_identity()))
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        if not session.query(Project.id).filter_by(id=project_id, company_id=user.company_id).first():
+            return jsonify({"error": "Project not found"}), 404
         
-        closed_count = sum(1 for nc in issues if nc.nc_status == 'closed')
-        total_count = len(issues)
-        open_count = total_count - closed_count
+        report = score_report(session, SAFETY, user.company_id, project_id, contractor, report_type, year, number)
         
-        # Calculate weighted score
-        total_severity_points = sum(severity_map.get(nc.severity.lower(), 0.5) for nc in issues)
-        closed_severity_points = sum(
-            severity_map.get(nc.severity.lower(), 0.5) 
-            for nc in issues if nc.nc_status == 'closed'
-        )
-        
-        total_score = (closed_severity_points / total_severity_points * 10) if total_severity_points > 0 else 10.0
-        
-        # Calculate closure rate
-        closure_rate = (closed_count / total_count * 100) if total_count > 0 else 0
-        
-        # Calculate avg resolution time
-        closed_issues = [nc for nc in issues if nc.nc_status == 'closed' and nc.actual_resolution_days]
-        avg_resolution_days = sum(nc.actual_resolution_days for nc in closed_issues) / len(closed_issues) if closed_issues else 0
-        
-        # Determine performance grade
-        grade = calculate_performance_grade(total_score)
-        
-        # Check if report already exists
-        from .safety_nc_models import SafetyNCScoreReport
-        existing_report = session.query(SafetyNCScoreReport).filter(
-            and_(
-                SafetyNCScoreReport.company_id == current_user.company_id,
-                SafetyNCScoreReport.project_id == project_id,
-                SafetyNCScoreReport.contractor_name == contractor,
-                SafetyNCScoreReport.report_type == report_type,
-                SafetyNCScoreReport.period == period
-            )
-        ).first()
-        
-        if existing_report:
-            # Update existing report
-            existing_report.critical_count = critical_count
-            existing_report.major_count = major_count
-            existing_report.minor_count = minor_count
-            existing_report.total_issues_count = total_count
-            existing_report.closed_issues_count = closed_count
-            existing_report.open_issues_count = open_count
-            existing_report.total_score = total_score
-            existing_report.closure_rate = closure_rate
-            existing_report.avg_resolution_days = avg_resolution_days
-            existing_report.performance_grade = grade
-            existing_report.generated_at = datetime.utcnow()
-            
-            report = existing_report
-        else:
-            # Create new report
-            report = SafetyNCScoreReport(
-                company_id=current_user.company_id,
-                project_id=project_id,
-                contractor_name=contractor,
-                report_type=report_type,
-                period=period,
-                critical_count=critical_count,
-                major_count=major_count,
-                minor_count=minor_count,
-                total_issues_count=total_count,
-                closed_issues_count=closed_count,
-                open_issues_count=open_count,
-                total_score=total_score,
-                closure_rate=closure_rate,
-                avg_resolution_days=avg_resolution_days,
-                performance_grade=grade,
-                generated_by_user_id=current_user.id,
-                generated_at=datetime.utcnow()
-            )
-            session.add(report)
-        
-        session.flush()
+        start, end = period_bounds(report_type, year, number)
+        issues = session.query(NonConformance).filter(
+            NonConformance.company_id == user.company_id,
+            NonConformance.project_id == project_id,
+            NonConformance.assigned_to_contractor == contractor,
+            NonConformance.raised_at >= datetime.combine(start, datetime.min.time()),
+            NonConformance.raised_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+        ).order_by(NonConformance.raised_at).all()
         
         return jsonify({
-            "report": report.to_dict(),
+            "period": period_label(report_type, year, number),
+            "report": report.to_dict() if report else None,
             "issues": [nc.to_dict() for nc in issues]
         }), 200
 
@@ -4,10 +4,10 @@ Handles NC lifecycle: Creation → Assignment → Notification → Action → Ve
 """
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import DateTime, Date, Float, Integer, String, Text, Boolean, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -19,6 +19,11 @@ class NonConformance(Base):
     Can be created from any form submission (incident, audit, observation, etc.)
     """
     __tablename__ = "safety_non_conformances"
+    __table_args__ = (
+        Index("ix_safety_non_conformances_overdue_due", "is_overdue", "due_date"),  # Overdue sweep
+        Index("ix_safety_non_conformances_updated", "updated_at"),  # Score report refresh
+        Index("ix_safety_non_conformances_tenant", "company_id", "project_id", "raised_at"),  # Tenant-scoped NC list
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"), nullable=False)
@@ -157,6 +162,10 @@ class ContractorNotification(Base):
     Tracks all notifications sent (WhatsApp, Email, In-app)
     """
     __tablename__ = "safety_contractor_notifications"
+    __table_args__ = (
+        # Per-user list and Last-Event-ID replay of the notification stream
+        Index("ix_safety_contractor_notifications_recipient", "recipient_user", "id"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"), nullable=False)
@@ -202,3 +211,80 @@ class ContractorNotification(Base):
             "delivery_status": self.delivery_status,
             "read_at": self.read_at.isoformat() if self.read_at else None,
         }
+
+
+class NotificationUnreadCounter(Base):
+    """
+    Unread in-app notification count per user
+    Maintained by notification_stream in the same transaction as the notification writes
+    """
+    __tablename__ = "safety_notification_unread_counters"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SafetyNCScoreReport(Base):
+    """
+    Weekly/Monthly contractor scorecard for Safety NCs (precomputed by nc_sweeper)
+    Score out of 10 = closed severity points / raised severity points
+    (critical=1.0, major=0.5, minor=0.25) - higher is better
+    """
+    __tablename__ = "safety_nc_score_reports"
+    __table_args__ = (
+        UniqueConstraint("project_id", "contractor_name", "report_type", "period",
+                         name="uq_safety_nc_score_reports_period"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"), nullable=False)
+    project_id: Mapped[int] = mapped_column(Integer, ForeignKey("projects.id"), nullable=False)
+    contractor_name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # Period: NCs raised within it
+    report_type: Mapped[str] = mapped_column(String(20), nullable=False)  # weekly, monthly
+    period: Mapped[str] = mapped_column(String(10), nullable=False)  # YYYY-Www (ISO week) or YYYY-MM
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    period_end: Mapped[date] = mapped_column(Date, nullable=False)
+
+    # Issues raised in the period
+    critical_count: Mapped[int] = mapped_column(Integer, default=0)
+    major_count: Mapped[int] = mapped_column(Integer, default=0)
+    minor_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_issues_count: Mapped[int] = mapped_column(Integer, default=0)
+    closed_issues_count: Mapped[int] = mapped_column(Integer, default=0)
+    open_issues_count: Mapped[int] = mapped_column(Integer, default=0)
+    overdue_issues_count: Mapped[int] = mapped_column(Integer, default=0)  # Open and past due date
+
+    # Score
+    total_score: Mapped[float] = mapped_column(Float, default=10.0)
+    closure_rate: Mapped[float] = mapped_column(Float, default=0.0)  # Percent
+    avg_resolution_days: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    performance_grade: Mapped[str] = mapped_column(String(10), nullable=False)
+
+    generated_by_user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)  # None = sweeper
+    generated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "project_id": self.project_id,
+            "contractor_name": self.contractor_name,
+            "report_type": self.report_type,
+            "period": self.period,
+            "period_start": self.period_start.isoformat() if self.period_start else None,
+            "period_end": self.period_end.isoformat() if self.period_end else None,
+            "critical_count": self.critical_count,
+            "major_count": self.major_count,
+            "minor_count": self.minor_count,
+            "total_issues_count": self.total_issues_count,
+            "closed_issues_count": self.closed_issues_count,
+            "open_issues_count": self.open_issues_count,
+            "overdue_issues_count": self.overdue_issues_count,
+            "total_score": round(self.total_score, 2) if self.total_score is not None else None,
+            "closure_rate": round(self.closure_rate, 1) if self.closure_rate is not None else None,
+            "avg_resolution_days": round(self.avg_resolution_days, 1) if self.avg_resolution_days is not None else None,
+            "performance_grade": self.performance_grade,
+            "generated_at": self.generated_at.isoformat() if self.generated_at else None,
+        }
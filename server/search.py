@@ -0,0 +1,159 @@
+"""
+Search API Blueprint
+Ranked full-text search across batches, NCs, handovers, incidents and permits
+
+Endpoints:
+- GET /api/search?q=<text>[&project_id=][&entities=batches,safety_ncs][&limit=]
+
+Every word of q must match (AND) and the last-typed form of each word is enough:
+words are prefix-matched, so "MH12 tow" finds vehicle MH12AB1234 poured at Tower A.
+Results come from search_documents (see search_models.py), never from the registers:
+- PostgreSQL: tsvector @@ to_tsquery('simple', 'w1:* & w2:*'), ranked by ts_rank
+- SQLite: FTS5 MATCH '"w1"* AND "w2"*', ranked by bm25 (reference and title weighted 10:1)
+- Other databases: LIKE scan of the documents (same filters, unranked)
+
+Scope is the caller's company; company admins see every project, everyone else
+only the projects they are members of.
+"""
+
+import logging
+import re
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, column, func, literal_column, select, table
+
+from .db import session_scope
+from .models import ProjectMembership, User
+from .search_models import FTS_TABLE, SEARCH_ENTITIES, SearchDocument
+from .tenancy import current_company_id
+
+logger = logging.getLogger(__name__)
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+MAX_TERMS = 8
+MAX_LIMIT = 100
+SUMMARY_CHARS = 200
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q):
+    """Lower-cased words of a query (the tokenizers split on the same boundaries)"""
+    return _WORD.findall((q or '').lower())[:MAX_TERMS]
+
+
+def _columns():
+    doc = SearchDocument.__table__.c
+    return [doc.entity, doc.entity_id, doc.project_id, doc.reference, doc.title,
+            func.substr(doc.body, 1, SUMMARY_CHARS).label('summary'), doc.updated_at]
+
+
+def _postgres_query(terms):
+    doc = SearchDocument.__table__.c
+    tsquery = func.to_tsquery('simple', ' & '.join(f"{term}:*" for term in terms))
+    vector = literal_column('search_documents.search_vector')
+    rank = func.ts_rank(vector, tsquery)
+    return (select(*_columns(), rank.label('rank')).where(vector.op('@@')(tsquery)),
+            [rank.desc(), doc.updated_at.desc()])
+
+
+def _sqlite_query(terms):
+    doc = SearchDocument.__table__.c
+    match = ' AND '.join(f'"{term}"*' for term in terms)  # \w+ terms never contain quotes
+    fts = table(FTS_TABLE, column('rowid'))
+    bm25 = literal_column(f"bm25({FTS_TABLE}, 10.0, 10.0, 1.0)")  # reference, title, body; lower is better
+    stmt = (
+        select(*_columns(), (-bm25).label('rank'))
+        .select_from(SearchDocument.__table__)
+        .join(fts, fts.c.rowid == doc.id)
+        .where(literal_column(FTS_TABLE).op('MATCH')(match))
+    )
+    return stmt, [bm25, doc.updated_at.desc()]
+
+
+def _like_query(terms):
+    doc = SearchDocument.__table__.c
+    haystack = func.lower(func.coalesce(doc.reference, '') + ' ' + doc.title + ' ' + doc.body)
+    stmt = select(*_columns(), literal_column('0.0').label('rank')).where(
+        and_(*[haystack.like(f"%{term}%") for term in terms])
+    )
+    return stmt, [doc.updated_at.desc()]
+
+
+def search_documents(session, company_id, q, project_ids=None, entities=None, limit=20):
+    """
+    Ranked matches of `q` within one company
+    project_ids: restrict to these projects (None = whole company)
+    entities: restrict to these entity names (None = all)
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    builder = {'postgresql': _postgres_query, 'sqlite': _sqlite_query}.get(session.get_bind().dialect.name, _like_query)
+    stmt, order = builder(terms)
+
+    doc = SearchDocument.__table__.c
+    stmt = stmt.where(doc.company_id == company_id)
+    if project_ids is not None:
+        stmt = stmt.where(doc.project_id.in_(project_ids))
+    if entities:
+        stmt = stmt.where(doc.entity.in_(entities))
+    rows = session.execute(stmt.order_by(*order).limit(limit)).all()
+    return [
+        {
+            'entity': row.entity,
+            'id': row.entity_id,
+            'projectId': row.project_id,
+            'reference': row.reference,
+            'title': row.title,
+            'summary': row.summary,
+            'rank': round(float(row.rank or 0), 4),
+            'updatedAt': row.updated_at.isoformat() if row.updated_at else None,
+        }
+        for row in rows
+    ]
+
+
+def _visible_projects(session, user_id, project_id):
+    """Project ids the caller may search (None = whole company), or False when project_id is not theirs"""
+    user = session.get(User, user_id)
+    if user.is_company_admin or user.is_system_admin or user.role == 'system_admin':
+        return [project_id] if project_id else None
+    member_of = set(session.scalars(
+        select(ProjectMembership.project_id).where(ProjectMembership.user_id == user_id)
+    ))
+    if project_id:
+        return [project_id] if project_id in member_of else False
+    return list(member_of)
+
+
+@search_bp.route('', methods=['GET'])
+@jwt_required()
+def search():
+    """
+    Search registers of the user's company
+    Query: q (required), project_id, entities (comma separated), limit (default 20, max 100)
+    """
+    q = request.args.get('q', '')
+    if not search_terms(q):
+        return jsonify({"success": False, "message": "q must contain at least one word"}), 400
+
+    entities = [e for e in request.args.get('entities', '').split(',') if e]
+    unknown = [e for e in entities if e not in SEARCH_ENTITIES]
+    if unknown:
+        return jsonify({"success": False, "message": f"Unknown entities: {', '.join(unknown)}"}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_LIMIT)
+
+    try:
+        company_id = current_company_id()
+        with session_scope() as session:
+            project_ids = _visible_projects(session, int(get_jwt_identity()), request.args.get('project_id', type=int))
+            if project_ids is False:
+                return jsonify({"success": False, "message": "Project access denied"}), 403
+            results = search_documents(session, company_id, q, project_ids, entities or None, limit)
+        return jsonify({"success": True, "query": q, "count": len(results), "results": results}), 200
+    except Exception as e:
+        logger.error(f"Search failed: {e}")
+        return jsonify({"success": False, "message": "Search failed"}), 500
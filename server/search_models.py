@@ -0,0 +1,245 @@
+"""
+Search Index Models
+One searchable document per register row, kept in step with the ORM on every write
+
+- search_documents: (entity, entity_id) -> company, project, reference number,
+  title and body text drawn from the row's key text columns
+- PostgreSQL: generated tsvector column (reference + title weight A, body weight B) + GIN index
+- SQLite: FTS5 external-content table search_documents_fts (reference, title, body),
+  synced by triggers
+
+Documents are written by a Session after_flush hook in the same transaction as the
+register write, so search never lags a commit. Soft-deleted rows are removed from the
+index. Bulk Core statements bypass the flush; run rebuild_search_index() after them
+(migrate_search_index.py does a full rebuild).
+
+Both backends tokenize without stemming ('simple' / unicode61), so numbers such as
+NC-PRJ-2025-0007 or MH12AB1234 split the same way and prefix matching behaves alike.
+"""
+
+import logging
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, String, Text, UniqueConstraint, delete, event, insert, select
+)
+from sqlalchemy.orm import Session
+
+from .db import Base
+from .models import BatchRegister, Project
+from .concrete_nc_models import QualityNCIssue
+from .safety_nc_models import NonConformance
+from .handover_register import HandoverRegister
+from .incident_investigation_models import IncidentReport
+from .permit_to_work_models import WorkPermit
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'search_documents_fts'
+
+
+class SearchDocument(Base):
+    """Searchable text of one register row"""
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    company_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    entity = Column(String(30), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    reference = Column(String(100), nullable=True)  # batch / NC / handover / incident / permit number
+    title = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('entity', 'entity_id', name='uq_search_documents_entity'),
+        Index('ix_search_documents_company_project', 'company_id', 'project_id'),
+    )
+
+
+class SearchEntity(NamedTuple):
+    model: type
+    reference: str
+    title: Tuple[str, ...]
+    body: Tuple[str, ...]
+    deleted: Optional[str] = None  # Soft delete flag column
+
+
+# Entity name (as sent to clients) -> indexed columns
+SEARCH_ENTITIES = {
+    'batches': SearchEntity(
+        BatchRegister, 'batch_number', ('vehicle_number', 'element_id'),
+        ('driver_name', 'building_name', 'floor_level', 'zone', 'grid_reference', 'structural_element_type',
+         'pour_location_description', 'remarks', 'rejection_reason'),
+        'is_deleted'),
+    'concrete_ncs': SearchEntity(
+        QualityNCIssue, 'nc_number', ('issue_title',),
+        ('issue_description', 'location', 'recommended_action', 'contractor_response',
+         'contractor_action_taken', 'closure_notes'),
+        'is_deleted'),
+    'safety_ncs': SearchEntity(
+        NonConformance, 'nc_number', ('nc_title',),
+        ('nc_description', 'location', 'category', 'assigned_to_contractor', 'root_cause',
+         'action_taken', 'closure_remarks')),
+    'handovers': SearchEntity(
+        HandoverRegister, 'handover_number', ('work_location', 'work_category'),
+        ('work_description', 'floor_level', 'zone_area', 'outgoing_contractor_name', 'outgoing_contractor_company',
+         'incoming_contractor_name', 'incoming_contractor_company', 'engineer_remarks', 'general_remarks'),
+        'is_deleted'),
+    'incidents': SearchEntity(
+        IncidentReport, 'incident_number', ('location',),
+        ('incident_description', 'immediate_action_taken', 'root_cause_analysis', 'lessons_learned',
+         'closure_remarks'),
+        'is_deleted'),
+    'permits': SearchEntity(
+        WorkPermit, 'permit_number', ('work_location', 'contractor_company'),
+        ('work_description', 'suspension_reason', 'cancellation_reason')),
+}
+
+_ENTITY_BY_MODEL = {spec.model: name for name, spec in SEARCH_ENTITIES.items()}
+
+
+# ========================================
+# BACKEND DDL
+# ========================================
+
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "reference, title, body, content='search_documents', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, reference, title, body) VALUES (new.id, new.reference, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, reference, title, body) "
+    "VALUES ('delete', old.id, old.reference, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, reference, title, body) "
+    "VALUES ('delete', old.id, old.reference, old.title, old.body); "
+    f"INSERT INTO {FTS_TABLE}(rowid, reference, title, body) VALUES (new.id, new.reference, new.title, new.body); END",
+)
+
+_POSTGRES_DDL = (
+    "ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(reference, '') || ' ' || title), 'A') || "
+    "setweight(to_tsvector('simple', body), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_vector ON search_documents USING GIN (search_vector)",
+)
+
+
+def create_search_index(connection):
+    """Create the backend full-text index of search_documents (idempotent)"""
+    statements = {'sqlite': _SQLITE_DDL, 'postgresql': _POSTGRES_DDL}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(SearchDocument.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(SearchDocument.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")  # Triggers go with search_documents
+
+
+# ========================================
+# WRITE SIDE
+# ========================================
+
+def _text(obj, attributes):
+    return ' '.join(str(value) for value in (getattr(obj, a) for a in attributes) if value)
+
+
+def _document(entity, obj, company_id):
+    spec = SEARCH_ENTITIES[entity]
+    reference = getattr(obj, spec.reference)
+    return {
+        'company_id': company_id,
+        'project_id': obj.project_id,
+        'entity': entity,
+        'entity_id': obj.id,
+        'reference': reference,
+        'title': (_text(obj, spec.title) or reference or '')[:500],
+        'body': _text(obj, spec.body),
+        'updated_at': getattr(obj, 'updated_at', None) or getattr(obj, 'created_at', None) or datetime.utcnow(),
+    }
+
+
+def _company_ids(connection, project_ids):
+    if not project_ids:
+        return {}
+    projects = Project.__table__
+    return dict(connection.execute(
+        select(projects.c.id, projects.c.company_id).where(projects.c.id.in_(project_ids))
+    ).all())
+
+
+def write_documents(connection, objects, removed):
+    """Replace the documents of `objects` and drop those of `removed` ((entity, id) pairs)"""
+    table = SearchDocument.__table__
+    keys = removed + [(_ENTITY_BY_MODEL[type(obj)], obj.id) for obj in objects]
+    by_entity = {}
+    for entity, entity_id in keys:
+        by_entity.setdefault(entity, []).append(entity_id)
+    for entity, ids in by_entity.items():
+        connection.execute(delete(table).where(table.c.entity == entity, table.c.entity_id.in_(ids)))
+
+    if not objects:
+        return
+    companies = _company_ids(connection, {obj.project_id for obj in objects if getattr(obj, 'company_id', None) is None})
+    rows = []
+    for obj in objects:
+        company_id = getattr(obj, 'company_id', None) or companies.get(obj.project_id)
+        if company_id is not None:
+            rows.append(_document(_ENTITY_BY_MODEL[type(obj)], obj, company_id))
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _index_changes(session, flush_context):
+    """Re-index every searchable row inserted or updated in this flush; drop deleted ones"""
+    objects, removed = [], []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        entity = _ENTITY_BY_MODEL.get(type(obj))
+        if entity is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        deleted_flag = SEARCH_ENTITIES[entity].deleted
+        if obj in session.deleted or (deleted_flag and getattr(obj, deleted_flag)):
+            removed.append((entity, obj.id))
+        else:
+            objects.append(obj)
+    if objects or removed:
+        write_documents(session.connection(), objects, removed)
+
+
+# ========================================
+# MAINTENANCE
+# ========================================
+
+def rebuild_search_index(session, entities=None, chunk_size=500):
+    """Re-create the documents of `entities` (default: all) from the registers; returns rows indexed"""
+    connection = session.connection()
+    table = SearchDocument.__table__
+    total = 0
+    for entity in entities or SEARCH_ENTITIES:
+        spec = SEARCH_ENTITIES[entity]
+        connection.execute(delete(table).where(table.c.entity == entity))
+        query = session.query(spec.model).order_by(spec.model.id)
+        if spec.deleted:
+            query = query.filter(getattr(spec.model, spec.deleted) == False)  # noqa: E712
+        last_id = 0
+        while True:
+            chunk = query.filter(spec.model.id > last_id).limit(chunk_size).all()
+            if not chunk:
+                break
+            write_documents(connection, chunk, [])
+            total += len(chunk)
+            last_id = chunk[-1].id
+            session.expunge_all()
+    return total
@@ -0,0 +1,182 @@
+"""
+Fast JSON Serialization
+orjson-backed Flask JSON provider and compiled row serializers for hot list endpoints
+
+- OrjsonProvider replaces Flask's stdlib provider; datetimes/dates are emitted
+  as ISO 8601 (same output as the .isoformat() calls in to_dict())
+- RowSerializer turns a declarative shape {key: column | nested shape | Const}
+  into a SELECT column list plus one generated function that maps a Row tuple
+  to the response dict - no ORM instances, no per-field isoformat()
+- model_shape() derives the default camelCase shape from a model's column metadata
+
+orjson is optional: without it the provider falls back to the stdlib json module.
+"""
+
+import dataclasses
+import decimal
+import enum
+import json
+import re
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import JSONProvider
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+
+# ========================================
+# JSON PROVIDER
+# ========================================
+
+def _default(obj):
+    """Types neither orjson nor the stdlib encoder handle natively"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (uuid.UUID,)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps_bytes(obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    loads = json.loads
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify, request.get_json, test clients)"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install the fast JSON provider on an app"""
+    app.json = OrjsonProvider(app)
+
+
+# ========================================
+# ROW SERIALIZERS
+# ========================================
+
+class Const:
+    """Literal value placed in a shape (e.g. the cube "name": "A" labels)"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Convert:
+    """Column whose value is passed through `fn` (e.g. Integer flags -> bool)"""
+
+    def __init__(self, column, fn):
+        self.column = column
+        self.fn = fn
+
+
+def camel_case(name: str) -> str:
+    """snake_case column name -> camelCase JSON key"""
+    return re.sub(r'_([a-z0-9])', lambda m: m.group(1).upper(), name)
+
+
+def model_shape(model, exclude=(), flags=()) -> dict:
+    """
+    Default shape for a model: every column as camelCase key, in declaration order.
+    `flags` are Integer boolean columns emitted as true/false (like bool() in to_dict).
+    """
+    shape = {}
+    for column in model.__table__.columns:
+        if column.key in exclude:
+            continue
+        attr = getattr(model, column.key)
+        shape[camel_case(column.key)] = Convert(attr, bool) if column.key in flags else attr
+    return shape
+
+
+class RowSerializer:
+    """
+    Compiled Row -> dict mapper for a declarative shape.
+
+    Usage:
+        serializer = RowSerializer({"id": Model.id, "meta": {"kind": Const("x")}})
+        rows = session.execute(serializer.select().where(...)).all()
+        payload = serializer.dump(rows)
+    """
+
+    def __init__(self, shape: dict):
+        self.columns = []
+        namespace = {}
+        body = self._compile(shape, namespace)
+        source = f"def build(r):\n    return {body}\n"
+        exec(compile(source, f"<RowSerializer {id(self):x}>", "exec"), namespace)
+        self._build = namespace["build"]
+
+    def _compile(self, shape, namespace) -> str:
+        items = []
+        for key, value in shape.items():
+            if isinstance(value, dict):
+                expr = self._compile(value, namespace)
+            elif isinstance(value, Const):
+                name = f"_k{len(namespace)}"
+                namespace[name] = value.value
+                expr = name
+            elif isinstance(value, Convert):
+                name = f"_f{len(namespace)}"
+                namespace[name] = value.fn
+                expr = f"{name}(r[{self._column(value.column)}])"
+            else:
+                expr = f"r[{self._column(value)}]"
+            items.append(f"{key!r}: {expr}")
+        return "{" + ", ".join(items) + "}"
+
+    def _column(self, column) -> int:
+        self.columns.append(column.label(f"c{len(self.columns)}"))
+        return len(self.columns) - 1
+
+    def select(self):
+        """SELECT statement for exactly the columns this shape reads"""
+        return select(*self.columns)
+
+    def dump_row(self, row) -> dict:
+        return self._build(row)
+
+    def dump(self, rows) -> list:
+        build = self._build
+        return [build(row) for row in rows]
@@ -0,0 +1,395 @@
+"""
+Early-Age Strength Forecasting
+28-day strength forecast for pending cube sets from their 3/7-day results
+
+Model (log-age / power law on maturity-equivalent age):
+
+    S(t) = S28 * (te / 28) ** beta          ln(S_early / S28) = beta * ln(te / 28)
+
+- te: Nurse-Saul equivalent age at the IS 516 curing temperature (27 C),
+  te = age * (T - T0) / (27 - T0) with datum T0 = -10 C and T = curing_temperature
+  of the set (27 C when not recorded)
+- beta is fitted per mix design (and per vendor as a fallback) by least squares
+  through the origin over historical batches that have both an early and a
+  28-day result. The fit only needs n, Sxx, Sxy, Syy, so it is kept as additive
+  sums that are updated for changed batches only (sync change feed)
+- Prediction band: 90% prediction interval of ln S28, sigma^2 * (1 + x^2 / Sxx)
+
+Fallback order: mix design (>= MIN_PAIRS pairs) -> vendor -> DEFAULT_BETA/DEFAULT_SIGMA.
+
+Endpoints:
+- GET /api/cube-tests/forecast?project_id=<id>
+"""
+
+import math
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
+
+import numpy as np
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, select
+
+from .db import session_scope
+from .models import CubeTestRegister, BatchRegister, MixDesign
+from .sync_models import SyncChange, project_change_version
+from .cube_tests import project_access_required
+from .cube_acceptance import parse_fck
+from .response_optimization import project_version_etag
+
+logger = logging.getLogger(__name__)
+
+strength_forecast_bp = Blueprint('strength_forecast', __name__)
+
+TARGET_AGE_DAYS = 28
+REFERENCE_TEMP_C = 27.0  # IS 516 curing temperature
+DATUM_TEMP_C = -10.0  # Nurse-Saul datum temperature
+MIN_PAIRS = 5
+DEFAULT_BETA = 0.33  # ~65% of 28-day strength at 7 days for OPC concrete
+DEFAULT_SIGMA = 0.12  # ln-strength scatter when no history is available
+Z_90 = 1.645
+CACHED_PROJECTS = 256
+
+_REFIT_SOURCES = ('batches', 'mix_designs')
+
+
+def equivalent_age(age_days, curing_temp_c):
+    """Nurse-Saul equivalent age (days at 27 C); vectorized over NumPy arrays"""
+    temp = np.where(np.isnan(curing_temp_c), REFERENCE_TEMP_C, curing_temp_c)
+    return age_days * np.maximum(temp - DATUM_TEMP_C, 0.0) / (REFERENCE_TEMP_C - DATUM_TEMP_C)
+
+
+def _log_age(age_days, curing_temp_c):
+    return np.log(np.maximum(equivalent_age(age_days, curing_temp_c), 0.1) / TARGET_AGE_DAYS)
+
+
+class GainCurve:
+    """Fitted strength-gain exponent for one mix design or vendor"""
+
+    def __init__(self, sums=None):
+        self.n, self.sxx, self.sxy, self.syy = sums if sums is not None else (0, 0.0, 0.0, 0.0)
+
+    def add(self, sign, x, y):
+        self.n += sign
+        self.sxx += sign * x * x
+        self.sxy += sign * x * y
+        self.syy += sign * y * y
+
+    @property
+    def usable(self):
+        return self.n >= MIN_PAIRS and self.sxx > 1e-9
+
+    @property
+    def beta(self):
+        return self.sxy / self.sxx
+
+    @property
+    def sigma(self):
+        sse = max(self.syy - self.sxy * self.sxy / self.sxx, 0.0)
+        return math.sqrt(sse / (self.n - 1))
+
+
+# ========================================
+# HISTORY (early/28-day pairs)
+# ========================================
+
+def _history_query(project_id):
+    return select(
+        CubeTestRegister.id, CubeTestRegister.batch_id, CubeTestRegister.test_age_days,
+        CubeTestRegister.average_strength_mpa, CubeTestRegister.curing_temperature,
+        BatchRegister.mix_design_id, BatchRegister.rmc_vendor_id
+    ).join(
+        BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+    ).where(
+        CubeTestRegister.project_id == project_id,
+        CubeTestRegister.is_deleted == False,
+        CubeTestRegister.average_strength_mpa > 0,
+        CubeTestRegister.test_age_days <= TARGET_AGE_DAYS
+    )
+
+
+def load_pairs(session, project_id, batch_ids=None):
+    """
+    Early/28-day pairs of tested batches.
+    Returns: {batch_id: (mix_ids, vendor_ids, x, y)} with x = ln(te/28), y = ln(S_early/S28)
+    """
+    query = _history_query(project_id)
+    if batch_ids is not None:
+        query = query.where(CubeTestRegister.batch_id.in_(batch_ids))
+    rows = session.execute(query).all()
+    if not rows:
+        return {}
+
+    batch = np.array([r.batch_id for r in rows], dtype=np.int64)
+    age = np.array([r.test_age_days for r in rows], dtype=np.float64)
+    strength = np.array([r.average_strength_mpa for r in rows], dtype=np.float64)
+    temp = np.array([np.nan if r.curing_temperature is None else r.curing_temperature for r in rows])
+    mix = np.array([r.mix_design_id or 0 for r in rows], dtype=np.int64)
+    vendor = np.array([r.rmc_vendor_id or 0 for r in rows], dtype=np.int64)
+
+    # Mean 28-day result per batch, broadcast back onto that batch's early sets
+    final = age == TARGET_AGE_DAYS
+    batches, index = np.unique(batch, return_inverse=True)
+    final_sum = np.bincount(index, weights=np.where(final, strength, 0.0), minlength=batches.size)
+    final_count = np.bincount(index, weights=final.astype(np.float64), minlength=batches.size)
+    early = ~final & (final_count[index] > 0)
+    s28 = final_sum[index[early]] / final_count[index[early]]
+
+    x = _log_age(age[early], temp[early])
+    y = np.log(strength[early] / s28)
+
+    pairs = {}
+    early_batch = batch[early]
+    order = np.argsort(early_batch, kind='stable')
+    bounds = np.flatnonzero(np.diff(early_batch[order])) + 1
+    for chunk in np.split(order, bounds) if order.size else ():
+        pairs[int(early_batch[chunk[0]])] = (mix[early][chunk], vendor[early][chunk], x[chunk], y[chunk])
+    return pairs
+
+
+class CurveSnapshot:
+    """Read-only copy of a project's fits, unaffected by later refreshes of the cached state"""
+
+    def __init__(self, curves):
+        self.curves = MappingProxyType({
+            key: GainCurve((curve.n, curve.sxx, curve.sxy, curve.syy)) for key, curve in curves.items()
+        })
+
+    def curve_for(self, mix_id, vendor_id):
+        for key, source in ((('mix', mix_id), 'mix'), (('vendor', vendor_id), 'vendor')):
+            curve = self.curves.get(key)
+            if curve is not None and curve.usable:
+                return curve, source
+        return None, 'default'
+
+
+class _ProjectCurves:
+    """Pairs and per-mix/per-vendor fits of one project"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # Held while this project refits; other projects run alongside
+        self.version = None
+        self.snapshot = None
+        self.pairs = {}
+        self.curves = defaultdict(GainCurve)  # ('mix', id) / ('vendor', id) -> GainCurve
+
+    def _apply(self, sign, pairs):
+        for mixes, vendors, xs, ys in pairs.values():
+            for mix_id, vendor_id, x, y in zip(mixes.tolist(), vendors.tolist(), xs.tolist(), ys.tolist()):
+                self.curves[('mix', mix_id)].add(sign, x, y)
+                self.curves[('vendor', vendor_id)].add(sign, x, y)
+
+    def rebuild(self, pairs):
+        """Full fit - group sums in one pass with np.bincount"""
+        self.pairs = pairs
+        self.curves = defaultdict(GainCurve)
+        if not pairs:
+            return
+        mixes, vendors, xs, ys = (np.concatenate(parts) for parts in zip(*pairs.values()))
+        for kind, keys in (('mix', mixes), ('vendor', vendors)):
+            groups, index = np.unique(keys, return_inverse=True)
+            sums = [np.bincount(index, minlength=groups.size)] + [
+                np.bincount(index, weights=w, minlength=groups.size) for w in (xs * xs, xs * ys, ys * ys)
+            ]
+            for g, key in enumerate(groups.tolist()):
+                self.curves[(kind, key)] = GainCurve((int(sums[0][g]), sums[1][g], sums[2][g], sums[3][g]))
+
+    def update(self, batch_ids, pairs):
+        """Replace the pairs of `batch_ids` and adjust the sums by the difference"""
+        self._apply(-1, {b: self.pairs.pop(b) for b in batch_ids if b in self.pairs})
+        self._apply(1, pairs)
+        self.pairs.update(pairs)
+
+
+_projects = OrderedDict()
+_lock = threading.Lock()  # Guards _projects only
+
+
+def _project_state(project_id):
+    with _lock:
+        state = _projects.get(project_id)
+        if state is None:
+            state = _projects[project_id] = _ProjectCurves()
+            while len(_projects) > CACHED_PROJECTS:
+                _projects.popitem(last=False)
+        else:
+            _projects.move_to_end(project_id)
+        return state
+
+
+def _refresh(session, state, project_id):
+    changed = session.execute(
+        select(SyncChange.entity, SyncChange.entity_id).where(
+            SyncChange.project_id == project_id,
+            SyncChange.seq > state.version,
+            SyncChange.entity.in_(('cube_tests',) + _REFIT_SOURCES)
+        ).distinct()
+    ).all()
+    if any(entity in _REFIT_SOURCES for entity, _ in changed):
+        state.rebuild(load_pairs(session, project_id))
+        return
+
+    test_ids = [entity_id for _, entity_id in changed]
+    if not test_ids:
+        return
+    # Cube tests are soft-deleted, so a changed test always still names its batch
+    batch_ids = set(session.scalars(
+        select(CubeTestRegister.batch_id).where(
+            CubeTestRegister.id.in_(test_ids), CubeTestRegister.batch_id.isnot(None)
+        )
+    ))
+    state.update(batch_ids, load_pairs(session, project_id, batch_ids) if batch_ids else {})
+
+
+def project_curves(session, project_id):
+    """Gain curves of a project (a CurveSnapshot), refitted only for batches changed since the cached version"""
+    version = project_change_version(session, project_id)
+    state = _project_state(project_id)
+    with state.lock:
+        # A request that read an older version than the cached one keeps the newer fits
+        if state.version is None or version > state.version:
+            if state.version is None:
+                state.rebuild(load_pairs(session, project_id))
+            else:
+                _refresh(session, state, project_id)
+            state.version = version
+            state.snapshot = CurveSnapshot(state.curves)
+        return state.snapshot
+
+
+# ========================================
+# FORECAST
+# ========================================
+
+def _pending_query(project_id):
+    grade = func.coalesce(func.nullif(CubeTestRegister.concrete_grade, ''), MixDesign.concrete_grade)
+    return select(
+        CubeTestRegister.id, CubeTestRegister.batch_id, CubeTestRegister.required_strength_mpa,
+        grade.label('grade'), BatchRegister.batch_number, BatchRegister.mix_design_id, BatchRegister.rmc_vendor_id
+    ).join(
+        BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+    ).outerjoin(
+        MixDesign, MixDesign.id == BatchRegister.mix_design_id
+    ).where(
+        CubeTestRegister.project_id == project_id,
+        CubeTestRegister.is_deleted == False,
+        CubeTestRegister.test_age_days == TARGET_AGE_DAYS,
+        CubeTestRegister.average_strength_mpa.is_(None)
+    )
+
+
+def forecast_pending(session, project_id):
+    """Predicted 28-day strength with a 90% band for every pending 28-day set with an early result"""
+    state = project_curves(session, project_id)
+    pending = session.execute(_pending_query(project_id)).all()
+    if not pending:
+        return []
+
+    # Latest early result of each pending batch
+    early = {}
+    for row in session.execute(
+        select(CubeTestRegister.id, CubeTestRegister.batch_id, CubeTestRegister.test_age_days,
+               CubeTestRegister.average_strength_mpa, CubeTestRegister.curing_temperature)
+        .where(
+            CubeTestRegister.batch_id.in_({p.batch_id for p in pending}),
+            CubeTestRegister.is_deleted == False,
+            CubeTestRegister.test_age_days < TARGET_AGE_DAYS,
+            CubeTestRegister.average_strength_mpa > 0
+        ).order_by(CubeTestRegister.test_age_days)
+    ):
+        early[row.batch_id] = row
+    pending = [p for p in pending if p.batch_id in early]
+    if not pending:
+        return []
+
+    basis = [early[p.batch_id] for p in pending]
+    age = np.array([b.test_age_days for b in basis], dtype=np.float64)
+    temp = np.array([np.nan if b.curing_temperature is None else b.curing_temperature for b in basis])
+    strength = np.array([b.average_strength_mpa for b in basis], dtype=np.float64)
+
+    fits = [state.curve_for(p.mix_design_id or 0, p.rmc_vendor_id or 0) for p in pending]
+    beta = np.array([c.beta if c else DEFAULT_BETA for c, _ in fits])
+    sigma = np.array([c.sigma if c else DEFAULT_SIGMA for c, _ in fits])
+    sxx = np.array([c.sxx if c else np.inf for c, _ in fits])
+
+    x = _log_age(age, temp)
+    log_pred = np.log(strength) - beta * x
+    half_width = Z_90 * sigma * np.sqrt(1.0 + x * x / sxx)
+    predicted, lower, upper = np.exp(log_pred), np.exp(log_pred - half_width), np.exp(log_pred + half_width)
+    te = equivalent_age(age, temp)
+
+    results = []
+    for i, p in enumerate(pending):
+        required = p.required_strength_mpa or parse_fck(p.grade)
+        if required is None:
+            risk = None
+        elif upper[i] < required:
+            risk = 'likely_fail'
+        elif predicted[i] < required:
+            risk = 'at_risk'
+        else:
+            risk = 'on_track'
+        curve, source = fits[i]
+        results.append({
+            "testId": p.id,
+            "batchId": p.batch_id,
+            "batchNumber": p.batch_number,
+            "mixDesignId": p.mix_design_id,
+            "vendorId": p.rmc_vendor_id,
+            "grade": p.grade,
+            "basedOnTestId": basis[i].id,
+            "basedOnAgeDays": basis[i].test_age_days,
+            "equivalentAgeDays": round(float(te[i]), 2),
+            "earlyStrength": round(float(strength[i]), 2),
+            "predictedStrength": round(float(predicted[i]), 2),
+            "lowerBound": round(float(lower[i]), 2),
+            "upperBound": round(float(upper[i]), 2),
+            "confidence": 0.9,
+            "model": source,
+            "historyPairs": curve.n if curve else 0,
+            "requiredStrength": required,
+            "risk": risk,
+        })
+    return results
+
+
+# ========================================
+# API ENDPOINTS
+# ========================================
+
+@strength_forecast_bp.route('/api/cube-tests/forecast', methods=['GET'])
+@jwt_required()
+@project_access_required
+@project_version_etag
+def get_strength_forecast():
+    """
+    28-day strength forecast for pending cube sets.
+
+    Query Parameters:
+    - project_id (required)
+    - risk (optional): Only forecasts with this risk (likely_fail, at_risk, on_track)
+
+    Returns:
+    - One forecast per pending 28-day set that has a 3/7-day result
+    """
+    try:
+        project_id = request.args.get('project_id', type=int)
+        risk = request.args.get('risk')
+
+        with session_scope() as session:
+            forecasts = forecast_pending(session, project_id)
+
+        if risk:
+            forecasts = [f for f in forecasts if f["risk"] == risk]
+
+        return jsonify({
+            "success": True,
+            "count": len(forecasts),
+            "forecasts": forecasts
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error forecasting cube strength: {e}")
+        return jsonify({"error": "Failed to forecast cube strength"}), 500
@@ -11,7 +11,7 @@ from flask import request, jsonify
 from functools import wraps
 import json as json_module
 
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
 try:
     from .db import session_scope
@@ -66,6 +66,7 @@ def require_app(app_name):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            verify_jwt_in_request()
             try:
                 user_id = get_current_user_id()
                 subscribed_apps = get_user_subscribed_apps(user_id)
@@ -100,6 +101,7 @@ def require_both_apps():
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            verify_jwt_in_request()
             try:
                 user_id = get_current_user_id()
                 subscribed_apps = get_user_subscribed_apps(user_id)
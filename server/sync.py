@@ -0,0 +1,284 @@
+"""
+Delta Sync API Blueprint
+Change feed for offline-first mobile and PWA clients (see OFFLINE_ARCHITECTURE.md)
+
+Endpoints:
+- GET  /api/sync?project_id=<id>&since=<token>&limit=<n>
+- POST /api/sync/mutations   - Replay queued offline writes (see sync_mutations.py)
+
+A reconnecting client sends the `next` token from its previous sync and receives
+only records changed since then, grouped by entity in columnar form:
+
+    {
+      "next": "1842", "hasMore": false,
+      "changes": {
+        "cube_tests": {"columns": ["id", "batchId", ...], "rows": [[12, 4, ...]], "deleted": [9]}
+      }
+    }
+
+Soft-deleted and hard-deleted records are returned as tombstones in `deleted`.
+Binary columns (photos, signatures) are sent as has<Name> flags; clients fetch
+the blobs through the existing per-record endpoints. since=0 returns everything.
+"""
+
+import logging
+from collections import defaultdict
+from functools import wraps
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import LargeBinary, func, select
+from sqlalchemy.exc import IntegrityError
+
+from .db import session_scope, begin_write
+from .config import get_config
+from .models import Project, ProjectMembership
+from .serialization import camel_case, dumps_bytes, loads
+from .subscription_middleware import get_user_subscribed_apps
+from .sync_models import SYNC_ENTITIES, SyncChange, IdempotencyKey
+from .sync_mutations import MUTATION_HANDLERS, MutationContext, MutationError
+from .cube_tests import notify_cube_test_failure
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+sync_bp = Blueprint('sync', __name__)
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+def _compact_columns(model):
+    """(keys, select columns) for a model: all columns, blobs reduced to NOT NULL flags"""
+    keys, columns = [], []
+    for column in model.__table__.columns:
+        attr = getattr(model, column.key)
+        if isinstance(column.type, LargeBinary):
+            keys.append(camel_case('has_' + column.key.removesuffix('_data')))
+            columns.append(attr.isnot(None))
+        else:
+            keys.append(camel_case(column.key))
+            columns.append(attr)
+    return keys, columns
+
+
+# Entity -> (keys, columns), compiled once
+SYNC_COLUMNS = {entity: _compact_columns(model) for entity, model in SYNC_ENTITIES.items()}
+
+
+def project_member_required(f):
+    """Decorator to check the user is a member of ?project_id"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        project_id = request.args.get('project_id', type=int)
+        if not project_id:
+            return jsonify({"error": "project_id is required"}), 400
+
+        with session_scope() as session:
+            membership = session.query(ProjectMembership.id).filter_by(
+                user_id=int(get_jwt_identity()),
+                project_id=project_id,
+                is_active=True
+            ).first()
+            if not membership:
+                return jsonify({"error": "Access denied. You are not a member of this project"}), 403
+
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def build_changes(session, project_id, since, limit):
+    """
+    Changes for a project after `since`, latest change per record, in seq order.
+    Returns: (changes dict, next seq, has_more)
+    """
+    pointers = session.execute(
+        select(SyncChange.entity, SyncChange.entity_id, func.max(SyncChange.seq).label('seq'))
+        .where(SyncChange.project_id == project_id, SyncChange.seq > since)
+        .group_by(SyncChange.entity, SyncChange.entity_id)
+        .order_by(func.max(SyncChange.seq))
+        .limit(limit + 1)
+    ).all()
+
+    has_more = len(pointers) > limit
+    pointers = pointers[:limit]
+    if not pointers:
+        return {}, since, False
+
+    ids_by_entity = defaultdict(list)
+    for pointer in pointers:
+        ids_by_entity[pointer.entity].append(pointer.entity_id)
+
+    changes = {}
+    for entity, ids in ids_by_entity.items():
+        model = SYNC_ENTITIES.get(entity)
+        if model is None:
+            continue
+        keys, columns = SYNC_COLUMNS[entity]
+        rows = session.execute(select(*columns).where(model.id.in_(ids))).all()
+
+        deleted_index = keys.index('isDeleted') if 'isDeleted' in keys else None
+        live = [list(row) for row in rows if deleted_index is None or not row[deleted_index]]
+        live_ids = {row[0] for row in live}
+        changes[entity] = {
+            "columns": keys,
+            "rows": live,
+            "deleted": [entity_id for entity_id in ids if entity_id not in live_ids],
+        }
+
+    return changes, pointers[-1].seq, has_more
+
+
+@sync_bp.route('/api/sync', methods=['GET'])
+@jwt_required()
+@project_member_required
+def sync_changes():
+    """
+    Delta sync for one project.
+
+    Query Parameters:
+    - project_id (required)
+    - since (optional): `next` token from the previous response (default 0 = everything)
+    - limit (optional): max records per response (default 500, max 2000) - repeat while hasMore
+    """
+    project_id = request.args.get('project_id', type=int)
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({"error": "Invalid since token"}), 400
+    since = int(since)
+    limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+
+    with session_scope() as session:
+        changes, next_seq, has_more = build_changes(session, project_id, since, limit)
+
+    return jsonify({
+        "since": str(since),
+        "next": str(next_seq),
+        "hasMore": has_more,
+        "changes": changes
+    }), 200
+
+
+# ========================================
+# BATCHED MUTATIONS
+# ========================================
+
+def _stored_result(record):
+    result = {"key": record.key, "type": record.op_type, "status": record.status_code, "replayed": True}
+    result.update(loads(record.response) if record.response else {})
+    return result
+
+
+def apply_mutation(ctx, operation):
+    """Apply one operation inside a SAVEPOINT and store its outcome; returns the per-op result"""
+    session = ctx.session
+    key, op_type = operation.get('key'), operation.get('type')
+    if not key or len(str(key)) > 100:
+        return {"key": key, "type": op_type, "status": 400, "error": "key is required (max 100 chars)"}
+
+    stored = session.query(IdempotencyKey).filter_by(user_id=ctx.user_id, key=str(key)).first()
+    if stored:
+        if stored.op_type != op_type or stored.project_id != ctx.project_id:
+            return {"key": key, "type": op_type, "status": 422, "error": "Idempotency key reused for a different operation"}
+        return _stored_result(stored)
+
+    handler = MUTATION_HANDLERS.get(op_type)
+    if handler is None:
+        return {"key": key, "type": op_type, "status": 400, "error": f"Unknown operation type '{op_type}'"}
+
+    failed_before = len(ctx.failed_cube_tests)
+    savepoint = session.begin_nested()
+    try:
+        status, body = handler(ctx, operation.get('data') or {})
+        session.add(IdempotencyKey(
+            user_id=ctx.user_id, key=str(key), op_type=op_type, project_id=ctx.project_id,
+            status_code=status, response=dumps_bytes(body).decode('utf-8')
+        ))
+        session.flush()
+        savepoint.commit()
+    except MutationError as e:
+        savepoint.rollback()
+        del ctx.failed_cube_tests[failed_before:]
+        return {"key": key, "type": op_type, "status": e.status, "error": e.message}
+    except IntegrityError:
+        # Same key committed concurrently by another request from this user
+        savepoint.rollback()
+        del ctx.failed_cube_tests[failed_before:]
+        return {"key": key, "type": op_type, "status": 409, "error": "Operation conflicts with existing data"}
+    except (ValueError, TypeError) as e:
+        savepoint.rollback()
+        del ctx.failed_cube_tests[failed_before:]
+        return {"key": key, "type": op_type, "status": 400, "error": f"Invalid data format: {e}"}
+    except Exception as e:
+        # Any other handler failure costs this operation only, not the batch
+        savepoint.rollback()
+        del ctx.failed_cube_tests[failed_before:]
+        logger.exception(f"Sync mutation {op_type} ({key}) failed: {e}")
+        return {"key": key, "type": op_type, "status": 500, "error": "Operation failed"}
+
+    return {"key": key, "type": op_type, "status": status, "replayed": False, **body}
+
+
+@sync_bp.route('/api/sync/mutations', methods=['POST'])
+@jwt_required()
+def apply_mutations():
+    """
+    Apply an ordered list of queued offline writes in one transaction.
+    
+    Request Body:
+    {
+        "project_id": int (required),
+        "atomic": bool (optional, default false - all-or-nothing when true),
+        "operations": [{"key": "uuid", "type": "vehicle.entry", "data": {...}}, ...]
+    }
+    
+    Returns:
+    - 200 with one result per operation ({key, type, status, replayed, ...body | error})
+    - 422 when atomic and any operation failed (nothing was applied)
+    """
+    data = request.get_json(silent=True) or {}
+    project_id = data.get('project_id')
+    operations = data.get('operations')
+    atomic = bool(data.get('atomic'))
+
+    if not project_id:
+        return jsonify({"error": "project_id is required"}), 400
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(operations) > config_obj.SYNC_MAX_MUTATIONS:
+        return jsonify({"error": f"At most {config_obj.SYNC_MAX_MUTATIONS} operations per request"}), 413
+
+    user_id = int(get_jwt_identity())
+    apps = get_user_subscribed_apps(user_id)  # Own session scope - resolve before ours
+
+    try:
+        with session_scope() as session:
+            begin_write(session)
+            membership = session.query(ProjectMembership).filter_by(
+                user_id=user_id, project_id=project_id, is_active=True
+            ).first()
+            project = session.get(Project, project_id)
+            if not membership or not project:
+                return jsonify({"error": "Access denied. You are not a member of this project"}), 403
+
+            ctx = MutationContext(session, user_id, project, membership.role, apps)
+            results = [apply_mutation(ctx, operation) for operation in operations]
+
+            failed = [r for r in results if r["status"] >= 400]
+            if atomic and failed:
+                session.rollback()
+                return jsonify({"success": False, "applied": 0, "results": results}), 422
+
+        # After commit: the sync_sequences lock is released and only committed failures are announced
+        for test_id in ctx.failed_cube_tests:
+            notify_cube_test_failure(test_id)
+
+        return jsonify({
+            "success": not failed,
+            "applied": sum(1 for r in results if r["status"] < 400 and not r.get("replayed")),
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error applying sync mutations: {e}")
+        return jsonify({"error": "Failed to apply mutations"}), 500
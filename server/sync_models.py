@@ -0,0 +1,267 @@
+"""
+Delta Sync Models
+Per-project change feed for offline-first mobile/PWA clients
+
+- sync_sequences: one row per project holding the last issued change number
+- sync_changes: (project_id, seq, entity, entity_id) appended on every write to a
+  tracked register; the row itself is read at sync time, so a change row is
+  only a pointer ("this record changed at seq N")
+- idempotency_keys: stored results of batched mutations, keyed by the client's
+  per-operation key, so replayed offline queues never apply an operation twice
+
+Writes are captured by a Session after_flush hook, so every ORM insert/update/delete
+of a tracked model is recorded in the same transaction as the write. Bulk Core
+statements bypass the ORM flush and must call record_changes() themselves.
+Shared rows (company vendors, mix designs without a project) are recorded under
+every project that can use them, and a new project's feed starts with them.
+
+Sequence numbers are issued with UPDATE ... RETURNING on the project's
+sync_sequences row; the row lock serializes writers of one project until commit,
+so a client that has seen seq N can never later miss a change with seq <= N.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Text, DateTime, Index, UniqueConstraint,
+    event, insert, update, delete, select, exists
+)
+from sqlalchemy.orm import Session, aliased
+
+from .db import Base, session_scope
+from .config import get_config
+from .models import (
+    Project, BatchRegister, CubeTestRegister, TrainingRecord, MaterialVehicleRegister,
+    MaterialTestRegister, PourActivity, ThirdPartyCubeTest, TestReminder, RMCVendor, MixDesign
+)
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+# Entity name (as sent to clients) -> tracked model; every model has id + project_id
+# (vendors and project-less mix designs are shared, see _shared_projects)
+SYNC_ENTITIES = {
+    'batches': BatchRegister,
+    'cube_tests': CubeTestRegister,
+    'training_records': TrainingRecord,
+    'material_vehicles': MaterialVehicleRegister,
+    'material_tests': MaterialTestRegister,
+    'pour_activities': PourActivity,
+    'third_party_cube_tests': ThirdPartyCubeTest,
+    'test_reminders': TestReminder,
+    'vendors': RMCVendor,
+    'mix_designs': MixDesign,
+}
+
+_ENTITY_BY_MODEL = {model: name for name, model in SYNC_ENTITIES.items()}
+
+
+class SyncSequence(Base):
+    """Last change number issued for a project"""
+    __tablename__ = "sync_sequences"
+
+    project_id = Column(Integer, primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0)
+
+
+class SyncChange(Base):
+    """Pointer to a changed (or deleted) row of a tracked register"""
+    __tablename__ = "sync_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    project_id = Column(Integer, nullable=False)
+    seq = Column(BigInteger, nullable=False)
+    entity = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_sync_changes_project_seq', 'project_id', 'seq'),
+        Index('ix_sync_changes_entity', 'project_id', 'entity', 'entity_id', 'seq'),
+    )
+
+
+class IdempotencyKey(Base):
+    """Outcome of one batched mutation, replayed verbatim when the same key is sent again"""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    key = Column(String(100), nullable=False)
+    op_type = Column(String(50), nullable=False)
+    project_id = Column(Integer, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response = Column(Text, nullable=True)  # JSON result of the operation
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+        Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+
+
+# ========================================
+# WRITE SIDE
+# ========================================
+
+def _allocate(connection, project_id, count):
+    """Reserve `count` change numbers for a project; returns the first one"""
+    last = connection.execute(
+        update(SyncSequence.__table__)
+        .where(SyncSequence.__table__.c.project_id == project_id)
+        .values(last_seq=SyncSequence.__table__.c.last_seq + count)
+        .returning(SyncSequence.__table__.c.last_seq)
+    ).scalar()
+    if last is None:
+        # Project created before the sync tables existed (see migrate_sync_changes.py)
+        connection.execute(insert(SyncSequence.__table__).values(project_id=project_id, last_seq=count))
+        last = count
+    return last - count + 1
+
+
+def _write_changes(connection, changes):
+    """changes: {project_id: [(entity, entity_id), ...]} -> sync_changes rows"""
+    now = datetime.utcnow()
+    rows = []
+    for project_id, entries in changes.items():
+        seq = _allocate(connection, project_id, len(entries))
+        for offset, (entity, entity_id) in enumerate(entries):
+            rows.append({
+                'project_id': project_id, 'seq': seq + offset, 'entity': entity,
+                'entity_id': entity_id, 'changed_at': now
+            })
+    if rows:
+        connection.execute(insert(SyncChange.__table__), rows)
+
+
+def record_changes(session, model, project_id, entity_ids):
+    """Record changes made outside the ORM flush (bulk INSERT/UPDATE statements)"""
+    entity = _ENTITY_BY_MODEL[model]
+    _write_changes(session.connection(), {project_id: [(entity, entity_id) for entity_id in entity_ids]})
+
+
+def _shared_projects(connection, obj, cache):
+    """
+    Projects whose feed carries `obj`, or None for a row of its own project only.
+    Batches of any project of the company may use a vendor (and list its name), and
+    a mix design without a project is accepted by batches of every project.
+    """
+    projects = Project.__table__
+    if isinstance(obj, RMCVendor):
+        key, where = obj.company_id, projects.c.company_id == obj.company_id
+    elif isinstance(obj, MixDesign) and obj.project_id is None:
+        key, where = None, True
+    else:
+        return None
+    if key not in cache:
+        cache[key] = connection.execute(select(projects.c.id).where(where)).scalars().all()
+    return cache[key]
+
+
+def _shared_rows(connection, company_id):
+    """(entity, id) of the live shared rows a new project of `company_id` starts its feed with"""
+    vendors = connection.execute(select(RMCVendor.id).where(
+        RMCVendor.company_id == company_id, RMCVendor.is_deleted == False
+    )).scalars()
+    mix_designs = connection.execute(select(MixDesign.id).where(
+        MixDesign.project_id.is_(None), MixDesign.is_deleted == False
+    )).scalars()
+    return [('vendors', entity_id) for entity_id in vendors] + [('mix_designs', entity_id) for entity_id in mix_designs]
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_changes(session, flush_context):
+    """Append a change row for every tracked row inserted, updated or deleted in this flush"""
+    changes = defaultdict(dict)
+    new_projects = []
+    tracked = []
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Project) and obj in session.new:
+            new_projects.append(obj)
+            continue
+        entity = _ENTITY_BY_MODEL.get(type(obj))
+        if entity is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        tracked.append((entity, obj))
+
+    if not new_projects and not tracked:
+        return
+
+    connection = session.connection()
+    if new_projects:
+        connection.execute(
+            insert(SyncSequence.__table__), [{'project_id': project.id, 'last_seq': 0} for project in new_projects]
+        )
+        for project in new_projects:
+            changes[project.id].update(dict.fromkeys(_shared_rows(connection, project.company_id)))
+
+    shared = {}
+    for entity, obj in tracked:
+        project_ids = _shared_projects(connection, obj, shared)
+        if project_ids is None:
+            project_ids = [obj.project_id] if obj.project_id is not None else []
+        for project_id in project_ids:
+            changes[project_id][(entity, obj.id)] = None  # dict keeps order, drops duplicates
+
+    # Sequence rows are locked in project order, so two fanned-out writes cannot deadlock
+    _write_changes(connection, {pid: list(changes[pid]) for pid in sorted(changes) if changes[pid]})
+
+
+def project_change_version(session, project_id):
+    """Last change number of a project (0 before its first tracked write) - a cheap list version"""
+    return session.query(SyncSequence.last_seq).filter_by(project_id=project_id).scalar() or 0
+
+
+# ========================================
+# MAINTENANCE
+# ========================================
+
+def compact_changes(session):
+    """Delete change rows superseded by a newer change of the same record; returns rows removed"""
+    newer = aliased(SyncChange)
+    result = session.execute(
+        delete(SyncChange).where(
+            exists(select(newer.id).where(
+                newer.project_id == SyncChange.project_id,
+                newer.entity == SyncChange.entity,
+                newer.entity_id == SyncChange.entity_id,
+                newer.seq > SyncChange.seq
+            ))
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def purge_idempotency_keys(session, now=None):
+    """Delete stored mutation results older than IDEMPOTENCY_KEY_RETENTION_DAYS; returns rows removed"""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=config_obj.IDEMPOTENCY_KEY_RETENTION_DAYS)
+    result = session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def run_sync_compaction():
+    """
+    Background job: Collapse the change feed to the latest change per record
+    and drop expired idempotency keys
+    Run once daily (off-peak)
+    """
+    try:
+        logger.info("Starting sync change compaction...")
+
+        with session_scope() as session:
+            removed = compact_changes(session)
+            keys = purge_idempotency_keys(session)
+
+        logger.info(f"Sync change compaction complete. Removed: {removed}, expired keys: {keys}")
+        return {"changes": removed, "idempotency_keys": keys}
+
+    except Exception as e:
+        logger.error(f"Error in sync change compaction: {e}")
+        return {"changes": 0, "idempotency_keys": 0}
@@ -0,0 +1,237 @@
+"""
+Batched Mutations
+Idempotent replay of offline sync_queue operations (POST /api/sync/mutations)
+
+Each operation is {"key": <client idempotency key>, "type": <op type>, "data": {...}}.
+The request is authorized once (membership + app subscription), every operation
+runs in its own SAVEPOINT inside one transaction, and each outcome is stored in
+idempotency_keys with the same commit - a replayed key returns the stored result
+instead of applying the operation again.
+
+Operation types:
+- batch.create         BatchRegister (camelCase fields, batchSheetPhoto as base64)
+- cube_test.results    cube loads/strengths for an existing set (same body as PUT /api/cube-tests/:id)
+- training.attendance  manual training attendance (trainer only, Safety + Concrete apps)
+- vehicle.entry        material vehicle gate entry
+- vehicle.exit         material vehicle gate exit (entryId, or entryKey of a queued vehicle.entry)
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from .models import (
+    BatchRegister, CubeTestRegister, MixDesign, RMCVendor, MaterialVehicleRegister, PourActivity, ProjectSettings,
+    TrainingRecord
+)
+from .serialization import loads
+from .sync_models import IdempotencyKey
+from .cube_tests import apply_cube_results
+from .material_vehicle_register import VEHICLE_ROLES, build_vehicle_entry, apply_vehicle_exit
+from .training_qr_attendance import add_manual_attendance
+
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+
+
+class MutationError(Exception):
+    """Operation rejected; rolled back to its savepoint and reported with `status`"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MutationContext:
+    """Per-request state resolved once and shared by every operation"""
+
+    def __init__(self, session, user_id, project, membership_role, apps):
+        self.session = session
+        self.user_id = user_id
+        self.project = project
+        self.project_id = project.id
+        self.membership_role = membership_role
+        self.apps = apps
+        self.failed_cube_tests = []  # Notified after commit
+
+
+def _require(data, *fields):
+    for field in fields:
+        if data.get(field) in (None, ''):
+            raise MutationError(400, f"{field} is required")
+
+
+def _require_strings(data, *fields):
+    """Fields that, when given, must be strings (null allowed) - a number or object would fail deep in a handler"""
+    for field in fields:
+        if not isinstance(data.get(field, ''), (str, type(None))):
+            raise MutationError(400, f"{field} must be a string")
+
+
+def _created_id(ctx, key, result_field):
+    """Id of a record created by an earlier operation of this user (offline-created records have no id yet)"""
+    if not key:
+        return None
+    stored = ctx.session.query(IdempotencyKey).filter_by(user_id=ctx.user_id, key=str(key)).first()
+    if not stored or stored.status_code >= 400:
+        raise MutationError(404, f"No applied operation with key '{key}'")
+    return loads(stored.response)[result_field]['id']
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise MutationError(400, f"Invalid {field} format. Use ISO 8601 format")
+
+
+# ========================================
+# HANDLERS
+# ========================================
+
+def create_batch(ctx, data):
+    _require(data, 'batchNumber', 'deliveryDate', 'quantityOrdered', 'rmcVendorId', 'mixDesignId', 'batchSheetPhoto')
+    _require_strings(data, 'batchNumber', 'deliveryDate', 'deliveryTime', 'batchSheetPhoto', 'batchSheetPhotoName',
+                     'batchSheetPhotoMimetype', 'vehicleNumber', 'driverName', 'remarks')
+    if not isinstance(data.get('location') or {}, dict):
+        raise MutationError(400, "location must be an object")
+    session = ctx.session
+
+    vendor = session.query(RMCVendor).filter_by(id=data['rmcVendorId'], is_deleted=False).first()
+    if not vendor or vendor.company_id != ctx.project.company_id:
+        raise MutationError(404, "Vendor not found")
+    if not vendor.is_approved:
+        raise MutationError(400, "Vendor is not approved. Cannot create batch.")
+
+    mix = session.query(MixDesign).filter_by(id=data['mixDesignId'], is_deleted=False).first()
+    if not mix or mix.project_id not in (None, ctx.project_id):
+        raise MutationError(404, "Mix design not found")
+
+    pour = None
+    if data.get('pourActivityId') is not None:
+        if isinstance(data['pourActivityId'], bool) or not isinstance(data['pourActivityId'], int):
+            raise MutationError(400, "pourActivityId must be an integer")
+        pour = session.query(PourActivity).filter_by(id=data['pourActivityId'], project_id=ctx.project_id).first()
+        if not pour:
+            raise MutationError(404, "Pour activity not found")
+
+    if session.query(BatchRegister.id).filter_by(batch_number=data['batchNumber']).first():
+        raise MutationError(409, f"Batch number '{data['batchNumber']}' already exists")
+
+    try:
+        photo_data = base64.b64decode(data['batchSheetPhoto'], validate=True)
+    except (binascii.Error, ValueError):
+        raise MutationError(400, "batchSheetPhoto must be base64 encoded")
+    if len(photo_data) > MAX_PHOTO_BYTES:
+        raise MutationError(400, "Photo size exceeds 10MB limit")
+
+    location = data.get('location') or {}
+    batch = BatchRegister(
+        project_id=ctx.project_id,
+        mix_design_id=mix.id,
+        rmc_vendor_id=vendor.id,
+        pour_activity_id=pour.id if pour else None,
+        batch_number=data['batchNumber'],
+        delivery_date=_parse_datetime(data['deliveryDate'], 'deliveryDate'),
+        delivery_time=data.get('deliveryTime'),
+        quantity_ordered=float(data['quantityOrdered']),
+        quantity_received=float(data['quantityReceived']) if data.get('quantityReceived') is not None else None,
+        batch_sheet_photo_name=data.get('batchSheetPhotoName') or f"{data['batchNumber']}.jpg",
+        batch_sheet_photo_data=photo_data,
+        batch_sheet_photo_mimetype=data.get('batchSheetPhotoMimetype') or 'image/jpeg',
+        vehicle_number=data.get('vehicleNumber'),
+        driver_name=data.get('driverName'),
+        temperature_celsius=data.get('temperatureCelsius'),
+        slump_tested=data.get('slumpTested'),
+        building_name=location.get('buildingName'),
+        floor_level=location.get('floorLevel'),
+        zone=location.get('zone'),
+        grid_reference=location.get('gridReference'),
+        structural_element_type=location.get('structuralElementType'),
+        element_id=location.get('elementId'),
+        pour_location_description=location.get('description'),
+        latitude=location.get('latitude'),
+        longitude=location.get('longitude'),
+        entered_by=ctx.user_id,
+        verification_status='pending',
+        remarks=data.get('remarks'),
+    )
+    session.add(batch)
+    session.flush()
+    return 201, {"batch": batch.to_dict()}
+
+
+def record_cube_results(ctx, data):
+    _require(data, 'testId')
+    test = ctx.session.query(CubeTestRegister).filter_by(
+        id=data['testId'], project_id=ctx.project_id, is_deleted=False
+    ).first()
+    if not test:
+        raise MutationError(404, "Cube test not found")
+
+    if apply_cube_results(test, data):
+        ctx.failed_cube_tests.append(test.id)
+    ctx.session.flush()
+    return 200, {"cube_test": test.to_dict()}
+
+
+def add_training_attendance(ctx, data):
+    _require(data, 'trainingId')
+    if not {'safety', 'concrete'} <= set(ctx.apps):
+        raise MutationError(403, "This feature requires both Safety and Concrete apps")
+
+    training = ctx.session.query(TrainingRecord).filter_by(id=data['trainingId'], project_id=ctx.project_id).first()
+    if not training:
+        raise MutationError(404, "Training record not found")
+    if training.trainer_id != ctx.user_id:
+        raise MutationError(403, "Only trainer can add attendance")
+
+    attendance = add_manual_attendance(ctx.session, training, data)
+    ctx.session.flush()
+    return 201, {"attendance": attendance.to_dict()}
+
+
+def _require_vehicle_role(ctx):
+    if ctx.membership_role not in VEHICLE_ROLES:
+        raise MutationError(403, "Insufficient permissions")
+
+
+def add_vehicle_entry(ctx, data):
+    _require_vehicle_role(ctx)
+    _require_strings(data, 'vehicleNumber', 'vehicleType', 'materialType', 'supplierName', 'challanNumber',
+                     'driverName', 'driverPhone', 'driverLicense', 'entryTime', 'purpose', 'remarks')
+    settings = ctx.session.query(ProjectSettings).filter_by(project_id=ctx.project_id).first()
+    allowed_time_hours = settings.vehicle_allowed_time_hours if settings else 3.0
+
+    entry = build_vehicle_entry(data, ctx.project_id, ctx.user_id, allowed_time_hours)
+    ctx.session.add(entry)
+    ctx.session.flush()
+    return 201, {"vehicleEntry": entry.to_dict()}
+
+
+def mark_vehicle_exit(ctx, data):
+    _require_vehicle_role(ctx)
+    _require_strings(data, 'exitTime')
+    entry_id = data.get('entryId') or _created_id(ctx, data.get('entryKey'), 'vehicleEntry')
+    if not entry_id:
+        raise MutationError(400, "entryId or entryKey is required")
+    entry = ctx.session.query(MaterialVehicleRegister).filter_by(
+        id=entry_id, project_id=ctx.project_id
+    ).first()
+    if not entry:
+        raise MutationError(404, "Vehicle entry not found")
+    if entry.status == 'exited':
+        raise MutationError(409, "Vehicle already marked as exited")
+
+    apply_vehicle_exit(entry, data.get('exitTime'), ctx.user_id)
+    ctx.session.flush()
+    return 200, {"vehicleEntry": entry.to_dict()}
+
+
+MUTATION_HANDLERS = {
+    'batch.create': create_batch,
+    'cube_test.results': record_cube_results,
+    'training.attendance': add_training_attendance,
+    'vehicle.entry': add_vehicle_entry,
+    'vehicle.exit': mark_vehicle_exit,
+}
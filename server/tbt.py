@@ -24,7 +24,7 @@ import io
 import base64
 from functools import wraps
 
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt_identity, jwt_required
 
 try:
     from .db import session_scope
@@ -46,6 +46,7 @@ def get_current_user_id():
     return int(identity)
 
 import logging
+from .metrics import IMAGE_PROCESSING_SECONDS
 logger = logging.getLogger(__name__)
 
 tbt_bp = Blueprint('tbt', __name__)
@@ -58,13 +59,14 @@ def generate_tbt_qr_token():
 
 def generate_qr_code(data):
     """Generate QR code image as base64 string"""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
+    with IMAGE_PROCESSING_SECONDS.labels('qr_code').time():
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(data)
+        qr.make(fit=True)
+        
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
     buffer.seek(0)
     
     return base64.b64encode(buffer.getvalue()).decode()
@@ -293,6 +295,7 @@ def complete_tbt_session(session_id):
 # ============================================================================
 
 @tbt_bp.route('/api/tbt/sessions/<int:session_id>/scan-worker', methods=['POST'])
+@jwt_required()
 def scan_worker_qr(session_id):
     """
     Conductor scans worker's QR code (helmet sticker) to mark attendance
@@ -350,8 +353,8 @@ def scan_worker_qr(session_id):
                 worker_id=worker.id,
                 worker_name=worker.full_name,
                 worker_code=worker.worker_code,
-                worker_company=worker.company_name,
-                worker_trade=worker.trade,
+                worker_company=worker.contractor,
+                worker_trade=worker.skill_category,
                 check_in_method='qr',
                 check_in_time=datetime.utcnow(),
                 qr_code_scanned=f"WORKER-{worker_code}",
@@ -370,8 +373,8 @@ def scan_worker_qr(session_id):
                 "worker": {
                     "name": worker.full_name,
                     "code": worker.worker_code,
-                    "company": worker.company_name,
-                    "trade": worker.trade,
+                    "company": worker.contractor,
+                    "trade": worker.skill_category,
                     "checkInTime": attendance.check_in_time.strftime('%H:%M:%S')
                 }
             }), 201
@@ -382,6 +385,7 @@ def scan_worker_qr(session_id):
 
 
 @tbt_bp.route('/api/tbt/sessions/<int:session_id>/attendance-manual', methods=['POST'])
+@jwt_required()
 def add_manual_attendance(session_id):
     """
     Conductor manually adds worker attendance (fallback if QR not working)
@@ -428,8 +432,8 @@ def add_manual_attendance(session_id):
                 worker_id=worker.id if worker else None,
                 worker_name=worker_name,
                 worker_code=worker_code,
-                worker_company=data.get("worker_company") or (worker.company_name if worker else None),
-                worker_trade=data.get("worker_trade") or (worker.trade if worker else None),
+                worker_company=data.get("worker_company") or (worker.contractor if worker else None),
+                worker_trade=data.get("worker_trade") or (worker.skill_category if worker else None),
                 check_in_method="manual",
                 check_in_time=datetime.utcnow(),
                 qr_code_scanned=None,
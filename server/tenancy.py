@@ -0,0 +1,331 @@
+"""
+Tenant Isolation and Tenant-Keyed Caching
+
+Query guard
+-----------
+tenant_session() is session_scope() bound to one company. Every ORM SELECT,
+UPDATE and DELETE it runs gets criteria added by a do_orm_execute hook
+(with_loader_criteria, so joined entities are covered too; relationship loads
+start from rows already in scope):
+
+- models with company_id      -> company_id = :company
+- companies                   -> id = :company
+- models with only project_id -> project_id IN (projects of :company)
+- models with is_deleted      -> is_deleted = false
+
+Handlers no longer add company filters or look up the User first; the company
+comes from the "cid" access-token claim. Opt out per statement with
+execution_options(include_deleted=True) or execution_options(tenant_bypass=True).
+Core statements on Table objects (session.execute(table.update())) are not ORM
+statements and are not filtered.
+
+Read cache
+----------
+tenant_cache holds slow-changing, JSON-ready reference lists per company
+(projects, vendors, ...). Keys carry the company's generation from
+tenant_cache_generations, which a write to a registered source model bumps in
+its own transaction. Every read looks the generation up (one primary-key
+SELECT), so any worker sees a committed write at once and never serves, or
+ETags, a stale list; old entries age out of the LRU. Backend: in-process LRU
+by default, Redis when TENANT_CACHE_URL is set (entries shared across workers).
+"""
+
+import pickle
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from sqlalchemy import Boolean, Column, Integer, event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from .db import Base, engine, session_scope
+from .config import get_config
+from .models import Company, Project, RMCVendor, User
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - Redis is only needed for a shared cache
+    redis = None
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+TENANT = 'tenant_company_id'
+MISSING = object()
+
+
+# ========================================
+# QUERY GUARD
+# ========================================
+
+_scopes = {}
+_scopes_lock = threading.Lock()
+
+
+def _tenant_scope(mapper):
+    """(kind, soft delete column) of a mapped class; kind: 'company', 'self', 'project' or None"""
+    cls = mapper.class_
+    scope = _scopes.get(cls)
+    if scope is None:
+        columns = mapper.columns
+        if cls is Company:
+            kind = 'self'
+        elif 'company_id' in columns:
+            kind = 'company'
+        elif 'project_id' in columns:
+            kind = 'project'
+        else:
+            kind = None
+        scope = (kind, columns['is_deleted'] if 'is_deleted' in columns else None)
+        with _scopes_lock:
+            _scopes[cls] = scope
+    return scope
+
+
+def _not_deleted(column):
+    return column == (False if isinstance(column.type, Boolean) else 0)
+
+
+def tenant_criteria(cls, company_id, include_deleted=False):
+    """Tenant (and soft delete) predicate of a mapped class, None when it is not tenant-scoped"""
+    kind, deleted_column = _tenant_scope(cls.__mapper__)
+    clauses = []
+    if kind == 'self':
+        clauses.append(cls.id == company_id)
+    elif kind == 'company':
+        clauses.append(cls.company_id == company_id)
+    elif kind == 'project':
+        clauses.append(cls.project_id.in_(select(Project.id).where(Project.company_id == company_id)))
+    if deleted_column is not None and not include_deleted:
+        clauses.append(_not_deleted(getattr(cls, deleted_column.key)))
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else clauses[0] & clauses[1]
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_tenant_criteria(orm_execute_state):
+    session = orm_execute_state.session
+    if TENANT not in session.info:
+        return
+    if not (orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return  # Criteria of the originating statement propagate to these
+    options = orm_execute_state.execution_options
+    if options.get('tenant_bypass'):
+        return
+
+    company_id = session.info[TENANT]
+    include_deleted = options.get('include_deleted', False)
+    criteria = []
+    for mapper in orm_execute_state.all_mappers:
+        if not issubclass(mapper.class_, Base):
+            continue
+        clause = tenant_criteria(mapper.class_, company_id, include_deleted)
+        if clause is not None:
+            criteria.append(with_loader_criteria(mapper.class_, clause, include_aliases=True))
+    if criteria:
+        orm_execute_state.statement = orm_execute_state.statement.options(*criteria)
+
+
+def current_company_id():
+    """Company of the authenticated user: "cid" token claim, one lookup for older tokens"""
+    from flask_jwt_extended import get_jwt, get_jwt_identity
+
+    claims = get_jwt()
+    if 'cid' in claims:
+        return claims['cid']
+    with session_scope() as session:
+        return session.scalar(select(User.company_id).where(User.id == int(get_jwt_identity())))
+
+
+def current_user_role():
+    """Role of the authenticated user: "role" token claim, one lookup for older tokens"""
+    from flask_jwt_extended import get_jwt, get_jwt_identity
+
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims['role']
+    with session_scope() as session:
+        return session.scalar(select(User.role).where(User.id == int(get_jwt_identity())))
+
+
+@contextmanager
+def tenant_session(company_id=MISSING):
+    """session_scope() whose ORM statements only see `company_id` (default: the caller's company)"""
+    if company_id is MISSING:
+        company_id = current_company_id()
+    with session_scope() as session:
+        session.info[TENANT] = company_id
+        try:
+            yield session
+        finally:
+            session.info.pop(TENANT, None)  # SessionLocal is thread-scoped and outlives this block
+
+
+# ========================================
+# CACHE BACKENDS
+# ========================================
+
+class LocalCacheBackend:
+    """In-process LRU with per-entry expiry (one per worker process)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Redis-backed cache shared by all worker processes"""
+
+    def __init__(self, url, prefix='prosite:tenant-cache:'):
+        if redis is None:
+            raise RuntimeError("TENANT_CACHE_URL is set but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        data = self._client.get(self._prefix + key)
+        return MISSING if data is None else pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self._prefix + '*'):
+            self._client.delete(key)
+
+
+# ========================================
+# TENANT CACHE
+# ========================================
+
+class TenantCacheGeneration(Base):
+    """Cache generation of one company, bumped with every committed write to a cache source"""
+    __tablename__ = "tenant_cache_generations"
+
+    company_id = Column(Integer, primary_key=True, autoincrement=False)
+    generation = Column(Integer, nullable=False, default=0)
+
+
+# INSERT ... ON CONFLICT DO UPDATE for the generation bump
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def bump_generations(connection, company_ids):
+    """Increment the generations of `company_ids` in the transaction of `connection`, in id order"""
+    table = TenantCacheGeneration.__table__
+    dialect_insert = _DIALECT_INSERTS[connection.dialect.name]
+    for company_id in sorted(company_ids):
+        statement = dialect_insert(table).values(company_id=company_id, generation=1)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['company_id'], set_={'generation': table.c.generation + 1}
+        ))
+
+
+class TenantCache:
+    """Per-company read-through cache keyed on the company's database generation"""
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _generation(self, company_id):
+        # Own connection: callers may be inside a session_scope of the thread-scoped session
+        table = TenantCacheGeneration.__table__
+        with engine.connect() as connection:
+            return connection.scalar(select(table.c.generation).where(table.c.company_id == company_id)) or 0
+
+    def get_or_load(self, company_id, key, loader):
+        """Cached value of `key` for a company; `loader()` computes it on a miss"""
+        full_key = f"{company_id}:{self._generation(company_id)}:{key}"
+        value = self.backend.get(full_key)
+        if value is MISSING:
+            value = loader()
+            self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def invalidate(self, *company_ids):
+        """Bump generations in a transaction of their own (writes made outside the ORM session)"""
+        with engine.begin() as connection:
+            bump_generations(connection, company_ids)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def _build_cache():
+    url = config_obj.TENANT_CACHE_URL
+    backend = RedisCacheBackend(url) if url else LocalCacheBackend(config_obj.TENANT_CACHE_MAX_ENTRIES)
+    return TenantCache(backend, config_obj.TENANT_CACHE_TTL_SECONDS)
+
+
+tenant_cache = _build_cache()
+
+# Models whose writes invalidate their company's cached entries: model -> company id attribute
+CACHE_SOURCES = {
+    Company: 'id',
+    Project: 'company_id',
+    RMCVendor: 'company_id',
+}
+
+
+def register_cache_source(model, company_attribute='company_id'):
+    """Invalidate a company's cache entries whenever `model` rows of that company are committed"""
+    CACHE_SOURCES[model] = company_attribute
+
+
+_TOUCHED = 'tenant_cache_touched'
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_companies(session, flush_context):
+    touched = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        attribute = CACHE_SOURCES.get(type(obj))
+        if attribute is not None and getattr(obj, attribute, None) is not None:
+            touched.add(getattr(obj, attribute))
+    if touched:
+        session.info.setdefault(_TOUCHED, set()).update(touched)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_touched_companies(session):
+    session.flush()  # Writes are collected by the flush hook; commit's own flush runs after this event
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        bump_generations(session.connection(), touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched_companies(session):
+    session.info.pop(_TOUCHED, None)
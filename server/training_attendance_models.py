@@ -10,7 +10,7 @@ Extends TrainingRecord with worker QR attendance tracking:
 - Similar to TBT attendance but for quality/technical training
 """
 
-from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Float, JSON, Index, UniqueConstraint, select, delete
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional
@@ -32,6 +32,13 @@ class TrainingAttendance(Base):
     Only available when company has BOTH apps subscribed!
     """
     __tablename__ = "training_attendances"
+    __table_args__ = (
+        # Covering index for competency refreshes: certified rows of one worker per training
+        Index(
+            "ix_training_attendances_cert_worker",
+            "certificate_issued", "worker_code", "training_record_id", "updated_at"
+        ),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
@@ -91,3 +98,129 @@ class TrainingAttendance(Base):
             "createdAt": self.created_at.isoformat(),
             "updatedAt": self.updated_at.isoformat()
         }
+
+
+class WorkerCompetency(Base):
+    """
+    Worker competency index (denormalized certification summary)
+    
+    One row per (project, worker_code) holding every certificate the worker earned
+    on that project, so the certification report is a paginated read of this table
+    instead of a join + group over all training attendances.
+    
+    Refreshed incrementally by refresh_worker_competency() whenever an assessment
+    issues a certificate; rebuild_worker_competencies() backfills from scratch.
+    """
+    __tablename__ = "worker_competencies"
+    __table_args__ = (
+        UniqueConstraint("project_id", "worker_code", name="uq_worker_competencies_project_worker"),
+        Index("ix_worker_competencies_worker_project", "worker_code", "project_id"),
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[int] = mapped_column(Integer, ForeignKey("projects.id"), nullable=False)
+    worker_code: Mapped[str] = mapped_column(String(50), nullable=False)
+    worker_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    worker_company: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    worker_trade: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    
+    certification_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_certified_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    certifications: Mapped[list] = mapped_column(JSON, nullable=False, default=list)  # Newest first
+    
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def _competency_rows(session, project_ids, worker_code=None):
+    """
+    Certified attendances joined to their training, one flat row each (no ORM objects),
+    ordered so rows for the same (project, worker) are contiguous and newest first.
+    """
+    from .models import TrainingRecord
+    
+    stmt = select(
+        TrainingRecord.project_id,
+        TrainingAttendance.worker_code,
+        TrainingAttendance.worker_name,
+        TrainingAttendance.worker_company,
+        TrainingAttendance.worker_trade,
+        TrainingAttendance.certificate_number,
+        TrainingAttendance.assessment_score,
+        TrainingAttendance.updated_at,
+        TrainingRecord.training_topic,
+        TrainingRecord.training_date,
+    ).join(TrainingRecord, TrainingAttendance.training_record_id == TrainingRecord.id).where(
+        TrainingAttendance.certificate_issued == True,
+        TrainingRecord.project_id.in_(project_ids)
+    )
+    if worker_code is not None:
+        stmt = stmt.where(TrainingAttendance.worker_code == worker_code)
+    
+    return session.execute(stmt.order_by(
+        TrainingRecord.project_id, TrainingAttendance.worker_code, TrainingAttendance.updated_at.desc()
+    ))
+
+
+def _build_competencies(rows):
+    """Fold contiguous (project, worker) rows into worker_competencies values"""
+    competencies = []
+    current = None
+    for row in rows:
+        if current is None or (current["project_id"], current["worker_code"]) != (row.project_id, row.worker_code):
+            current = {
+                "project_id": row.project_id,
+                "worker_code": row.worker_code,
+                "worker_name": row.worker_name,
+                "worker_company": row.worker_company,
+                "worker_trade": row.worker_trade,
+                "certification_count": 0,
+                "last_certified_at": row.updated_at,
+                "certifications": [],
+                "refreshed_at": datetime.utcnow(),
+            }
+            competencies.append(current)
+        
+        current["certification_count"] += 1
+        current["certifications"].append({
+            "certificateNumber": row.certificate_number,
+            "trainingTopic": row.training_topic,
+            "trainingDate": row.training_date.isoformat() if row.training_date else None,
+            "score": row.assessment_score,
+            "issuedAt": row.updated_at.isoformat() if row.updated_at else None
+        })
+    return competencies
+
+
+def refresh_worker_competency(session, project_id: int, worker_code: str) -> Optional[WorkerCompetency]:
+    """Recompute one worker's competency row for a project (called when a certificate is issued)"""
+    session.flush()
+    built = _build_competencies(_competency_rows(session, [project_id], worker_code))
+    
+    competency = session.query(WorkerCompetency).filter_by(
+        project_id=project_id, worker_code=worker_code
+    ).first()
+    
+    if not built:
+        if competency:
+            session.delete(competency)
+        return None
+    
+    if competency is None:
+        competency = WorkerCompetency(project_id=project_id, worker_code=worker_code)
+        session.add(competency)
+    for key, value in built[0].items():
+        setattr(competency, key, value)
+    return competency
+
+
+def rebuild_worker_competencies(session, project_ids) -> int:
+    """Rebuild the competency index for the given projects in one pass; returns rows written"""
+    project_ids = list(project_ids)
+    if not project_ids:
+        return 0
+    
+    session.execute(delete(WorkerCompetency).where(WorkerCompetency.project_id.in_(project_ids)))
+    competencies = _build_competencies(_competency_rows(session, project_ids))
+    if competencies:
+        session.execute(WorkerCompetency.__table__.insert(), competencies)
+    return len(competencies)
@@ -16,17 +16,19 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 import json
 
+from sqlalchemy import func
+
 from flask_jwt_extended import get_jwt_identity
 
 try:
     from .db import session_scope
-    from .training_attendance_models import TrainingAttendance
+    from .training_attendance_models import TrainingAttendance, WorkerCompetency, refresh_worker_competency
     from .models import TrainingRecord, User, Project, ProjectMembership
     from .safety_models import Worker
     from .subscription_middleware import require_both_apps
 except ImportError:
     from db import session_scope
-    from training_attendance_models import TrainingAttendance
+    from training_attendance_models import TrainingAttendance, WorkerCompetency, refresh_worker_competency
     from models import TrainingRecord, User, Project, ProjectMembership
     from safety_models import Worker
     from subscription_middleware import require_both_apps
@@ -110,8 +112,8 @@ def scan_worker_for_training(training_id):
                 worker_id=worker.id,
                 worker_name=worker.full_name,
                 worker_code=worker.worker_code,
-                worker_company=worker.company_name,
-                worker_trade=worker.trade,
+                worker_company=worker.contractor,
+                worker_trade=worker.skill_category,
                 check_in_method='qr',
                 check_in_time=datetime.utcnow(),
                 qr_code_scanned=f"WORKER-{worker_code}",
@@ -132,8 +134,8 @@ def scan_worker_for_training(training_id):
                 "worker": {
                     "name": worker.full_name,
                     "code": worker.worker_code,
-                    "company": worker.company_name,
-                    "trade": worker.trade,
+                    "company": worker.contractor,
+                    "trade": worker.skill_category,
                     "checkInTime": attendance.check_in_time.strftime('%H:%M:%S')
                 }
             }), 201
@@ -143,6 +145,48 @@ def scan_worker_for_training(training_id):
         return jsonify({"error": str(e)}), 500
 
 
+def add_manual_attendance(session, training, data):
+    """
+    Add a manual (non-QR) attendance row to a training session (shared with batched sync).
+    Raises ValueError when neither a known worker code nor a worker name is given.
+    """
+    worker_code = data.get("worker_code")
+    worker_name = data.get("worker_name")
+    worker = None
+    
+    if worker_code:
+        # Look up worker
+        worker = session.query(Worker).filter_by(
+            worker_code=worker_code,
+            project_id=training.project_id
+        ).first()
+        
+        if worker:
+            worker_name = worker.full_name
+    
+    if not worker_name:
+        raise ValueError("Worker name or code required")
+    
+    # Create manual attendance
+    attendance = TrainingAttendance(
+        training_record_id=training.id,
+        worker_id=worker.id if worker else None,
+        worker_name=worker_name,
+        worker_code=worker_code or "MANUAL",
+        worker_company=data.get("worker_company") or (worker.contractor if worker else None),
+        worker_trade=data.get("worker_trade") or (worker.skill_category if worker else None),
+        check_in_method="manual",
+        check_in_time=datetime.utcnow(),
+        qr_code_scanned=None,
+        device_info="Manual entry",
+        has_signed=True,
+        signature_timestamp=datetime.utcnow()
+    )
+    
+    session.add(attendance)
+    return attendance
+
+
 @training_qr_bp.route('/api/training/<int:training_id>/attendance-manual', methods=['POST'])
 @require_both_apps()
 def add_manual_training_attendance(training_id):
@@ -170,40 +214,11 @@ def add_manual_training_attendance(training_id):
             if training.trainer_id != user_id:
                 return jsonify({"error": "Only trainer can add attendance"}), 403
             
-            worker_code = data.get("worker_code")
-            worker_name = data.get("worker_name")
-            worker = None
-            
-            if worker_code:
-                # Look up worker
-                worker = session.query(Worker).filter_by(
-                    worker_code=worker_code,
-                    project_id=training.project_id
-                ).first()
-                
-                if worker:
-                    worker_name = worker.full_name
-            
-            if not worker_name:
-                return jsonify({"error": "Worker name or code required"}), 400
-            
-            # Create manual attendance
-            attendance = TrainingAttendance(
-                training_record_id=training_id,
-                worker_id=worker.id if worker else None,
-                worker_name=worker_name,
-                worker_code=worker_code or "MANUAL",
-                worker_company=data.get("worker_company") or (worker.company_name if worker else None),
-                worker_trade=data.get("worker_trade") or (worker.trade if worker else None),
-                check_in_method="manual",
-                check_in_time=datetime.utcnow(),
-                qr_code_scanned=None,
-                device_info="Manual entry",
-                has_signed=True,
-                signature_timestamp=datetime.utcnow()
-            )
-            
-            session.add(attendance)
+            try:
+                attendance = add_manual_attendance(session, training, data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            worker_name = attendance.worker_name
             
             logger.info(f"Manual attendance added: {worker_name} for training {training_id}")
             
@@ -302,6 +317,7 @@ def record_worker_assessment(training_id):
             if data.get("issue_certificate") and data.get("passed"):
                 attendance.certificate_issued = True
                 attendance.certificate_number = f"CERT-{training_id}-{attendance.id}-{datetime.utcnow().strftime('%Y%m%d')}"
+                refresh_worker_competency(session, training.project_id, attendance.worker_code)
             
             logger.info(f"Assessment recorded for {attendance.worker_name}: {data.get('score')}")
             
@@ -319,61 +335,77 @@ def record_worker_assessment(training_id):
 @require_both_apps()
 def worker_certifications_report():
     """
-    Get worker certification report
+    Get worker certification report (paginated by worker)
+    
+    Reads the worker_competencies index, so the cost is one page of workers
+    regardless of how many attendances the user's projects hold.
     
     Query params:
     - project_id (optional)
     - worker_code (optional)
+    - page (default 1), per_page (default 50, max 200)
     """
     try:
         user_id = get_current_user_id()
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
         
         with session_scope() as session:
             # Get user's projects
-            memberships = session.query(ProjectMembership).filter_by(user_id=user_id).all()
-            project_ids = [m.project_id for m in memberships]
-            
-            # Base query
-            query = session.query(TrainingAttendance).join(TrainingRecord).filter(
-                TrainingRecord.project_id.in_(project_ids),
-                TrainingAttendance.certificate_issued == True
-            )
+            project_ids = [
+                m.project_id for m in session.query(ProjectMembership.project_id).filter_by(user_id=user_id)
+            ]
             
-            # Apply filters
             if request.args.get('project_id'):
-                query = query.filter(TrainingRecord.project_id == int(request.args['project_id']))
+                requested = int(request.args['project_id'])
+                project_ids = [pid for pid in project_ids if pid == requested]
             
+            filters = [WorkerCompetency.project_id.in_(project_ids)]
             if request.args.get('worker_code'):
-                query = query.filter(TrainingAttendance.worker_code == request.args['worker_code'])
-            
-            certifications = query.order_by(TrainingAttendance.created_at.desc()).all()
-            
-            # Group by worker
+                filters.append(WorkerCompetency.worker_code == request.args['worker_code'])
+            
+            total_workers, total_certifications = session.query(
+                func.count(func.distinct(WorkerCompetency.worker_code)),
+                func.coalesce(func.sum(WorkerCompetency.certification_count), 0)
+            ).filter(*filters).one()
+            
+            page_codes = [
+                code for (code,) in session.query(WorkerCompetency.worker_code)
+                .filter(*filters)
+                .group_by(WorkerCompetency.worker_code)
+                .order_by(WorkerCompetency.worker_code)
+                .limit(per_page)
+                .offset((page - 1) * per_page)
+            ]
+            
+            # A worker certified on several projects has one competency row per project
             worker_certs = {}
-            for cert in certifications:
-                code = cert.worker_code
-                if code not in worker_certs:
-                    worker_certs[code] = {
-                        "workerCode": code,
-                        "workerName": cert.worker_name,
-                        "company": cert.worker_company,
-                        "trade": cert.worker_trade,
+            rows = session.query(WorkerCompetency).filter(
+                *filters, WorkerCompetency.worker_code.in_(page_codes)
+            ).order_by(WorkerCompetency.worker_code, WorkerCompetency.last_certified_at.desc()).all() if page_codes else []
+            
+            for row in rows:
+                if row.worker_code not in worker_certs:
+                    worker_certs[row.worker_code] = {
+                        "workerCode": row.worker_code,
+                        "workerName": row.worker_name,
+                        "company": row.worker_company,
+                        "trade": row.worker_trade,
                         "certifications": []
                     }
-                
-                worker_certs[code]["certifications"].append({
-                    "certificateNumber": cert.certificate_number,
-                    "trainingTopic": cert.training_record.training_topic,
-                    "trainingDate": cert.training_record.training_date.isoformat(),
-                    "score": cert.assessment_score,
-                    "issuedAt": cert.updated_at.isoformat()
-                })
+                worker_certs[row.worker_code]["certifications"].extend(row.certifications or [])
+            
+            for worker in worker_certs.values():
+                worker["certifications"].sort(key=lambda c: c.get("issuedAt") or "", reverse=True)
             
             return jsonify({
                 "success": True,
                 "workers": list(worker_certs.values()),
-                "totalWorkers": len(worker_certs),
-                "totalCertifications": len(certifications)
+                "totalWorkers": total_workers,
+                "totalCertifications": int(total_certifications),
+                "page": page,
+                "perPage": per_page,
+                "totalPages": (total_workers + per_page - 1) // per_page
             }), 200
             
     except Exception as e:
@@ -0,0 +1,445 @@
+"""
+RMC Vendor Scorecard
+Per vendor / project / month delivery and strength aggregates
+
+vendor_scorecard_stats holds one row per (vendor, project, month of delivery)
+with additive sums, so any date range or project set rolls up by summing rows:
+- deliveries, ordered/received quantity, quantity variance, short deliveries
+- approved / rejected batches (verification_status)
+- slump and arrival temperature: count, sum, sum of squares (mean and sigma),
+  deliveries hotter than VENDOR_MAX_CONCRETE_TEMP_C
+- cube tests: tested sets, failed sets, 28-day strength count/sum/sum of squares
+
+Rows are kept current by Session hooks: every flush that touches a batch or a
+cube test marks the affected buckets (old and new vendor/month when they move),
+and the buckets are recomputed from their source rows just before commit, in
+the same transaction, with the bucket rows locked first so concurrent writers
+to one bucket queue instead of overwriting each other. Bulk Core statements bypass the flush and must call
+mark_vendor_buckets() themselves. rebuild_vendor_scorecards() recomputes the
+whole table in one streamed pass (migration and nightly safety net).
+"""
+
+import math
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import (
+    Column, Integer, Float, Date, DateTime, Index, UniqueConstraint, event, update, delete, select,
+    bindparam, and_, or_, true
+)
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .db import Base, session_scope
+from .config import get_config
+from .models import BatchRegister, CubeTestRegister
+
+logger = logging.getLogger(__name__)
+config_obj = get_config()
+
+STRENGTH_AGE_DAYS = 28
+
+# INSERT ... ON CONFLICT, used to create bucket rows before locking them and to upsert rebuilt rows
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+SUM_FIELDS = (
+    'deliveries', 'quantity_ordered', 'quantity_received', 'quantity_variance', 'short_deliveries',
+    'approved', 'rejected',
+    'slump_count', 'slump_sum', 'slump_sumsq',
+    'temperature_count', 'temperature_sum', 'temperature_sumsq', 'hot_deliveries',
+    'tests', 'failed_tests', 'strength_count', 'strength_sum', 'strength_sumsq',
+)
+
+
+class VendorScorecardStat(Base):
+    """Monthly delivery/test aggregates of one vendor on one project"""
+    __tablename__ = "vendor_scorecard_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    rmc_vendor_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    month = Column(Date, nullable=False)  # First day of the delivery month
+
+    deliveries = Column(Integer, nullable=False, default=0)
+    quantity_ordered = Column(Float, nullable=False, default=0.0)
+    quantity_received = Column(Float, nullable=False, default=0.0)
+    quantity_variance = Column(Float, nullable=False, default=0.0)  # Sum of (received - ordered)
+    short_deliveries = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+
+    slump_count = Column(Integer, nullable=False, default=0)
+    slump_sum = Column(Float, nullable=False, default=0.0)
+    slump_sumsq = Column(Float, nullable=False, default=0.0)
+    temperature_count = Column(Integer, nullable=False, default=0)
+    temperature_sum = Column(Float, nullable=False, default=0.0)
+    temperature_sumsq = Column(Float, nullable=False, default=0.0)
+    hot_deliveries = Column(Integer, nullable=False, default=0)
+
+    tests = Column(Integer, nullable=False, default=0)  # Cube sets with results (any age)
+    failed_tests = Column(Integer, nullable=False, default=0)
+    strength_count = Column(Integer, nullable=False, default=0)  # 28-day sets
+    strength_sum = Column(Float, nullable=False, default=0.0)
+    strength_sumsq = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('rmc_vendor_id', 'project_id', 'month', name='uq_vendor_scorecard_stats_bucket'),
+        Index('ix_vendor_scorecard_stats_project_month', 'project_id', 'month'),
+    )
+
+
+# ========================================
+# AGGREGATION
+# ========================================
+
+def month_of(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _empty():
+    return dict.fromkeys(SUM_FIELDS, 0)
+
+
+def _add_batch(sums, batch):
+    sums['deliveries'] += 1
+    sums['quantity_ordered'] += batch.quantity_ordered or 0.0
+    if batch.quantity_received is not None:
+        sums['quantity_received'] += batch.quantity_received
+        sums['quantity_variance'] += batch.quantity_received - (batch.quantity_ordered or 0.0)
+        sums['short_deliveries'] += batch.quantity_received < (batch.quantity_ordered or 0.0)
+    sums['approved'] += batch.verification_status == 'approved'
+    sums['rejected'] += batch.verification_status == 'rejected'
+    if batch.slump_tested is not None:
+        sums['slump_count'] += 1
+        sums['slump_sum'] += batch.slump_tested
+        sums['slump_sumsq'] += batch.slump_tested ** 2
+    if batch.temperature_celsius is not None:
+        sums['temperature_count'] += 1
+        sums['temperature_sum'] += batch.temperature_celsius
+        sums['temperature_sumsq'] += batch.temperature_celsius ** 2
+        sums['hot_deliveries'] += batch.temperature_celsius > config_obj.VENDOR_MAX_CONCRETE_TEMP_C
+
+
+def _add_test(sums, test):
+    sums['tests'] += 1
+    sums['failed_tests'] += test.pass_fail_status == 'fail'
+    if test.test_age_days == STRENGTH_AGE_DAYS:
+        sums['strength_count'] += 1
+        sums['strength_sum'] += test.average_strength_mpa
+        sums['strength_sumsq'] += test.average_strength_mpa ** 2
+
+
+def _batch_columns():
+    return (
+        BatchRegister.id, BatchRegister.rmc_vendor_id, BatchRegister.project_id, BatchRegister.delivery_date,
+        BatchRegister.quantity_ordered, BatchRegister.quantity_received, BatchRegister.verification_status,
+        BatchRegister.slump_tested, BatchRegister.temperature_celsius
+    )
+
+
+def _test_query(batch_filter):
+    return select(
+        CubeTestRegister.batch_id, CubeTestRegister.test_age_days,
+        CubeTestRegister.average_strength_mpa, CubeTestRegister.pass_fail_status
+    ).join(
+        BatchRegister, BatchRegister.id == CubeTestRegister.batch_id
+    ).where(
+        batch_filter,
+        BatchRegister.is_deleted == False,
+        CubeTestRegister.is_deleted == False,
+        CubeTestRegister.average_strength_mpa.isnot(None)
+    )
+
+
+def _bucket_filter(buckets):
+    return or_(*(
+        and_(
+            BatchRegister.rmc_vendor_id == vendor_id,
+            BatchRegister.project_id == project_id,
+            BatchRegister.delivery_date >= datetime.combine(month, datetime.min.time()),
+            BatchRegister.delivery_date < datetime.combine(_next_month(month), datetime.min.time())
+        )
+        for vendor_id, project_id, month in buckets
+    ))
+
+
+def _aggregate(session, batch_filter, yield_per=None):
+    """{(vendor, project, month): sums} over the batches matching `batch_filter`"""
+    stats = defaultdict(_empty)
+    bucket_of = {}
+
+    batches = select(*_batch_columns()).where(batch_filter, BatchRegister.is_deleted == False)
+    tests = _test_query(batch_filter)
+    if yield_per:
+        batches = batches.execution_options(yield_per=yield_per)
+        tests = tests.execution_options(yield_per=yield_per)
+
+    for batch in session.execute(batches):
+        key = (batch.rmc_vendor_id, batch.project_id, month_of(batch.delivery_date))
+        bucket_of[batch.id] = key
+        _add_batch(stats[key], batch)
+    for test in session.execute(tests):
+        key = bucket_of.get(test.batch_id)
+        if key is not None:
+            _add_test(stats[key], test)
+    return stats
+
+
+def _write(session, stats):
+    """
+    Upsert the given buckets (INSERT ... ON CONFLICT DO UPDATE), in key order so
+    concurrent writers take the row locks in the same order and cannot deadlock
+    """
+    table = VendorScorecardStat.__table__
+    now = datetime.utcnow()
+    rows = [
+        {'rmc_vendor_id': vendor_id, 'project_id': project_id, 'month': month, 'updated_at': now, **stats[key]}
+        for key in sorted(stats) for vendor_id, project_id, month in (key,)
+    ]
+    if not rows:
+        return
+    statement = _DIALECT_INSERTS[session.get_bind().dialect.name](table)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['rmc_vendor_id', 'project_id', 'month'],
+            set_={name: statement.excluded[name] for name in ('updated_at',) + SUM_FIELDS}
+        ),
+        rows
+    )
+
+
+def _bucket_rows(table, buckets):
+    return or_(*(
+        and_(table.c.rmc_vendor_id == v, table.c.project_id == p, table.c.month == m) for v, p, m in buckets
+    ))
+
+
+def _lock_buckets(session, buckets):
+    """
+    Make sure every bucket has a row and lock the rows (SELECT ... FOR UPDATE).
+    A concurrent refresh of the same bucket waits here until the first commits,
+    then aggregates with its writes visible, so neither result is lost and the
+    unique key is never hit. Buckets come in key order so lockers cannot deadlock.
+    Returns: {(vendor, project, month): row id}
+    """
+    table = VendorScorecardStat.__table__
+    now = datetime.utcnow()
+    dialect_insert = _DIALECT_INSERTS[session.get_bind().dialect.name]
+    session.execute(
+        dialect_insert(table).on_conflict_do_nothing(
+            index_elements=['rmc_vendor_id', 'project_id', 'month']
+        ),
+        [{'rmc_vendor_id': v, 'project_id': p, 'month': m, 'updated_at': now, **_empty()} for v, p, m in buckets]
+    )
+    rows = session.execute(
+        select(table.c.id, table.c.rmc_vendor_id, table.c.project_id, table.c.month)
+        .where(_bucket_rows(table, buckets))
+        .order_by(table.c.rmc_vendor_id, table.c.project_id, table.c.month)
+        .with_for_update()
+    )
+    return {(row.rmc_vendor_id, row.project_id, row.month): row.id for row in rows}
+
+
+def refresh_vendor_buckets(session, buckets):
+    """Recompute the given (vendor, project, month) rows from their batches and tests, under row locks"""
+    table = VendorScorecardStat.__table__
+    buckets = sorted(set(buckets))
+    for start in range(0, len(buckets), 50):
+        chunk = buckets[start:start + 50]
+        ids = _lock_buckets(session, chunk)
+        stats = _aggregate(session, _bucket_filter(chunk))
+        now = datetime.utcnow()
+        updates = [{'_id': ids[key], 'updated_at': now, **sums} for key, sums in stats.items()]
+        if updates:
+            session.execute(
+                update(table).where(table.c.id == bindparam('_id'))
+                .values({name: bindparam(name) for name in ('updated_at',) + SUM_FIELDS}),
+                updates
+            )
+        emptied = [row_id for key, row_id in ids.items() if key not in stats]
+        if emptied:
+            session.execute(delete(table).where(table.c.id.in_(emptied)))
+
+
+def rebuild_vendor_scorecards(session):
+    """
+    Recompute the whole table in one streamed pass; returns the number of rows written.
+    Rows are upserted and only buckets without batches are deleted, so a second
+    rebuild running at the same time never hits the unique key.
+    """
+    table = VendorScorecardStat.__table__
+    stats = _aggregate(session, true(), yield_per=5000)
+    _write(session, stats)
+    stale = [
+        row.id for row in session.execute(select(table.c.id, table.c.rmc_vendor_id, table.c.project_id, table.c.month))
+        if (row.rmc_vendor_id, row.project_id, row.month) not in stats
+    ]
+    for start in range(0, len(stale), 500):
+        session.execute(delete(table).where(table.c.id.in_(stale[start:start + 500])))
+    return len(stats)
+
+
+# ========================================
+# INCREMENTAL MAINTENANCE
+# ========================================
+
+_BUCKETS = 'vendor_scorecard_buckets'
+_BATCHES = 'vendor_scorecard_batches'
+
+
+def mark_vendor_buckets(session, batch_ids):
+    """Recompute the buckets of `batch_ids` at commit (for writes made outside the ORM flush)"""
+    session.info.setdefault(_BATCHES, set()).update(batch_ids)
+
+
+def _history_values(obj, key):
+    """Current and pre-flush values of an attribute"""
+    history = sa_inspect(obj).attrs[key].history
+    return set(history.added or history.unchanged or ()) | set(history.deleted or ())
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_changed_buckets(session, flush_context):
+    buckets = session.info.setdefault(_BUCKETS, set())
+    batch_ids = session.info.setdefault(_BATCHES, set())
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, BatchRegister):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            for vendor_id in _history_values(obj, 'rmc_vendor_id'):
+                for project_id in _history_values(obj, 'project_id'):
+                    for delivered in _history_values(obj, 'delivery_date'):
+                        if None not in (vendor_id, project_id, delivered):
+                            buckets.add((vendor_id, project_id, month_of(delivered)))
+        elif isinstance(obj, CubeTestRegister):
+            batch_ids.update(b for b in _history_values(obj, 'batch_id') if b is not None)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_marked_buckets(session):
+    session.flush()  # Marks are collected by the flush hook; commit's own flush runs after this event
+    if not session.info.get(_BUCKETS) and not session.info.get(_BATCHES):
+        return
+    buckets = session.info.pop(_BUCKETS, set())
+    batch_ids = session.info.pop(_BATCHES, set())
+    if batch_ids:
+        for vendor_id, project_id, delivered in session.execute(
+            select(BatchRegister.rmc_vendor_id, BatchRegister.project_id, BatchRegister.delivery_date)
+            .where(BatchRegister.id.in_(batch_ids))
+        ):
+            buckets.add((vendor_id, project_id, month_of(delivered)))
+    if buckets:
+        refresh_vendor_buckets(session, buckets)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_marked_buckets(session):
+    session.info.pop(_BUCKETS, None)
+    session.info.pop(_BATCHES, None)
+
+
+# ========================================
+# READ SIDE
+# ========================================
+
+def _mean_sigma(count, total, total_sq):
+    if not count:
+        return None, None
+    mean = total / count
+    if count < 2:
+        return round(mean, 2), None
+    variance = max(total_sq - count * mean * mean, 0.0) / (count - 1)
+    return round(mean, 2), round(math.sqrt(variance), 2)
+
+
+def _percent(part, whole):
+    return round(part * 100.0 / whole, 2) if whole else None
+
+
+def scorecard_metrics(sums):
+    """Derived scorecard figures from summed stat rows"""
+    slump_mean, slump_sigma = _mean_sigma(sums['slump_count'], sums['slump_sum'], sums['slump_sumsq'])
+    temp_mean, temp_sigma = _mean_sigma(sums['temperature_count'], sums['temperature_sum'], sums['temperature_sumsq'])
+    strength_mean, strength_sigma = _mean_sigma(sums['strength_count'], sums['strength_sum'], sums['strength_sumsq'])
+    return {
+        "deliveries": sums['deliveries'],
+        "quantityOrdered": round(sums['quantity_ordered'], 2),
+        "quantityReceived": round(sums['quantity_received'], 2),
+        "quantityVariance": round(sums['quantity_variance'], 2),
+        "quantityVariancePercent": _percent(sums['quantity_variance'], sums['quantity_ordered']),
+        "shortDeliveries": sums['short_deliveries'],
+        "approved": sums['approved'],
+        "rejected": sums['rejected'],
+        "rejectionPercent": _percent(sums['rejected'], sums['deliveries']),
+        "slumpMean": slump_mean,
+        "slumpStdDev": slump_sigma,
+        "temperatureMean": temp_mean,
+        "temperatureStdDev": temp_sigma,
+        "hotDeliveries": sums['hot_deliveries'],
+        "testsCompleted": sums['tests'],
+        "testsFailed": sums['failed_tests'],
+        "failurePercent": _percent(sums['failed_tests'], sums['tests']),
+        "strengthMean": strength_mean,
+        "strengthStdDev": strength_sigma,
+    }
+
+
+def vendor_scorecards(session, project_ids=None, vendor_id=None, month_from=None, month_to=None, monthly=False):
+    """
+    Scorecards rolled up per vendor (and per month when `monthly`) from vendor_scorecard_stats.
+    Returns: {vendor_id: {"totals": {...}, "months": [{"month": "YYYY-MM", ...}]}}
+    """
+    query = select(VendorScorecardStat)
+    if project_ids is not None:
+        query = query.where(VendorScorecardStat.project_id.in_(project_ids))
+    if vendor_id is not None:
+        query = query.where(VendorScorecardStat.rmc_vendor_id == vendor_id)
+    if month_from is not None:
+        query = query.where(VendorScorecardStat.month >= month_of(month_from))
+    if month_to is not None:
+        query = query.where(VendorScorecardStat.month <= month_of(month_to))
+
+    totals = defaultdict(_empty)
+    months = defaultdict(lambda: defaultdict(_empty))
+    for row in session.scalars(query.order_by(VendorScorecardStat.month)):
+        for field in SUM_FIELDS:
+            value = getattr(row, field)
+            totals[row.rmc_vendor_id][field] += value
+            if monthly:
+                months[row.rmc_vendor_id][row.month][field] += value
+
+    return {
+        vid: {
+            "totals": scorecard_metrics(sums),
+            "months": [{"month": m.strftime('%Y-%m'), **scorecard_metrics(s)} for m, s in months[vid].items()],
+        }
+        for vid, sums in totals.items()
+    }
+
+
+def run_vendor_scorecard_rebuild():
+    """
+    Background job: Recompute vendor scorecards from all batches and cube tests
+    Run once daily (off-peak) as a safety net for bulk writes
+    """
+    try:
+        logger.info("Starting vendor scorecard rebuild...")
+
+        with session_scope() as session:
+            rows = rebuild_vendor_scorecards(session)
+
+        logger.info(f"Vendor scorecard rebuild complete. Rows: {rows}")
+        return rows
+
+    except Exception as e:
+        logger.error(f"Error rebuilding vendor scorecards: {e}")
+        return 0
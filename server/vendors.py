@@ -7,6 +7,8 @@ Implements quality approval workflow and vendor master data management.
 Endpoints:
 - GET    /api/vendors                - List approved vendors
 - GET    /api/vendors/pending        - List pending approval vendors (QM only)
+- GET    /api/vendors/scorecards     - Performance scorecards of all vendors
+- GET    /api/vendors/:id/scorecard  - Monthly performance scorecard of one vendor
 - GET    /api/vendors/:id            - Get vendor details
 - POST   /api/vendors                - Create new vendor (requires quality team role)
 - PUT    /api/vendors/:id            - Update vendor details
@@ -24,9 +26,15 @@ import traceback
 
 try:
     from .db import session_scope
+    from .response_optimization import project_version_etag
+    from .vendor_scorecard import vendor_scorecards
+    from .tenancy import current_company_id, tenant_session, tenant_cache
     from .models import RMCVendor, User, Project, ProjectMembership
 except ImportError:
     from db import session_scope
+    from response_optimization import project_version_etag
+    from vendor_scorecard import vendor_scorecards
+    from tenancy import current_company_id, tenant_session, tenant_cache
     from models import RMCVendor, User, Project, ProjectMembership
 
 
@@ -43,6 +51,23 @@ def get_current_user_id():
     return int(get_jwt_identity())
 
 
+def parse_month_range():
+    """?from=YYYY-MM&to=YYYY-MM -> (datetime|None, datetime|None); raises ValueError"""
+    bounds = []
+    for key in ('from', 'to'):
+        value = request.args.get(key)
+        bounds.append(datetime.strptime(value, '%Y-%m') if value else None)
+    return tuple(bounds)
+
+
+def scorecard_project_ids(session, user):
+    """?project_id when given (membership checked by the decorator), else every project of the user's company"""
+    project_id = request.args.get('project_id', type=int)
+    if project_id:
+        return [project_id]
+    return [pid for pid, in session.query(Project.id).filter_by(company_id=user.company_id)]
+
+
 # ============================================================================
 # DECORATORS
 # ============================================================================
@@ -138,6 +163,7 @@ def quality_team_required():
 @vendors_bp.route('/api/vendors', methods=['GET'])
 @jwt_required()
 @project_access_required(optional=True)
+@project_version_etag
 def get_vendors():
     """
     Get list of RMC vendors for a project or all projects.
@@ -152,39 +178,24 @@ def get_vendors():
     try:
         project_id = request.args.get('project_id', type=int)
         approved_only = request.args.get('approved_only', 'true').lower() == 'true'
-        user_id = get_current_user_id()
+        company_id = current_company_id()
         
-        with session_scope() as session:
-            # Get user's company
-            user = session.query(User).filter_by(id=user_id).first()
-            if not user:
-                return jsonify({"error": "User not found"}), 404
-            
-            # Base query - exclude soft deleted
-            if project_id:
-                # Filter by specific project
-                query = session.query(RMCVendor).filter_by(
-                    project_id=project_id,
-                    is_deleted=False
-                )
-            else:
-                # Get all vendors for user's company projects
-                query = session.query(RMCVendor).join(Project).filter(
-                    Project.company_id == user.company_id,
-                    RMCVendor.is_deleted == False
-                )
-            
-            # Filter by approval status
-            if approved_only:
-                query = query.filter_by(is_approved=True)
-            
-            vendors = query.order_by(RMCVendor.vendor_name).all()
-            
-            return jsonify({
-                "success": True,
-                "count": len(vendors),
-                "vendors": [vendor.to_dict() for vendor in vendors]
-            }), 200
+        def load():
+            # Tenant guard adds company_id and is_deleted (rmc_vendors company_id, is_deleted, vendor_name index)
+            with tenant_session(company_id) as session:
+                query = session.query(RMCVendor)
+                if project_id:
+                    query = query.filter_by(project_id=project_id)
+                if approved_only:
+                    query = query.filter_by(is_approved=True)
+                return [vendor.to_dict() for vendor in query.order_by(RMCVendor.vendor_name).all()]
+        
+        vendors = tenant_cache.get_or_load(company_id, f"vendors:{project_id}:{approved_only}", load)
+        return jsonify({
+            "success": True,
+            "count": len(vendors),
+            "vendors": vendors
+        }), 200
     
     except Exception as e:
         print(f"Error fetching vendors: {str(e)}")
@@ -228,6 +239,97 @@ def get_pending_vendors():
         return jsonify({"error": f"Failed to fetch pending vendors: {str(e)}"}), 500
 
 
+@vendors_bp.route('/api/vendors/scorecards', methods=['GET'])
+@jwt_required()
+@project_access_required(optional=True)
+def get_vendor_scorecards():
+    """
+    Performance scorecard of every vendor that delivered to a project (or the user's company).
+    
+    Query Parameters:
+    - project_id (optional): Only this project
+    - from, to (optional): Delivery month range, YYYY-MM (inclusive)
+    
+    Returns:
+    - One scorecard per vendor: deliveries, quantity variance, rejection %,
+      slump/temperature mean and sigma, cube failure % and 28-day strength mean/sigma
+    """
+    try:
+        try:
+            month_from, month_to = parse_month_range()
+        except ValueError:
+            return jsonify({"error": "Invalid month. Use YYYY-MM"}), 400
+        
+        with session_scope() as session:
+            user = session.query(User).filter_by(id=get_current_user_id()).first()
+            if not user:
+                return jsonify({"error": "User not found"}), 404
+            
+            cards = vendor_scorecards(session, scorecard_project_ids(session, user),
+                                      month_from=month_from, month_to=month_to)
+            names = dict(session.query(RMCVendor.id, RMCVendor.vendor_name).filter(RMCVendor.id.in_(cards)))
+            
+            scorecards = [
+                {"vendorId": vendor_id, "vendorName": names.get(vendor_id), **card["totals"]}
+                for vendor_id, card in cards.items()
+            ]
+            scorecards.sort(key=lambda c: (c["vendorName"] or ""))
+            
+            return jsonify({
+                "success": True,
+                "count": len(scorecards),
+                "scorecards": scorecards
+            }), 200
+    
+    except Exception as e:
+        print(f"Error fetching vendor scorecards: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Failed to fetch vendor scorecards: {str(e)}"}), 500
+
+
+@vendors_bp.route('/api/vendors/<int:vendor_id>/scorecard', methods=['GET'])
+@jwt_required()
+@project_access_required(optional=True)
+def get_vendor_scorecard(vendor_id):
+    """
+    Monthly performance scorecard of one vendor.
+    
+    Query Parameters:
+    - project_id (optional): Only this project (default: all projects of the user's company)
+    - from, to (optional): Delivery month range, YYYY-MM (inclusive)
+    
+    Returns:
+    - Totals for the range and one entry per delivery month
+    """
+    try:
+        try:
+            month_from, month_to = parse_month_range()
+        except ValueError:
+            return jsonify({"error": "Invalid month. Use YYYY-MM"}), 400
+        
+        with session_scope() as session:
+            user = session.query(User).filter_by(id=get_current_user_id()).first()
+            vendor = session.query(RMCVendor).filter_by(id=vendor_id).first()
+            if not user or not vendor or vendor.company_id != user.company_id:
+                return jsonify({"error": "Vendor not found"}), 404
+            
+            card = vendor_scorecards(session, scorecard_project_ids(session, user), vendor_id=vendor_id,
+                                     month_from=month_from, month_to=month_to, monthly=True).get(vendor_id)
+            
+            return jsonify({
+                "success": True,
+                "vendorId": vendor_id,
+                "vendorName": vendor.vendor_name,
+                "totals": card["totals"] if card else None,
+                "months": card["months"] if card else []
+            }), 200
+    
+    except Exception as e:
+        print(f"Error fetching vendor scorecard: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Failed to fetch vendor scorecard: {str(e)}"}), 500
+
+
 @vendors_bp.route('/api/vendors/<int:vendor_id>', methods=['GET'])
 @jwt_required()
 @project_access_required()
@@ -0,0 +1,188 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server import cube_acceptance  # noqa: E402
+from server.cube_acceptance import evaluate_series, parse_fck  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    cube_acceptance._projects.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _seed(strengths) -> dict:
+    with session_scope() as session:
+        company = Company(name="Acceptance Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Acceptance Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        batch = BatchRegister(
+            project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+            batch_number="B-001", delivery_date=datetime(2025, 11, 1, 9, 0),
+            quantity_ordered=6.0, entered_by=user.id, batch_sheet_photo_data=b"\x89PNG",
+        )
+        session.add(batch)
+        session.flush()
+        tests = [
+            CubeTestRegister(
+                project_id=project.id, batch_id=batch.id, set_number=i + 1, test_age_days=28,
+                casting_date=datetime(2025, 11, 1, 10, 0) + timedelta(days=i), cast_by=user.id,
+                average_strength_mpa=strength,
+            )
+            for i, strength in enumerate(strengths)
+        ]
+        # Site-mix set graded on the test itself, and a 7-day set that is never judged here
+        tests.append(CubeTestRegister(
+            project_id=project.id, set_number=1, test_age_days=28, concrete_grade="M20",
+            casting_date=datetime(2025, 11, 1, 10, 0), cast_by=user.id, average_strength_mpa=25.0,
+        ))
+        tests.append(CubeTestRegister(
+            project_id=project.id, batch_id=batch.id, set_number=99, test_age_days=7,
+            casting_date=datetime(2025, 11, 1, 10, 0), cast_by=user.id, average_strength_mpa=5.0,
+        ))
+        session.add_all(tests)
+        session.flush()
+        return {"project_id": project.id, "test_ids": [t.id for t in tests]}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_parse_fck():
+    assert parse_fck("M30") == 30
+    assert parse_fck("m40FF") == 40
+    assert parse_fck("Unknown") is None
+
+
+def test_group_criteria_with_assumed_sigma():
+    # M30, fewer than 30 results: sigma 5.0 (Table 8), required mean max(34.0, 34) = 34.0
+    result = evaluate_series([35, 36, 34, 35, 33, 33, 34, 33, 40], 30)
+    assert not result["sigma_established"] and result["sigma"] == 5.0
+    assert result["group_threshold"].tolist() == [34.0, 34.0]
+    assert result["group_pass"].tolist() == [True, False]
+    assert result["individual_limit"] == 26
+    assert result["individual_pass"].all()
+
+
+def test_group_sigma_uses_last_30_results():
+    rng = np.random.default_rng(7)
+    strengths = rng.normal(38, 3.0, size=44)
+    strengths[5] = 24.0  # Below fck - 4
+    result = evaluate_series(strengths, 30)
+
+    assert result["group_established"].tolist() == [False] * 7 + [True] * 4
+    for k in range(7, 11):
+        end = k * 4 + 3
+        sigma = np.std(strengths[end - 29:end + 1], ddof=1)
+        assert result["group_sigma"][k] == pytest.approx(sigma)
+        assert result["group_threshold"][k] == max(np.floor((30 + 0.825 * sigma) * 2 + 0.5) / 2, 34)
+    assert result["sigma"] == pytest.approx(np.std(strengths[-30:], ddof=1))
+    assert result["individual_pass"].tolist().count(False) == 1
+    assert not result["group_pass"][1]  # Group holding the low result fails on the individual criterion
+
+
+def test_acceptance_endpoint_updates_incrementally(client, monkeypatch):
+    seeded = _seed([35, 36, 34, 35, 33, 33, 34, 33, 40])
+    headers = _headers(client)
+    url = f"/api/cube-tests/acceptance?project_id={seeded['project_id']}"
+
+    body = client.get(url, headers=headers).get_json()
+    m20, m30 = body["grades"]
+    assert (m20["grade"], m20["results"], m20["pendingResults"]) == ("M20", 1, 1)
+    assert m30["results"] == 9 and m30["pendingResults"] == 1
+    assert [g["status"] for g in m30["groups"]] == ["pass", "fail"]
+    assert not body["compliant"]
+
+    loads = []
+    original = cube_acceptance._load
+    monkeypatch.setattr(cube_acceptance, "_load",
+                        lambda session, project_id, ids=None: loads.append(ids) or original(session, project_id, ids))
+
+    # Retest of one set: only that test is reloaded, only M30 is recomputed
+    failing_id = seeded["test_ids"][4]
+    with session_scope() as session:
+        session.get(CubeTestRegister, failing_id).average_strength_mpa = 40.0
+
+    body = client.get(url + "&grade=m30", headers=headers).get_json()
+    assert loads == [[failing_id]]
+    assert [g["grade"] for g in body["grades"]] == ["M30"]
+    assert [g["status"] for g in body["grades"][0]["groups"]] == ["pass", "pass"]
+    assert body["compliant"]
+
+
+def test_projects_refresh_under_their_own_lock():
+    seeded = _seed([35, 36, 34, 35])
+    busy = cube_acceptance._project_state(seeded["project_id"] + 1)
+
+    # Another project's refresh in progress does not hold this one up
+    with busy.lock:
+        reports = cube_acceptance.project_acceptance(SessionLocal(), seeded["project_id"])
+    assert set(reports) == {"M20", "M30"}
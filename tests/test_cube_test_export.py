@@ -0,0 +1,91 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def test_export_streams_csv_with_batch_numbers(client):
+    with session_scope() as session:
+        company = Company(name="Export Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Export Project")
+        user = User(email="qe@example.com", phone="9777777777", full_name="Quality Engineer",
+                    password_hash=hash_password("Password123!"), company_id=company.id)
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@example.com")
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_engineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        batch = BatchRegister(project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                              batch_number="B-001", delivery_date=datetime(2025, 11, 1, 9, 0),
+                              quantity_ordered=6.0, entered_by=user.id)
+        session.add(batch)
+        session.flush()
+        session.add_all([
+            CubeTestRegister(project_id=project.id, batch_id=batch.id, set_number=1, test_age_days=age,
+                             casting_date=datetime(2025, 11, 1), cast_by=user.id)
+            for age in (7, 28)
+        ])
+        project_id = project.id
+
+    token = client.post(
+        "/api/auth/login", json={"email": "qe@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    response = client.get(f"/api/reports/cube-tests/export?project_id={project_id}",
+                          headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).strip().splitlines()
+    assert lines[0].startswith("Test ID,Batch No")
+    assert len(lines) == 3 and all(",B-001,2025-11-01," in line for line in lines[1:])
+    assert all(",PENDING," in line for line in lines[1:])  # Untested sets
@@ -0,0 +1,206 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.concrete_nc_models import NCIssueSeverity, NCIssueStatus, QualityNCIssue  # noqa: E402
+from server import dashboard  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    dashboard._cache.clear()
+    dashboard._invalidations.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Dashboard Company", subscribed_modules='["safety", "concrete"]')
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Dashboard Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        batches = [
+            BatchRegister(
+                project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                batch_number=f"B-{i:03d}", delivery_date=datetime(2025, 11, 1 + i, 9, 0), quantity_ordered=6.0,
+                quantity_received=received, verification_status=status, entered_by=user.id,
+                batch_sheet_photo_data=b"\x89PNG",
+            )
+            for i, (received, status) in enumerate([(6.0, "approved"), (5.0, "rejected"), (None, "pending")])
+        ]
+        session.add_all(batches)
+        session.flush()
+        session.add_all([
+            CubeTestRegister(project_id=project.id, batch_id=batches[0].id, set_number=1, test_age_days=28,
+                             casting_date=batches[0].delivery_date, cast_by=user.id,
+                             average_strength_mpa=36.0, pass_fail_status="pass"),
+            CubeTestRegister(project_id=project.id, batch_id=batches[1].id, set_number=1, test_age_days=28,
+                             casting_date=batches[1].delivery_date, cast_by=user.id,
+                             average_strength_mpa=28.0, pass_fail_status="fail"),
+            CubeTestRegister(project_id=project.id, batch_id=batches[2].id, set_number=1, test_age_days=7,
+                             casting_date=batches[2].delivery_date, cast_by=user.id),
+        ])
+        return {"project_id": project.id, "batch_ids": [b.id for b in batches]}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_dashboard_tiles_and_module_filter(client):
+    seeded = _seed()
+    response = client.get(f"/api/dashboard/{seeded['project_id']}", headers=_headers(client))
+    assert response.status_code == 200, response.get_json()
+    sections = response.get_json()["sections"]
+
+    assert set(sections) == {"cubeTests", "batches", "safety", "tbt", "ppe", "incidents"}  # No concrete_nc module
+    assert sections["cubeTests"] == {
+        "total": 3, "passed": 1, "failed": 1, "awaitingResults": 1, "passRate": 50.0, "avgStrength28Day": 32.0
+    }
+    batches = sections["batches"]
+    assert (batches["total"], batches["pendingVerification"], batches["rejected"]) == (3, 1, 1)
+    assert batches["quantityDelivered"] == 17.0
+    assert sections["incidents"]["totalIncidents"] == 0
+    assert sections["ppe"]["totalIssuances"] == 0
+
+
+def test_dashboard_is_cached_until_a_project_write(client):
+    seeded = _seed()
+    headers = _headers(client)
+    url = f"/api/dashboard/{seeded['project_id']}"
+
+    first = client.get(url, headers=headers).get_json()
+    assert client.get(url, headers=headers).get_json()["generatedAt"] == first["generatedAt"]
+
+    with session_scope() as session:
+        session.get(BatchRegister, seeded["batch_ids"][2]).verification_status = "approved"
+
+    refreshed = client.get(url, headers=headers).get_json()
+    assert refreshed["generatedAt"] != first["generatedAt"]
+    assert refreshed["sections"]["batches"]["pendingVerification"] == 0
+
+
+def test_dashboard_built_across_a_write_is_not_cached(monkeypatch):
+    seeded = _seed()
+    project = dashboard.ProjectRef(seeded["project_id"], 1)
+    build = dashboard.build_dashboard
+
+    def build_then_write(project, now=None):
+        payload = build(project, now)
+        with session_scope() as session:  # Commits while the payload is being built
+            session.get(BatchRegister, seeded["batch_ids"][2]).verification_status = "approved"
+        return payload
+
+    monkeypatch.setattr(dashboard, "build_dashboard", build_then_write)
+    assert dashboard.cached_dashboard(project)["sections"]["batches"]["pendingVerification"] == 1
+    assert project.id not in dashboard._cache
+
+    monkeypatch.setattr(dashboard, "build_dashboard", build)
+    assert dashboard.cached_dashboard(project)["sections"]["batches"]["pendingVerification"] == 0
+    assert project.id in dashboard._cache
+
+
+def test_sequential_and_parallel_builds_match(monkeypatch):
+    seeded = _seed()
+    project = dashboard.ProjectRef(seeded["project_id"], 1)
+    now = datetime(2025, 11, 20)
+    parallel = dashboard.build_dashboard(project, now)
+    monkeypatch.setattr(dashboard.config_obj, "DASHBOARD_WORKERS", 1)
+    assert dashboard.build_dashboard(project, now) == parallel
+    assert parallel["sections"]["concreteNC"]["score"] == 10.0
+
+
+def test_nc_score_counts_closed_issues_by_severity():
+    seeded = _seed()
+    with session_scope() as session:
+        project = session.get(Project, seeded["project_id"])
+        user = session.query(User).one()
+        vendor = session.query(RMCVendor).one()
+        for number, severity, score, status in (
+            (1, NCIssueSeverity.HIGH, 0.0, NCIssueStatus.CLOSED),  # Closing zeroes severity_score
+            (2, NCIssueSeverity.LOW, 0.25, NCIssueStatus.RAISED),
+        ):
+            session.add(QualityNCIssue(
+                company_id=project.company_id, project_id=project.id, nc_number=f"CNC-{number}",
+                issue_title="Honeycombing", issue_description="Honeycombing at column base", location="C-5",
+                tag_ids=[], photo_urls=[], severity=severity, severity_score=score,
+                deadline_date=datetime(2025, 12, 1).date(), raised_by_id=user.id, raised_by_role="quality_manager",
+                raised_at=datetime(2025, 11, 19), assigned_contractor_id=vendor.id, contractor_supervisor_id=user.id,
+                status=status, score_month=11, score_year=2025, score_week=47,
+            ))
+        company_id = project.company_id
+
+    tiles = dashboard.build_dashboard(dashboard.ProjectRef(seeded["project_id"], company_id),
+                                      datetime(2025, 11, 20))["sections"]["concreteNC"]
+    assert (tiles["closed"], tiles["open"]) == (1, 1)
+    assert (tiles["score"], tiles["performanceGrade"]) == (8.0, "B")
+
+
+def test_dashboard_requires_membership(client):
+    seeded = _seed()
+    response = client.get(f"/api/dashboard/{seeded['project_id'] + 1}", headers=_headers(client))
+    assert response.status_code == 403
@@ -0,0 +1,222 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.cube_tests import create_cube_sets  # noqa: E402
+from server.sync_models import SyncChange, compact_changes  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Sync Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Sync Project")
+        other = Project(company_id=company.id, name="Other Project")
+        user = User(
+            email="tablet@example.com",
+            phone="9888888888",
+            full_name="Site Tablet",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, other, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_engineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351)
+        session.add(mix)
+        session.flush()
+
+        batches = [
+            BatchRegister(
+                project_id=pid, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                batch_number=f"B-{pid}-{i}", delivery_date=datetime(2025, 11, 10, 9, 0),
+                quantity_ordered=6.0, entered_by=user.id, batch_sheet_photo_data=b"photo",
+            )
+            for pid in (project.id, other.id) for i in range(2)
+        ]
+        session.add_all(batches)
+        session.flush()
+        return {
+            "project_id": project.id, "other_id": other.id, "company_id": company.id, "user_id": user.id,
+            "vendor_id": vendor.id, "batch_ids": [b.id for b in batches[:2]]
+        }
+
+
+def _sync(client, headers, project_id, since="0", **params):
+    response = client.get("/api/sync", query_string={"project_id": project_id, "since": since, **params},
+                          headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_sync_returns_only_changes_since_token(client):
+    seeded = _seed()
+    token = client.post(
+        "/api/auth/login", json={"email": "tablet@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project_id = seeded["project_id"]
+
+    first = _sync(client, headers, project_id)
+    batches = first["changes"]["batches"]
+    assert [row[0] for row in batches["rows"]] == seeded["batch_ids"]  # Other project's batches excluded
+    assert batches["rows"][0][batches["columns"].index("hasBatchSheetPhoto")] is True
+    assert "batchSheetPhotoData" not in batches["columns"]
+    assert len(first["changes"]["mix_designs"]["rows"]) == 1  # Project-scoped mix design
+    assert len(first["changes"]["vendors"]["rows"]) == 1  # Company vendor, shared by the company's projects
+
+    assert _sync(client, headers, project_id, first["next"])["changes"] == {}
+
+    # Edit one batch, soft-delete the other, cast cube sets through the bulk path
+    with session_scope() as session:
+        first_batch, second_batch = (session.get(BatchRegister, i) for i in seeded["batch_ids"])
+        first_batch.slump_tested = 95.0
+        second_batch.is_deleted = 1
+        create_cube_sets(session, project_id, [first_batch.id], datetime(2025, 11, 10, 10, 0), [7, 28],
+                         seeded["user_id"])
+
+    second = _sync(client, headers, project_id, first["next"])
+    changes = second["changes"]
+    assert [row[0] for row in changes["batches"]["rows"]] == [seeded["batch_ids"][0]]
+    assert changes["batches"]["deleted"] == [seeded["batch_ids"][1]]
+    assert len(changes["cube_tests"]["rows"]) == len(changes["test_reminders"]["rows"]) == 2
+
+    # Paging walks the same feed in seq order without gaps
+    paged, since = [], first["next"]
+    while True:
+        page = _sync(client, headers, project_id, since, limit=2)
+        paged += [(entity, row[0]) for entity, body in page["changes"].items() for row in body["rows"]]
+        since = page["next"]
+        if not page["hasMore"]:
+            break
+    assert since == second["next"] and len(paged) == 5
+
+    # Compaction keeps only the latest pointer per record
+    with session_scope() as session:
+        assert compact_changes(session) == 2
+        assert session.query(SyncChange).filter_by(project_id=project_id).count() == 8
+
+
+def test_sync_requires_membership_and_valid_token(client):
+    seeded = _seed()
+    token = client.post(
+        "/api/auth/login", json={"email": "tablet@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/sync", query_string={"project_id": seeded["project_id"] + 1},
+                      headers=headers).status_code == 403
+    assert client.get("/api/sync", query_string={"project_id": seeded["project_id"], "since": "abc"},
+                      headers=headers).status_code == 400
+
+    with session_scope() as session:
+        session.query(ProjectMembership).filter_by(user_id=seeded["user_id"]).update({"is_active": False})
+    assert client.get("/api/sync", query_string={"project_id": seeded["project_id"]},
+                      headers=headers).status_code == 403
+
+
+def test_shared_mix_designs_and_vendors_reach_every_project_feed(client):
+    seeded = _seed()
+    token = client.post(
+        "/api/auth/login", json={"email": "tablet@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    project_id = seeded["project_id"]
+    since = _sync(client, headers, project_id)["next"]
+
+    # The mix design endpoint never sets a project; batches of any project accept it
+    response = client.post("/api/mix-designs", json={"mixDesignId": "M25-Shared", "specifiedStrengthPsi": 3626},
+                           headers=headers)
+    assert response.status_code == 201, response.get_json()
+    mix_id = response.get_json()["id"]
+    assert [row[0] for row in _sync(client, headers, project_id, since)["changes"]["mix_designs"]["rows"]] == [mix_id]
+
+    # A project created later starts its feed with the company's vendors and the shared mix designs
+    with session_scope() as session:
+        annex = Project(company_id=seeded["company_id"], name="Annex")
+        session.add(annex)
+        session.flush()
+        session.add(ProjectMembership(project_id=annex.id, user_id=seeded["user_id"], role="quality_engineer"))
+        annex_id = annex.id
+    changes = _sync(client, headers, annex_id)["changes"]
+    assert [row[0] for row in changes["vendors"]["rows"]] == [seeded["vendor_id"]]
+    assert [row[0] for row in changes["mix_designs"]["rows"]] == [mix_id]
+
+
+def test_vendor_rename_invalidates_batch_lists_of_every_company_project(client):
+    seeded = _seed()
+    with session_scope() as session:
+        session.get(RMCVendor, seeded["vendor_id"]).project_id = seeded["project_id"]
+        session.add(ProjectMembership(project_id=seeded["other_id"], user_id=seeded["user_id"], role="quality_engineer"))
+    token = client.post(
+        "/api/auth/login", json={"email": "tablet@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    query = {"project_id": seeded["other_id"]}
+
+    first = client.get("/api/batches", query_string=query, headers=headers)
+    assert first.status_code == 200, first.get_json()
+    etag = first.headers["ETag"]
+    assert client.get("/api/batches", query_string=query,
+                      headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # The vendor belongs to another project, but this project's batches list its name
+    with session_scope() as session:
+        session.get(RMCVendor, seeded["vendor_id"]).vendor_name = "RMC Co (Renamed)"
+    second = client.get("/api/batches", query_string=query, headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 200
+    assert {b["vendorName"] for b in second.get_json()["batches"]} == {"RMC Co (Renamed)"}
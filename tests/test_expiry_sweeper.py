@@ -0,0 +1,195 @@
+import os
+import tempfile
+import atexit
+from datetime import date, timedelta
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_models import Worker  # noqa: E402
+from server.ppe_tracking_models import PPEIssuance, PPEType, IssuanceStatus  # noqa: E402
+from server.safety_induction_models import SafetyInduction  # noqa: E402
+from server.expiry_management import (  # noqa: E402
+    ExpiryBucket, rebuild_expiry_buckets, sweep_expired_records, worker_eligibility
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+TODAY = date.today()
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Expiry Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Expiry Project")
+        user = User(
+            email="officer@example.com",
+            phone="9777777777",
+            full_name="Safety Officer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+
+        workers = []
+        for code in ("W-001", "W-002"):
+            worker = Worker(company_id=company.id, project_id=project.id, worker_code=code, full_name=code)
+            session.add(worker)
+            workers.append(worker)
+        session.flush()
+        workers[1].certifications = [
+            {"name": "Scaffolding", "expiry_date": (TODAY - timedelta(days=2)).isoformat()},
+            {"name": "First Aid", "valid_until": (TODAY + timedelta(days=20)).isoformat()},
+        ]
+
+        ppe = {}
+        for key, days in (("expired", -1), ("soon", 5), ("later", 45), ("far", 400)):
+            issuance = PPEIssuance(
+                company_id=company.id,
+                project_id=project.id,
+                issuance_number=f"PPE-{project.id}-{key}",
+                worker_id=workers[0].id,
+                ppe_type=PPEType.HAND_GLOVES,
+                ppe_description="Gloves",
+                issue_date=TODAY - timedelta(days=30),
+                issued_by_id=user.id,
+                expiry_date=TODAY + timedelta(days=days),
+                status=IssuanceStatus.ISSUED,
+            )
+            session.add(issuance)
+            ppe[key] = issuance
+
+        inductions = {}
+        for worker, key, days in ((workers[0], "lapsed", -3), (workers[1], "valid", 10)):
+            induction = SafetyInduction(
+                company_id=company.id,
+                project_id=project.id,
+                worker_id=worker.id,
+                conducted_by=user.id,
+                induction_number=f"IND-{project.id}-{key}",
+                induction_topics=[],
+                valid_from=TODAY - timedelta(days=300),
+                valid_until=TODAY + timedelta(days=days),
+                status="completed",
+            )
+            session.add(induction)
+            inductions[key] = induction
+        session.flush()
+
+        return {
+            "email": user.email,
+            "workers": [w.id for w in workers],
+            "ppe": {k: v.id for k, v in ppe.items()},
+            "inductions": {k: v.id for k, v in inductions.items()},
+        }
+
+
+def test_sweep_flips_expired_records_in_bulk():
+    seeded = _seed()
+
+    with session_scope() as session:
+        assert sweep_expired_records(session, TODAY) == {"ppe": 1, "inductions": 1}
+        # Already-expired rows are not touched again
+        assert sweep_expired_records(session, TODAY) == {"ppe": 0, "inductions": 0}
+
+    with session_scope() as session:
+        expired_ppe = session.get(PPEIssuance, seeded["ppe"]["expired"])
+        assert expired_ppe.is_expired and expired_ppe.status == IssuanceStatus.EXPIRED
+        assert session.get(PPEIssuance, seeded["ppe"]["soon"]).status == IssuanceStatus.ISSUED
+
+        lapsed = session.get(SafetyInduction, seeded["inductions"]["lapsed"])
+        assert lapsed.is_expired and lapsed.status == "expired"
+
+
+def test_buckets_and_worker_eligibility():
+    seeded = _seed()
+
+    with session_scope() as session:
+        sweep_expired_records(session, TODAY)
+        counts = rebuild_expiry_buckets(session, TODAY)
+        assert counts == {"ppe": 3, "inductions": 1, "certifications": 2}
+
+        buckets = {
+            (b.entity_type, b.label): b.bucket_days for b in session.query(ExpiryBucket).all()
+        }
+        assert buckets[("ppe", "PPE-1-expired")] == 0
+        assert buckets[("ppe", "PPE-1-soon")] == 7
+        assert buckets[("ppe", "PPE-1-later")] == 60
+        assert buckets[("induction", "IND-1-valid")] == 30
+        assert buckets[("certification", "Scaffolding")] == 0
+
+        first, second = seeded["workers"]
+        blocked = worker_eligibility(session, first, TODAY)
+        assert blocked["eligible"] is False
+        assert blocked["reasons"] == ["No valid safety induction", "1 expired item(s) in use"]
+
+        lapsed_cert = worker_eligibility(session, second, TODAY)
+        assert lapsed_cert["eligible"] is False
+        assert [e["label"] for e in lapsed_cert["expired"]] == ["Scaffolding"]
+        assert {e["label"] for e in lapsed_cert["expiring"]} == {"IND-1-valid", "First Aid"}
+
+
+def test_expiring_endpoint_reads_buckets(client):
+    seeded = _seed()
+    with session_scope() as session:
+        sweep_expired_records(session, TODAY)
+        rebuild_expiry_buckets(session, TODAY)
+
+    token = client.post(
+        "/api/auth/login", json={"email": seeded["email"], "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/ppe/expiring?days_threshold=30", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert [i["id"] for i in response.get_json()["expiring_ppe"]] == [seeded["ppe"]["soon"]]
+
+    # Beyond the bucket horizon the endpoint falls back to a live query
+    response = client.get("/api/ppe/expiring?days_threshold=500", headers=headers)
+    assert {i["id"] for i in response.get_json()["expiring_ppe"]} == {
+        seeded["ppe"]["soon"], seeded["ppe"]["later"], seeded["ppe"]["far"]
+    }
+
+    response = client.get("/api/safety-inductions/expiring", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    assert [i["id"] for i in response.get_json()["inductions"]] == [seeded["inductions"]["valid"]]
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402,F401
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, User  # noqa: E402
+from server.geofence_models import LocationVerification  # noqa: E402
+from server.log_partitions import (  # noqa: E402
+    LogArchive, add_months, archive_expired_logs, bounded_log_window, iter_archive_rows, month_start
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed_verifications(timestamps) -> None:
+    with session_scope() as session:
+        company = Company(name="Log Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Log Project")
+        user = User(
+            email="logger@example.com",
+            phone="9000000000",
+            full_name="Site Logger",
+            password_hash="x",
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+
+        for ts in timestamps:
+            session.add(LocationVerification(
+                company_id=company.id,
+                project_id=project.id,
+                user_id=user.id,
+                submitted_latitude=19.07,
+                submitted_longitude=72.87,
+                is_verified=True,
+                action="TBT_CREATE",
+                verified_at=ts,
+            ))
+
+
+def test_month_helpers_roll_over_year_boundaries():
+    assert month_start(datetime(2025, 11, 17, 8, 30)) == datetime(2025, 11, 1)
+    assert add_months(datetime(2025, 11, 17), 2) == datetime(2026, 1, 1)
+    assert add_months(datetime(2025, 1, 5), -1) == datetime(2024, 12, 1)
+
+
+def test_bounded_log_window_defaults_to_recent_days():
+    end = datetime(2025, 6, 30)
+    start, resolved_end = bounded_log_window(end_date=end, default_days=7)
+    assert resolved_end == end
+    assert start == datetime(2025, 6, 23)
+    assert bounded_log_window(end_date=end, default_days=0) == (end, end)  # ?days=0 is not the default
+
+
+def test_log_maintenance_steps_fail_independently(monkeypatch):
+    from server import log_partitions
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("partition overlaps default")
+
+    monkeypatch.setattr(log_partitions, "ensure_partitions", broken)
+    monkeypatch.setattr(log_partitions, "archive_expired_logs", lambda: {"permit_audit_logs": 3})
+    results = log_partitions.run_log_maintenance()
+    assert results["rowsArchived"] == {"permit_audit_logs": 3}
+    assert results["errors"] == {"partitions": "partition overlaps default"}
+
+
+def test_archive_expired_logs_moves_old_months_to_files(tmp_path):
+    now = datetime(2025, 6, 15)
+    _seed_verifications([
+        datetime(2025, 1, 3, 9, 0),
+        datetime(2025, 1, 28, 17, 0),
+        datetime(2025, 2, 10, 12, 0),
+        datetime(2025, 5, 2, 8, 0),  # Inside the retention window
+    ])
+
+    results = archive_expired_logs(retention_months=3, archive_dir=tmp_path, now=now)
+
+    assert results["location_verifications"] == 3
+    with session_scope() as session:
+        remaining = session.query(LocationVerification).all()
+        assert [row.verified_at for row in remaining] == [datetime(2025, 5, 2, 8, 0)]
+
+        archives = session.query(LogArchive).order_by(LogArchive.period_start).all()
+        assert [(a.period_start, a.row_count) for a in archives] == [
+            (datetime(2025, 1, 1), 2),
+            (datetime(2025, 2, 1), 1),
+        ]
+        january_file = archives[0].file_path
+
+    rows = list(iter_archive_rows(january_file))
+    assert [row["verified_at"] for row in rows] == ["2025-01-03T09:00:00", "2025-01-28T17:00:00"]
+
+    # Re-running is a no-op once the window is clean
+    assert archive_expired_logs(retention_months=3, archive_dir=tmp_path, now=now)["location_verifications"] == 0
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import atexit
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, User  # noqa: E402
+from server.config import get_config  # noqa: E402
+from server import password_hashing  # noqa: E402
+from server.password_hashing import needs_rehash, resolve_method  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    yield application
+    password_hashing.shutdown_pool()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _create_user(password_hash) -> int:
+    with session_scope() as session:
+        company = Company(name="Login Company")
+        session.add(company)
+        session.flush()
+        user = User(
+            email="staff@example.com",
+            phone="9333333333",
+            full_name="Site Staff",
+            password_hash=password_hash,
+            company_id=company.id,
+        )
+        session.add(user)
+        session.flush()
+        return user.id
+
+
+def test_resolve_method_fills_in_kdf_defaults():
+    assert resolve_method("pbkdf2:sha256:1000") == "pbkdf2:sha256:1000"
+    assert resolve_method("scrypt") == "scrypt:32768:8:1"
+    assert resolve_method("scrypt:16384") == "scrypt:16384:8:1"
+    assert needs_rehash("pbkdf2:sha256:1000$salt$hash", "pbkdf2:sha256:2000")
+    assert not needs_rehash("pbkdf2:sha256:2000$salt$hash", "pbkdf2:sha256:2000")
+
+
+def test_login_upgrades_outdated_hash_and_accepts_phone(client):
+    user_id = _create_user(generate_password_hash("Password123!", method="pbkdf2:sha256:1000"))
+
+    response = client.post("/api/auth/login", json={"phone": "9333333333", "password": "Password123!"})
+    assert response.status_code == 200, response.get_json()
+
+    with session_scope() as session:
+        upgraded = session.get(User, user_id).password_hash
+    assert upgraded.startswith(resolve_method() + "$")
+
+    # The upgraded hash still verifies (by email this time) and is not rewritten again
+    response = client.post("/api/auth/login", json={"email": "STAFF@example.com", "password": "Password123!"})
+    assert response.status_code == 200, response.get_json()
+    with session_scope() as session:
+        assert session.get(User, user_id).password_hash == upgraded
+
+    response = client.post("/api/auth/login", json={"email": "staff@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_login_sheds_load_when_hash_pool_is_full(client, monkeypatch):
+    _create_user(generate_password_hash("Password123!", method="pbkdf2:sha256:1000"))
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(password_hashing, "_slots", full)
+
+    response = client.post("/api/auth/login", json={"email": "staff@example.com", "password": "Password123!"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+    # Shedding happens before the KDF, so it is not counted as a failed attempt
+    with session_scope() as session:
+        assert session.query(User).one().failed_login_attempts == 0
+
+
+def test_timed_out_hash_answers_busy_and_keeps_its_slot(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(password_hashing, "_slots", slots)
+    monkeypatch.setattr(get_config(), "PASSWORD_HASH_TIMEOUT", 0.05)
+
+    with pytest.raises(password_hashing.PasswordHasherBusy, match="timed out"):
+        password_hashing._run(time.sleep, 1.0)
+    # The KDF still runs in the pool, so its slot is not handed to the next login yet
+    with pytest.raises(password_hashing.PasswordHasherBusy, match="Too many"):
+        password_hashing._run(time.sleep, 0)
+
+    deadline = time.monotonic() + 30
+    while not slots.acquire(timeout=0.1):
+        assert time.monotonic() < deadline
+    slots.release()
+    password_hashing.shutdown_pool()
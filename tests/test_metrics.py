@@ -0,0 +1,107 @@
+import os
+import tempfile
+import atexit
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine  # noqa: E402
+from server.config import get_config  # noqa: E402
+from server import metrics  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+requires_prometheus = pytest.mark.skipif(metrics.REGISTRY is None, reason="prometheus_client not installed")
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def test_readiness_checks_database_latency(client, monkeypatch):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["status"] == "ready"
+    assert payload["checks"]["database"]["status"] == "ok"
+    assert payload["checks"]["database"]["latencyMs"] >= 0
+
+    monkeypatch.setattr(get_config(), "HEALTH_READY_MAX_DB_MS", -1)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.get_json()["checks"]["database"]["status"] == "slow"
+
+
+def test_job_tracking_counts_items_and_reraises():
+    assert metrics._count_items({"expired": {"ppe": 2, "inductions": 3}, "bucketed": [1, 2], "note": "x"}) == 7
+
+    with metrics.track_job("unit_test_job") as run:
+        run.result = {"changes": 4, "idempotency_keys": 1}
+    with pytest.raises(RuntimeError):
+        with metrics.track_job("unit_test_job"):
+            raise RuntimeError("boom")
+
+
+@pytest.mark.skipif(metrics.REGISTRY is not None, reason="prometheus_client installed")
+def test_metrics_unavailable_without_prometheus_client(client):
+    assert client.get("/metrics").status_code == 503
+
+
+@requires_prometheus
+def test_metrics_exposition(client, monkeypatch):
+    client.get("/health")
+    client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "x"})
+    with metrics.track_job("unit_test_job") as run:
+        run.result = 3
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'prosite_http_request_duration_seconds_count{blueprint="auth",endpoint="auth.login",method="POST"' in body
+    assert "prosite_db_pool_checkout_seconds_count" in body
+    assert 'prosite_job_items_total{job="unit_test_job"}' in body
+
+    monkeypatch.setattr(get_config(), "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+@requires_prometheus
+def test_package_and_bare_imports_share_collectors(monkeypatch):
+    import importlib
+    import server.notifications  # noqa: F401
+
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.dirname(__file__)), "server"))
+    bare = importlib.import_module("notifications")
+    bare_metrics = importlib.import_module("metrics")
+
+    assert bare.record_notification is bare_metrics.record_notification
+    assert bare_metrics.NOTIFICATIONS is metrics.NOTIFICATIONS
@@ -0,0 +1,312 @@
+import os
+import tempfile
+import atexit
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, RMCVendor, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_nc_models import NonConformance, SafetyNCScoreReport  # noqa: E402
+from server.concrete_nc_models import (  # noqa: E402
+    ConcreteNCScoreReport, NCIssueSeverity, NCIssueStatus, QualityNCIssue
+)
+from server import concrete_nc_api, nc_sweeper, safety_nc  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+NOW = datetime(2025, 11, 20, 12, 0)  # Thursday of ISO week 2025-W47
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Messages that would have gone out over WhatsApp"""
+    messages = []
+    monkeypatch.setattr(safety_nc, "send_whatsapp_alert", lambda phone, message: messages.append((phone, message)))
+    monkeypatch.setattr(concrete_nc_api, "send_whatsapp_alert", lambda phone, message: messages.append((phone, message)))
+    monkeypatch.setattr(safety_nc, "send_email", lambda *args, **kwargs: True)
+    monkeypatch.setattr(concrete_nc_api, "send_email", lambda *args, **kwargs: True)
+    return messages
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="NC Company", subscribed_modules='["safety", "concrete", "concrete_nc"]')
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="NC Project")
+        user = User(
+            email="qm@example.com",
+            phone="9555555555",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+
+        def safety(number, severity, due, closed=False, raised=NOW - timedelta(days=1)):
+            return NonConformance(
+                company_id=company.id, project_id=project.id, nc_number=f"NC-{number}", nc_title="Missing guard rail",
+                nc_description="Edge protection missing", severity=severity, assigned_to_contractor="Acme Builders",
+                assigned_to_user=user.id, due_date=due, raised_by=user.id, raised_at=raised, is_closed=closed,
+                closed_at=raised + timedelta(days=2) if closed else None,
+            )
+
+        def concrete(number, severity, score, deadline, status=NCIssueStatus.RAISED):
+            return QualityNCIssue(
+                company_id=company.id, project_id=project.id, nc_number=f"CNC-{number}", issue_title="Honeycombing",
+                issue_description="Honeycombing at column base", location="Column C-5", tag_ids=[], photo_urls=[],
+                severity=severity, severity_score=score, deadline_date=deadline, raised_by_id=user.id,
+                raised_by_role="quality_manager", raised_at=NOW - timedelta(days=1), assigned_contractor_id=vendor.id,
+                contractor_supervisor_id=user.id, status=status, score_month=11, score_year=2025, score_week=47,
+            )
+
+        session.add_all([
+            safety(1, "critical", NOW - timedelta(hours=1)),  # Overdue
+            safety(2, "major", NOW + timedelta(days=3)),  # Not yet due
+            safety(3, "minor", NOW - timedelta(days=1), closed=True),  # Closed - never flagged
+            concrete(1, NCIssueSeverity.HIGH, 1.0, NOW.date() - timedelta(days=1)),  # Overdue
+            # Closing zeroes severity_score; the report still counts the severity
+            concrete(2, NCIssueSeverity.LOW, 0.0, NOW.date() - timedelta(days=1), NCIssueStatus.CLOSED),
+        ])
+        return {"project_id": project.id, "vendor_id": vendor.id}
+
+
+def _sweep(now=NOW, since=None):
+    with session_scope() as session:
+        return {
+            "safety": nc_sweeper.sweep_safety_overdue(session, now),
+            "concrete": nc_sweeper.sweep_concrete_overdue(session, now),
+            "safety_reports": nc_sweeper.refresh_score_reports(session, nc_sweeper.SAFETY, since),
+            "concrete_reports": nc_sweeper.refresh_score_reports(session, nc_sweeper.CONCRETE, since),
+        }
+
+
+def test_periods():
+    assert nc_sweeper.report_periods(date(2025, 11, 20)) == (("weekly", 2025, 47), ("monthly", 2025, 11))
+    assert nc_sweeper.period_bounds("weekly", 2025, 47) == (date(2025, 11, 17), date(2025, 11, 23))
+    assert nc_sweeper.period_bounds("monthly", 2025, 12) == (date(2025, 12, 1), date(2025, 12, 31))
+    assert nc_sweeper.parse_period("weekly", "2025-W07") == (2025, 7)
+    assert nc_sweeper.period_label("monthly", 2025, 3) == "2025-03"
+    with pytest.raises(ValueError):
+        nc_sweeper.parse_period("monthly", "2025-13")
+
+
+def test_sweep_flags_overdue_once_and_clears_extended(sent):
+    _seed()
+    results = _sweep()
+    assert results["safety"] == {"flagged": 1, "cleared": 0}
+    assert results["concrete"] == {"flagged": 1, "cleared": 0}
+    assert any("NC-1" in message and "OVERDUE" in message for _, message in sent)
+    assert any("CNC-1" in message and "overdue" in message for _, message in sent)
+
+    with session_scope() as session:
+        flags = dict(session.query(NonConformance.nc_number, NonConformance.is_overdue))
+        assert flags == {"NC-1": True, "NC-2": False, "NC-3": False}
+        assert session.query(QualityNCIssue.is_overdue).filter_by(nc_number="CNC-1").scalar() is True
+
+    count = len(sent)
+    assert _sweep()["safety"] == {"flagged": 0, "cleared": 0}
+    assert len(sent) == count  # Notified once only
+
+    with session_scope() as session:
+        session.query(NonConformance).filter_by(nc_number="NC-1").one().due_date = NOW + timedelta(days=7)
+    assert _sweep()["safety"] == {"flagged": 0, "cleared": 1}
+
+
+def test_score_reports_are_precomputed_and_served(client, sent):
+    seeded = _seed()
+    assert _sweep()["safety_reports"] == 2  # Weekly + monthly for one contractor
+
+    with session_scope() as session:
+        weekly = session.query(SafetyNCScoreReport).filter_by(report_type="weekly").one()
+        assert (weekly.period, weekly.total_issues_count, weekly.closed_issues_count) == ("2025-W47", 3, 1)
+        assert weekly.overdue_issues_count == 1
+        assert weekly.total_score == pytest.approx(0.25 / 1.75 * 10)
+        assert weekly.performance_grade == "F"
+        assert weekly.avg_resolution_days == pytest.approx(2.0)
+
+        monthly = session.query(ConcreteNCScoreReport).filter_by(report_type="monthly").one()
+        assert (monthly.total_issues_raised, monthly.issues_closed, monthly.issues_overdue) == (2, 1, 1)
+        assert monthly.total_score == pytest.approx(0.25 / 1.25 * 10)
+
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(
+        f"/api/concrete/nc/reports/weekly?project_id={seeded['project_id']}"
+        f"&contractor_id={seeded['vendor_id']}&period=2025-W47",
+        headers=headers,
+    )
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["report"]["issuesOverdue"] == 1 and len(body["issues"]) == 2
+
+    response = client.get(
+        f"/api/safety/nc/reports/monthly?project_id={seeded['project_id']}&contractor=Acme Builders&period=2025-11",
+        headers=headers,
+    )
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["report"]["critical_count"] == 1
+
+
+def test_issue_closed_through_the_api_counts_as_closed_points(client, sent):
+    seeded = _seed()
+    with session_scope() as session:
+        issue = session.query(QualityNCIssue).filter_by(nc_number="CNC-1").one()
+        issue.status = NCIssueStatus.VERIFIED
+        issue_id = issue.id
+
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    response = client.post(f"/api/concrete/nc/{issue_id}/close", json={"remarks": "Repaired"},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.get_json()
+
+    _sweep()
+    with session_scope() as session:
+        assert session.query(QualityNCIssue.severity_score).filter_by(id=issue_id).scalar() == 0.0
+        monthly = session.query(ConcreteNCScoreReport).filter_by(
+            report_type="monthly", contractor_id=seeded["vendor_id"]
+        ).one()
+        assert monthly.issues_closed == 2
+        assert (monthly.total_score, monthly.performance_grade) == (pytest.approx(10.0), "A")
+
+
+def test_incremental_refresh_only_recomputes_touched_periods(sent):
+    _seed()
+    _sweep()
+    with session_scope() as session:
+        session.query(NonConformance).filter_by(nc_number="NC-1").one().is_closed = True
+
+    # Nothing updated after the cutoff -> no rows rewritten
+    assert _sweep(since=datetime.utcnow() + timedelta(minutes=1))["safety_reports"] == 0
+    assert _sweep(since=datetime.utcnow() - timedelta(minutes=1))["safety_reports"] == 2
+    with session_scope() as session:
+        weekly = session.query(SafetyNCScoreReport).filter_by(report_type="weekly").one()
+        assert (weekly.closed_issues_count, weekly.overdue_issues_count) == (2, 0)
+
+
+def test_overdue_flags_are_committed_before_notifying(monkeypatch):
+    from sqlalchemy import text
+
+    _seed()
+    flags_seen = []
+
+    def whatsapp(phone, message):
+        # A separate connection only sees the flag once the sweep committed it
+        with engine.connect() as connection:
+            flags_seen.append(connection.execute(
+                text("SELECT is_overdue FROM safety_non_conformances WHERE nc_number = 'NC-1'")
+            ).scalar())
+
+    monkeypatch.setattr(safety_nc, "send_whatsapp_alert", whatsapp)
+    monkeypatch.setattr(safety_nc, "send_email", lambda *args, **kwargs: True)
+    with session_scope() as session:
+        nc_sweeper.sweep_safety_overdue(session, NOW)
+    assert flags_seen and all(flags_seen)
+
+
+def test_report_endpoints_never_write_and_check_the_company(client, sent):
+    seeded = _seed()
+    with session_scope() as session:
+        other = Company(name="Other Company", subscribed_modules='["safety", "concrete", "concrete_nc"]')
+        session.add(other)
+        session.flush()
+        session.add(User(email="other@example.com", phone="9555555556", full_name="Other",
+                         password_hash=hash_password("Password123!"), company_id=other.id))
+
+    def headers(email):
+        token = client.post("/api/auth/login", json={"email": email, "password": "Password123!"}).get_json()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    safety_url = f"/api/safety/nc/reports/weekly?project_id={seeded['project_id']}&contractor=Acme Builders&period=2025-W47"
+    concrete_url = (f"/api/concrete/nc/reports/monthly?project_id={seeded['project_id']}"
+                    f"&contractor_id={seeded['vendor_id']}&period=2025-11")
+
+    # Never swept: computed on the fly, nothing stored
+    response = client.get(safety_url, headers=headers("qm@example.com"))
+    assert response.status_code == 200, response.get_json()
+    report = response.get_json()["report"]
+    assert report["id"] is None and report["total_issues_count"] == 3
+    assert client.get(concrete_url, headers=headers("qm@example.com")).get_json()["report"]["totalIssuesRaised"] == 2
+    with session_scope() as session:
+        assert session.query(SafetyNCScoreReport).count() == 0
+        assert session.query(ConcreteNCScoreReport).count() == 0
+
+    assert client.get(safety_url, headers=headers("other@example.com")).status_code == 404
+    assert client.get(concrete_url, headers=headers("other@example.com")).status_code == 404
+
+
+def test_sweeps_never_overlap(client, sent):
+    from server import job_locks
+
+    _seed()
+    with session_scope() as session:
+        session.query(User).filter_by(email="qm@example.com").one().is_company_admin = 1
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    url = "/api/background-jobs/run-nc-sweep"
+
+    holder = job_locks.acquire_job_lock("nc_sweep", 60)  # A sweep in progress (e.g. cron)
+    assert holder and job_locks.acquire_job_lock("nc_sweep", 60) is None
+    assert nc_sweeper.run_nc_sweep() == {"skipped": "locked"}
+    assert client.post(url, headers={"Authorization": f"Bearer {token}"}).status_code == 409
+    with session_scope() as session:
+        assert session.query(SafetyNCScoreReport).count() == 0
+
+    job_locks.release_job_lock("nc_sweep", holder)
+    response = client.post(url, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["results"]["safety_reports"] == 2
+
+    # A lock left behind by a crashed run is taken over once it expires
+    assert job_locks.acquire_job_lock("nc_sweep", -1)
+    assert job_locks.acquire_job_lock("nc_sweep", 60)
@@ -0,0 +1,250 @@
+import os
+import tempfile
+import atexit
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_nc_models import ContractorNotification, NotificationUnreadCounter  # noqa: E402
+from server import notification_stream  # noqa: E402
+from server.notification_stream import LocalBroker, NotificationHub, rebuild_unread_counters  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    hub = NotificationHub(LocalBroker())
+    previous = notification_stream.set_hub(hub)
+    yield hub
+    notification_stream.set_hub(previous)
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Notify Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Notify Project")
+        user = User(
+            email="contractor@example.com",
+            phone="9666666666",
+            full_name="Contractor",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+        return {"company_id": company.id, "project_id": project.id, "user_id": user.id}
+
+
+def _notification(seeded, subject="NC raised", status="sent"):
+    return ContractorNotification(
+        company_id=seeded["company_id"], project_id=seeded["project_id"], notification_type="nc_raised",
+        notification_channel="in_app", recipient_user=seeded["user_id"], subject=subject, message=subject,
+        delivery_status=status,
+    )
+
+
+def _counter(user_id):
+    with session_scope() as session:
+        return session.get(NotificationUnreadCounter, user_id).unread
+
+
+def _drain(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def _token(client):
+    return client.post(
+        "/api/auth/login", json={"email": "contractor@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+
+
+def test_unread_counter_follows_orm_writes_and_publishes_after_commit(reset_database):
+    seeded = _seed()
+    subscription = reset_database.subscribe(seeded["user_id"])
+
+    with session_scope() as session:
+        session.add_all([_notification(seeded, "A"), _notification(seeded, "B"), _notification(seeded, "C", "read")])
+    assert _counter(seeded["user_id"]) == 2
+    messages = _drain(subscription)
+    assert [m["data"]["subject"] for m in messages if m["event"] == "notification"] == ["A", "B", "C"]
+    assert messages[-1] == {"event": "unread", "data": {"count": 2}}
+
+    with session_scope() as session:
+        notification = session.query(ContractorNotification).filter_by(subject="A").one()
+        notification.delivery_status = "read"
+    assert _counter(seeded["user_id"]) == 1
+
+    session = SessionLocal()
+    session.add(_notification(seeded, "D"))
+    session.flush()
+    session.rollback()
+    SessionLocal.remove()
+    assert _counter(seeded["user_id"]) == 1
+    assert _drain(subscription) == [{"event": "unread", "data": {"count": 1}}]  # Nothing from the rollback
+
+    with session_scope() as session:
+        assert rebuild_unread_counters(session) == 1
+    assert _counter(seeded["user_id"]) == 1
+
+
+def test_counter_seeded_concurrently_is_added_to_not_duplicated(monkeypatch):
+    seeded = _seed()
+    count_unread = notification_stream._count_unread
+
+    def seeded_meanwhile(session, user_id):
+        # Another transaction creates the user's first counter row between our UPDATE and INSERT
+        session.execute(NotificationUnreadCounter.__table__.insert().values(user_id=user_id, unread=5))
+        return count_unread(session, user_id)
+
+    monkeypatch.setattr(notification_stream, "_count_unread", seeded_meanwhile)
+    with session_scope() as session:
+        session.add(_notification(seeded))
+    assert _counter(seeded["user_id"]) == 6
+
+
+def test_bulk_mark_read_and_unread_count(client):
+    seeded = _seed()
+    with session_scope() as session:
+        session.add_all([_notification(seeded, f"N{i}") for i in range(4)])
+        session.flush()
+        ids = [n.id for n in session.query(ContractorNotification).order_by(ContractorNotification.id)]
+    headers = {"Authorization": f"Bearer {_token(client)}"}
+
+    response = client.post("/api/notifications/read", json={"ids": ids[:2]}, headers=headers)
+    assert response.get_json() == {"success": True, "updated": 2, "unread": 2}
+    assert client.get("/api/notifications/unread-count", headers=headers).get_json()["unread"] == 2
+
+    response = client.post("/api/notifications/read", json={"all": True}, headers=headers)
+    assert response.get_json() == {"success": True, "updated": 2, "unread": 0}
+    assert client.post("/api/notifications/read", json={"ids": []}, headers=headers).status_code == 400
+
+    listing = client.get("/api/safety/nc/notifications", headers=headers).get_json()
+    assert listing["unread"] == 0
+    assert {n["delivery_status"] for n in listing["notifications"]} == {"read"}
+
+
+def test_stream_replays_missed_notifications_then_pushes_new_ones(client, reset_database, monkeypatch):
+    monkeypatch.setattr(notification_stream.config_obj, "NOTIFICATION_HEARTBEAT_SECONDS", 1)
+    monkeypatch.setattr(notification_stream.config_obj, "NOTIFICATION_STREAM_MAX_SECONDS", 5)
+    seeded = _seed()
+    with session_scope() as session:
+        first, second = _notification(seeded, "Seen"), _notification(seeded, "Missed")
+        session.add_all([first, second])
+        session.flush()
+        first_id = first.id
+
+    response = client.get(
+        f"/api/notifications/stream?jwt={_token(client)}", headers={"Last-Event-ID": str(first_id)}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    chunks = (chunk.decode() for chunk in response.response)
+    assert next(chunks).startswith("retry:")
+    replayed = next(chunks)
+    assert replayed.startswith(f"id: {first_id + 1}\nevent: notification\n") and "Missed" in replayed
+    assert next(chunks) == 'event: unread\ndata: {"count": 2}\n\n'
+    assert reset_database.subscriber_count() == 1
+
+    with session_scope() as session:
+        session.add(_notification(seeded, "Live"))
+    live = next(chunks)
+    assert "event: notification" in live and "Live" in live
+    assert next(chunks) == 'event: unread\ndata: {"count": 3}\n\n'
+
+    response.close()
+    assert reset_database.subscriber_count() == 0
+
+
+def test_stream_refused_under_sync_workers_and_broker_failures_never_break_commits(client, reset_database,
+                                                                                   monkeypatch):
+    seeded = _seed()
+    url = f"/api/notifications/stream?jwt={_token(client)}"
+    sync_worker = {"gunicorn.socket": object(), "wsgi.multithread": False}
+    assert client.get(url, environ_overrides=sync_worker).status_code == 503
+    assert reset_database.subscriber_count() == 0
+
+    def broken_hub():
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(notification_stream, "get_hub", broken_hub)
+    with session_scope() as session:
+        session.add(_notification(seeded))
+    assert _counter(seeded["user_id"]) == 1
+
+
+def test_redis_broker_reconnects_and_ends_open_streams(monkeypatch):
+    received, gaps = [], []
+
+    class FakePubSub:
+        def __init__(self, broker, attempt):
+            self.broker, self.attempt = broker, attempt
+
+        def psubscribe(self, pattern):
+            if self.attempt == 0:
+                raise ConnectionError("connection refused")
+
+        def listen(self):
+            yield {"channel": b"prosite:notifications:7", "data": '{"event": "unread"}'}
+            self.broker.close()
+            raise ConnectionError("closed")
+
+        def close(self):
+            pass
+
+    class FakeClient:
+        attempts = 0
+
+        def pubsub(self, ignore_subscribe_messages):
+            pubsub = FakePubSub(broker, FakeClient.attempts)
+            FakeClient.attempts += 1
+            return pubsub
+
+    class FakeRedis:
+        @staticmethod
+        def from_url(url):
+            return FakeClient()
+
+    monkeypatch.setattr(notification_stream, "redis", type("redis", (), {"Redis": FakeRedis}))
+    broker = notification_stream.RedisBroker("redis://localhost:6379/0")
+
+    broker._listen(lambda user_id, message: received.append((user_id, message)), lambda: gaps.append(1))
+    assert received == [(7, {"event": "unread"})]
+    assert gaps == [1] and FakeClient.attempts == 2
@@ -0,0 +1,204 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, PourActivity, Project, ProjectMembership, RMCVendor,
+    TestReminder, ThirdPartyLab, User
+)
+from server.auth import hash_password  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed_pour(truck_count, concrete_type="Normal") -> dict:
+    with session_scope() as session:
+        company = Company(name="Pour Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Pour Project")
+        user = User(
+            email="engineer@example.com",
+            phone="9555555555",
+            full_name="Site Engineer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_engineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351)
+        session.add(mix)
+        session.flush()
+
+        pour = PourActivity(
+            project_id=project.id,
+            pour_id="POUR-2025-001",
+            pour_date=datetime(2025, 11, 10, 9, 0),
+            structural_element_type="Slab",
+            concrete_type=concrete_type,
+            design_grade="M30",
+            total_quantity_planned=float(truck_count * 6),
+            created_by=user.id,
+        )
+        session.add(pour)
+        session.flush()
+
+        for i in range(truck_count):
+            session.add(BatchRegister(
+                project_id=project.id,
+                mix_design_id=mix.id,
+                rmc_vendor_id=vendor.id,
+                batch_number=f"B-{i:03d}",
+                delivery_date=datetime(2025, 11, 10, 9, 0),
+                quantity_ordered=6.0,
+                quantity_received=6.0,
+                entered_by=user.id,
+                pour_activity_id=pour.id,
+            ))
+
+        return {"email": user.email, "pour_id": pour.id}
+
+
+def _login(client, email):
+    token = client.post(
+        "/api/auth/login", json={"email": email, "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_complete_pour_casts_all_cube_sets_in_one_request(client):
+    seeded = _seed_pour(truck_count=20, concrete_type="PT")
+    headers = _login(client, seeded["email"])
+
+    response = client.post(
+        f"/api/pour-activities/{seeded['pour_id']}/complete",
+        json={"cubeSets": {"castingDate": "2025-11-10T10:00:00"}},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["showCubeModal"] is False
+    assert len(body["cubeTests"]) == len(body["reminders"]) == 80
+
+    with session_scope() as session:
+        tests = session.query(CubeTestRegister).all()
+        assert len(tests) == 80
+        assert {t.test_age_days for t in tests} == {5, 7, 28, 56}
+        assert all(t.pour_activity_id == seeded["pour_id"] and t.concrete_type == "PT" for t in tests)
+        assert all(t.required_strength_mpa == 30.0 for t in tests)
+
+        reminders = {r.cube_test_id: r for r in session.query(TestReminder).all()}
+        for test in tests:
+            assert reminders[test.id].test_age_days == test.test_age_days
+        five_day = next(t for t in tests if t.test_age_days == 5)
+        assert reminders[five_day.id].reminder_date == datetime(2025, 11, 15, 10, 0)
+
+
+def test_cube_sets_endpoint_requires_completed_pour_and_is_not_repeated(client):
+    seeded = _seed_pour(truck_count=3)
+    headers = _login(client, seeded["email"])
+    url = f"/api/pour-activities/{seeded['pour_id']}/cube-sets"
+
+    assert client.post(url, json={}, headers=headers).status_code == 400
+
+    with session_scope() as session:
+        lab = ThirdPartyLab(company_id=session.query(Project).one().company_id, lab_name="NABL Lab",
+                            lab_code="LAB-1", contact_person_name="Lab", contact_phone="9222222222",
+                            contact_email="lab@example.com")
+        session.add(lab)
+        session.flush()
+        lab_id = lab.id
+
+    client.post(f"/api/pour-activities/{seeded['pour_id']}/complete", json={}, headers=headers)
+    response = client.post(url, json={"testAges": [7, 28], "thirdPartyLabAssignments": {"28": lab_id}},
+                           headers=headers)
+    assert response.status_code == 201, response.get_json()
+    assert {(t["testAgeDays"], t["thirdPartyLabId"]) for t in response.get_json()["cubeTests"]} == {
+        (7, None), (28, lab_id)
+    }
+    assert [(t["batchId"], t["setNumber"]) for t in response.get_json()["cubeTests"]][:2] == [(1, 1), (1, 2)]
+
+    assert client.post(url, json={}, headers=headers).status_code == 409
+
+
+def test_cube_casting_requires_project_access_and_valid_options(client):
+    seeded = _seed_pour(truck_count=2)
+    with session_scope() as session:
+        other = Company(name="Other Company")
+        session.add(other)
+        session.flush()
+        session.add(User(email="outsider@example.com", phone="9333333333", full_name="Outsider",
+                         password_hash=hash_password("Password123!"), company_id=other.id))
+        other_lab = ThirdPartyLab(company_id=other.id, lab_name="Other Lab", lab_code="OTH-1",
+                                  contact_person_name="Lab", contact_phone="9222222222",
+                                  contact_email="lab@example.com")
+        session.add(other_lab)
+        session.flush()
+        other_lab_id = other_lab.id
+    outsider = _login(client, "outsider@example.com")
+    headers = _login(client, seeded["email"])
+    complete_url = f"/api/pour-activities/{seeded['pour_id']}/complete"
+    cube_url = f"/api/pour-activities/{seeded['pour_id']}/cube-sets"
+
+    assert client.post(complete_url, json={"cubeSets": {}}, headers=outsider).status_code == 403
+    for bad in ({"setsPerAge": 0}, {"setsPerAge": 500}, {"setsPerAge": "2"},
+                {"testAges": [7, -1]}, {"testAges": "28"}, {"castingDate": "yesterday"},
+                {"thirdPartyLabAssignments": {"28": other_lab_id}}, {"thirdPartyLabAssignments": {"28": "x"}}):
+        response = client.post(complete_url, json={"cubeSets": bad}, headers=headers)
+        assert response.status_code == 400, (bad, response.get_json())
+    with session_scope() as session:
+        assert session.get(PourActivity, seeded["pour_id"]).status != "completed"
+
+    assert client.post(complete_url, json={}, headers=headers).status_code == 200
+    assert client.post(cube_url, json={}, headers=outsider).status_code == 403
+    assert client.post(cube_url, json={"testAges": [7, 400]}, headers=headers).status_code == 400
+    with session_scope() as session:
+        assert session.query(CubeTestRegister).count() == 0
@@ -0,0 +1,240 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.tbt_models import TBTAttendance, TBTSession  # noqa: E402
+from server.safety_nc_models import ContractorNotification, NotificationUnreadCounter  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.config import get_config  # noqa: E402
+from server.project_archive import (  # noqa: E402
+    ProjectArchiveError, archive_project, project_tables, restore_project, run_project_archive_requests
+)
+
+PHOTO = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_config(), "PROJECT_ARCHIVE_DIR", tmp_path / "archives")
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Archive Company")
+        session.add(company)
+        session.flush()
+        closed = Project(company_id=company.id, name="Closed Tower", status="completed")
+        live = Project(company_id=company.id, name="Live Tower")
+        admin = User(
+            email="admin@example.com",
+            phone="9666666666",
+            full_name="Company Admin",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+            is_company_admin=1,
+        )
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@example.com")
+        session.add_all([closed, live, admin, vendor])
+        session.flush()
+        mixes = {}
+        for project in (closed, live):
+            session.add(ProjectMembership(project_id=project.id, user_id=admin.id, role="site_engineer"))
+            mixes[project.id] = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                                          specified_strength_psi=4351, concrete_grade="M30", image_data=PHOTO)
+            session.add(mixes[project.id])
+        session.flush()
+
+        batches = []
+        for number, project in (("B-001", closed), ("B-002", closed), ("B-101", live)):
+            batch = BatchRegister(
+                project_id=project.id, mix_design_id=mixes[project.id].id, rmc_vendor_id=vendor.id,
+                batch_number=number, delivery_date=datetime(2025, 6, 1, 9, 0), quantity_ordered=6.5,
+                entered_by=admin.id, batch_sheet_photo_data=PHOTO if project is closed else None,
+            )
+            session.add(batch)
+            batches.append(batch)
+        session.flush()
+        session.add(CubeTestRegister(project_id=closed.id, batch_id=batches[0].id, set_number=1, test_age_days=28,
+                                     casting_date=datetime(2025, 6, 1), cast_by=admin.id,
+                                     tester_signature_data=b"sig"))
+        tbt = TBTSession(project_id=closed.id, conductor_id=admin.id, conductor_name="Company Admin",
+                         topic="Working at height", location="Core", activity="Shuttering")
+        session.add(tbt)
+        session.flush()
+        session.add(TBTAttendance(session_id=tbt.id, worker_name="Ravi"))  # No project_id: follows its session
+        return {"closed_id": closed.id, "live_id": live.id, "closed_mix_id": mixes[closed.id].id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "admin@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _run_queued(client, headers, response):
+    """Carry out the request queued by `response` and return its final state"""
+    assert response.status_code == 202, response.get_json()
+    request_id = response.get_json()["request"]["id"]
+    run_project_archive_requests()
+    return client.get(f"/api/projects/archive-requests/{request_id}", headers=headers).get_json()["request"]
+
+
+def _counts(project_id):
+    with session_scope() as session:
+        return {
+            "batches": session.query(BatchRegister).filter_by(project_id=project_id).count(),
+            "cubes": session.query(CubeTestRegister).filter_by(project_id=project_id).count(),
+            "mixes": session.query(MixDesign).filter_by(project_id=project_id).count(),
+            "members": session.query(ProjectMembership).filter_by(project_id=project_id).count(),
+            "attendances": session.query(TBTAttendance).count(),
+        }
+
+
+def test_project_graph_follows_foreign_keys():
+    tables = {table.name: parent_fk for table, parent_fk in project_tables()}
+    assert tables["batch_registers"] is None  # Own project_id
+    assert tables["tbt_attendances"].column.table.name == "tbt_sessions"
+    assert tables["permit_audit_logs"].column.table.name == "work_permits"
+    assert "projects" not in tables and "project_archives" not in tables and "users" not in tables
+    assert "project_archive_requests" not in tables
+    order = list(tables)
+    assert order.index("tbt_sessions") < order.index("tbt_attendances")
+
+
+def test_archive_browse_and_restore_round_trip(client):
+    ids = _seed()
+    headers = _headers(client)
+    before = _counts(ids["closed_id"])
+
+    response = client.post(f"/api/projects/{ids['live_id']}/archive", headers=headers)
+    assert response.status_code == 409  # Still active
+
+    response = client.post(f"/api/projects/{ids['closed_id']}/archive", headers=headers)
+    assert _counts(ids["closed_id"]) == before  # Queued, not yet carried out
+    assert client.post(f"/api/projects/{ids['closed_id']}/archive", headers=headers).status_code == 409
+    archive_request = _run_queued(client, headers, response)
+    assert archive_request["status"] == "done", archive_request
+    archive = client.get(f"/api/projects/archives/{archive_request['archive_id']}", headers=headers).get_json()["archive"]
+    assert archive["table_counts"]["batch_registers"] == 2
+    assert archive["blob_count"] == 4  # Mix design image, two batch sheets, one signature
+
+    assert _counts(ids["closed_id"]) == {"batches": 0, "cubes": 0, "mixes": 0, "members": 0, "attendances": 0}
+    assert _counts(ids["live_id"])["batches"] == 1
+    with session_scope() as session:
+        project = session.get(Project, ids["closed_id"])
+        assert (project.status, project.is_active) == ("archived", 0)
+
+    # Read-only browsing, blobs served from the archive
+    response = client.get(f"/api/projects/archives/{archive['id']}", headers=headers)
+    assert response.get_json()["manifest"]["tables"]["cube_test_registers"]["rows"] == 1
+    rows = client.get(f"/api/projects/archives/{archive['id']}/tables/batch_registers?limit=1",
+                      headers=headers).get_json()["rows"]
+    assert [row["batch_number"] for row in rows] == ["B-001"]
+    blob = rows[0]["batch_sheet_photo_data"]["$blob"]
+    response = client.get(f"/api/projects/archives/{archive['id']}/{blob}", headers=headers)
+    assert response.status_code == 200 and response.data == PHOTO
+
+    response = client.post(f"/api/projects/archives/{archive['id']}/restore", headers=headers)
+    assert _run_queued(client, headers, response)["status"] == "done"
+    response = client.get(f"/api/projects/archives/{archive['id']}", headers=headers)
+    assert response.get_json()["archive"]["status"] == "restored"
+    assert _counts(ids["closed_id"]) == before
+    with session_scope() as session:
+        batch = session.query(BatchRegister).filter_by(batch_number="B-001").one()
+        assert batch.batch_sheet_photo_data == PHOTO
+        assert batch.delivery_date == datetime(2025, 6, 1, 9, 0) and batch.quantity_ordered == 6.5
+        restored = session.get(Project, ids["closed_id"])
+        assert (restored.status, restored.is_active) == ("completed", 1)
+
+    response = client.post(f"/api/projects/archives/{archive['id']}/restore", headers=headers)
+    assert response.status_code == 409  # Already restored
+
+
+def test_archive_is_blocked_by_outside_references(tmp_path):
+    ids = _seed()
+    with session_scope() as session:
+        session.query(BatchRegister).filter_by(batch_number="B-101").one().mix_design_id = ids["closed_mix_id"]
+
+    with pytest.raises(ProjectArchiveError, match="batch_registers.mix_design_id -> mix_designs"):
+        archive_project(ids["closed_id"], archive_dir=tmp_path)
+    assert _counts(ids["closed_id"])["batches"] == 2
+    assert list(tmp_path.rglob("*.zip")) == []
+
+
+def test_failed_archive_request_is_recorded(client):
+    ids = _seed()
+    headers = _headers(client)
+    with session_scope() as session:
+        session.query(BatchRegister).filter_by(batch_number="B-101").one().mix_design_id = ids["closed_mix_id"]
+
+    response = client.post(f"/api/projects/{ids['closed_id']}/archive", headers=headers)
+    archive_request = _run_queued(client, headers, response)
+    assert archive_request["status"] == "failed" and "mix_designs" in archive_request["error"]
+    assert archive_request["archive_id"] is None
+    assert _counts(ids["closed_id"])["batches"] == 2
+    assert run_project_archive_requests() == {"done": 0, "failed": 0}  # Nothing left queued
+
+
+def test_archive_and_restore_keep_unread_counters_in_step():
+    ids = _seed()
+    with session_scope() as session:
+        admin = session.query(User).one()
+        for project_id, status in ((ids["closed_id"], "sent"), (ids["closed_id"], "read"), (ids["live_id"], "sent")):
+            session.add(ContractorNotification(
+                company_id=admin.company_id, project_id=project_id, notification_type="nc_raised",
+                notification_channel="in_app", recipient_user=admin.id, subject="NC raised", message="NC raised",
+                delivery_status=status,
+            ))
+        admin_id = admin.id
+
+    def unread():
+        with session_scope() as session:
+            return session.get(NotificationUnreadCounter, admin_id).unread
+
+    assert unread() == 2
+    archive = archive_project(ids["closed_id"])
+    assert unread() == 1  # Only the live project's notification is left
+    restore_project(archive["id"])
+    assert unread() == 2
@@ -0,0 +1,178 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from flask import jsonify  # noqa: E402
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.config import get_config  # noqa: E402
+from server.query_profiler import (  # noqa: E402
+    QueryBudgetExceeded, fingerprint, history, profile_block, query_budget
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+def _users_one_by_one():
+    """Deliberate N+1: one SELECT per user"""
+    with session_scope() as session:
+        ids = [user_id for (user_id,) in session.query(User.id).order_by(User.id)]
+        names = []
+        for user_id in ids:
+            names.append(session.query(User.full_name).filter(User.id == user_id).scalar())
+    return jsonify({"names": names})
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    application.add_url_rule("/_test/users-one-by-one", "users_one_by_one", _users_one_by_one)
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database(monkeypatch):
+    monkeypatch.setattr(get_config(), "QUERY_PROFILE_HEADERS", True)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    history.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _seed(batches=1) -> dict:
+    with session_scope() as session:
+        company = Company(name="Profiler Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Profiler Project")
+        engineer = User(email="qe@example.com", phone="9777777777", full_name="Quality Engineer",
+                        password_hash=hash_password("Password123!"), company_id=company.id)
+        admin = User(email="support@example.com", phone="9888888888", full_name="Support Admin",
+                     password_hash=hash_password("Password123!"), is_support_admin=1)
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@example.com")
+        session.add_all([project, engineer, admin, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=engineer.id, role="quality_engineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        session.add_all([
+            User(email=f"viewer{i}@example.com", phone=f"95555{i:05d}", full_name=f"Viewer {i}",
+                 password_hash="x", company_id=company.id)
+            for i in range(6)
+        ])
+        project_id, engineer_id, mix_id, vendor_id = project.id, engineer.id, mix.id, vendor.id
+    _add_batches(project_id, engineer_id, mix_id, vendor_id, batches)
+    return {"project_id": project_id, "engineer_id": engineer_id, "mix_id": mix_id, "vendor_id": vendor_id}
+
+
+def _add_batches(project_id, engineer_id, mix_id, vendor_id, count, start=0):
+    with session_scope() as session:
+        for i in range(start, start + count):
+            batch = BatchRegister(project_id=project_id, mix_design_id=mix_id, rmc_vendor_id=vendor_id,
+                                  batch_number=f"B-{i:03d}", delivery_date=datetime(2025, 11, 1, 9, 0),
+                                  quantity_ordered=6.0, entered_by=engineer_id)
+            session.add(batch)
+            session.flush()
+            session.add_all([
+                CubeTestRegister(project_id=project_id, batch_id=batch.id, set_number=1, test_age_days=age,
+                                 casting_date=datetime(2025, 11, 1), cast_by=engineer_id)
+                for age in (7, 28)
+            ])
+
+
+def _headers(client, email):
+    token = client.post("/api/auth/login", json={"email": email, "password": "Password123!"}).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    a = fingerprint("SELECT * FROM users WHERE id = 7 AND email = 'a@b.c'")
+    b = fingerprint("SELECT *  FROM users\nWHERE id = %(id_1)s AND email = %(email_1)s")
+    assert a == b == "SELECT * FROM users WHERE id = ? AND email = ?"
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == fingerprint("SELECT 1 FROM t WHERE id IN (?)")
+    assert fingerprint("SELECT a FROM t1") != fingerprint("SELECT a FROM t2")
+
+
+def test_failed_statements_do_not_leak_start_times():
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    with engine.connect() as connection, profile_block("errors"):
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_such_table"))
+        connection.execute(text("SELECT 1"))
+        assert connection.info.get("query_profiler_started") == []
+
+
+def test_n_plus_one_is_flagged_with_callsite_and_server_timing(client):
+    _seed()
+    response = client.get("/_test/users-one-by-one")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and 'queries", app;dur=' in timing
+
+    headers = _headers(client, "support@example.com")
+    payload = client.get("/api/_debug/profile?n_plus_one=1", headers=headers).get_json()
+    [profile] = payload["recent"]
+    assert profile["name"] == "users_one_by_one" and profile["path"] == "/_test/users-one-by-one"
+    [suspect] = profile["n_plus_one"]
+    assert suspect["count"] == 8  # Engineer, support admin, six viewers
+    assert suspect["callsite"].startswith("tests/test_query_profiler.py:") and "_users_one_by_one" in suspect["callsite"]
+    assert {row["name"] for row in payload["endpoints"]} >= {"users_one_by_one", "auth.login"}
+
+
+def test_debug_profile_is_support_admin_only(client):
+    _seed()
+    response = client.get("/api/_debug/profile", headers=_headers(client, "qe@example.com"))
+    assert response.status_code == 403
+    assert client.get("/api/_debug/profile").status_code == 401
+
+
+def test_cube_test_list_query_count_does_not_grow_with_rows(client):
+    ids = _seed(batches=2)
+    headers = _headers(client, "qe@example.com")
+    url = f"/api/cube-tests?project_id={ids['project_id']}"
+
+    with query_budget(50, n_plus_one=True) as few:
+        assert client.get(url, headers=headers).status_code == 200
+    _add_batches(ids["project_id"], ids["engineer_id"], ids["mix_id"], ids["vendor_id"], 20, start=2)
+    with query_budget(few.profile.queries, n_plus_one=True):
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+
+    with pytest.raises(QueryBudgetExceeded, match=r"budget: \d+ queries \(budget 1\)"):
+        with query_budget(1):
+            client.get(url, headers=headers)
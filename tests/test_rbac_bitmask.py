@@ -0,0 +1,150 @@
+import os
+import tempfile
+import atexit
+
+import pytest
+from flask import jsonify
+from flask_jwt_extended import create_access_token, decode_token
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.rbac import (  # noqa: E402
+    ALL_PERMISSIONS_MASK, PERMISSION_BITS, PERMISSION_MASK_VERSION, Permission, RBACManager, UserRole,
+    decode_mask, encode_mask, get_role_from_string, require_permission,
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+
+    @application.post("/_test/approve-batch")
+    @require_permission(Permission.APPROVE_BATCH, Permission.VIEW_BATCH)
+    def _approve_batch():
+        return jsonify({"ok": True})
+
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _create_user(role) -> int:
+    with session_scope() as session:
+        company = Company(name="RBAC Company")
+        session.add(company)
+        session.flush()
+        user = User(
+            email=f"{role}@example.com",
+            phone="9666666666",
+            full_name="RBAC User",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+            role=role,
+        )
+        session.add(user)
+        session.flush()
+        return user.id
+
+
+def _login(client, email):
+    return client.post("/api/auth/login", json={"email": email, "password": "Password123!"}).get_json()
+
+
+def test_compiled_masks_match_permission_sets():
+    assert len(set(PERMISSION_BITS.values())) == len(Permission)
+    # Positions are fixed by the table, not by enum order
+    assert PERMISSION_BITS[Permission.VIEW_DASHBOARD] == 1
+    assert PERMISSION_BITS[Permission.EDIT_BUDGET] == 1 << 65
+    assert decode_mask(encode_mask(ALL_PERMISSIONS_MASK)) == ALL_PERMISSIONS_MASK
+    assert decode_mask("not-hex") is None and decode_mask(3) is None
+    for role, permissions in RBACManager.ROLE_PERMISSIONS.items():
+        for permission in Permission:
+            assert RBACManager.has_permission(role, permission) == (permission in permissions)
+
+    assert RBACManager.get_accessible_modules(UserRole.SYSTEM_ADMIN)[0] == "dashboard"
+    assert "settings" not in RBACManager.get_accessible_modules(UserRole.WATCHMAN)
+    assert RBACManager.can_access_module(UserRole.WATCHMAN, "gate_register")
+    assert not RBACManager.can_access_module(UserRole.WATCHMAN, "unknown_module")
+    assert get_role_from_string("not-a-role") is UserRole.WATCHMAN
+
+
+def test_require_permission_checks_token_mask(client):
+    _create_user("quality_manager")
+    tokens = _login(client, "quality_manager@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    assert client.post("/_test/approve-batch", headers=headers).status_code == 200
+
+    body = client.get("/api/auth/permissions", headers=headers).get_json()
+    assert body["role"] == "quality_manager"
+    assert "approve_batch" in body["permissions"]
+    assert "batches" in body["modules"]
+
+    # Demote: the old token still carries the old mask until refreshed
+    with session_scope() as session:
+        session.query(User).one().role = "watchman"
+    refreshed = client.post(
+        "/api/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    ).get_json()
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    assert client.post("/_test/approve-batch", headers=headers).status_code == 403
+
+
+def test_require_permission_falls_back_for_tokens_without_mask(app, client):
+    user_id = _create_user("building_engineer")
+    with session_scope() as session:
+        session.get(User, user_id).is_system_admin = True
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.post("/_test/approve-batch", headers=headers).status_code == 200
+    assert client.get("/api/auth/permissions", headers=headers).status_code == 401
+
+    # Integer masks and other mask versions are not trusted either
+    with app.app_context():
+        legacy = create_access_token(identity=str(user_id), additional_claims={"perm": 0})
+        stale = create_access_token(
+            identity=str(user_id), additional_claims={"perm": "0", "pv": PERMISSION_MASK_VERSION + 1}
+        )
+    for token in (legacy, stale):
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.post("/_test/approve-batch", headers=headers).status_code == 200
+        assert client.get("/api/auth/permissions", headers=headers).status_code == 401
+
+    tokens = _login(client, "building_engineer@example.com")
+    with app.app_context():
+        claims = decode_token(tokens["access_token"])
+    assert claims["pv"] == PERMISSION_MASK_VERSION
+    assert decode_mask(claims["perm"]) == ALL_PERMISSIONS_MASK
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import atexit
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import ApprovedBrand, Company, MaterialCategory, User  # noqa: E402
+from server.permit_to_work_models import PermitType  # noqa: E402
+from server.tbt_models import TBTTopic  # noqa: E402
+from server.safety_audit_models import AuditChecklist, AuditType  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.tenancy import tenant_cache  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    tenant_cache.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company, other = Company(name="Ref Company"), Company(name="Other Company")
+        session.add_all([company, other])
+        session.flush()
+        user = User(
+            email="so@example.com",
+            phone="9666666666",
+            full_name="Safety Officer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add(user)
+        session.flush()
+        steel = MaterialCategory(company_id=company.id, category_name="Steel", category_code="STL")
+        session.add(steel)
+        session.flush()
+        session.add_all([
+            ApprovedBrand(company_id=company.id, category_id=steel.id, brand_name="Tata Tiscon",
+                          manufacturer_name="Tata Steel", approved_by=user.id),
+            PermitType(company_id=company.id, permit_type_name="Hot Work", permit_code="HW",
+                       description="Welding and cutting", risk_level="high", created_by=user.id),
+            PermitType(company_id=other.id, permit_type_name="Confined Space", permit_code="CS",
+                       description="Tanks", risk_level="critical", created_by=user.id),
+            PermitType(company_id=company.id, permit_type_name="Retired", permit_code="RT",
+                       description="Old", risk_level="low", created_by=user.id, is_active=False),
+            TBTTopic(company_id=None, topic_name="Housekeeping", category="General"),
+            TBTTopic(company_id=other.id, topic_name="Other Topic", category="General"),
+            AuditChecklist(company_id=company.id, checklist_name="Site Audit", audit_type=AuditType.COMPREHENSIVE,
+                           categories=["PPE"], items=[{"item_id": 1}]),
+            AuditChecklist(company_id=company.id, checklist_name="Deleted Audit", audit_type=AuditType.FOCUSED,
+                           categories=[], items=[], is_deleted=True),
+        ])
+        return {"company_id": company.id, "other_id": other.id, "user_id": user.id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "so@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_reference_data_is_tenant_scoped_snapshot(client):
+    _seed()
+    response = client.get("/api/reference-data", headers=_headers(client))
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert data["version"] > 0
+    assert [c["categoryCode"] for c in data["materialCategories"]] == ["STL"]
+    assert [b["brandName"] for b in data["approvedBrands"]] == ["Tata Tiscon"]
+    assert [p["permit_code"] for p in data["permitTypes"]] == ["HW"]
+    assert [t["topicName"] for t in data["tbtTopics"]] == ["Housekeeping"]
+    assert [c["checklist_name"] for c in data["auditChecklists"]] == ["Site Audit"]
+    assert "SAFETY_HELMET" in data["ppeTypes"]
+
+
+def test_unchanged_version_returns_304_until_a_write(client):
+    ids = _seed()
+    headers = _headers(client)
+    first = client.get("/api/reference-data", headers=headers)
+    version = first.get_json()["version"]
+
+    assert client.get(f"/api/reference-data?version={version}", headers=headers).status_code == 304
+    etag_headers = {**headers, "If-None-Match": first.headers["ETag"]}
+    assert client.get("/api/reference-data", headers=etag_headers).status_code == 304
+
+    # Another company's write leaves this version alone
+    with session_scope() as session:
+        session.add(PermitType(company_id=ids["other_id"], permit_type_name="Height", permit_code="WAH",
+                               description="Scaffolds", risk_level="high", created_by=ids["user_id"]))
+    assert client.get(f"/api/reference-data?version={version}", headers=headers).status_code == 304
+
+    with session_scope() as session:
+        session.add(PermitType(company_id=ids["company_id"], permit_type_name="Excavation", permit_code="EX",
+                               description="Trenches", risk_level="high", created_by=ids["user_id"]))
+    response = client.get(f"/api/reference-data?version={version}", headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["version"] > version
+    assert [p["permit_code"] for p in data["permitTypes"]] == ["EX", "HW"]
+
+    # Global rows (company_id NULL) bump every company's version
+    with session_scope() as session:
+        session.add(TBTTopic(company_id=None, topic_name="Heat Stress", category="Health"))
+    assert client.get(f"/api/reference-data?version={data['version']}", headers=headers).status_code == 200
+
+
+def test_version_bump_upserts_the_counter_row():
+    from server import reference_data
+
+    for _ in range(2):  # Second bump hits the existing row (as a concurrent first edit would)
+        with engine.begin() as connection:
+            reference_data._bump(connection, [7])
+    with session_scope() as session:
+        assert reference_data.reference_data_version(session, 7) == 2
@@ -0,0 +1,169 @@
+import gzip
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server import cube_tests  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed(cube_sets=20) -> dict:
+    with session_scope() as session:
+        company = Company(name="Compression Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Compression Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+        batch = BatchRegister(
+            project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+            batch_number="B-001", delivery_date=datetime(2025, 11, 10, 9, 0),
+            quantity_ordered=6.0, entered_by=user.id, batch_sheet_photo_data=b"\x89PNG",
+        )
+        session.add(batch)
+        session.flush()
+        session.add_all([
+            CubeTestRegister(
+                project_id=project.id, batch_id=batch.id, set_number=i + 1, test_age_days=28,
+                casting_date=datetime(2025, 11, 10, 10, 0), cast_by=user.id,
+            )
+            for i in range(cube_sets)
+        ])
+        return {"project_id": project.id, "batch_id": batch.id}
+
+
+def _headers(client, **extra):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}", **extra}
+
+
+def test_large_list_is_gzip_encoded(client):
+    seeded = _seed()
+    url = f"/api/cube-tests?project_id={seeded['project_id']}"
+
+    plain = client.get(url, headers=_headers(client))
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    encoded = client.get(url, headers=_headers(client, **{"Accept-Encoding": "gzip"}))
+    assert encoded.status_code == 200
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert len(encoded.data) < len(plain.data)
+    assert gzip.decompress(encoded.data) == plain.data
+
+
+def test_small_response_is_not_encoded(client):
+    _seed(cube_sets=0)
+    response = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_matching_etag_returns_304_without_running_view(client, monkeypatch):
+    seeded = _seed()
+    headers = _headers(client)
+    url = f"/api/cube-tests?project_id={seeded['project_id']}"
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("list was rebuilt for an unchanged project")
+
+    monkeypatch.setattr(cube_tests.CUBE_TEST_LIST_SERIALIZER, "dump", fail)
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == etag
+
+    # Different query -> different validator
+    other = client.get(url + "&age=7", headers={**headers, "If-None-Match": etag})
+    assert other.headers.get("ETag") != etag
+
+
+def test_write_to_project_changes_etag(client):
+    seeded = _seed()
+    headers = _headers(client)
+    url = f"/api/batches?project_id={seeded['project_id']}"
+
+    etag = client.get(url, headers=headers).headers["ETag"]
+    with session_scope() as session:
+        session.get(BatchRegister, seeded["batch_id"]).remarks = "Slump rechecked"
+
+    refreshed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.get_json()["batches"][0]["remarks"] == "Slump rechecked"
+
+
+def test_list_without_project_has_no_etag(client):
+    _seed(cube_sets=0)
+    response = client.get("/api/vendors", headers=_headers(client))
+    assert "ETag" not in response.headers
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_audit_models import (  # noqa: E402
+    SafetyAudit, SafetyAuditItem, AuditType, AuditStatus, apply_checklist_updates, create_audit_items
+)
+from server.query_profiler import query_budget  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _create_audit(item_count=5, legacy_items=None) -> dict:
+    with session_scope() as session:
+        company = Company(name="Audit Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Audit Project")
+        user = User(
+            email="auditor@example.com",
+            phone="9888888888",
+            full_name="Lead Auditor",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+
+        audit = SafetyAudit(
+            company_id=company.id,
+            project_id=project.id,
+            audit_number="AUDIT-1-2025-0001",
+            audit_type=AuditType.COMPREHENSIVE,
+            audit_title="Monthly audit",
+            scheduled_date=datetime(2025, 11, 1),
+            lead_auditor_id=user.id,
+            status=AuditStatus.IN_PROGRESS,
+            checklist_items=legacy_items,
+        )
+        session.add(audit)
+        session.flush()
+
+        if legacy_items is None:
+            create_audit_items(session, audit, [
+                {"item_id": f"GH-{i:03d}", "category": "General Housekeeping", "item_description": f"Item {i}"}
+                for i in range(item_count)
+            ])
+
+        return {"audit_id": audit.id, "user_id": user.id, "email": user.email}
+
+
+def test_incremental_counters_match_full_recount():
+    seeded = _create_audit(item_count=6)
+
+    with session_scope() as session:
+        audit = session.get(SafetyAudit, seeded["audit_id"])
+        assert (audit.total_items, audit.not_applicable_items) == (6, 6)
+
+        apply_checklist_updates(session, audit, [
+            {"item_index": 0, "compliant": True},
+            {"item_index": 1, "compliant": True},
+            {"item_index": 2, "compliant": False, "remarks": "Debris on walkway"},
+        ], seeded["user_id"])
+        # Flip one answer and touch a remark without changing compliance
+        apply_checklist_updates(session, audit, [
+            {"item_index": 1, "compliant": False},
+            {"item_index": 0, "remarks": "Good"},
+        ], seeded["user_id"])
+
+    with session_scope() as session:
+        audit = session.get(SafetyAudit, seeded["audit_id"])
+        rows = session.query(SafetyAuditItem).filter_by(audit_id=audit.id).all()
+
+        assert audit.compliant_items == sum(1 for r in rows if r.compliant is True) == 1
+        assert audit.non_compliant_items == sum(1 for r in rows if r.compliant is False) == 2
+        assert audit.not_applicable_items == sum(1 for r in rows if r.compliant is None) == 3
+        assert rows[0].remarks == "Good" and rows[0].compliant is True
+        assert rows[2].remarks == "Debris on walkway"
+
+
+def test_legacy_json_snapshot_is_migrated_on_first_update():
+    legacy = [
+        {"item_id": "PPE-001", "category": "PPE", "compliant": True, "remarks": "", "corrective_action_required": False},
+        {"item_id": "PPE-002", "category": "PPE", "compliant": None, "remarks": "", "corrective_action_required": False},
+    ]
+    seeded = _create_audit(legacy_items=legacy)
+
+    with session_scope() as session:
+        audit = session.get(SafetyAudit, seeded["audit_id"])
+        items = apply_checklist_updates(session, audit, [{"item_index": 1, "compliant": False}], seeded["user_id"])
+        assert items[0]["item_id"] == "PPE-002"
+        assert (audit.compliant_items, audit.non_compliant_items, audit.not_applicable_items) == (1, 1, 0)
+        assert audit.checklist_items is None
+
+
+def test_bulk_endpoint_applies_all_changes_or_none(client):
+    seeded = _create_audit(item_count=4)
+    token = client.post(
+        "/api/auth/login", json={"email": seeded["email"], "password": "Password123!"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/safety-audits/{seeded['audit_id']}/checklist/bulk"
+
+    rejected = client.put(url, json={"items": [
+        {"item_index": 0, "compliant": True},
+        {"item_index": 99, "compliant": True},
+    ]}, headers=headers)
+    assert rejected.status_code == 404
+    for value in (1, 0, "yes"):
+        rejected = client.put(url, json={"items": [{"item_index": 0, "compliant": value}]}, headers=headers)
+        assert rejected.status_code == 400, value
+
+    response = client.put(url, json={"items": [
+        {"item_index": 0, "compliant": True},
+        {"item_index": 1, "compliant": True},
+        {"item_index": 2, "compliant": True},
+        {"item_index": 3, "compliant": False, "corrective_action_required": True},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["scoring"]["compliant_items"] == 3
+    assert body["scoring"]["compliance_percentage"] == 75.0
+    assert body["scoring"]["audit_grade"] == "GOOD"
+    assert body["items"][3]["corrective_action_required"] is True
+
+
+def test_list_loads_checklist_rows_without_n_plus_one(client):
+    seeded = _create_audit(item_count=3)
+    with session_scope() as session:
+        first = session.get(SafetyAudit, seeded["audit_id"])
+        for n in range(2, 8):
+            audit = SafetyAudit(company_id=first.company_id, project_id=first.project_id,
+                                audit_number=f"AUDIT-1-2025-{n:04d}", audit_type=AuditType.COMPREHENSIVE,
+                                audit_title="Monthly audit", scheduled_date=datetime(2025, 11, n),
+                                lead_auditor_id=seeded["user_id"], status=AuditStatus.IN_PROGRESS)
+            session.add(audit)
+            session.flush()
+            create_audit_items(session, audit, [
+                {"item_id": "GH-001", "category": "General Housekeeping", "item_description": "Item"}
+            ])
+    token = client.post(
+        "/api/auth/login", json={"email": seeded["email"], "password": "Password123!"}
+    ).get_json()["access_token"]
+
+    with query_budget(10, n_plus_one=True):
+        response = client.get("/api/safety-audits", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body["count"] == 7
+    assert sorted(len(audit["checklist_items"]) for audit in body["audits"]) == [1, 1, 1, 1, 1, 1, 3]
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import BatchRegister, Company, MixDesign, Project, ProjectMembership, RMCVendor, User  # noqa: E402
+from server.safety_nc_models import NonConformance  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.search import search_documents  # noqa: E402
+from server.search_models import SearchDocument, rebuild_search_index  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company, other = Company(name="Search Company"), Company(name="Other Company")
+        session.add_all([company, other])
+        session.flush()
+        project = Project(company_id=company.id, name="Tower Project")
+        hidden = Project(company_id=company.id, name="Hidden Project")
+        foreign = Project(company_id=other.id, name="Foreign Project")
+        user = User(
+            email="se@example.com",
+            phone="9555555555",
+            full_name="Site Engineer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(company_id=company.id, vendor_name="RMC Co", contact_person_name="Vendor",
+                           contact_phone="9444444444", contact_email="vendor@example.com")
+        session.add_all([project, hidden, foreign, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="site_engineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+
+        def batch(number, project_id, vehicle, remarks):
+            return BatchRegister(
+                project_id=project_id, mix_design_id=mix.id, rmc_vendor_id=vendor.id, batch_number=number,
+                delivery_date=datetime(2025, 11, 1, 9, 0), quantity_ordered=6.0, entered_by=user.id,
+                vehicle_number=vehicle, building_name="Tower A", remarks=remarks,
+            )
+
+        session.add_all([
+            batch("B-001", project.id, "MH12AB1234", "Slump within limits, guard rail checked"),
+            batch("B-002", project.id, "MH14XY9999", "Honeycombing observed at column base"),
+            batch("B-003", hidden.id, "MH12ZZ0001", "Hidden project pour"),
+            batch("B-004", foreign.id, "MH12FF0002", "Foreign company pour"),
+            NonConformance(company_id=company.id, project_id=project.id, nc_number="NC-PRJ-2025-0007",
+                           nc_title="Missing guard rail", nc_description="Edge protection missing at slab edge",
+                           severity="major", raised_by=user.id, due_date=datetime(2025, 11, 10)),
+        ])
+        return {"company_id": company.id, "project_id": project.id, "hidden_id": hidden.id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "se@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _search(client, headers, q, **params):
+    response = client.get("/api/search", headers=headers, query_string={"q": q, **params})
+    assert response.status_code == 200, response.get_json()
+    return [(r["entity"], r["reference"]) for r in response.get_json()["results"]]
+
+
+def test_search_is_prefix_matched_ranked_and_scoped(client):
+    _seed()
+    headers = _headers(client)
+
+    # Prefix match; member-only projects, never another company
+    assert _search(client, headers, "mh12") == [("batches", "B-001")]
+    assert _search(client, headers, "honeycomb col") == [("batches", "B-002")]
+    assert _search(client, headers, "nc prj 0007") == [("safety_ncs", "NC-PRJ-2025-0007")]
+    assert _search(client, headers, "tower", entities="safety_ncs") == []
+
+    # Title matches (reference, vehicle) outrank body matches
+    assert _search(client, headers, "guard") == [("safety_ncs", "NC-PRJ-2025-0007"), ("batches", "B-001")]
+
+
+def test_search_rejects_bad_requests(client):
+    ids = _seed()
+    headers = _headers(client)
+    assert client.get("/api/search?q=%20-", headers=headers).status_code == 400
+    assert client.get("/api/search?q=tower&entities=nope", headers=headers).status_code == 400
+    assert client.get(f"/api/search?q=tower&project_id={ids['hidden_id']}", headers=headers).status_code == 403
+
+
+def test_index_follows_updates_and_soft_deletes():
+    ids = _seed()
+    with session_scope() as session:
+        batch = session.query(BatchRegister).filter_by(batch_number="B-001").one()
+        batch.remarks = "Segregation noticed"
+    with session_scope() as session:
+        assert [r["reference"] for r in search_documents(session, ids["company_id"], "segreg")] == ["B-001"]
+        assert search_documents(session, ids["company_id"], "slump") == []
+
+    with session_scope() as session:
+        session.query(BatchRegister).filter_by(batch_number="B-001").one().is_deleted = 1
+    with session_scope() as session:
+        assert search_documents(session, ids["company_id"], "segreg") == []
+
+    with session_scope() as session:
+        session.query(SearchDocument).delete()
+    with session_scope() as session:
+        assert rebuild_search_index(session) == 4  # Soft-deleted batch is not indexed
+    with session_scope() as session:
+        assert [r["reference"] for r in search_documents(session, ids["company_id"], "MH12ZZ")] == ["B-003"]
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.serialization import dumps_bytes, loads  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Serializer Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Serializer Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+
+        batch = BatchRegister(
+            project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+            batch_number="B-001", delivery_date=datetime(2025, 11, 10, 9, 0, 0, 250000),
+            quantity_ordered=6.0, quantity_received=0.0, entered_by=user.id,
+            batch_sheet_photo_data=b"\x89PNG", building_name="Tower A", latitude=12.9,
+        )
+        session.add(batch)
+        session.flush()
+        session.add_all([
+            CubeTestRegister(
+                project_id=project.id, batch_id=batch.id, set_number=1, test_age_days=7,
+                casting_date=datetime(2025, 11, 10, 10, 0), cast_by=user.id,
+                cube_1_strength_mpa=31.5, cube_2_load_kn=700.0, failure_mode_cube_3="Shear",
+                ncr_generated=1, tester_signature_data=b"sig",
+            ),
+            CubeTestRegister(
+                project_id=project.id, set_number=1, test_age_days=28, concrete_grade="M40",
+                casting_date=datetime(2025, 11, 11, 10, 0), cast_by=user.id,
+            ),
+        ])
+        return {"project_id": project.id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _roundtrip(obj):
+    return loads(dumps_bytes(obj))
+
+
+def test_cube_test_list_matches_to_dict(client):
+    seeded = _seed()
+    response = client.get(f"/api/cube-tests?project_id={seeded['project_id']}", headers=_headers(client))
+    assert response.status_code == 200, response.get_json()
+    listed = response.get_json()["cube_tests"]
+
+    with session_scope() as session:
+        tests = session.query(CubeTestRegister).order_by(CubeTestRegister.casting_date.desc()).all()
+        expected = [test.to_dict() for test in tests]
+    expected[0].update(batch_number="Planned", mix_design_name=None, mix_design_grade="M40")
+    expected[1].update(batch_number="B-001", mix_design_name="M30-A", mix_design_grade="M30")
+
+    assert listed == _roundtrip(expected)
+    assert listed[1]["hasTesterSignature"] is True and listed[1]["ncrGenerated"] is True
+
+
+def test_batch_list_matches_to_dict(client):
+    seeded = _seed()
+    response = client.get(f"/api/batches?project_id={seeded['project_id']}", headers=_headers(client))
+    assert response.status_code == 200, response.get_json()
+    listed = response.get_json()["batches"]
+
+    with session_scope() as session:
+        expected = session.query(BatchRegister).one().to_dict()
+    expected.update(vendor_name="RMC Co", vendorName="RMC Co", mix_design_name="M30-A",
+                    mixDesignName="M30-A", status="pending", quantity=6.0)
+
+    assert listed == _roundtrip([expected])
+    assert listed[0]["deliveryDate"] == "2025-11-10T09:00:00.250000"
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import struct
+import tempfile
+import atexit
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+import server.app  # noqa: E402,F401 - registers every model
+from server.db import Base  # noqa: E402
+from scripts.migrate_sqlite_to_postgres import (  # noqa: E402
+    COPY_HEADER, COPY_TRAILER, ColumnPlan, CopyStream, _stream_source, copy_chunks, dependency_levels,
+    table_checksum,
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+COLUMNS = [
+    ColumnPlan("id", "int4"),
+    ColumnPlan("amount", "numeric", 2),
+    ColumnPlan("active", "bool"),
+    ColumnPlan("created_at", "timestamp"),
+    ColumnPlan("due", "date"),
+    ColumnPlan("starts", "time"),
+    ColumnPlan("meta", "json"),
+    ColumnPlan("photo", "bytea"),
+    ColumnPlan("status", "enum"),
+]
+
+# As SQLite stores them, and as psycopg2 reads them back from PostgreSQL
+SQLITE_ROW = (7, 1234.5, 1, "2025-11-01 09:30:00.250000", "2025-11-10", "07:45:00", '{"b": 1, "a": [2]}',
+              b"\x00\xffjpeg", "OPEN")
+POSTGRES_ROW = (7, Decimal("1234.50"), True, datetime(2025, 11, 1, 9, 30, 0, 250000), date(2025, 11, 10),
+                time(7, 45), {"a": [2], "b": 1}, memoryview(b"\x00\xffjpeg"), "OPEN")
+
+
+def _decode_numeric(data):
+    ndigits, weight, sign, dscale = struct.unpack(">hhHh", data[:8])
+    digits = struct.unpack(f">{ndigits}H", data[8:])
+    value = sum(Decimal(d) * Decimal(10000) ** (weight - i) for i, d in enumerate(digits))
+    return (-value if sign == 0x4000 else value), dscale
+
+
+def _tuples(stream):
+    """Split a binary COPY stream into tuples of raw field bytes"""
+    assert stream.startswith(COPY_HEADER) and stream.endswith(COPY_TRAILER)
+    body, offset, rows = stream[len(COPY_HEADER):-len(COPY_TRAILER)], 0, []
+    while offset < len(body):
+        (count,), offset = struct.unpack_from(">h", body, offset), offset + 2
+        fields = []
+        for _ in range(count):
+            (length,), offset = struct.unpack_from(">i", body, offset), offset + 4
+            fields.append(None if length == -1 else body[offset:offset + length])
+            offset += max(length, 0)
+        rows.append(fields)
+    return rows
+
+
+def test_dependency_levels_load_referenced_tables_first():
+    levels = dependency_levels(Base.metadata.sorted_tables)
+    level_of = {table.name: number for number, level in enumerate(levels) for table in level}
+    assert len(level_of) == len(Base.metadata.tables)
+    assert level_of["companies"] == 0
+    for table in Base.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            referenced = fk.column.table.name
+            if referenced != table.name:
+                assert level_of[referenced] < level_of[table.name], (table.name, referenced)
+
+
+def test_binary_copy_encoding():
+    stream = b"".join(copy_chunks([SQLITE_ROW, (8,) + (None,) * 8], COLUMNS, chunk_rows=1))
+    first, second = _tuples(stream)
+
+    assert struct.unpack(">i", first[0]) == (7,)
+    assert _decode_numeric(first[1]) == (Decimal("1234.5"), 1)
+    assert first[2] == b"\x01"
+    micros = struct.unpack(">q", first[3])[0]
+    assert micros == (datetime(2025, 11, 1, 9, 30, 0, 250000) - datetime(2000, 1, 1)).total_seconds() * 1_000_000
+    assert struct.unpack(">i", first[4])[0] == (date(2025, 11, 10) - date(2000, 1, 1)).days
+    assert struct.unpack(">q", first[5])[0] == (7 * 60 + 45) * 60 * 1_000_000
+    assert first[6] == b'{"b": 1, "a": [2]}'
+    assert first[7] == b"\x00\xffjpeg"  # Raw bytes, no hex escaping
+    assert first[8] == b"OPEN"
+    assert second[1:] == [None] * 8
+
+    for value, expected in ((Decimal("-0.0001"), (Decimal("-0.0001"), 4)), (Decimal("10000"), (Decimal(10000), 0)),
+                            (Decimal("0"), (Decimal(0), 0))):
+        row = _tuples(b"".join(copy_chunks([(value,)], [ColumnPlan("n", "numeric")])))[0]
+        assert _decode_numeric(row[0]) == expected
+
+    aware = datetime(2025, 11, 1, 15, 0, tzinfo=timezone.utc)
+    row = _tuples(b"".join(copy_chunks([(aware,)], [ColumnPlan("t", "timestamptz")])))[0]
+    assert struct.unpack(">q", row[0])[0] == (datetime(2025, 11, 1, 15, 0) - datetime(2000, 1, 1)).total_seconds() * 1e6
+
+
+def test_checksum_matches_across_storage_and_detects_changes():
+    source = table_checksum([SQLITE_ROW, (8,) + (None,) * 8], COLUMNS, convert=True)
+    target = table_checksum([(8,) + (None,) * 8, POSTGRES_ROW], COLUMNS, convert=False)  # Any order
+    assert source == target == (2, source[1])
+
+    changed = POSTGRES_ROW[:1] + (Decimal("1234.51"),) + POSTGRES_ROW[2:]
+    assert table_checksum([changed, (8,) + (None,) * 8], COLUMNS, convert=False) != source
+
+
+def test_source_is_streamed_in_chunks_through_copy_stream(tmp_path):
+    path = str(tmp_path / "source.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"item {i}") for i in range(1, 251)])
+    connection.commit()
+    connection.close()
+
+    columns = [ColumnPlan("id", "int4"), ColumnPlan("name", "text")]
+    counter, chunks = [0], []
+    source = copy_chunks(_stream_source(path, "items", columns, chunk_rows=100), columns, counter, chunk_rows=100)
+    stream = CopyStream(iter(chunk for chunk in source if not chunks.append(len(chunk))))
+
+    data = b""
+    while True:
+        piece = stream.read(4096)
+        if not piece:
+            break
+        data += piece
+    rows = _tuples(data)
+    assert counter == [250] and len(chunks) == 5  # Header, 100 + 100 + 50 rows, trailer
+    assert [struct.unpack(">i", row[0])[0] for row in rows] == list(range(1, 251))
+    assert rows[-1][1] == b"item 250"
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server import strength_forecast  # noqa: E402
+from server.strength_forecast import equivalent_age  # noqa: E402
+
+BETA = 0.3
+HISTORY = [(40.0, 1.00), (38.0, 1.02), (42.0, 0.98), (36.0, 1.01), (41.0, 0.99), (39.0, 1.00)]
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    strength_forecast._projects.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _cube_set(project_id, batch_id, user_id, age, cast, strength=None, **extra):
+    return CubeTestRegister(
+        project_id=project_id, batch_id=batch_id, set_number=1, test_age_days=age,
+        casting_date=cast, cast_by=user_id, average_strength_mpa=strength, **extra
+    )
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Forecast Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Forecast Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+
+        batch_ids, final_ids = [], []
+        for i, (s28, scatter) in enumerate(HISTORY + [(None, None)]):
+            cast = datetime(2025, 10, 1, 9, 0) + timedelta(days=i)
+            batch = BatchRegister(
+                project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                batch_number=f"B-{i:03d}", delivery_date=cast, quantity_ordered=6.0,
+                entered_by=user.id, batch_sheet_photo_data=b"\x89PNG",
+            )
+            session.add(batch)
+            session.flush()
+            early = 20.0 if s28 is None else s28 * 0.25 ** BETA * scatter
+            final = _cube_set(project.id, batch.id, user.id, 28, cast, s28)
+            session.add_all([_cube_set(project.id, batch.id, user.id, 7, cast, early), final])
+            session.flush()
+            batch_ids.append(batch.id)
+            final_ids.append(final.id)
+        return {"project_id": project.id, "batch_ids": batch_ids, "final_ids": final_ids}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_equivalent_age_uses_curing_temperature():
+    ages = equivalent_age(np.array([7.0, 7.0, 7.0]), np.array([np.nan, 27.0, 17.0]))
+    assert ages[:2].tolist() == [7.0, 7.0]
+    assert ages[2] == pytest.approx(7 * 27 / 37)
+
+
+def test_forecast_from_mix_history(client):
+    seeded = _seed()
+    url = f"/api/cube-tests/forecast?project_id={seeded['project_id']}"
+    body = client.get(url, headers=_headers(client)).get_json()
+
+    assert body["count"] == 1
+    forecast = body["forecasts"][0]
+    assert forecast["testId"] == seeded["final_ids"][-1]
+    assert (forecast["model"], forecast["historyPairs"], forecast["basedOnAgeDays"]) == ("mix", 6, 7)
+    assert forecast["predictedStrength"] == pytest.approx(20.0 / 0.25 ** BETA, rel=0.02)
+    assert forecast["lowerBound"] < forecast["predictedStrength"] < forecast["upperBound"]
+    assert forecast["requiredStrength"] == 30
+    assert forecast["risk"] == "on_track"
+
+
+def test_forecast_falls_back_to_default_curve(client):
+    seeded = _seed()
+    with session_scope() as session:
+        session.query(CubeTestRegister).filter(
+            CubeTestRegister.id.in_(seeded["final_ids"][:-1])
+        ).update({"average_strength_mpa": None}, synchronize_session=False)
+
+    forecasts = strength_forecast.forecast_pending(SessionLocal(), seeded["project_id"])
+    assert len(forecasts) == len(HISTORY) + 1
+    assert {f["model"] for f in forecasts} == {"default"}
+
+
+def test_refit_only_reloads_changed_batches(client, monkeypatch):
+    seeded = _seed()
+    headers = _headers(client)
+    url = f"/api/cube-tests/forecast?project_id={seeded['project_id']}"
+    before = client.get(url, headers=headers).get_json()["forecasts"][0]
+
+    calls = []
+    original = strength_forecast.load_pairs
+    monkeypatch.setattr(strength_forecast, "load_pairs",
+                        lambda session, project_id, batch_ids=None:
+                        calls.append(batch_ids) or original(session, project_id, batch_ids))
+
+    with session_scope() as session:
+        session.get(CubeTestRegister, seeded["final_ids"][0]).average_strength_mpa = 60.0
+
+    after = client.get(url, headers=headers).get_json()["forecasts"][0]
+    assert calls == [{seeded["batch_ids"][0]}]
+    assert after["upperBound"] - after["lowerBound"] > before["upperBound"] - before["lowerBound"]
+
+    # Incremental sums match a full refit
+    state = strength_forecast.project_curves(SessionLocal(), seeded["project_id"])
+    full = strength_forecast._ProjectCurves()
+    full.rebuild(original(SessionLocal(), seeded["project_id"]))
+    for key, curve in full.curves.items():
+        assert state.curves[key].n == curve.n
+        assert state.curves[key].sxy == pytest.approx(curve.sxy)
+        assert state.curves[key].syy == pytest.approx(curve.syy)
+
+
+def test_returned_curves_are_not_changed_by_a_later_refit():
+    seeded = _seed()
+    before = strength_forecast.project_curves(SessionLocal(), seeded["project_id"])
+    SessionLocal.remove()
+    fitted = {key: (curve.n, curve.sxy) for key, curve in before.curves.items()}
+
+    with session_scope() as session:
+        session.get(CubeTestRegister, seeded["final_ids"][0]).average_strength_mpa = 60.0
+    after = strength_forecast.project_curves(SessionLocal(), seeded["project_id"])
+
+    assert after is not before
+    assert {key: (curve.n, curve.sxy) for key, curve in before.curves.items()} == fitted
+    assert any(after.curves[key].sxy != sxy for key, (_, sxy) in fitted.items())
+    with pytest.raises(TypeError):
+        before.curves[("mix", 0)] = None
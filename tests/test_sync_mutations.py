@@ -0,0 +1,278 @@
+import os
+import tempfile
+import atexit
+import base64
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MaterialVehicleRegister, MixDesign, PourActivity, Project,
+    ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.sync_models import IdempotencyKey  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Offline Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Offline Project")
+        user = User(
+            email="gate@example.com",
+            phone="9121212121",
+            full_name="Gate Tablet",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+            is_approved=1,
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="QualityEngineer"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351)
+        session.add(mix)
+        session.flush()
+        batch = BatchRegister(
+            project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id, batch_number="B-001",
+            delivery_date=datetime(2025, 11, 10, 9, 0), quantity_ordered=6.0, entered_by=user.id,
+        )
+        session.add(batch)
+        session.flush()
+        test = CubeTestRegister(
+            project_id=project.id, batch_id=batch.id, set_number=1, test_age_days=28,
+            casting_date=datetime(2025, 10, 13, 10, 0), cast_by=user.id, required_strength_mpa=30.0,
+            pass_fail_status="pending",
+        )
+        session.add(test)
+        session.flush()
+        return {"project_id": project.id, "vendor_id": vendor.id, "mix_id": mix.id, "test_id": test.id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "gate@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _operations(seeded):
+    return [
+        {"key": "k1", "type": "vehicle.entry", "data": {"vehicleNumber": "ka01ab1234", "entryTime": "2025-11-10T08:00:00"}},
+        {"key": "k2", "type": "vehicle.exit", "data": {"entryKey": "k1", "exitTime": "2025-11-10T09:30:00"}},
+        {"key": "k3", "type": "batch.create", "data": {
+            "batchNumber": "B-002", "deliveryDate": "2025-11-10T09:00:00", "quantityOrdered": 6,
+            "rmcVendorId": seeded["vendor_id"], "mixDesignId": seeded["mix_id"],
+            "batchSheetPhoto": base64.b64encode(b"photo").decode(), "location": {"buildingName": "Tower A"},
+        }},
+        {"key": "k4", "type": "cube_test.results", "data": {
+            "testId": seeded["test_id"], "cube_1_strength_mpa": 20, "cube_2_strength_mpa": 21, "cube_3_strength_mpa": 22,
+        }},
+        {"key": "k5", "type": "unknown.op", "data": {}},
+        {"key": "k6", "type": "batch.create", "data": {
+            "batchNumber": "B-001", "deliveryDate": "2025-11-10T09:00:00", "quantityOrdered": 6,
+            "rmcVendorId": seeded["vendor_id"], "mixDesignId": seeded["mix_id"],
+            "batchSheetPhoto": base64.b64encode(b"photo").decode(),
+        }},
+    ]
+
+
+def test_mutations_apply_once_and_replay_stored_results(client):
+    seeded = _seed()
+    headers = _headers(client)
+    body = {"project_id": seeded["project_id"], "operations": _operations(seeded)}
+
+    response = client.post("/api/sync/mutations", json=body, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    first = response.get_json()
+    assert [r["status"] for r in first["results"]] == [201, 200, 201, 200, 400, 409]
+    assert first["applied"] == 4 and first["success"] is False
+    assert first["results"][1]["vehicleEntry"]["durationHours"] == 1.5
+    assert first["results"][3]["cube_test"]["passFailStatus"] == "fail"
+
+    replay = client.post("/api/sync/mutations", json=body, headers=headers).get_json()
+    assert [r.get("replayed") for r in replay["results"][:4]] == [True] * 4
+    assert replay["results"][2]["batch"] == first["results"][2]["batch"]
+    assert replay["applied"] == 0
+
+    with session_scope() as session:
+        assert session.query(MaterialVehicleRegister).count() == 1
+        assert session.query(BatchRegister).count() == 2
+        assert session.query(IdempotencyKey).count() == 4
+        assert session.get(CubeTestRegister, seeded["test_id"]).ncr_generated
+
+    # Written rows show up in the delta feed like any other write
+    changes = client.get("/api/sync", query_string={"project_id": seeded["project_id"]},
+                         headers=headers).get_json()["changes"]
+    assert len(changes["material_vehicles"]["rows"]) == 1 and len(changes["batches"]["rows"]) == 2
+
+
+def test_atomic_mutations_roll_back_everything_on_failure(client):
+    seeded = _seed()
+    headers = _headers(client)
+    operations = _operations(seeded)[:1] + _operations(seeded)[5:]
+
+    response = client.post("/api/sync/mutations", json={
+        "project_id": seeded["project_id"], "atomic": True, "operations": operations
+    }, headers=headers)
+    assert response.status_code == 422
+    assert [r["status"] for r in response.get_json()["results"]] == [201, 409]
+
+    with session_scope() as session:
+        assert session.query(MaterialVehicleRegister).count() == 0
+        assert session.query(IdempotencyKey).count() == 0
+
+    # Mismatched reuse of a key is rejected rather than replayed
+    client.post("/api/sync/mutations", json={"project_id": seeded["project_id"], "operations": operations[:1]},
+                headers=headers)
+    reused = client.post("/api/sync/mutations", json={
+        "project_id": seeded["project_id"], "operations": [{"key": "k1", "type": "vehicle.exit", "data": {}}]
+    }, headers=headers).get_json()
+    assert reused["results"][0]["status"] == 422
+
+
+def test_bad_operations_fail_alone(client, monkeypatch):
+    from server import sync_mutations
+
+    seeded = _seed()
+    headers = _headers(client)
+
+    def broken(ctx, data):
+        raise RuntimeError("handler bug")
+
+    monkeypatch.setitem(sync_mutations.MUTATION_HANDLERS, "vehicle.exit", broken)
+    response = client.post("/api/sync/mutations", json={"project_id": seeded["project_id"], "operations": [
+        {"key": "k1", "type": "vehicle.entry", "data": {"vehicleNumber": None}},
+        {"key": "k2", "type": "vehicle.entry", "data": {"vehicleNumber": 1234}},
+        {"key": "k3", "type": "vehicle.exit", "data": {"entryKey": "k1"}},
+        {"key": "k4", "type": "batch.create", "data": {**_operations(seeded)[2]["data"], "location": "Tower A"}},
+    ]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [201, 400, 500, 400]
+    assert results[1]["error"] == "vehicleNumber must be a string"
+
+    with session_scope() as session:
+        assert session.query(MaterialVehicleRegister).count() == 1
+        assert session.query(IdempotencyKey).count() == 1
+
+
+def test_batch_pour_activity_must_belong_to_project(client):
+    seeded = _seed()
+    headers = _headers(client)
+    with session_scope() as session:
+        user = session.query(User).one()
+        other = Project(company_id=user.company_id, name="Other Project")
+        session.add(other)
+        session.flush()
+        pours = [
+            PourActivity(project_id=project_id, pour_id=f"POUR-{project_id}", pour_date=datetime(2025, 11, 10),
+                         total_quantity_planned=12.0, created_by=user.id)
+            for project_id in (seeded["project_id"], other.id)
+        ]
+        session.add_all(pours)
+        session.flush()
+        own_pour, other_pour = (pour.id for pour in pours)
+
+    batch = _operations(seeded)[2]["data"]
+    response = client.post("/api/sync/mutations", json={"project_id": seeded["project_id"], "operations": [
+        {"key": "k1", "type": "batch.create", "data": {**batch, "pourActivityId": other_pour}},
+        {"key": "k2", "type": "batch.create", "data": {**batch, "pourActivityId": "POUR-1"}},
+        {"key": "k3", "type": "batch.create", "data": {**batch, "pourActivityId": own_pour}},
+    ]}, headers=headers)
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [404, 400, 201]
+    assert results[0]["error"] == "Pour activity not found"
+
+    with session_scope() as session:
+        assert session.query(BatchRegister).filter_by(batch_number="B-002").one().pour_activity_id == own_pour
+
+
+def test_cube_failure_alerts_are_sent_after_commit(client, monkeypatch):
+    import server.cube_tests as cube_tests
+    from sqlalchemy import text
+
+    seeded = _seed()
+    headers = _headers(client)
+    sent = []
+
+    def fake_email(**data):
+        # A separate connection only sees the failure once the sync transaction committed
+        with engine.connect() as connection:
+            sent.append(connection.execute(
+                text("SELECT pass_fail_status FROM cube_test_registers WHERE id = :id"), {"id": data["test_id"]}
+            ).scalar())
+
+    monkeypatch.setattr(cube_tests, "notify_test_failure_email", fake_email)
+    monkeypatch.setattr(cube_tests, "notify_test_failure", lambda *args: None)
+
+    cube_result = _operations(seeded)[3:4]
+    atomic = client.post("/api/sync/mutations", json={
+        "project_id": seeded["project_id"], "atomic": True, "operations": cube_result + _operations(seeded)[4:5]
+    }, headers=headers)
+    assert atomic.status_code == 422 and sent == []
+
+    response = client.post("/api/sync/mutations", json={
+        "project_id": seeded["project_id"], "operations": cube_result
+    }, headers=headers)
+    assert response.status_code == 200
+    assert sent == ["fail"]
+    with session_scope() as session:
+        assert session.get(CubeTestRegister, seeded["test_id"]).notification_sent
+
+    # Marking the alert sent is a tracked write: the feed carries it to other clients
+    with session_scope() as session:
+        session.get(CubeTestRegister, seeded["test_id"]).notification_sent = False
+    since = client.get("/api/sync", query_string={"project_id": seeded["project_id"]},
+                       headers=headers).get_json()["next"]
+    cube_tests.notify_cube_test_failure(seeded["test_id"])
+    feed = client.get("/api/sync", query_string={"project_id": seeded["project_id"], "since": since},
+                      headers=headers).get_json()["changes"]["cube_tests"]
+    assert [row[feed["columns"].index("notificationSent")] for row in feed["rows"]] == [1]
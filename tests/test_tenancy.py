@@ -0,0 +1,204 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, ProjectMembership, RMCVendor, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_nc_models import NonConformance  # noqa: E402
+from server.tenancy import TENANT, LocalCacheBackend, TenantCache, tenant_cache, tenant_session  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    tenant_cache.clear()
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    ids = {}
+    with session_scope() as session:
+        for n, name in enumerate(("Alpha", "Beta")):
+            company = Company(name=f"{name} Builders")
+            session.add(company)
+            session.flush()
+            project = Project(company_id=company.id, name=f"{name} Tower")
+            user = User(
+                email=f"qm@{name.lower()}.example.com",
+                phone=f"98000000{n}0",
+                full_name=f"{name} QM",
+                password_hash=hash_password("Password123!"),
+                company_id=company.id,
+            )
+            session.add_all([project, user])
+            session.flush()
+            session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+            session.add_all([
+                RMCVendor(company_id=company.id, project_id=project.id, vendor_name=f"{name} RMC",
+                          contact_person_name="Vendor", contact_phone="9444444444",
+                          contact_email="vendor@example.com", is_approved=1),
+                RMCVendor(company_id=company.id, project_id=project.id, vendor_name=f"{name} Old RMC",
+                          contact_person_name="Vendor", contact_phone="9444444444",
+                          contact_email="vendor@example.com", is_approved=1, is_deleted=1),
+            ])
+            ids[name] = {"company_id": company.id, "project_id": project.id}
+    return ids
+
+
+def _headers(client, email):
+    token = client.post(
+        "/api/auth/login", json={"email": email, "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_guard_scopes_queries_to_tenant_and_hides_soft_deleted():
+    ids = _seed()
+    alpha = ids["Alpha"]["company_id"]
+
+    with tenant_session(alpha) as session:
+        assert [p.name for p in session.query(Project).all()] == ["Alpha Tower"]
+        assert [c.name for c in session.scalars(select(Company))] == ["Alpha Builders"]
+        assert [v.vendor_name for v in session.scalars(select(RMCVendor))] == ["Alpha RMC"]
+        # Joined entities are scoped too
+        joined = session.execute(select(RMCVendor.vendor_name, Project.name).join(Project)).all()
+        assert joined == [("Alpha RMC", "Alpha Tower")]
+        # Other tenants' rows cannot be fetched by primary key either
+        assert session.get(Project, ids["Beta"]["project_id"]) is None
+
+        names = session.scalars(select(RMCVendor.vendor_name).execution_options(include_deleted=True)).all()
+        assert sorted(names) == ["Alpha Old RMC", "Alpha RMC"]
+        assert len(session.scalars(select(Project).execution_options(tenant_bypass=True)).all()) == 2
+
+    # The scoped session is reused - the tenant must not leak into the next unit of work
+    with session_scope() as session:
+        assert TENANT not in session.info
+        assert len(session.query(Project).all()) == 2
+
+
+def test_guard_scopes_bulk_updates():
+    ids = _seed()
+    with tenant_session(ids["Alpha"]["company_id"]) as session:
+        session.query(RMCVendor).update({RMCVendor.is_approved: 0}, synchronize_session=False)
+
+    with session_scope() as session:
+        approved = session.scalars(select(RMCVendor.vendor_name).where(RMCVendor.is_approved == 1)).all()
+        # Soft-deleted rows are outside the guard as well
+        assert sorted(approved) == ["Alpha Old RMC", "Beta Old RMC", "Beta RMC"]
+
+
+def test_tenant_cache_hits_until_a_committed_write():
+    cache = TenantCache(LocalCacheBackend(max_entries=10), ttl=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_load(1, "projects", loader) == 1
+    assert cache.get_or_load(1, "projects", loader) == 1
+    assert cache.get_or_load(2, "projects", loader) == 2
+    cache.invalidate(1)
+    assert cache.get_or_load(1, "projects", loader) == 3
+    assert cache.get_or_load(2, "projects", loader) == 2
+
+
+def test_project_and_vendor_lists_are_tenant_scoped_and_invalidated(client):
+    ids = _seed()
+    headers = _headers(client, "qm@alpha.example.com")
+
+    response = client.get("/api/projects/", headers=headers)
+    assert response.status_code == 200
+    assert [p["name"] for p in response.get_json()["projects"]] == ["Alpha Tower"]
+
+    vendors = client.get("/api/vendors", headers=headers).get_json()["vendors"]
+    assert [v["vendorName"] for v in vendors] == ["Alpha RMC"]
+
+    # A committed write invalidates the company's cached list
+    with session_scope() as session:
+        session.add(Project(company_id=ids["Beta"]["company_id"], name="Beta Annex"))
+        session.add(Project(company_id=ids["Alpha"]["company_id"], name="Alpha Annex"))
+    names = [p["name"] for p in client.get("/api/projects/", headers=headers).get_json()["projects"]]
+    assert sorted(names) == ["Alpha Annex", "Alpha Tower"]
+
+    # A rolled back write does not invalidate
+    generation = tenant_cache._generation(ids["Alpha"]["company_id"])
+    session = SessionLocal()
+    session.add(Project(company_id=ids["Alpha"]["company_id"], name="Never"))
+    session.flush()
+    session.rollback()
+    session.close()
+    assert tenant_cache._generation(ids["Alpha"]["company_id"]) == generation
+
+    # Another worker's cache (its own LRU) sees the generation bumped by this write at once
+    other_worker = TenantCache(LocalCacheBackend(max_entries=10), ttl=60)
+    assert other_worker.get_or_load(ids["Alpha"]["company_id"], "projects", lambda: "cached") == "cached"
+    with session_scope() as session:
+        session.add(Project(company_id=ids["Alpha"]["company_id"], name="Alpha Wing"))
+    assert other_worker.get_or_load(ids["Alpha"]["company_id"], "projects", lambda: "reloaded") == "reloaded"
+
+
+def test_contractor_filter_applies_to_tokens_without_role_claim(app, client):
+    ids = _seed()
+    alpha = ids["Alpha"]
+    with session_scope() as session:
+        contractor = User(
+            email="crew@alpha.example.com", phone="9800000099", full_name="Alpha Crew", role="contractor",
+            password_hash=hash_password("Password123!"), company_id=alpha["company_id"],
+        )
+        session.add(contractor)
+        session.flush()
+        session.add_all([
+            NonConformance(
+                company_id=alpha["company_id"], project_id=alpha["project_id"], nc_number=f"NC-{n}",
+                nc_title="Missing guard rail", nc_description="Edge protection missing", severity="minor",
+                assigned_to_user=user_id, raised_by=contractor.id, due_date=datetime(2025, 11, 20),
+            )
+            for n, user_id in enumerate((contractor.id, None))
+        ])
+        session.flush()
+        contractor_id = contractor.id
+
+    # Access token issued before the "role" and "cid" claims existed
+    with app.app_context():
+        token = create_access_token(identity=str(contractor_id))
+    response = client.get("/api/safety/nc", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.get_json()
+    assert [nc["nc_number"] for nc in response.get_json()["ncs"]] == ["NC-0"]
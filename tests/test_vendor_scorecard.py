@@ -0,0 +1,208 @@
+import os
+import tempfile
+import atexit
+from datetime import date, datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import (  # noqa: E402
+    BatchRegister, Company, CubeTestRegister, MixDesign, Project, ProjectMembership, RMCVendor, User
+)
+from server.auth import hash_password  # noqa: E402
+from server.vendor_scorecard import VendorScorecardStat, SUM_FIELDS, rebuild_vendor_scorecards  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Scorecard Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Scorecard Project")
+        user = User(
+            email="qm@example.com",
+            phone="9777777777",
+            full_name="Quality Manager",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        vendor = RMCVendor(
+            company_id=company.id,
+            vendor_name="RMC Co",
+            contact_person_name="Vendor",
+            contact_phone="9444444444",
+            contact_email="vendor@example.com",
+        )
+        session.add_all([project, user, vendor])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="quality_manager"))
+        mix = MixDesign(project_id=project.id, project_name=project.name, mix_design_id="M30-A",
+                        specified_strength_psi=4351, concrete_grade="M30")
+        session.add(mix)
+        session.flush()
+
+        batches = []
+        for i, (delivered, received, slump, temp) in enumerate([
+            (datetime(2025, 10, 5, 9, 0), 6.0, 100.0, 30.0),
+            (datetime(2025, 10, 20, 9, 0), 5.5, 120.0, 37.0),
+            (datetime(2025, 11, 2, 9, 0), None, None, None),
+        ]):
+            batch = BatchRegister(
+                project_id=project.id, mix_design_id=mix.id, rmc_vendor_id=vendor.id,
+                batch_number=f"B-{i:03d}", delivery_date=delivered, quantity_ordered=6.0,
+                quantity_received=received, slump_tested=slump, temperature_celsius=temp,
+                entered_by=user.id, batch_sheet_photo_data=b"\x89PNG",
+            )
+            session.add(batch)
+            batches.append(batch)
+        session.flush()
+        session.add_all([
+            CubeTestRegister(project_id=project.id, batch_id=batches[0].id, set_number=1, test_age_days=28,
+                             casting_date=batches[0].delivery_date, cast_by=user.id,
+                             average_strength_mpa=36.0, pass_fail_status="pass"),
+            CubeTestRegister(project_id=project.id, batch_id=batches[1].id, set_number=1, test_age_days=28,
+                             casting_date=batches[1].delivery_date, cast_by=user.id,
+                             average_strength_mpa=28.0, pass_fail_status="fail"),
+            CubeTestRegister(project_id=project.id, batch_id=batches[1].id, set_number=1, test_age_days=7,
+                             casting_date=batches[1].delivery_date, cast_by=user.id),
+        ])
+        return {"project_id": project.id, "vendor_id": vendor.id, "batch_ids": [b.id for b in batches]}
+
+
+def _stats():
+    with session_scope() as session:
+        return {
+            row.month: {field: getattr(row, field) for field in SUM_FIELDS}
+            for row in session.query(VendorScorecardStat).order_by(VendorScorecardStat.month)
+        }
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "qm@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_buckets_follow_writes():
+    seeded = _seed()
+    stats = _stats()
+    october = stats[date(2025, 10, 1)]
+    assert (october["deliveries"], october["short_deliveries"], october["hot_deliveries"]) == (2, 1, 1)
+    assert october["quantity_variance"] == pytest.approx(-0.5)
+    assert (october["tests"], october["failed_tests"], october["strength_count"]) == (2, 1, 2)
+    assert october["strength_sum"] == pytest.approx(64.0)
+    assert stats[date(2025, 11, 1)]["deliveries"] == 1
+    with session_scope() as session:
+        row_ids = dict(session.query(VendorScorecardStat.month, VendorScorecardStat.id).all())
+
+    # Verification and a delivery date correction update both affected months
+    with session_scope() as session:
+        second = session.get(BatchRegister, seeded["batch_ids"][1])
+        second.verification_status = "rejected"
+        second.delivery_date = datetime(2025, 11, 1, 9, 0)
+    stats = _stats()
+    assert stats[date(2025, 10, 1)]["deliveries"] == 1
+    assert stats[date(2025, 10, 1)]["failed_tests"] == 0
+    november = stats[date(2025, 11, 1)]
+    assert (november["deliveries"], november["rejected"], november["failed_tests"]) == (2, 1, 1)
+    # Bucket rows are updated in place, not deleted and re-inserted
+    with session_scope() as session:
+        assert dict(session.query(VendorScorecardStat.month, VendorScorecardStat.id).all()) == row_ids
+
+    # Recording a cube result refreshes its batch's bucket
+    with session_scope() as session:
+        test = session.query(CubeTestRegister).filter_by(test_age_days=7).one()
+        test.average_strength_mpa = 18.0
+        test.pass_fail_status = "pass"
+    assert _stats()[date(2025, 11, 1)]["tests"] == 2
+
+    incremental = _stats()
+    with session_scope() as session:
+        rebuild_vendor_scorecards(session)
+    assert _stats() == incremental
+
+
+def test_rebuild_upserts_rows_and_drops_stale_buckets():
+    _seed()
+    incremental = _stats()
+    with session_scope() as session:
+        session.query(VendorScorecardStat).update({VendorScorecardStat.id: VendorScorecardStat.id + 100})
+        row_ids = dict(session.query(VendorScorecardStat.month, VendorScorecardStat.id).all())
+        project_id = session.query(VendorScorecardStat.project_id).first()[0]
+        session.add(VendorScorecardStat(rmc_vendor_id=999, project_id=project_id, month=date(2024, 1, 1)))
+
+    # Existing buckets are updated in place, so concurrent rebuilds never collide on the unique key
+    for _ in range(2):
+        with session_scope() as session:
+            assert rebuild_vendor_scorecards(session) == len(incremental)
+    with session_scope() as session:
+        assert dict(session.query(VendorScorecardStat.month, VendorScorecardStat.id).all()) == row_ids
+    assert _stats() == incremental
+
+
+def test_rolled_back_writes_leave_stats_untouched():
+    seeded = _seed()
+    before = _stats()
+    session = SessionLocal()
+    session.get(BatchRegister, seeded["batch_ids"][0]).verification_status = "rejected"
+    session.flush()
+    session.rollback()
+    session.commit()
+    assert _stats() == before
+
+
+def test_scorecard_endpoints(client):
+    seeded = _seed()
+    headers = _headers(client)
+
+    response = client.get(f"/api/vendors/scorecards?project_id={seeded['project_id']}", headers=headers)
+    assert response.status_code == 200, response.get_json()
+    card = response.get_json()["scorecards"][0]
+    assert (card["vendorName"], card["deliveries"], card["testsFailed"]) == ("RMC Co", 3, 1)
+    assert card["failurePercent"] == 50.0
+    assert card["strengthMean"] == 32.0 and card["strengthStdDev"] == pytest.approx(5.66, abs=0.01)
+
+    response = client.get(f"/api/vendors/{seeded['vendor_id']}/scorecard?from=2025-11", headers=headers)
+    body = response.get_json()
+    assert [m["month"] for m in body["months"]] == ["2025-11"]
+    assert body["totals"]["deliveries"] == 1
+
+    assert client.get("/api/vendors/scorecards?from=2025-13", headers=headers).status_code == 400
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import atexit
+from datetime import datetime
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, ProjectMembership, TrainingRecord, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.training_attendance_models import (  # noqa: E402
+    TrainingAttendance, WorkerCompetency, rebuild_worker_competencies
+)
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed(worker_codes) -> dict:
+    with session_scope() as session:
+        company = Company(name="Training Company")
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Training Project")
+        user = User(
+            email="trainer@example.com",
+            phone="9666666666",
+            full_name="Quality Trainer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="ProjectAdmin"))
+
+        trainings = []
+        for topic in ("Mix design", "Curing"):
+            training = TrainingRecord(
+                project_id=project.id,
+                trainer_id=user.id,
+                training_date=datetime(2025, 10, 1),
+                training_topic=topic,
+                trainee_names_json="[]",
+                building="Tower A",
+                activity="Concreting",
+                photo_filename="photo.jpg",
+                photo_data=b"x",
+                photo_mimetype="image/jpeg",
+            )
+            session.add(training)
+            trainings.append(training)
+        session.flush()
+
+        attendance_ids = {}
+        for training in trainings:
+            for code in worker_codes:
+                attendance = TrainingAttendance(
+                    training_record_id=training.id,
+                    worker_name=f"Worker {code}",
+                    worker_code=code,
+                )
+                session.add(attendance)
+                session.flush()
+                attendance_ids[(training.training_topic, code)] = attendance.id
+
+        return {
+            "email": user.email,
+            "project_id": project.id,
+            "trainings": {t.training_topic: t.id for t in trainings},
+            "attendances": attendance_ids,
+        }
+
+
+def _login(client, email):
+    token = client.post(
+        "/api/auth/login", json={"email": email, "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_assessment_refreshes_competency_incrementally(client):
+    seeded = _seed(["W-1", "W-2"])
+    headers = _login(client, seeded["email"])
+
+    for topic in ("Mix design", "Curing"):
+        response = client.post(
+            f"/api/training/{seeded['trainings'][topic]}/assessment",
+            json={"attendance_id": seeded["attendances"][(topic, "W-1")], "score": 90,
+                  "passed": True, "issue_certificate": True},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.get_json()
+
+    with session_scope() as session:
+        competency = session.query(WorkerCompetency).filter_by(worker_code="W-1").one()
+        assert competency.certification_count == 2
+        assert {c["trainingTopic"] for c in competency.certifications} == {"Mix design", "Curing"}
+        assert session.query(WorkerCompetency).filter_by(worker_code="W-2").count() == 0
+
+
+def test_report_is_paginated_by_worker(client):
+    codes = [f"W-{i}" for i in range(5)]
+    seeded = _seed(codes)
+    with session_scope() as session:
+        session.query(TrainingAttendance).update({TrainingAttendance.certificate_issued: True})
+        assert rebuild_worker_competencies(session, [seeded["project_id"]]) == 5
+
+    headers = _login(client, seeded["email"])
+    first = client.get("/api/training/reports/worker-certifications?per_page=2", headers=headers)
+    assert first.status_code == 200, first.get_json()
+    body = first.get_json()
+    assert [w["workerCode"] for w in body["workers"]] == ["W-0", "W-1"]
+    assert (body["totalWorkers"], body["totalCertifications"], body["totalPages"]) == (5, 10, 3)
+    assert len(body["workers"][0]["certifications"]) == 2
+
+    last = client.get("/api/training/reports/worker-certifications?per_page=2&page=3", headers=headers)
+    assert [w["workerCode"] for w in last.get_json()["workers"]] == ["W-4"]
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import atexit
+
+import pytest
+
+
+db_fd, db_path = tempfile.mkstemp(prefix="prosite_tests_", suffix=".sqlite3")
+os.close(db_fd)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+os.environ.setdefault("FLASK_ENV", "development")
+
+from server.app import create_app  # noqa: E402
+from server.db import Base, SessionLocal, engine, session_scope  # noqa: E402
+from server.models import Company, Project, ProjectMembership, TrainingRecord, User  # noqa: E402
+from server.auth import hash_password  # noqa: E402
+from server.safety_models import Worker  # noqa: E402
+from server.tbt_models import TBTAttendance, TBTSession  # noqa: E402
+from server.training_attendance_models import TrainingAttendance  # noqa: E402
+
+
+def _cleanup_temp_db() -> None:
+    try:
+        os.remove(db_path)
+    except FileNotFoundError:
+        pass
+
+
+atexit.register(_cleanup_temp_db)
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = create_app()
+    application.config.update({"TESTING": True})
+    return application
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+    SessionLocal.remove()
+
+
+def _seed() -> dict:
+    with session_scope() as session:
+        company = Company(name="Site Company", subscribed_modules='["safety", "concrete"]')
+        session.add(company)
+        session.flush()
+        project = Project(company_id=company.id, name="Site Project")
+        user = User(
+            email="trainer@example.com",
+            phone="9333333333",
+            full_name="Site Trainer",
+            password_hash=hash_password("Password123!"),
+            company_id=company.id,
+        )
+        session.add_all([project, user])
+        session.flush()
+        session.add(ProjectMembership(project_id=project.id, user_id=user.id, role="safety_engineer"))
+        session.add(Worker(company_id=company.id, project_id=project.id, worker_code="W00042",
+                           full_name="Ravi Kumar", contractor="Acme Builders", skill_category="Mason"))
+        tbt = TBTSession(project_id=project.id, conductor_id=user.id, conductor_name=user.full_name,
+                         topic="Working at Height", location="Tower A", activity="Scaffolding")
+        training = TrainingRecord(
+            project_id=project.id, trainer_id=user.id, training_topic="Blockwork quality", trainee_names_json="[]",
+            building="Tower A", activity="Blockwork", photo_filename="session.jpg", photo_data=b"\xff",
+            photo_mimetype="image/jpeg",
+        )
+        session.add_all([tbt, training])
+        session.flush()
+        return {"tbt_id": tbt.id, "training_id": training.id}
+
+
+def _headers(client):
+    token = client.post(
+        "/api/auth/login", json={"email": "trainer@example.com", "password": "Password123!"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("url, model", [
+    ("/api/tbt/sessions/{tbt_id}/scan-worker", TBTAttendance),
+    ("/api/training/{training_id}/scan-worker", TrainingAttendance),
+])
+def test_worker_qr_scan_records_contractor_and_trade(client, url, model):
+    seeded = _seed()
+    headers = _headers(client)
+    url = url.format(**seeded)
+
+    response = client.post(url, json={"worker_code": "W00042"}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    worker = response.get_json()["worker"]
+    assert (worker["company"], worker["trade"]) == ("Acme Builders", "Mason")
+
+    repeat = client.post(url, json={"worker_code": "W00042"}, headers=headers)
+    assert repeat.status_code == 200 and repeat.get_json()["success"] is False
+
+    with session_scope() as session:
+        attendance = session.query(model).one()
+        assert (attendance.worker_company, attendance.worker_trade) == ("Acme Builders", "Mason")